@@ -43,8 +43,12 @@ def extract_netcdf(config, config_yaml):
                         Used in netCDF4 file history metadata.
     :type config_yaml: :py:class:`pathlib.Path`
 
-    :return: File path and name that netCDF4 file was written to.
-    :rtype: :py:class:`pathlib.Path`
+    :return: File path and name that netCDF4 file was written to,
+             or mapping of box names to the file paths and names that their netCDF4
+             files were written to for ``selection: boxes:`` extractions,
+             or mapping of tile names to the file paths and names that their netCDF4
+             files were written to for ``tiles:`` extractions.
+    :rtype: :py:class:`pathlib.Path` or dict
     """
     return extract.api_extract_netcdf(config, config_yaml)
 
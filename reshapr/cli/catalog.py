@@ -0,0 +1,62 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Command-line interface for the catalog sub-command."""
+
+from pathlib import Path
+
+import click
+
+import reshapr.core.catalog
+
+
+@click.command(
+    help="""
+    Build and maintain the SQLite catalog of the results archive files of a model
+    product that records their dates, integrity, and variables.
+    """,
+    short_help="Catalog model product results archive files",
+)
+@click.argument(
+    "config_file",
+    type=click.Path(
+        exists=True, readable=True, file_okay=True, dir_okay=False, path_type=Path
+    ),
+)
+@click.option(
+    "--start-date",
+    default="",
+    help="Start date for catalog. Overrides start date in config file. Use YYYY-MM-DD format.",
+)
+@click.option(
+    "--end-date",
+    default="",
+    help="End date for catalog. Overrides end date in config file. Use YYYY-MM-DD format.",
+)
+def catalog(config_file, start_date, end_date):
+    """Command-line interface for :py:func:`reshapr.core.catalog.cli_catalog`.
+
+    :param config_file: File path and name of the YAML file to read processing configuration
+                        dictionary from.
+                        Please see :ref:`ReshaprCatalogYAMLFile` for details.
+    :type config_file: :py:class:`pathlib.Path`
+
+    :param str start_date: Start date for catalog. Overrides start date in config file.
+
+    :param str end_date: End date for catalog. Overrides end date in config file.
+    """
+    reshapr.core.catalog.cli_catalog(config_file, start_date, end_date)
@@ -22,8 +22,12 @@ import logging
 import click
 import structlog
 
+from reshapr.cli.aggregate import aggregate
+from reshapr.cli.catalog import catalog
 from reshapr.cli.extract import extract
 from reshapr.cli.info import info
+from reshapr.cli.match import match
+from reshapr.cli.pyramid import pyramid
 
 
 @click.group(help="""
@@ -57,5 +61,9 @@ def reshapr(verbosity):
     )
 
 
+reshapr.add_command(aggregate)
+reshapr.add_command(catalog)
 reshapr.add_command(extract)
 reshapr.add_command(info)
+reshapr.add_command(match)
+reshapr.add_command(pyramid)
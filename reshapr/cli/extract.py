@@ -27,11 +27,16 @@ import reshapr.core.extract
 @click.command(
     help="""
     Extract model variable time series from model products like SalishSeaCast, HRDPS & CANESM2/CGCM4.
+
+    When more than one config file is given, the source dataset files that the extractions
+    share are read once for all of them.
     """,
     short_help="Extract model variable time series from model products",
 )
 @click.argument(
-    "config_file",
+    "config_files",
+    nargs=-1,
+    required=True,
     type=click.Path(
         exists=True, readable=True, file_okay=True, dir_okay=False, path_type=Path
     ),
@@ -46,16 +51,21 @@ import reshapr.core.extract
     default="",
     help="End date for extraction. Overrides end date in config file. Use YYYY-MM-DD format.",
 )
-def extract(config_file, start_date, end_date):
-    """Command-line interface for :py:func:`reshapr.core.extract.extract`.
+def extract(config_files, start_date, end_date):
+    """Command-line interface for :py:func:`reshapr.core.extract.cli_extract`,
+    or :py:func:`reshapr.core.extract.cli_extract_shared_scan` when more than one
+    config file is given.
 
-    :param config_file: File path and name of the YAML file to read processing configuration
-                        dictionary from.
-                        Please see :ref:`ReshaprExtractYAMLFile` for details.
-    :type config_file: :py:class:`pathlib.Path`
+    :param config_files: File paths and names of the YAML files to read processing
+                         configuration dictionaries from.
+                         Please see :ref:`ReshaprExtractYAMLFile` for details.
+    :type config_files: tuple of :py:class:`pathlib.Path`
 
     :param str start_date: Start date for extraction. Overrides start date in config file.
 
     :param str end_date: End date for extraction. Overrides end date in config file.
     """
-    reshapr.core.extract.cli_extract(config_file, start_date, end_date)
+    if len(config_files) == 1:
+        reshapr.core.extract.cli_extract(config_files[0], start_date, end_date)
+    else:
+        reshapr.core.extract.cli_extract_shared_scan(config_files, start_date, end_date)
@@ -0,0 +1,101 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Build and maintain the day and month aggregate cache of model products.
+
+:command:`reshapr extract` populates the cache on first use when it answers
+``resample:`` and ``climatology:`` stages from it.
+This module populates it ahead of time for a range of dates,
+so that it can be maintained as new results are added to the results archive.
+Please see :py:mod:`reshapr.utils.aggregate_cache` for the cache layout.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import structlog
+
+from reshapr.core import extract
+from reshapr.utils import aggregate_cache, io_limits
+
+logger = structlog.get_logger()
+
+
+def cli_aggregate(config_yaml, cli_start_date, cli_end_date):
+    """Build or update the aggregate cache entries of model variables via command-line
+    interface.
+
+    Cache entries that are newer than the results archive files that they are
+    calculated from are not rebuilt.
+
+    :param config_yaml: File path and name of the YAML file to read processing configuration
+                        dictionary from.
+                        Please see :ref:`ReshaprAggregateYAMLFile` for details.
+    :type config_yaml: :py:class:`pathlib.Path`
+
+    :param str cli_start_date: Start date for aggregates. Overrides start date in config file.
+
+    :param str cli_end_date: End date for aggregates. Overrides end date in config file.
+
+    :raises: :py:exc:`SystemExit` if processing configuration YAML file cannot be found,
+             the model profile has no ``aggregate cache`` stanza,
+             or the config has unsupported levels or aggregations.
+    """
+    t_start = time.time()
+    try:
+        config = extract.load_config(config_yaml, cli_start_date, cli_end_date)
+    except FileNotFoundError:
+        logger.error("config file not found", config_file=os.fspath(config_yaml))
+        raise SystemExit(2)
+    model_profile = extract._load_model_profile(
+        Path(config["dataset"]["model profile"])
+    )
+    if "aggregate cache" not in model_profile:
+        logger.error(
+            "model profile has no aggregate cache",
+            model_profile=os.fspath(config["dataset"]["model profile"]),
+        )
+        raise SystemExit(2)
+    time_base = config["dataset"]["time base"]
+    time_base_levels = aggregate_cache.calc_levels(time_base)
+    levels = config.get("levels", list(time_base_levels))
+    if not levels or set(levels) - set(time_base_levels):
+        logger.error(
+            "aggregate cache levels must be coarser than the time base",
+            levels=levels,
+            time_base=time_base,
+        )
+        raise SystemExit(2)
+    aggregations = config.get("aggregations", ["mean"])
+    if set(aggregations) - aggregate_cache.AGGREGATIONS:
+        logger.error(
+            "unsupported aggregate cache aggregations",
+            aggregations=aggregations,
+            supported_aggregations=sorted(aggregate_cache.AGGREGATIONS),
+        )
+        raise SystemExit(2)
+    cache_levels = tuple(level for level in time_base_levels if level in levels)
+    chunk_size = extract.calc_ds_chunk_size(config, model_profile)
+    dask_client = extract.get_dask_client(config["dask cluster"])
+    for aggregation in aggregations:
+        extract._populate_aggregate_cache(
+            cache_levels, aggregation, chunk_size, config, model_profile
+        )
+    io_limits.log_io_stats(dask_client)
+    logger.info("total time", t_total=time.time() - t_start)
+    dask_client.close()
@@ -0,0 +1,219 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Build and maintain the SQLite catalog of the results archive files of model products.
+
+:command:`reshapr extract` and :command:`reshapr info` consult the catalog,
+if it exists,
+for the coverage, gaps, and variables of the results archive.
+Please see :py:mod:`reshapr.utils.archive_catalog` for what the catalog records.
+"""
+
+import contextlib
+import os
+import time
+from pathlib import Path
+
+import arrow
+import structlog
+
+from reshapr.core import extract
+from reshapr.utils import archive_catalog, path_resolver
+
+logger = structlog.get_logger()
+
+
+def cli_catalog(config_yaml, cli_start_date, cli_end_date):
+    """Build or update the catalog of the results archive files of a model product
+    via command-line interface.
+
+    The files are scanned in parallel on the dask cluster.
+    Files whose catalog records are current are not scanned again,
+    so the catalog can be maintained by running the command for the dates of
+    new or updated results.
+
+    :param config_yaml: File path and name of the YAML file to read processing configuration
+                        dictionary from.
+                        Please see :ref:`ReshaprCatalogYAMLFile` for details.
+    :type config_yaml: :py:class:`pathlib.Path`
+
+    :param str cli_start_date: Start date for catalog. Overrides start date in config file.
+
+    :param str cli_end_date: End date for catalog. Overrides end date in config file.
+
+    :raises: :py:exc:`SystemExit` if processing configuration YAML file cannot be found,
+             the model profile has no ``catalog`` stanza,
+             or the config has time bases or variables groups that are not in the
+             model profile.
+    """
+    t_start = time.time()
+    try:
+        config = extract.load_config(config_yaml, cli_start_date, cli_end_date)
+    except FileNotFoundError:
+        logger.error("config file not found", config_file=os.fspath(config_yaml))
+        raise SystemExit(2)
+    model_profile = extract._load_model_profile(
+        Path(config["dataset"]["model profile"])
+    )
+    if "catalog" not in model_profile:
+        logger.error(
+            "model profile has no catalog",
+            model_profile=os.fspath(config["dataset"]["model profile"]),
+        )
+        raise SystemExit(2)
+    catalog_datasets = _calc_catalog_datasets(config, model_profile)
+    catalog_path = Path(model_profile["catalog"]["path"])
+    dask_client = extract.get_dask_client(config["dask cluster"])
+    with contextlib.closing(archive_catalog.connect(catalog_path)) as connection:
+        for time_base, vars_group in catalog_datasets:
+            ds_dates = calc_catalog_ds_dates(
+                config, model_profile, time_base, vars_group
+            )
+            stale_paths = archive_catalog.calc_stale_paths(connection, list(ds_dates))
+            records = dask_client.gather(
+                dask_client.map(archive_catalog.scan_file, stale_paths, pure=False)
+            )
+            for record in records:
+                record["date"] = ds_dates[Path(record["path"])].isoformat()
+            archive_catalog.store_records(connection, records, time_base, vars_group)
+            logger.info(
+                "updated catalog",
+                catalog=os.fspath(catalog_path),
+                time_base=time_base,
+                vars_group=vars_group,
+                n_datasets=len(ds_dates),
+                n_scanned=len(records),
+                n_missing=sum(record["status"] == "missing" for record in records),
+                n_unreadable=sum(
+                    record["status"] == "unreadable" for record in records
+                ),
+            )
+    logger.info("total time", t_total=time.time() - t_start)
+    dask_client.close()
+
+
+def _calc_catalog_datasets(config, model_profile):
+    """Calculate the time base and variables group pairs of the datasets to catalog.
+
+    :param dict config: Catalog processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Time base and variables group pairs.
+    :rtype: list
+
+    :raises: :py:exc:`SystemExit` if the config has time bases or variables groups
+             that are not in the model profile.
+    """
+    datasets = model_profile["results archive"]["datasets"]
+    time_bases = config["dataset"].get("time bases", list(datasets))
+    if set(time_bases) - set(datasets):
+        logger.error(
+            "time bases are not in model profile",
+            time_bases=sorted(set(time_bases) - set(datasets)),
+        )
+        raise SystemExit(2)
+    profile_datasets = [
+        (time_base, vars_group)
+        for time_base in time_bases
+        for vars_group in datasets[time_base]
+        if vars_group != "days per file"
+    ]
+    if "variables groups" not in config["dataset"]:
+        return profile_datasets
+    vars_groups = config["dataset"]["variables groups"]
+    missing_vars_groups = set(vars_groups) - {
+        vars_group for _, vars_group in profile_datasets
+    }
+    if missing_vars_groups:
+        logger.error(
+            "variables groups are not in model profile time bases",
+            vars_groups=sorted(missing_vars_groups),
+            time_bases=time_bases,
+        )
+        raise SystemExit(2)
+    return [
+        (time_base, vars_group)
+        for time_base, vars_group in profile_datasets
+        if vars_group in vars_groups
+    ]
+
+
+def calc_catalog_ds_dates(config, model_profile, time_base, vars_group):
+    """Calculate the results archive file paths of a dataset to catalog,
+    and their day or month start dates.
+
+    The dates are limited to the ``valid dates`` of the model profile because the
+    dates of its successors are catalogued in their own catalogs.
+    For datasets with ``discover files: True`` only the files that exist are
+    calculated,
+    otherwise the paths are calculated from the file pattern so that missing files
+    are catalogued.
+
+    :param dict config: Catalog processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :param str time_base: Time base of the dataset.
+
+    :param str vars_group: Variables group of the dataset.
+
+    :return: Mapping of file paths to day or month start dates.
+    :rtype: dict
+
+    :raises: :py:exc:`SystemExit` if the file pattern of the dataset is invalid.
+    """
+    valid_dates = model_profile.get("valid dates", {})
+    start_date = max(
+        arrow.get(config["start date"]),
+        arrow.get(valid_dates.get("start date", config["start date"])),
+    )
+    end_date = min(
+        arrow.get(config["end date"]),
+        arrow.get(valid_dates.get("end date", config["end date"])),
+    )
+    ds_config = {
+        "dataset": {"time base": time_base, "variables group": vars_group},
+        "start date": start_date.date(),
+        "end date": end_date.date(),
+    }
+    frame, date_range = extract._calc_ds_dates(ds_config, model_profile)
+    results_archive_path = Path(model_profile["results archive"]["path"])
+    dataset = model_profile["results archive"]["datasets"][time_base][vars_group]
+    try:
+        if dataset.get("discover files", False):
+            found_paths = path_resolver.discover_paths(
+                results_archive_path, dataset["file pattern"], date_range, frame
+            )
+            return {
+                ds_path: period_date
+                for period_date, ds_path in sorted(found_paths.items())
+            }
+        format_pattern = path_resolver.compile_pattern(dataset["file pattern"])
+    except ValueError as exc:
+        logger.error(
+            "invalid model profile file pattern",
+            time_base=time_base,
+            vars_group=vars_group,
+            reason=str(exc),
+        )
+        raise SystemExit(2)
+    return {
+        results_archive_path
+        / format_pattern(ds_date.date()): path_resolver.calc_period_date(ds_date, frame)
+        for ds_date in date_range
+    }
@@ -17,6 +17,10 @@
 
 """Extract model variable time series from model products."""
 
+import calendar
+import contextlib
+import datetime
+import functools
 import os
 import re
 import sys
@@ -24,17 +28,56 @@ import time
 from pathlib import Path
 
 import arrow
+import dask
 import dask.distributed
+import dask.utils
+import flox.xarray
 import numpy
+import pandas
 import pandas.tseries.frequencies
 import structlog
 import xarray
 import yaml
 
-from reshapr.utils import date_formatters
+from reshapr.utils import (
+    aggregate_cache,
+    archive_catalog,
+    column_kernels,
+    date_formatters,
+    expressions,
+    geo_index,
+    io_limits,
+    mesh_geometry,
+    path_resolver,
+    regrid,
+    vertical_interp,
+)
 
 logger = structlog.get_logger()
 
+GEO_SELECTIONS = {"lon lat box", "lon lat point", "transect"}
+TIME_FILTERS = {"months", "days of week", "hours", "dates"}
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+# Time steps, and default offsets from the start of the day of the first time record,
+# of the time bases whose time coordinates can be synthesized from dataset file dates
+SYNTHESIZED_TIME_STEPS = {
+    "hour": pandas.Timedelta(hours=1),
+    "day": pandas.Timedelta(days=1),
+}
+SYNTHESIZED_TIME_OFFSETS = {"hour": "00:30:00", "day": "12:00:00"}
+COMPARE_OUTPUTS = {"difference", "bias", "rmse"}
+# Fraction of the memory of the dask cluster workers that the extracted datasets that
+# write_netcdfs() persists together may use
+PERSIST_MEMORY_FRACTION = 0.5
+
 
 def api_extract_netcdf(extract_config, extract_config_yaml):
     """Extract model variable(s) time series from model product to a netCDF file
@@ -47,42 +90,64 @@ def api_extract_netcdf(extract_config, extract_config_yaml):
                                 Used in netCDF4 file history metadata.
     :type extract_config_yaml: :py:class:`pathlib.Path`
 
-    :return: File path and name that netCDF4 file was written to.
-    :rtype: :py:class:`pathlib.Path`
+    :return: File path and name that netCDF4 file was written to,
+             or mapping of box names to the file paths and names that their netCDF4
+             files were written to for ``selection: boxes:`` extractions,
+             or mapping of tile names to the file paths and names that their netCDF4
+             files were written to for ``tiles:`` extractions.
+    :rtype: :py:class:`pathlib.Path` or dict
     """
     if "climatology" in extract_config and "resample" in extract_config:
         msg = "`resample` and `climatology` in the same extraction is not supported"
         logger.error(msg, config_file=os.fspath(extract_config_yaml))
         raise ValueError(msg)
+    # Resolving the config replaces some of its stanzas,
+    # so work on a copy to leave the caller's config unchanged for reuse
+    extract_config = dict(extract_config)
     model_profile = _load_model_profile(
         Path(extract_config["dataset"]["model profile"])
     )
+    compare_model_profile = _load_compare_model_profile(extract_config)
+    _resolve_selections(extract_config, model_profile)
+    model_profile = _resolve_resolution(extract_config, model_profile)
+    model_profile = _resolve_month_avg_source(extract_config, model_profile)
     ds_paths = calc_ds_paths(extract_config, model_profile)
     chunk_size = calc_ds_chunk_size(extract_config, model_profile)
     dask_client = get_dask_client(extract_config["dask cluster"])
-    with open_dataset(ds_paths, chunk_size, extract_config) as ds:
-        logger.info("extracting variables")
-        output_coords = calc_output_coords(ds, extract_config, model_profile)
-        extracted_vars = calc_extracted_vars(
-            ds, output_coords, extract_config, model_profile
-        )
+    with (
+        _open_source_dataset(ds_paths, chunk_size, extract_config, model_profile) as ds,
+        _open_vector_v_dataset(extract_config, model_profile) as v_ds,
+        _open_compare_dataset(extract_config, compare_model_profile) as compare_ds,
+    ):
+        if v_ds is not None:
+            ds = _calc_vector_field_vars(ds, v_ds, extract_config, model_profile)
         generated_by = f"reshapr.api.v1.extract.extract_netcdf({extract_config_yaml})"
-        extracted_ds = calc_extracted_dataset(
-            extracted_vars,
-            output_coords,
-            extract_config,
-            generated_by,
-        )
-        if "resample" in extract_config:
-            extracted_ds = _resample(extracted_ds, extract_config, model_profile)
-        if "climatology" in extract_config:
-            extracted_ds = _calc_climatology(
-                extracted_ds, extract_config, model_profile
+        if "tiles" in extract_config:
+            nc_path = _extract_tiles(
+                ds,
+                extract_config,
+                model_profile,
+                generated_by,
+                compare_source_ds=compare_ds,
+                compare_model_profile=compare_model_profile,
             )
-        nc_path, encoding, nc_format, unlimited_dim = prep_netcdf_write(
-            extracted_ds, output_coords, extract_config, model_profile
-        )
-        write_netcdf(extracted_ds, nc_path, encoding, nc_format, unlimited_dim)
+        else:
+            writes = _calc_extraction_writes(
+                ds,
+                extract_config,
+                model_profile,
+                generated_by,
+                compare_source_ds=compare_ds,
+                compare_model_profile=compare_model_profile,
+            )
+            write_netcdfs(writes.values())
+            nc_path = (
+                {box_name: write[1] for box_name, write in writes.items()}
+                if "boxes" in extract_config.get("selection", {})
+                else writes[None][1]
+            )
+    mesh_geometry.clear_cache()
+    io_limits.log_io_stats(dask_client)
     dask_client.close()
     return nc_path
 
@@ -103,6 +168,218 @@ def cli_extract(config_yaml, cli_start_date, cli_end_date):
     :raises: :py:exc:`SystemExit` if processing configuration YAML file cannot be found.
     """
     t_start = time.time()
+    config = _load_cli_config(config_yaml, cli_start_date, cli_end_date)
+    model_profile = _load_model_profile(Path(config["dataset"]["model profile"]))
+    compare_model_profile = _load_compare_model_profile(config)
+    _resolve_selections(config, model_profile)
+    model_profile = _resolve_resolution(config, model_profile)
+    model_profile = _resolve_month_avg_source(config, model_profile)
+    ds_paths = calc_ds_paths(config, model_profile)
+    chunk_size = calc_ds_chunk_size(config, model_profile)
+    dask_client = get_dask_client(config["dask cluster"])
+    with (
+        _open_source_dataset(ds_paths, chunk_size, config, model_profile) as ds,
+        _open_vector_v_dataset(config, model_profile) as v_ds,
+        _open_compare_dataset(config, compare_model_profile) as compare_ds,
+    ):
+        if v_ds is not None:
+            ds = _calc_vector_field_vars(ds, v_ds, config, model_profile)
+        generated_by = _reconstruct_cmd_line(config_yaml, cli_start_date, cli_end_date)
+        if "tiles" in config:
+            _extract_tiles(
+                ds,
+                config,
+                model_profile,
+                generated_by,
+                cli_start_date,
+                cli_end_date,
+                compare_ds,
+                compare_model_profile,
+            )
+        else:
+            writes = _calc_extraction_writes(
+                ds,
+                config,
+                model_profile,
+                generated_by,
+                cli_start_date,
+                cli_end_date,
+                compare_ds,
+                compare_model_profile,
+            )
+            write_netcdfs(writes.values())
+    io_limits.log_io_stats(dask_client)
+    logger.info("total time", t_total=time.time() - t_start)
+    mesh_geometry.clear_cache()
+    dask_client.close()
+
+
+def cli_extract_shared_scan(config_yamls, cli_start_date, cli_end_date):
+    """Extract model variable time series from model product to netCDF files
+    for several extractions via command-line interface,
+    reading the source dataset files that the extractions share once.
+
+    The source of each extraction is resolved the same way as in
+    :py:func:`cli_extract`,
+    so extractions that read month-avg profile results are grouped with the other
+    extractions of the month-avg profile,
+    and extractions that the aggregate cache can answer are read from the cache
+    one at a time instead of being part of a shared scan.
+    The other extractions are grouped by their model profile, time base,
+    and variables group.
+    For each group,
+    the union of the source dataset files and variables that the extractions need
+    is opened as a single dataset,
+    the time records and variables of each extraction are selected from it,
+    and all of the extracted datasets of the group are computed together
+    so that each source dataset chunk is read once.
+    The netCDF4 files that are written are the same as those written by running
+    the extractions one at a time with :py:func:`cli_extract`.
+
+    The dask cluster of the first extraction is used for all of them.
+
+    :param config_yamls: File paths and names of the YAML files to read processing
+                         configuration dictionaries from.
+                         Please see :ref:`ReshaprExtractYAMLFile` for details.
+    :type config_yamls: :py:class:`collections.abc.Sequence` of :py:class:`pathlib.Path`
+
+    :param str cli_start_date: Start date for extractions.
+                               Overrides start dates in config files.
+
+    :param str cli_end_date: End date for extractions. Overrides end dates in config files.
+
+    :raises: :py:exc:`SystemExit` if a processing configuration YAML file cannot be
+             found, contains a ``vector field``, ``compare``, or ``tiles`` stanza,
+             or has an overview ``resolution``.
+    """
+    t_start = time.time()
+    configs = {
+        config_yaml: _load_cli_config(config_yaml, cli_start_date, cli_end_date)
+        for config_yaml in config_yamls
+    }
+    for config_yaml, config in configs.items():
+        if "vector field" in config:
+            logger.error(
+                "vector field extractions are not supported in shared scans",
+                config_file=os.fspath(config_yaml),
+            )
+            raise SystemExit(2)
+        if "compare" in config:
+            logger.error(
+                "compare extractions are not supported in shared scans",
+                config_file=os.fspath(config_yaml),
+            )
+            raise SystemExit(2)
+        if "tiles" in config:
+            logger.error(
+                "tiled extractions are not supported in shared scans",
+                config_file=os.fspath(config_yaml),
+            )
+            raise SystemExit(2)
+        if config.get("resolution", "full") != "full":
+            logger.error(
+                "overview resolution extractions are not supported in shared scans",
+                config_file=os.fspath(config_yaml),
+            )
+            raise SystemExit(2)
+    model_profiles = {}
+    scan_groups = {}
+    cache_extractions = []
+    for config_yaml, config in configs.items():
+        model_profile_yaml = Path(config["dataset"]["model profile"])
+        if model_profile_yaml not in model_profiles:
+            model_profiles[model_profile_yaml] = _load_model_profile(model_profile_yaml)
+        _resolve_selections(config, model_profiles[model_profile_yaml])
+        model_profile = _resolve_month_avg_source(
+            config, model_profiles[model_profile_yaml]
+        )
+        # The month-avg profile replaces the model profile in the config dataset stanza
+        model_profile_yaml = Path(config["dataset"]["model profile"])
+        model_profiles.setdefault(model_profile_yaml, model_profile)
+        cache_levels = _resolve_aggregate_cache(config, model_profile)
+        if cache_levels:
+            cache_extractions.append((config_yaml, model_profile_yaml, cache_levels))
+            continue
+        group_key = (
+            model_profile_yaml,
+            config["dataset"]["time base"],
+            config["dataset"]["variables group"],
+        )
+        scan_groups.setdefault(group_key, []).append(config_yaml)
+    first_config = next(iter(configs.values()))
+    dask_client = get_dask_client(first_config["dask cluster"])
+    for (model_profile_yaml, time_base, vars_group), group_yamls in scan_groups.items():
+        model_profile = model_profiles[model_profile_yaml]
+        group_configs = [configs[config_yaml] for config_yaml in group_yamls]
+        scan_config = _calc_shared_scan_config(group_configs)
+        ds_paths = _calc_shared_scan_ds_paths(group_configs, scan_config, model_profile)
+        chunk_size = calc_ds_chunk_size(scan_config, model_profile)
+        logger.info(
+            "scanning source dataset for extractions",
+            time_base=time_base,
+            vars_group=vars_group,
+            n_configs=len(group_configs),
+            n_datasets=len(ds_paths),
+        )
+        writes = []
+        with open_dataset(ds_paths, chunk_size, scan_config, model_profile) as scan_ds:
+            for config_yaml in group_yamls:
+                config = configs[config_yaml]
+                ds = _select_shared_scan_source(scan_ds, config, model_profile)
+                generated_by = _reconstruct_cmd_line(
+                    config_yaml, cli_start_date, cli_end_date
+                )
+                writes.extend(
+                    _calc_extraction_writes(
+                        ds,
+                        config,
+                        model_profile,
+                        generated_by,
+                        cli_start_date,
+                        cli_end_date,
+                    ).values()
+                )
+            write_netcdfs(writes)
+        mesh_geometry.clear_cache()
+    for config_yaml, model_profile_yaml, cache_levels in cache_extractions:
+        config = configs[config_yaml]
+        model_profile = model_profiles[model_profile_yaml]
+        chunk_size = calc_ds_chunk_size(config, model_profile)
+        with _open_aggregate_cache_dataset(
+            cache_levels, chunk_size, config, model_profile
+        ) as ds:
+            generated_by = _reconstruct_cmd_line(
+                config_yaml, cli_start_date, cli_end_date
+            )
+            writes = _calc_extraction_writes(
+                ds, config, model_profile, generated_by, cli_start_date, cli_end_date
+            )
+            write_netcdfs(writes.values())
+        mesh_geometry.clear_cache()
+    io_limits.log_io_stats(dask_client)
+    logger.info("total time", t_total=time.time() - t_start)
+    dask_client.close()
+
+
+def _load_cli_config(config_yaml, cli_start_date, cli_end_date):
+    """Load and check an extraction processing configuration YAML file for the
+    command-line interface.
+
+    :param config_yaml: File path and name of the YAML file to read processing configuration
+                        dictionary from.
+                        Please see :ref:`ReshaprExtractYAMLFile` for details.
+    :type config_yaml: :py:class:`pathlib.Path`
+
+    :param str cli_start_date: Start date for extraction. Overrides start date in config file.
+
+    :param str cli_end_date: End date for extraction. Overrides end date in config file.
+
+    :return: Extraction processing configuration dictionary.
+    :rtype: dict
+
+    :raises: :py:exc:`SystemExit` if processing configuration YAML file cannot be found,
+             or contains both ``resample`` and ``climatology`` stanzas.
+    """
     try:
         config = load_config(config_yaml, cli_start_date, cli_end_date)
     except FileNotFoundError:
@@ -114,33 +391,90 @@ def cli_extract(config_yaml, cli_start_date, cli_end_date):
             config_file=os.fspath(config_yaml),
         )
         raise SystemExit(2)
-    model_profile = _load_model_profile(Path(config["dataset"]["model profile"]))
-    ds_paths = calc_ds_paths(config, model_profile)
-    chunk_size = calc_ds_chunk_size(config, model_profile)
-    dask_client = get_dask_client(config["dask cluster"])
-    with open_dataset(ds_paths, chunk_size, config) as ds:
-        logger.info("extracting variables")
-        output_coords = calc_output_coords(ds, config, model_profile)
-        extracted_vars = calc_extracted_vars(ds, output_coords, config, model_profile)
-        generated_by = _reconstruct_cmd_line(config_yaml, cli_start_date, cli_end_date)
-        extracted_ds = calc_extracted_dataset(
-            extracted_vars,
-            output_coords,
-            config,
-            generated_by,
-            cli_start_date,
-            cli_end_date,
-        )
-        if "resample" in config:
-            extracted_ds = _resample(extracted_ds, config, model_profile)
-        if "climatology" in config:
-            extracted_ds = _calc_climatology(extracted_ds, config, model_profile)
-        nc_path, encoding, nc_format, unlimited_dim = prep_netcdf_write(
-            extracted_ds, output_coords, config, model_profile
-        )
-        write_netcdf(extracted_ds, nc_path, encoding, nc_format, unlimited_dim)
-    logger.info("total time", t_total=time.time() - t_start)
-    dask_client.close()
+    return config
+
+
+def _calc_shared_scan_config(configs):
+    """Calculate the processing configuration dictionary to open the source dataset
+    of a group of extractions that share a model profile, time base,
+    and variables group.
+
+    :param list configs: Extraction processing configuration dictionaries.
+
+    :return: Processing configuration dictionary for the union of the dates and
+             source variables of the extractions.
+    :rtype: dict
+    """
+    return {
+        "dataset": configs[0]["dataset"],
+        "start date": min(arrow.get(config["start date"]) for config in configs),
+        "end date": max(arrow.get(config["end date"]) for config in configs),
+        "extract variables": sorted(
+            set().union(*(_calc_source_vars(config) for config in configs))
+        ),
+        "parallel read": all(config.get("parallel read", True) for config in configs),
+    }
+
+
+def _calc_shared_scan_ds_paths(configs, scan_config, model_profile):
+    """Calculate the list of dataset netCDF4 file paths that are needed by a group
+    of extractions.
+
+    :param list configs: Extraction processing configuration dictionaries.
+
+    :param dict scan_config: Processing configuration dictionary for the union of the
+                             dates and source variables of the extractions.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset netCDF4 file paths in date order,
+             without the paths in gaps between the dates of the extractions.
+    :rtype: list
+    """
+    needed_paths = set()
+    for config in configs:
+        needed_paths.update(calc_ds_paths(config, model_profile))
+    return [
+        ds_path
+        for ds_path in calc_ds_paths(scan_config, model_profile)
+        if ds_path in needed_paths
+    ]
+
+
+def _select_shared_scan_source(scan_ds, config, model_profile):
+    """Select the time records and variables of an extraction from the source dataset
+    of a shared scan.
+
+    The time records that are selected are those in the periods of the dataset files
+    that :py:func:`calc_ds_paths` calculates for the extraction,
+    so the selected dataset is the same as the one that :py:func:`open_dataset`
+    opens for the extraction by itself.
+
+    :param scan_ds: Source dataset of the shared scan.
+    :type scan_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Source dataset of the extraction.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    frame, ds_dates = _calc_ds_dates(config, model_profile)
+    period_start = ds_dates[0].floor(frame)
+    period_end = ds_dates[-1].floor(frame).shift(**{f"{frame}s": 1})
+    time_coord = model_profile["time coord"]["name"]
+    time_index = scan_ds.indexes[time_coord]
+    time_slice = slice(
+        time_index.searchsorted(period_start.naive),
+        time_index.searchsorted(period_end.naive),
+    )
+    drop_vars = set(scan_ds.data_vars) - _calc_source_vars(config)
+    return _select_time_records(
+        scan_ds.drop_vars(sorted(drop_vars)).isel({time_coord: time_slice}),
+        config,
+        model_profile,
+    )
 
 
 def load_config(config_yaml, start_date, end_date):
@@ -291,650 +625,3760 @@ def _load_model_profile(model_profile_yaml):
     return model_profile
 
 
-def calc_ds_paths(config, model_profile):
-    """Calculate the list of dataset netCDF4 file paths to process.
+def _resolve_selections(config, model_profile):
+    """Resolve the geographic and box selections,
+    and the regular grid of a ``regrid:`` stanza,
+    of an extraction to grid y/x index selections,
+    and check the time filters of the ``selection:`` stanza,
+    and the ``tiles:`` stanza of a tiled extraction.
 
-    The list is in order ascending date order.
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+    """
+    if TIME_FILTERS & set(config.get("selection", {})):
+        _resolve_time_filters(config)
+    if GEO_SELECTIONS & set(config.get("selection", {})):
+        _resolve_geo_selection(config, model_profile)
+    if "boxes" in config.get("selection", {}):
+        _resolve_box_selections(config, model_profile)
+    if "regrid" in config:
+        _resolve_regrid(config, model_profile)
+    if "tiles" in config:
+        _resolve_tiles(config)
+
+
+def _resolve_resolution(config, model_profile):
+    """Calculate the model profile to read the overview pyramid level of a
+    ``resolution: overview-N`` extraction from,
+    and convert the extraction grid y/x selections to overview grid indices.
+
+    Overview pyramid levels are built by :py:func:`reshapr.core.pyramid.cli_pyramid`.
+    The files of a level have the same names as the results archive files,
+    so the overview model profile is the model profile with the level directory
+    as its results archive path,
+    and its y/x chunk sizes reduced by the level block size.
 
     :param dict config: Extraction processing configuration dictionary.
 
     :param dict model_profile: Model profile dictionary.
 
-    :return: Dataset netCDF4 file paths in date order.
-    :rtype: list
+    :return: Model profile dictionary to read the extraction source dataset with.
+    :rtype: dict
+
+    :raises: :py:exc:`SystemExit` if the resolution is not a level of the model
+             profile overview pyramid,
+             if the extraction uses processing stages that require full
+             resolution grids,
+             or if it has grid y/x intervals.
     """
-    results_archive_path = Path(model_profile["results archive"]["path"])
-    time_base = config["dataset"]["time base"]
-    vars_group = config["dataset"]["variables group"]
-    datasets = model_profile["results archive"]["datasets"]
-    days_per_file = datasets[time_base].get("days per file", 1)
-    nc_files_pattern = datasets[time_base][vars_group]["file pattern"]
-    log = logger.bind(
-        results_archive_path=os.fspath(results_archive_path),
-        time_base=time_base,
-        vars_group=vars_group,
-        nc_files_pattern=os.fspath(nc_files_pattern),
-        days_per_file=days_per_file,
+    resolution = config.get("resolution", "full")
+    if resolution == "full":
+        return model_profile
+    log = logger.bind(resolution=resolution)
+    match = re.fullmatch(r"overview-(\d+)", str(resolution))
+    if match is None:
+        log.error("unknown resolution")
+        raise SystemExit(2)
+    if "overview pyramid" not in model_profile:
+        log.error("model profile has no overview pyramid")
+        raise SystemExit(2)
+    level = int(match.group(1))
+    if level not in model_profile["overview pyramid"]["levels"]:
+        log.error(
+            "resolution is not an overview pyramid level",
+            levels=model_profile["overview pyramid"]["levels"],
+        )
+        raise SystemExit(2)
+    conflicts = ({"boxes", "transect"} & set(config.get("selection", {}))) | (
+        {"regrid", "reduce", "column kernels", "vector field", "compare"} & set(config)
     )
-    start_date = arrow.get(config["start date"])
-    end_date = arrow.get(config["end date"])
-    log = log.bind(
-        start_date=start_date.format("YYYY-MM-DD"),
-        end_date=end_date.format("YYYY-MM-DD"),
-    )
-    date_range = arrow.Arrow.range(
-        frame=("months" if days_per_file == "month" else "days"),
-        start=start_date,
-        end=end_date,
-    )
-    ds_paths = [
-        results_archive_path.joinpath(
-            nc_files_pattern.format(
-                ddmmmyy=date_formatters.ddmmmyy(day),
-                yyyymmdd=date_formatters.yyyymmdd(day),
-                yyyymm01=date_formatters.yyyymm01(day),
-                yyyymm_end=date_formatters.yyyymm_end(day),
-                yyyy=date_formatters.yyyy(day),
-                nemo_yyyymm=date_formatters.nemo_yyyymm(day),
-                nemo_yyyymmdd=date_formatters.nemo_yyyymmdd(day),
-            )
+    if conflicts:
+        log.error(
+            "overview resolutions can't be combined with boxes or transect selections, "
+            "or with regrid, reduce, column kernels, vector field, or compare stanzas",
+            stanzas=sorted(conflicts),
         )
-        for day in date_range
-    ]
-    log = log.bind(n_datasets=len(ds_paths))
-    log.debug("collected dataset paths")
-    return ds_paths
+        raise SystemExit(2)
+    selection = config.get("selection", {})
+    intervals = {
+        f"{coord} interval": selection[f"grid {coord}"][f"{coord} interval"]
+        for coord in ("y", "x")
+        if selection.get(f"grid {coord}", {}).get(f"{coord} interval", 1) != 1
+    }
+    if intervals:
+        log.error(
+            "grid y/x intervals can't be combined with overview resolutions",
+            intervals=intervals,
+        )
+        raise SystemExit(2)
+    # Rescale copies of the grid selections so that configs that are reused for more
+    # than one extraction aren't rescaled again
+    selection = dict(selection)
+    for coord in ("y", "x"):
+        if f"grid {coord}" not in selection:
+            continue
+        coord_selection = dict(selection[f"grid {coord}"])
+        if f"{coord} min" in coord_selection:
+            coord_selection[f"{coord} min"] //= level
+        if coord_selection.get(f"{coord} max") is not None:
+            coord_selection[f"{coord} max"] = -(
+                -coord_selection[f"{coord} max"] // level
+            )
+        selection[f"grid {coord}"] = coord_selection
+    if selection:
+        config["selection"] = selection
+    chunk_size = model_profile["chunk size"]
+    overview_model_profile = {
+        **model_profile,
+        "results archive": {
+            **model_profile["results archive"],
+            "path": os.fspath(
+                Path(model_profile["overview pyramid"]["path"]) / f"overview-{level}"
+            ),
+        },
+        "chunk size": {
+            **chunk_size,
+            "y": -(-chunk_size["y"] // level),
+            "x": -(-chunk_size["x"] // level),
+        },
+    }
+    log.info(
+        "reading overview pyramid level",
+        results_archive=overview_model_profile["results archive"]["path"],
+        grid_y=selection.get("grid y"),
+        grid_x=selection.get("grid x"),
+    )
+    return overview_model_profile
 
 
-def calc_ds_chunk_size(config, model_profile):
-    """Calculate chunk size dictionary for dataset loading.
+def _resolve_month_avg_source(config, model_profile):
+    """Calculate the model profile to read the source dataset of a month resampling
+    extraction from.
 
-    This does a transformation of the "conceptual" (time, depth, y, x) chunks dict to
-    one with the correct coordinate names for the model datasets.
+    If the model profile has a ``month-avg profile`` item,
+    and the extraction calculates month means of whole months that the month-averaged
+    results archive files of that profile cover,
+    the extraction reads those files instead of resampling the finer time base files
+    of the model profile.
+    The variables and grid of the month-averaged files are checked against those of the
+    model profile files,
+    and the extraction config time base is changed to ``month`` when they match.
+    The substitution can be disabled with ``month-avg source: False`` in the config.
 
     :param dict config: Extraction processing configuration dictionary.
 
     :param dict model_profile: Model profile dictionary.
 
-    :return: Chunks size dict to use for loading model datasets.
+    :return: Model profile dictionary to read the extraction source dataset with.
     :rtype: dict
     """
-    abstract_chunk_size = model_profile["chunk size"].copy()
-    time_chunk_size = abstract_chunk_size.pop("time")
-    chunk_size = {model_profile["time coord"]["name"]: time_chunk_size}
-    if "depth" in abstract_chunk_size:
-        depth_chunk_size = abstract_chunk_size.pop("depth")
-        time_base = config["dataset"]["time base"]
-        vars_group = config["dataset"]["variables group"]
-        datasets = model_profile["results archive"]["datasets"]
-        ds_depth_coord = datasets[time_base][vars_group]["depth coord"]
-        chunk_size.update({ds_depth_coord: depth_chunk_size})
-    chunk_size.update(abstract_chunk_size)
-    logger.debug("chunk size for dataset loading", chunk_size=chunk_size)
-    return chunk_size
+    if "month-avg profile" not in model_profile or not config.get(
+        "month-avg source", True
+    ):
+        return model_profile
+    resample = config.get("resample", {})
+    start_date = arrow.get(config["start date"])
+    end_date = arrow.get(config["end date"])
+    conflicts = _calc_time_aggregation_conflicts(config)
+    month_avg_profile_yaml = Path(model_profile["month-avg profile"])
+    log = logger.bind(month_avg_profile=os.fspath(month_avg_profile_yaml))
+    if (
+        resample.get("time interval") not in {"1M", "M", "1MS", "MS"}
+        or resample.get("aggregation", "mean") != "mean"
+        or config["extracted dataset"].get("use model coords", False)
+        or start_date != start_date.floor("month")
+        or end_date != end_date.ceil("month").floor("day")
+        or conflicts
+    ):
+        log.debug(
+            "month-avg profile can't be used for extraction", stanzas=sorted(conflicts)
+        )
+        return model_profile
+    month_avg_profile = _load_model_profile(month_avg_profile_yaml)
+    vars_group = config["dataset"]["variables group"]
+    if vars_group not in month_avg_profile["results archive"]["datasets"].get(
+        "month", {}
+    ):
+        log.warning(
+            "variables group is not in month-avg profile; "
+            "resampling model profile results",
+            vars_group=vars_group,
+        )
+        return model_profile
+    month_avg_config = {
+        **config,
+        "dataset": {
+            **config["dataset"],
+            "model profile": os.fspath(month_avg_profile_yaml),
+            "time base": "month",
+        },
+    }
+    month_avg_ds_paths = calc_ds_paths(month_avg_config, month_avg_profile)
+    missing_ds_paths = [
+        ds_path for ds_path in month_avg_ds_paths if not ds_path.exists()
+    ]
+    if missing_ds_paths:
+        log.warning(
+            "month-avg profile doesn't cover extraction dates; "
+            "resampling model profile results",
+            missing_ds_path=os.fspath(missing_ds_paths[0]),
+            n_missing_ds_paths=len(missing_ds_paths),
+        )
+        return model_profile
+    mismatches = _calc_month_avg_mismatches(
+        calc_ds_paths(config, model_profile)[0],
+        model_profile,
+        month_avg_ds_paths[0],
+        month_avg_profile,
+        _calc_source_vars(config),
+    )
+    if mismatches:
+        log.warning(
+            "month-avg profile variables or grid don't match model profile; "
+            "resampling model profile results",
+            mismatches=mismatches,
+        )
+        return model_profile
+    config["dataset"] = month_avg_config["dataset"]
+    log.info(
+        "reading month-avg profile results",
+        time_base="month",
+        n_datasets=len(month_avg_ds_paths),
+    )
+    return month_avg_profile
 
 
-def get_dask_client(dask_config_yaml):
-    """Return a dask cluster client.
+def _calc_month_avg_mismatches(
+    ds_path, model_profile, month_avg_ds_path, month_avg_profile, source_vars
+):
+    """Compare the source variables in a month-averaged results archive file with those in
+    a model profile results archive file.
 
-    If :kbd:`dask_cluster` is a dask cluster configuration YAML file,
-    a :py:class:`dask.distributed.LocalCluster` is created using the parameters in the file,
-    and a client connected to that cluster is returned.
-    Otherwise,
-    :kbd:`dask_cluster` is assumed to be the IP address and port number of an existing cluster
-    in the form :kbd:`host_ip:port`,
-    and a client connected to that cluster is returned.
+    :param ds_path: Model profile results archive file path.
+    :type ds_path: :py:class:`pathlib.Path`
 
-    :param dask_config_yaml: File path and name of the YAML file to read the dask cluster configuration
-                             dictionary from,
-                             or a :kbd:`host_ip:port` string of an existing dask cluster to connect to.
-                             Please see :ref:`ReshaprDaskClusterYAMLFile` for details.
-    :type dask_config_yaml: :py:class:`pathlib.Path` or str
+    :param dict model_profile: Model profile dictionary.
 
-    :return: Dask cluster client.
-    :rtype: :py:class:`dask.distributed.Client`
+    :param month_avg_ds_path: Month-averaged results archive file path.
+    :type month_avg_ds_path: :py:class:`pathlib.Path`
+
+    :param dict month_avg_profile: Month-avg model profile dictionary.
 
-    :raises: :py:exc:`SystemExit` if a client cannot be created.
+    :param set source_vars: Names of variables to load from the source dataset.
+
+    :return: Mapping of the names of source variables that are missing from the
+             month-averaged file, or whose non-time shapes differ,
+             to descriptions of the differences.
+    :rtype: dict
     """
-    log = logger.bind(dask_config_yaml=os.fspath(dask_config_yaml))
-    try:
-        # Handle possible user-created dask cluster description
-        with Path(dask_config_yaml).open("rt") as f:
-            cluster_config = yaml.safe_load(f)
-    except FileNotFoundError:
-        # Fall back to try to find cluster description in Reshapr/cluster_configs/
-        cluster_configs_path = Path(__file__).parent.parent.parent / "cluster_configs"
-        try:
-            with Path(cluster_configs_path / dask_config_yaml).open("rt") as f:
-                cluster_config = yaml.safe_load(f)
-            log = logger.bind(
-                dask_config_yaml=os.fspath(cluster_configs_path / dask_config_yaml)
-            )
-        except FileNotFoundError:
-            # Maybe config is a host_ip:port string
-            try:
-                # Connect to an existing cluster
-                client = dask.distributed.Client(dask_config_yaml)
-                log = log.bind(dashboard_link=client.dashboard_link)
-                log.info("dask cluster dashboard")
-                return client
-            except TypeError:
-                log.error("dask cluster config file not found")
-                raise SystemExit(2)
-            except ValueError:
-                log.error(
-                    "unrecognized dask cluster config; expected YAML file path or host_ip:port"
-                )
-                raise SystemExit(1)
-            except OSError:
-                log.error(
-                    "requested dask cluster is not running or refused your connection"
+    time_coord = model_profile["time coord"]["name"]
+    month_avg_time_coord = month_avg_profile["time coord"]["name"]
+    mismatches = {}
+    with (
+        xarray.open_dataset(ds_path, engine="h5netcdf") as ds,
+        xarray.open_dataset(month_avg_ds_path, engine="h5netcdf") as month_avg_ds,
+    ):
+        for var in sorted(source_vars):
+            if var not in month_avg_ds.data_vars:
+                mismatches[var] = "missing"
+                continue
+            shape = {
+                dim: size for dim, size in ds[var].sizes.items() if dim != time_coord
+            }
+            month_avg_shape = {
+                dim: size
+                for dim, size in month_avg_ds[var].sizes.items()
+                if dim != month_avg_time_coord
+            }
+            if tuple(shape.values()) != tuple(month_avg_shape.values()):
+                mismatches[var] = (
+                    f"shape {tuple(month_avg_shape.values())} "
+                    f"instead of {tuple(shape.values())}"
                 )
-                raise SystemExit(1)
-    log.debug("loaded dask cluster config")
-    # Set up cluster described in YAML file
-    config_memory_limit = cluster_config.get("memory limit", "auto")
-    memory_limit = None if config_memory_limit == "None" else config_memory_limit
-    cluster = dask.distributed.LocalCluster(
-        name=cluster_config["name"],
-        n_workers=cluster_config["number of workers"],
-        threads_per_worker=cluster_config["threads per worker"],
-        processes=cluster_config["processes"],
-        memory_limit=memory_limit,
-    )
-    client = dask.distributed.Client(cluster)
-    log = log.bind(dashboard_link=client.dashboard_link)
-    log.info("dask cluster dashboard")
-    return client
+    return mismatches
 
 
-def open_dataset(ds_paths, chunk_size, config):
-    """Open a list of dataset paths as a single dataset.
+def _resolve_aggregate_cache(config, model_profile):
+    """Calculate the aggregate cache levels that can answer the ``resample:`` or
+    ``climatology:`` stage of an extraction.
 
-    This is a wrapper around :py:func:`xarray.open_mfdataset` that ensures that the
-    returned dataset contains only the variable(s) of interest and their coordinates.
-    That is done to minimize the memory size of the dataset.
+    The cache is used when the model profile has an ``aggregate cache`` stanza,
+    unless the extraction config has ``aggregate cache: False``.
+    It can only answer month and day resampling and climatologies with aggregations
+    that can be calculated from the aggregates of shorter periods,
+    of extractions that don't have processing stages which would have to be applied
+    before the time aggregation.
 
-    The returned dataset contains dask arrays that defer processing and delegate it to
-    the dask cluster.
+    :param dict config: Extraction processing configuration dictionary.
 
-    :param list ds_paths: Dataset netCDF4 file paths in date order.
+    :param dict model_profile: Model profile dictionary.
 
-    :param dict chunk_size: Chunks size to use for loading datasets.
+    :return: Cache levels to read in order from coarsest to finest,
+             or an empty tuple if the cache can't be used for the extraction.
+    :rtype: tuple
+    """
+    if "aggregate cache" not in model_profile or not config.get(
+        "aggregate cache", True
+    ):
+        return ()
+    if "resample" in config:
+        aggregation = config["resample"].get("aggregation", "mean")
+        match config["resample"]["time interval"]:
+            case "1M" | "M" | "1MS" | "MS":
+                levels = ("month", "day")
+            case "1D" | "D":
+                levels = ("day",)
+            case _:
+                levels = ()
+    elif "climatology" in config:
+        aggregation = config["climatology"].get("aggregation", "mean")
+        # Months have different lengths, so means of month means are not the means
+        # of the month groups of a climatology
+        levels = (
+            ("month", "day")
+            if config["climatology"]["group by"] == "month" and aggregation != "mean"
+            else ("day",)
+        )
+    else:
+        return ()
+    time_base = config["dataset"]["time base"]
+    levels = tuple(
+        level for level in levels if level in aggregate_cache.calc_levels(time_base)
+    )
+    conflicts = _calc_time_aggregation_conflicts(config)
+    log = logger.bind(time_base=time_base, aggregation=aggregation)
+    if not levels or aggregation not in aggregate_cache.AGGREGATIONS or conflicts:
+        log.debug(
+            "aggregate cache can't be used for extraction",
+            levels=levels,
+            stanzas=sorted(conflicts),
+        )
+        return ()
+    log.info("using aggregate cache", levels=levels)
+    return levels
 
-    :param dict config: Extraction processing configuration dictionary.
 
-    :return: Multi-file dataset.
-    :rtype: :py:class:`xarray.Dataset`
+def _calc_time_aggregation_conflicts(config):
+    """Calculate the stanzas and selections of an extraction that have to be applied
+    before its time aggregation,
+    so that the extraction can't be answered from pre-aggregated source datasets.
 
-    :raises: :py:exc:`SystemExit` if multi-file dataset contains no variables.
+    :param dict config: Extraction processing configuration dictionary.
+
+    :return: Names of the conflicting stanzas and selections.
+    :rtype: set
     """
-    unused_vars_yaml = (
-        Path(__file__).parent.parent.parent / "model_profiles" / "unused-variables.yaml"
-    )
-    with unused_vars_yaml.open("rt") as f:
-        unused_vars = yaml.safe_load(f)
-    drop_vars = {var for var in unused_vars}
-    extract_vars = {var for var in config["extract variables"]}
-    # Use 1st and last dataset paths to calculate the set of all variables
-    # in the dataset, and from that the set of variables to drop.
-    # We need to use the variables lists from 1st and last datasets to avoid issue #51.
-    for ds_path in (ds_paths[0], ds_paths[-1]):
-        with xarray.open_dataset(ds_path, chunks=chunk_size, engine="h5netcdf") as ds:
-            drop_vars.update(var for var in ds.data_vars)
-    drop_vars -= extract_vars
-    parallel_read = config.get("parallel read", True)
-    ds = xarray.open_mfdataset(
-        ds_paths,
-        chunks=chunk_size,
-        compat="override",
-        coords="minimal",
-        data_vars="minimal",
-        drop_variables=drop_vars,
-        parallel=parallel_read,
+    selection = config.get("selection", {})
+    return (
+        {"depths", "isopycnals"} & set(selection)
+        | {
+            "derived variables",
+            "column kernels",
+            "vector field",
+            "reduce",
+            "regrid",
+            "compare",
+        }
+        & set(config)
+        | TIME_FILTERS & set(selection)
+        | ({"time interval"} if selection.get("time interval", 1) != 1 else set())
+        | ({"resolution"} if config.get("resolution", "full") != "full" else set())
     )
-    if not ds.data_vars:
-        logger.error(
-            "no variables in source dataset",
-            extract_vars=extract_vars,
-            possible_reasons="typo in variable name, or incorrect variables group",
-        )
-        raise SystemExit(2)
-    logger.debug("opened dataset", ds=ds)
-    return ds
 
 
-def calc_output_coords(source_dataset, config, model_profile):
-    """Construct the coordinates for the dataset containing the extracted variable(s).
+def _resolve_time_filters(config):
+    """Check the ``months``, ``days of week``, ``hours``, and ``dates`` time filters
+    of the ``selection`` stanza of an extraction.
 
-    The returned coordinates container has the following mapping of attributes to
-    coordinate names:
+    :param dict config: Extraction processing configuration dictionary.
 
-    * ``time``: ``time``
-    * ``depth``: ``depth``
-    * ``y_index``: ``gridY``
-    * ``x_index``: ``gridX``
+    :raises: :py:exc:`SystemExit` if a time filter is invalid,
+             or no dates in the extraction date range match the time filters.
+    """
+    time_filters = _calc_time_filters(config)
+    start_date = arrow.get(config["start date"])
+    end_date = arrow.get(config["end date"])
+    if not any(
+        _is_date_selected(
+            start_date.date() + datetime.timedelta(days=day), time_filters
+        )
+        for day in range((end_date - start_date).days + 1)
+    ):
+        logger.error(
+            "no dates in extraction date range match selection time filters",
+            start_date=start_date.format("YYYY-MM-DD"),
+            end_date=end_date.format("YYYY-MM-DD"),
+            time_filters={
+                name: sorted(values) for name, values in time_filters.items()
+            },
+        )
+        raise SystemExit(2)
 
-    except if ``extracted dataset: use model coords: True`` is set in the
-    extraction configuration, in which case the output coordinates will be the same as the
-    model coordinates.
 
-    :param source_dataset: Dataset from which variables are being extracted.
-    :type source_dataset: :py:class:`xarray.Dataset`
+def _calc_time_filters(config):
+    """Calculate the time filters of the ``months``, ``days of week``, ``hours``,
+    and ``dates`` items of the ``selection`` stanza of an extraction.
 
-    :param dict config: Extraction processing configuration dictionary.
+    Days of the week are names like ``Monday``, or abbreviations like ``Mon``,
+    in any case.
 
-    :param dict model_profile: Model profile dictionary.
+    :param dict config: Extraction processing configuration dictionary.
 
-    :return: Mapping of coordinate names to their data arrays.
+    :return: Mapping of time filter names to the sets of month numbers,
+             day of week numbers (Monday is 0), hours,
+             or :py:class:`datetime.date` dates to select.
     :rtype: dict
-    """
-    use_model_coords = config["extracted dataset"].get("use model coords", False)
-    time_interval = config.get("selection", {}).get("time interval", 1)
-    # stop=None in slice() means the length of the array without having to know what that is
-    time_selector = {model_profile["time coord"]["name"]: slice(0, None, time_interval)}
-    output_time_coord_name = (
-        "time" if not use_model_coords else model_profile["time coord"]["name"]
-    )
-    times = create_dataarray(
-        output_time_coord_name,
-        source_dataset[model_profile["time coord"]["name"]].isel(time_selector),
-        attrs=calc_time_coord_attrs(config["dataset"]["time base"], model_profile),
-    )
-    logger.debug("extraction time coordinate", time=times)
 
-    # There are 2 special cases for which there is no depth coordinate:
-    #   1. The dataset does not have a depth coordinate; e.g. HRDPS surface forcing fields
-    #   2. The variable does not have a depth coordinate; e.g. sea surface height
-    #      in SalishSeaCast grid_T dataset
-    if "depth" not in model_profile["chunk size"]:
-        # Dataset does not have a depth coordinate; e.g. HRDPS surface forcing fields
-        include_depth_coord = False
-        output_depth_coord_name = None
-        depths = None
-    else:
-        datasets = model_profile["results archive"]["datasets"]
-        time_base = config["dataset"]["time base"]
-        vars_group = config["dataset"]["variables group"]
-        depth_coord = datasets[time_base][vars_group]["depth coord"]
-        include_depth_coord = any(
-            [depth_coord in var.coords for var in source_dataset.data_vars.values()]
-        )
-        if not include_depth_coord:
-            # Variable does not have a depth coordinate; e.g. sea surface height in SalishSeaCast
-            # grid_T dataset
-            output_depth_coord_name = None
-            depths = None
-        else:
-            # At least 1 variable has a depth coordinate, so include depth in output dataset
-            # coordinates
-            depth_min = config.get("selection", {}).get("depth", {}).get("depth min", 0)
-            depth_max = (
-                config.get("selection", {}).get("depth", {}).get("depth max", None)
-            )
-            depth_interval = (
-                config.get("selection", {}).get("depth", {}).get("depth interval", 1)
+    :raises: :py:exc:`SystemExit` if a time filter is invalid.
+    """
+    selection = config.get("selection", {})
+    time_filters = {}
+    for name in sorted(TIME_FILTERS & set(selection)):
+        values = selection[name]
+        if not isinstance(values, list) or not values:
+            logger.error(
+                "selection time filter must be a list of values",
+                time_filter=name,
+                values=values,
             )
-            depth_selector = slice(depth_min, depth_max, depth_interval)
-            output_depth_coord_name = "depth" if not use_model_coords else depth_coord
-            depths = create_dataarray(
-                output_depth_coord_name,
-                source_dataset[depth_coord].isel({depth_coord: depth_selector}),
-                attrs={
-                    "standard_name": "sea_floor_depth",
-                    "long_name": "Sea Floor Depth",
-                    "units": "metres",
-                    "positive": "down",
-                },
+            raise SystemExit(2)
+        try:
+            match name:
+                case "months":
+                    time_filters[name] = {
+                        _check_time_filter_value(month, 1, 12) for month in values
+                    }
+                case "days of week":
+                    time_filters[name] = {_calc_weekday(day) for day in values}
+                case "hours":
+                    time_filters[name] = {
+                        _check_time_filter_value(hour, 0, 23) for hour in values
+                    }
+                case "dates":
+                    time_filters[name] = {arrow.get(date).date() for date in values}
+        except (AttributeError, TypeError, ValueError):
+            logger.error(
+                "invalid selection time filter values",
+                time_filter=name,
+                values=values,
             )
-            logger.debug("extraction depth coordinate", depth=depths)
+            raise SystemExit(2)
+    return time_filters
 
-    y_min = config.get("selection", {}).get("grid y", {}).get("y min", 0)
-    y_max = config.get("selection", {}).get("grid y", {}).get("y max", None)
-    y_interval = config.get("selection", {}).get("grid y", {}).get("y interval", 1)
-    y_selector = slice(y_min, y_max, y_interval)
-    y_coord = model_profile["y coord"]["name"]
-    output_y_coord_name = (
-        "gridY" if not use_model_coords else model_profile["y coord"]["name"]
-    )
-    y_indices = create_dataarray(
-        output_y_coord_name,
-        source_dataset[y_coord].isel({y_coord: y_selector}).astype(int),
-        attrs={
-            "standard_name": "y",
-            "long_name": "Grid Y",
-            "units": model_profile["y coord"].get("units", "count"),
-            "comment": model_profile["y coord"].get(
-                "comment",
-                f"{output_y_coord_name} values are grid indices in the model y-direction",
-            ),
-        },
-    )
-    logger.debug("extraction y coordinate", y_index=y_indices)
 
-    x_min = config.get("selection", {}).get("grid x", {}).get("x min", 0)
-    x_max = config.get("selection", {}).get("grid x", {}).get("x max", None)
-    x_interval = config.get("selection", {}).get("grid x", {}).get("x interval", 1)
-    x_selector = slice(x_min, x_max, x_interval)
-    x_coord = model_profile["x coord"]["name"]
-    output_x_coord_name = (
-        "gridX" if not use_model_coords else model_profile["x coord"]["name"]
-    )
-    x_indices = create_dataarray(
-        output_x_coord_name,
-        source_dataset[x_coord].isel({x_coord: x_selector}).astype(int),
-        attrs={
-            "standard_name": "x",
-            "long_name": "Grid X",
-            "units": model_profile["x coord"].get("units", "count"),
-            "comment": model_profile["x coord"].get(
-                "comment",
-                f"{output_x_coord_name} values are grid indices in the model x-direction",
-            ),
-        },
-    )
-    logger.debug("extraction x coordinate", x_index=x_indices)
+def _check_time_filter_value(value, min_value, max_value):
+    """Return an integer time filter value if it is in a range.
 
-    return (
-        {
-            output_time_coord_name: times,
-            output_depth_coord_name: depths,
-            output_y_coord_name: y_indices,
-            output_x_coord_name: x_indices,
-        }
-        if include_depth_coord
-        else {
-            output_time_coord_name: times,
-            output_y_coord_name: y_indices,
-            output_x_coord_name: x_indices,
-        }
-    )
+    :param int value: Time filter value.
 
+    :param int min_value: Minimum valid value.
 
-def calc_time_coord_attrs(time_base, model_profile):
+    :param int max_value: Maximum valid value.
+
+    :rtype: int
+
+    :raises: :py:exc:`ValueError` if the value is not an integer in the range.
     """
-    :param str time_base: Time base for extraction or time interval for resampling.
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{value} is not an integer")
+    if not min_value <= value <= max_value:
+        raise ValueError(f"{value} is not in [{min_value}, {max_value}]")
+    return value
 
-    :param dict model_profile: Model profile dictionary.
 
-    :return: Time coordinate netCDF attributes.
-    :rtype: dict
+def _calc_weekday(day):
+    """Return the day of week number of a day name or abbreviation.
+
+    :param str day: Day name like ``Monday``, or abbreviation like ``Mon``.
+
+    :return: Day of week number; Monday is 0.
+    :rtype: int
+
+    :raises: :py:exc:`ValueError` if the day is not a day name or abbreviation.
     """
-    extract_time_origin = model_profile["extraction time origin"]
-    match time_base:
-        case "hour":
-            time_offset = "00:30:00"
-            example = (
-                "e.g. the field average values for the first hour of 8 February 2022 have "
-                "a time value of 2022-02-08 00:30:00Z"
-            )
-        case "day":
-            time_offset = "12:00:00"
-            example = (
-                "e.g. the field average values for 8 February 2022 have "
-                "a time value of 2022-02-08 12:00:00Z"
-            )
-        case "month":
-            time_offset = "12:00:00"
-            example = (
-                "e.g. the field average values for January 2022 have "
-                "a time value of 2022-01-15 12:00:00Z, "
-                "and those for April 2022 have a time value of 2022-04-15 00:00:00Z"
-            )
-        case _:
-            time_offset = "00:30:00"
-            example = ""
-    comment = (
-        "time values are UTC at the centre of the intervals over which the "
-        "calculated model results are averaged"
-    )
-    comment = f"{comment}; {example}" if example else comment
-    time_attrs = {
-        "standard_name": "time",
-        "long_name": "Time Axis",
-        "time_origin": f"{extract_time_origin} {time_offset}",
-        "comment": comment,
-        # time_origin and units are provided by encoding when dataset is written to netCDF file
-    }
-    return time_attrs
+    for weekday, name in enumerate(WEEKDAYS):
+        if day.lower() in {name, name[:3]}:
+            return weekday
+    raise ValueError(f"{day} is not a day of the week")
 
 
-def calc_extracted_vars(source_dataset, output_coords, config, model_profile):
-    """Construct the data array for the extracted variable(s).
+def _is_date_selected(date, time_filters):
+    """Return :py:obj:`True` if a date matches the ``months``, ``days of week``,
+    and ``dates`` time filters.
 
-    :param source_dataset: Dataset from which variable(s) are being extracted.
-    :type source_dataset: :py:class:`xarray.Dataset`
+    :param date: Date.
+    :type date: :py:class:`datetime.date`
 
-    :param dict output_coords: Coordinate names to data array mapping for the extracted
-                               variable(s).
+    :param dict time_filters: Time filters from :py:func:`_calc_time_filters`.
+
+    :rtype: bool
+    """
+    return (
+        date.month in time_filters.get("months", {date.month})
+        and date.weekday() in time_filters.get("days of week", {date.weekday()})
+        and date in time_filters.get("dates", {date})
+    )
+
+
+def _resolve_geo_selection(config, model_profile):
+    """Resolve a longitude/latitude box or point selection to grid y/x index selections.
+
+    The resolution uses the geographic index of the model profile geo ref dataset
+    from :py:mod:`reshapr.utils.geo_index`.
+    The resolved ``grid y`` and ``grid x`` selections are stored in the ``selection``
+    stanza of the extraction configuration so that all of the later processing uses them.
 
     :param dict config: Extraction processing configuration dictionary.
 
     :param dict model_profile: Model profile dictionary.
 
-    :return: Extracted variable data array(s).
-    :rtype: list
+    :raises: :py:exc:`SystemExit` if the selection can't be resolved.
     """
-    time_interval = config.get("selection", {}).get("time interval", 1)
-    # stop=None in slice() means the length of the array without having to know what that is
-    time_selector = slice(0, None, time_interval)
-    if "depth" in model_profile["chunk size"]:
-        depth_min = config.get("selection", {}).get("depth", {}).get("depth min", 0)
-        depth_max = config.get("selection", {}).get("depth", {}).get("depth max", None)
-        depth_interval = (
-            config.get("selection", {}).get("depth", {}).get("depth interval", 1)
+    selection = config["selection"]
+    geo_selections = GEO_SELECTIONS & set(selection)
+    if len(geo_selections) > 1 or {"grid y", "grid x"} & set(selection):
+        logger.error(
+            "only one of lon lat box, lon lat point, transect, or grid y/x selections "
+            "is supported",
+            selections=sorted(geo_selections | ({"grid y", "grid x"} & set(selection))),
         )
-        depth_selector = slice(depth_min, depth_max, depth_interval)
-        time_base = config["dataset"]["time base"]
-        vars_group = config["dataset"]["variables group"]
-        datasets = model_profile["results archive"]["datasets"]
-        depth_coord = datasets[time_base][vars_group]["depth coord"]
-        include_depth_coord = True
-    else:
-        depth_coord, depth_selector = None, None
-        include_depth_coord = False
-    y_min = config.get("selection", {}).get("grid y", {}).get("y min", 0)
-    y_max = config.get("selection", {}).get("grid y", {}).get("y max", None)
-    y_interval = config.get("selection", {}).get("grid y", {}).get("y interval", 1)
-    y_selector = slice(y_min, y_max, y_interval)
-    x_min = config.get("selection", {}).get("grid x", {}).get("x min", 0)
-    x_max = config.get("selection", {}).get("grid x", {}).get("x max", None)
-    x_interval = config.get("selection", {}).get("grid x", {}).get("x interval", 1)
-    x_selector = slice(x_min, x_max, x_interval)
-    if include_depth_coord:
-        selector = {
-            model_profile["time coord"]["name"]: time_selector,
-            depth_coord: depth_selector,
-            model_profile["y coord"]["name"]: y_selector,
-            model_profile["x coord"]["name"]: x_selector,
+        raise SystemExit(2)
+    if "transect" in selection and {"space", "regions"} & set(config.get("reduce", {})):
+        logger.error("space and regions reductions of transects are not supported")
+        raise SystemExit(2)
+    geo_ref_dataset = model_profile["geo ref dataset"]
+    grid_geo_index = geo_index.load_geo_index(geo_ref_dataset)
+    if "lon lat box" in selection:
+        box = selection["lon lat box"]
+        log = logger.bind(lon_lat_box=box)
+        try:
+            indices = geo_index.find_box_indices(
+                grid_geo_index,
+                box["lon min"],
+                box["lon max"],
+                box["lat min"],
+                box["lat max"],
+            )
+        except ValueError as exc:
+            log.error("lon lat box selection failed", reason=str(exc))
+            raise SystemExit(2)
+    elif "transect" in selection:
+        transect_config = selection["transect"]
+        log = logger.bind(transect=transect_config)
+        try:
+            transect = geo_index.load_transect(
+                geo_ref_dataset,
+                transect_config["waypoints"],
+                transect_config.get("spacing"),
+            )
+        except ValueError as exc:
+            log.error("transect selection failed", reason=str(exc))
+            raise SystemExit(2)
+        log = log.bind(n_points=len(transect["distance"]))
+        # Grid y/x selections of the transect bounding box that the transect points
+        # are selected from after extraction
+        indices = {
+            "y min": int(transect["y"].min()),
+            "y max": int(transect["y"].max()) + 1,
+            "x min": int(transect["x"].min()),
+            "x max": int(transect["x"].max()) + 1,
         }
     else:
-        selector = {
-            model_profile["time coord"]["name"]: time_selector,
-            model_profile["y coord"]["name"]: y_selector,
-            model_profile["x coord"]["name"]: x_selector,
-        }
-    extracted_vars = []
-    use_model_coords = config["extracted dataset"].get("use model coords", False)
-    output_depth_coord = "depth" if not use_model_coords else depth_coord
-    for name, var in source_dataset.data_vars.items():
-        var_selector = (
-            selector
-            if depth_coord in var.coords
-            else {
-                c_name: c_selector
-                for c_name, c_selector in selector.items()
-                if c_name != depth_coord
+        point = selection["lon lat point"]
+        log = logger.bind(lon_lat_point=point)
+        wet_mask = None
+        if point.get("wet point", False):
+            mesh_mask_path = _calc_mesh_mask_path(point, model_profile)
+            if mesh_mask_path is None:
+                log.error("nearest wet point selection requires a mesh mask")
+                raise SystemExit(2)
+            full_grid = {
+                "depth": slice(0, None, 1),
+                "y": slice(0, None, 1),
+                "x": slice(0, None, 1),
             }
+            tmask = mesh_geometry.load_mesh_fields(
+                mesh_mask_path, ("tmask",), full_grid, surface=True
+            )["tmask"][1]
+            wet_mask = numpy.asarray(tmask).astype(bool)
+        try:
+            y_index, x_index, distance = geo_index.find_nearest_index(
+                grid_geo_index, point["lon"], point["lat"], wet_mask
+            )
+        except ValueError as exc:
+            log.error("lon lat point selection failed", reason=str(exc))
+            raise SystemExit(2)
+        log = log.bind(distance=distance)
+        indices = {
+            "y min": y_index,
+            "y max": y_index + 1,
+            "x min": x_index,
+            "x max": x_index + 1,
+        }
+    selection["grid y"] = {"y min": indices["y min"], "y max": indices["y max"]}
+    selection["grid x"] = {"x min": indices["x min"], "x max": indices["x max"]}
+    log.info("resolved geographic selection to grid indices", **indices)
+
+
+def _resolve_box_selections(config, model_profile):
+    """Resolve the boxes of a ``selection: boxes:`` stanza to grid y/x index selections,
+    and set the extraction grid y/x selections to the bounding box of all of them.
+
+    Boxes are specified by ``grid y`` and ``grid x`` index ranges,
+    or by a ``lon lat box`` that is resolved to index ranges using the geographic index
+    of the model profile geo ref dataset.
+    The resolved index ranges are stored in the boxes' stanzas.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :raises: :py:exc:`SystemExit` if the boxes can't be resolved.
+    """
+    selection = config["selection"]
+    other_selections = ({"grid y", "grid x"} | GEO_SELECTIONS) & set(selection)
+    if other_selections:
+        logger.error(
+            "boxes selection can't be combined with other horizontal selections",
+            selections=sorted(other_selections),
         )
-        var_output_coords = (
-            output_coords
-            if depth_coord in var.coords
-            else {
-                c_name: c_selector
-                for c_name, c_selector in output_coords.items()
-                if c_name != output_depth_coord
-            }
+        raise SystemExit(2)
+    boxes = selection["boxes"]
+    for box_name, box in boxes.items():
+        log = logger.bind(box=box_name)
+        if "lon lat box" in box:
+            lon_lat_box = box["lon lat box"]
+            try:
+                indices = geo_index.find_box_indices(
+                    geo_index.load_geo_index(model_profile["geo ref dataset"]),
+                    lon_lat_box["lon min"],
+                    lon_lat_box["lon max"],
+                    lon_lat_box["lat min"],
+                    lon_lat_box["lat max"],
+                )
+            except ValueError as exc:
+                log.error("lon lat box selection failed", reason=str(exc))
+                raise SystemExit(2)
+            box["grid y"] = {"y min": indices["y min"], "y max": indices["y max"]}
+            box["grid x"] = {"x min": indices["x min"], "x max": indices["x max"]}
+        if {"y max", "x max"} - (
+            set(box.get("grid y", {})) | set(box.get("grid x", {}))
+        ):
+            log.error("box requires grid y and grid x index ranges, or a lon lat box")
+            raise SystemExit(2)
+    selection["grid y"] = {
+        "y min": min(box["grid y"].get("y min", 0) for box in boxes.values()),
+        "y max": max(box["grid y"]["y max"] for box in boxes.values()),
+    }
+    selection["grid x"] = {
+        "x min": min(box["grid x"].get("x min", 0) for box in boxes.values()),
+        "x max": max(box["grid x"]["x max"] for box in boxes.values()),
+    }
+    logger.info(
+        "resolved box selections to grid indices",
+        boxes=sorted(boxes),
+        grid_y=selection["grid y"],
+        grid_x=selection["grid x"],
+    )
+
+
+def _resolve_tiles(config):
+    """Check that the ``tiles:`` stanza of a tiled extraction is consistent with the
+    rest of the extraction configuration.
+
+    The grid y/x selections of the tiles can only be calculated when the extent of the
+    source dataset grid is known,
+    so that is done by :py:func:`_calc_tile_configs`.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :raises: :py:exc:`SystemExit` if the tiles can't be combined with the other
+             selections and stages of the extraction,
+             or their sizes are not positive multiples of the selection intervals.
+    """
+    tiles = config["tiles"]
+    selection = config.get("selection", {})
+    other_selections = {"boxes", "lon lat point", "transect"} & set(selection)
+    if other_selections:
+        logger.error(
+            "tiles can't be combined with boxes, lon lat point, or transect selections",
+            selections=sorted(other_selections),
+        )
+        raise SystemExit(2)
+    if "regrid" in config:
+        logger.error("tiled extractions of regridded datasets are not supported")
+        raise SystemExit(2)
+    if {"space", "regions"} & set(config.get("reduce", {})):
+        logger.error("space and regions reductions of tiled datasets are not supported")
+        raise SystemExit(2)
+    for coord in ("y", "x"):
+        tile_size = tiles.get(f"{coord} size")
+        interval = selection.get(f"grid {coord}", {}).get(f"{coord} interval", 1)
+        if not isinstance(tile_size, int) or tile_size < 1 or tile_size % interval:
+            logger.error(
+                "tile sizes must be positive multiples of the selection intervals",
+                **{f"{coord}_size": tile_size, f"{coord}_interval": interval},
+            )
+            raise SystemExit(2)
+
+
+def _resolve_regrid(config, model_profile):
+    """Calculate the weights to regrid the extraction to the regular longitude/latitude
+    grid of its ``regrid:`` stanza,
+    and set the extraction grid y/x selections to the box of model grid points that the
+    regular grid covers.
+
+    The weights are calculated by :py:func:`reshapr.utils.regrid.load_regrid_weights`
+    the first time that they are needed, and cached.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :raises: :py:exc:`SystemExit` if the regridding weights can't be calculated.
+    """
+    selection = config.setdefault("selection", {})
+    other_selections = ({"grid y", "grid x", "boxes"} | GEO_SELECTIONS) & set(selection)
+    if other_selections:
+        logger.error(
+            "regrid can't be combined with horizontal selections",
+            selections=sorted(other_selections),
+        )
+        raise SystemExit(2)
+    if {"space", "regions"} & set(config.get("reduce", {})):
+        logger.error(
+            "space and regions reductions of regridded datasets are not supported"
+        )
+        raise SystemExit(2)
+    log = logger.bind(regrid=config["regrid"])
+    try:
+        weights, _, _ = _load_regrid_weights(config, model_profile)
+    except (KeyError, ValueError) as exc:
+        log.error("regrid weights calculation failed", reason=str(exc))
+        raise SystemExit(2)
+    selection["grid y"] = {"y min": weights["y min"], "y max": weights["y max"]}
+    selection["grid x"] = {"x min": weights["x min"], "x max": weights["x max"]}
+    log.info(
+        "resolved regrid to grid indices",
+        **{key: weights[key] for key in ("y min", "y max", "x min", "x max")},
+    )
+
+
+def _load_regrid_weights(config, model_profile):
+    """Return the weights and the regular grid of the ``regrid:`` stanza of an
+    extraction.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Regridding weights from :py:func:`reshapr.utils.regrid.load_regrid_weights`,
+             and the longitudes and latitudes of the regular grid.
+    :rtype: 3-tuple
+    """
+    regrid_config = config["regrid"]
+    lons = regrid.calc_regular_axis(
+        regrid_config["lon min"], regrid_config["lon max"], regrid_config["lon step"]
+    )
+    lats = regrid.calc_regular_axis(
+        regrid_config["lat min"], regrid_config["lat max"], regrid_config["lat step"]
+    )
+    wet_mask = None
+    mesh_mask_path = _calc_mesh_mask_path(regrid_config, model_profile)
+    if mesh_mask_path is not None:
+        full_grid = {
+            "depth": slice(0, None, 1),
+            "y": slice(0, None, 1),
+            "x": slice(0, None, 1),
+        }
+        tmask = mesh_geometry.load_mesh_fields(
+            mesh_mask_path, ("tmask",), full_grid, surface=True
+        )["tmask"][1]
+        wet_mask = numpy.asarray(tmask).astype(bool)
+    weights = regrid.load_regrid_weights(
+        model_profile["geo ref dataset"],
+        lons,
+        lats,
+        regrid_config.get("method", "bilinear"),
+        wet_mask,
+        None if mesh_mask_path is None else os.fspath(mesh_mask_path),
+    )
+    return weights, lons, lats
+
+
+def calc_ds_paths(config, model_profile):
+    """Calculate the list of dataset netCDF4 file paths to process.
+
+    The list is in order ascending date order.
+
+    If the model profile has a ``valid dates`` stanza and the extraction ends after
+    its end date,
+    the paths for the dates after it are calculated from the ``successor profile``
+    of the model profile,
+    so that an extraction can span model products that are split across several
+    model profiles.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset netCDF4 file paths in date order.
+    :rtype: list
+
+    :raises: :py:exc:`SystemExit` if the extraction dates are outside of the
+             valid dates of the model profile and its successors.
+    """
+    valid_dates = model_profile.get("valid dates", {})
+    if "start date" in valid_dates and arrow.get(config["start date"]) < arrow.get(
+        valid_dates["start date"]
+    ):
+        logger.error(
+            "extraction start date is before model profile valid dates",
+            start_date=arrow.get(config["start date"]).format("YYYY-MM-DD"),
+            valid_start_date=arrow.get(valid_dates["start date"]).format("YYYY-MM-DD"),
+        )
+        raise SystemExit(2)
+    if "end date" in valid_dates and arrow.get(config["end date"]) > arrow.get(
+        valid_dates["end date"]
+    ):
+        return _calc_stitched_ds_paths(config, model_profile)
+    results_archive_path = Path(model_profile["results archive"]["path"])
+    time_base = config["dataset"]["time base"]
+    vars_group = config["dataset"]["variables group"]
+    datasets = model_profile["results archive"]["datasets"]
+    days_per_file = datasets[time_base].get("days per file", 1)
+    nc_files_pattern = datasets[time_base][vars_group]["file pattern"]
+    log = logger.bind(
+        results_archive_path=os.fspath(results_archive_path),
+        time_base=time_base,
+        vars_group=vars_group,
+        nc_files_pattern=os.fspath(nc_files_pattern),
+        days_per_file=days_per_file,
+    )
+    log = log.bind(
+        start_date=arrow.get(config["start date"]).format("YYYY-MM-DD"),
+        end_date=arrow.get(config["end date"]).format("YYYY-MM-DD"),
+    )
+    frame, date_range = _calc_ds_dates(config, model_profile)
+    time_filters = _calc_time_filters(config)
+    if time_filters:
+        # Prune the files that contain no dates that the time filters select so that
+        # they are never opened
+        n_dates = len(date_range)
+        date_range = [
+            ds_date
+            for ds_date in date_range
+            if any(
+                _is_date_selected(day, time_filters)
+                for day in _calc_ds_file_days(ds_date, frame)
+            )
+        ]
+        log = log.bind(n_pruned_datasets=n_dates - len(date_range))
+    try:
+        if datasets[time_base][vars_group].get("discover files", False):
+            ds_paths = _discover_ds_paths(
+                results_archive_path, nc_files_pattern, frame, date_range, log
+            )
+        else:
+            format_pattern = path_resolver.compile_pattern(nc_files_pattern)
+            ds_paths = [
+                results_archive_path / format_pattern(ds_date.date())
+                for ds_date in date_range
+            ]
+    except ValueError as exc:
+        log.error("invalid model profile file pattern", reason=str(exc))
+        raise SystemExit(2)
+    if "catalog" in model_profile:
+        ds_paths = _drop_catalogued_gaps(ds_paths, frame, config, model_profile, log)
+    log = log.bind(n_datasets=len(ds_paths))
+    log.debug("collected dataset paths")
+    return ds_paths
+
+
+def _discover_ds_paths(results_archive_path, nc_files_pattern, frame, date_range, log):
+    """Discover the dataset netCDF4 file paths to process by scanning the results
+    archive directories,
+    and report the dates that have no files.
+
+    :param results_archive_path: Results archive directory.
+    :type results_archive_path: :py:class:`pathlib.Path`
+
+    :param str nc_files_pattern: Results archive file pattern.
+
+    :param str frame: Time frame of the dataset files (``day`` or ``month``).
+
+    :param list date_range: Dates of the dataset files in ascending order.
+
+    :param log: Logger bound with the dataset details.
+    :type log: :py:class:`structlog.BoundLogger`
+
+    :return: Dataset netCDF4 file paths in date order.
+    :rtype: list
+
+    :raises: :py:exc:`SystemExit` if no files are found for any of the dates.
+    """
+    found_paths = path_resolver.discover_paths(
+        results_archive_path, nc_files_pattern, date_range, frame
+    )
+    period_dates = [
+        path_resolver.calc_period_date(ds_date, frame) for ds_date in date_range
+    ]
+    missing_dates = [
+        period_date for period_date in period_dates if period_date not in found_paths
+    ]
+    if date_range and len(missing_dates) == len(period_dates):
+        log.error("no dataset files found in results archive")
+        raise SystemExit(2)
+    if missing_dates:
+        log.warning(
+            "dataset files missing from results archive",
+            n_missing_datasets=len(missing_dates),
+            gaps=path_resolver.calc_gaps(missing_dates, frame),
+        )
+    return [
+        found_paths[period_date]
+        for period_date in period_dates
+        if period_date in found_paths
+    ]
+
+
+def _drop_catalogued_gaps(ds_paths, frame, config, model_profile, log):
+    """Drop the dataset netCDF4 file paths that the catalog of the model profile
+    records as missing or unreadable,
+    and report their dates as gaps.
+
+    Paths that are not in the catalog are kept,
+    and so are paths of files that were written or changed after the catalog
+    recorded them as missing or unreadable.
+
+    :param list ds_paths: Dataset netCDF4 file paths in date order.
+
+    :param str frame: Time frame of the dataset files (``day`` or ``month``).
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :param log: Logger bound with the dataset details.
+    :type log: :py:class:`structlog.BoundLogger`
+
+    :return: Dataset netCDF4 file paths in date order.
+    :rtype: list
+
+    :raises: :py:exc:`SystemExit` if the catalog records all of the files as missing
+             or unreadable.
+    """
+    statuses = archive_catalog.load_current_gaps(
+        model_profile["catalog"]["path"],
+        config["dataset"]["time base"],
+        config["dataset"]["variables group"],
+        ds_paths,
+    )
+    gap_paths = [ds_path for ds_path in ds_paths if ds_path in statuses]
+    if not gap_paths:
+        return ds_paths
+    log = log.bind(
+        catalog=os.fspath(model_profile["catalog"]["path"]),
+        n_missing_datasets=sum(
+            statuses[ds_path][1] == "missing" for ds_path in gap_paths
+        ),
+        n_unreadable_datasets=sum(
+            statuses[ds_path][1] == "unreadable" for ds_path in gap_paths
+        ),
+    )
+    if len(gap_paths) == len(ds_paths):
+        log.error("catalog records no readable dataset files")
+        raise SystemExit(2)
+    log.warning(
+        "dropped dataset files that catalog records as missing or unreadable",
+        gaps=path_resolver.calc_gaps(
+            [
+                datetime.date.fromisoformat(statuses[ds_path][0])
+                for ds_path in gap_paths
+            ],
+            frame,
+        ),
+    )
+    gap_paths = set(gap_paths)
+    return [ds_path for ds_path in ds_paths if ds_path not in gap_paths]
+
+
+def _calc_ds_file_days(ds_date, frame):
+    """Calculate the days that a dataset netCDF4 file contains.
+
+    :param ds_date: Date of the dataset file.
+    :type ds_date: :py:class:`arrow.arrow.Arrow`
+
+    :param str frame: Time frame of the dataset files (``day`` or ``month``).
+
+    :return: Days in ascending order.
+    :rtype: list of :py:class:`datetime.date`
+    """
+    period_date = path_resolver.calc_period_date(ds_date, frame)
+    n_days = (
+        calendar.monthrange(period_date.year, period_date.month)[1]
+        if frame == "month"
+        else 1
+    )
+    return [period_date + datetime.timedelta(days=day) for day in range(n_days)]
+
+
+def _calc_stitched_ds_paths(config, model_profile):
+    """Calculate the list of dataset netCDF4 file paths to process for an extraction
+    that ends after the valid dates of its model profile.
+
+    The paths up to the end of the valid dates are calculated from the model profile,
+    and those after it from its ``successor profile``,
+    which may itself have a successor.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset netCDF4 file paths in date order.
+    :rtype: list
+
+    :raises: :py:exc:`SystemExit` if the model profile has no successor.
+    """
+    start_date = arrow.get(config["start date"])
+    valid_end_date = arrow.get(model_profile["valid dates"]["end date"])
+    if "successor profile" not in model_profile:
+        logger.error(
+            "extraction end date is after model profile valid dates",
+            end_date=arrow.get(config["end date"]).format("YYYY-MM-DD"),
+            valid_end_date=valid_end_date.format("YYYY-MM-DD"),
+        )
+        raise SystemExit(2)
+    ds_paths = []
+    if start_date <= valid_end_date:
+        ds_paths = calc_ds_paths(
+            {**config, "end date": valid_end_date.date()}, model_profile
+        )
+    successor_profile_yaml = Path(model_profile["successor profile"])
+    successor_profile = _load_model_profile(successor_profile_yaml)
+    successor_start_date = max(start_date, valid_end_date.shift(days=+1))
+    successor_paths = calc_ds_paths(
+        {**config, "start date": successor_start_date.date()}, successor_profile
+    )
+    logger.info(
+        "stitched successor model profile dataset paths",
+        successor_profile=os.fspath(successor_profile_yaml),
+        successor_start_date=successor_start_date.format("YYYY-MM-DD"),
+        n_datasets=len(ds_paths),
+        n_successor_datasets=len(successor_paths),
+    )
+    return ds_paths + successor_paths
+
+
+def _calc_ds_dates(config, model_profile):
+    """Calculate the dates of the dataset netCDF4 files to process.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Time frame of the dataset files (``day`` or ``month``),
+             and the dates of the files in ascending order.
+    :rtype: 2-tuple
+    """
+    time_base = config["dataset"]["time base"]
+    datasets = model_profile["results archive"]["datasets"]
+    days_per_file = datasets[time_base].get("days per file", 1)
+    frame = "month" if days_per_file == "month" else "day"
+    start_date = arrow.get(config["start date"])
+    end_date = arrow.get(config["end date"])
+    if frame == "month":
+        date_range = list(arrow.Arrow.range("months", start=start_date, end=end_date))
+    else:
+        # arrow.Arrow.range() takes a significant time for the thousands of days of
+        # multi-year extractions
+        date_range = [
+            start_date + datetime.timedelta(days=day)
+            for day in range(max((end_date - start_date).days + 1, 0))
+        ]
+    return frame, date_range
+
+
+def calc_ds_chunk_size(config, model_profile):
+    """Calculate chunk size dictionary for dataset loading.
+
+    This does a transformation of the "conceptual" (time, depth, y, x) chunks dict to
+    one with the correct coordinate names for the model datasets.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Chunks size dict to use for loading model datasets.
+    :rtype: dict
+    """
+    abstract_chunk_size = model_profile["chunk size"].copy()
+    time_chunk_size = abstract_chunk_size.pop("time")
+    chunk_size = {model_profile["time coord"]["name"]: time_chunk_size}
+    if "depth" in abstract_chunk_size:
+        depth_chunk_size = abstract_chunk_size.pop("depth")
+        time_base = config["dataset"]["time base"]
+        vars_group = config["dataset"]["variables group"]
+        datasets = model_profile["results archive"]["datasets"]
+        ds_depth_coord = datasets[time_base][vars_group]["depth coord"]
+        chunk_size.update({ds_depth_coord: depth_chunk_size})
+    chunk_size.update(abstract_chunk_size)
+    logger.debug("chunk size for dataset loading", chunk_size=chunk_size)
+    return chunk_size
+
+
+def get_dask_client(dask_config_yaml):
+    """Return a dask cluster client.
+
+    If :kbd:`dask_cluster` is a dask cluster configuration YAML file,
+    a :py:class:`dask.distributed.LocalCluster` is created using the parameters in the file,
+    and a client connected to that cluster is returned.
+    Closing the client also closes that cluster and its workers.
+    Otherwise,
+    :kbd:`dask_cluster` is assumed to be the IP address and port number of an existing cluster
+    in the form :kbd:`host_ip:port`,
+    and a client connected to that cluster is returned.
+
+    :param dask_config_yaml: File path and name of the YAML file to read the dask cluster configuration
+                             dictionary from,
+                             or a :kbd:`host_ip:port` string of an existing dask cluster to connect to.
+                             Please see :ref:`ReshaprDaskClusterYAMLFile` for details.
+    :type dask_config_yaml: :py:class:`pathlib.Path` or str
+
+    :return: Dask cluster client.
+    :rtype: :py:class:`dask.distributed.Client`
+
+    :raises: :py:exc:`SystemExit` if a client cannot be created,
+             or the ``io limits`` of the cluster configuration are invalid.
+    """
+    log = logger.bind(dask_config_yaml=os.fspath(dask_config_yaml))
+    try:
+        # Handle possible user-created dask cluster description
+        with Path(dask_config_yaml).open("rt") as f:
+            cluster_config = yaml.safe_load(f)
+    except FileNotFoundError:
+        # Fall back to try to find cluster description in Reshapr/cluster_configs/
+        cluster_configs_path = Path(__file__).parent.parent.parent / "cluster_configs"
+        try:
+            with Path(cluster_configs_path / dask_config_yaml).open("rt") as f:
+                cluster_config = yaml.safe_load(f)
+            log = logger.bind(
+                dask_config_yaml=os.fspath(cluster_configs_path / dask_config_yaml)
+            )
+        except FileNotFoundError:
+            # Maybe config is a host_ip:port string
+            try:
+                # Connect to an existing cluster
+                client = dask.distributed.Client(dask_config_yaml)
+                log = log.bind(dashboard_link=client.dashboard_link)
+                log.info("dask cluster dashboard")
+                return client
+            except TypeError:
+                log.error("dask cluster config file not found")
+                raise SystemExit(2)
+            except ValueError:
+                log.error(
+                    "unrecognized dask cluster config; expected YAML file path or host_ip:port"
+                )
+                raise SystemExit(1)
+            except OSError:
+                log.error(
+                    "requested dask cluster is not running or refused your connection"
+                )
+                raise SystemExit(1)
+    log.debug("loaded dask cluster config")
+    # Set up cluster described in YAML file
+    config_memory_limit = cluster_config.get("memory limit", "auto")
+    memory_limit = None if config_memory_limit == "None" else config_memory_limit
+    # Let the client start the cluster so that closing the client also closes the
+    # cluster and its worker processes
+    client = dask.distributed.Client(
+        name=cluster_config["name"],
+        n_workers=cluster_config["number of workers"],
+        threads_per_worker=cluster_config["threads per worker"],
+        processes=cluster_config["processes"],
+        memory_limit=memory_limit,
+    )
+    log = log.bind(dashboard_link=client.dashboard_link)
+    log.info("dask cluster dashboard")
+    if "io limits" in cluster_config:
+        try:
+            io_limits.configure(client, cluster_config)
+        except (TypeError, ValueError) as exc:
+            log.error("invalid dask cluster I/O limits", reason=str(exc))
+            client.close()
+            raise SystemExit(2)
+    return client
+
+
+def open_dataset(ds_paths, chunk_size, config, model_profile=None):
+    """Open a list of dataset paths as a single dataset.
+
+    This is a wrapper around :py:func:`xarray.open_mfdataset` that ensures that the
+    returned dataset contains only the variable(s) of interest and their coordinates.
+    That is done to minimize the memory size of the dataset.
+
+    The returned dataset contains dask arrays that defer processing and delegate it to
+    the dask cluster.
+
+    :param list ds_paths: Dataset netCDF4 file paths in date order.
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+                               If it has a ``catalog`` stanza,
+                               the variables of the dataset files are read from the
+                               catalog instead of from the files when the catalog
+                               records of the files are current.
+                               When the dataset paths are stitched from successor
+                               model profiles,
+                               the y and x coordinates are read from the 1st dataset
+                               file so that the files of all of the profiles are
+                               opened on the same grid.
+                               If its ``time coord`` stanza has
+                               ``synthesize: True``,
+                               the time coordinate is synthesized from the dataset
+                               file dates,
+                               and the static coordinates are read from the 1st
+                               dataset file,
+                               instead of reading them from every file.
+
+    :return: Multi-file dataset.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if multi-file dataset contains no variables.
+    """
+    unused_vars_yaml = (
+        Path(__file__).parent.parent.parent / "model_profiles" / "unused-variables.yaml"
+    )
+    with unused_vars_yaml.open("rt") as f:
+        unused_vars = yaml.safe_load(f)
+    drop_vars = {var for var in unused_vars}
+    extract_vars = _calc_source_vars(config)
+    # Use 1st and last dataset paths to calculate the set of all variables
+    # in the dataset, and from that the set of variables to drop.
+    # We need to use the variables lists from 1st and last datasets to avoid issue #51.
+    for ds_path in (ds_paths[0], ds_paths[-1]):
+        drop_vars.update(_calc_ds_data_vars(ds_path, chunk_size, model_profile))
+    drop_vars -= extract_vars
+    parallel_read = config.get("parallel read", True)
+    synthesized_ds_dates = _calc_synthesized_ds_dates(ds_paths, config, model_profile)
+    if synthesized_ds_dates is None and not _is_stitched(config, model_profile):
+        ds = xarray.open_mfdataset(
+            ds_paths,
+            chunks=chunk_size,
+            compat="override",
+            coords="minimal",
+            data_vars="minimal",
+            drop_variables=drop_vars,
+            parallel=parallel_read,
+            **io_limits.get_open_kwargs(),
+        )
+    elif synthesized_ds_dates is None:
+        # The y/x coordinates of the files of stitched successor model profiles may
+        # differ;
+        # e.g. grid indices in the HRDPS GEMLAM files, and metres in the operational
+        # files.
+        # They are dropped from all of the files and taken from the 1st file so that
+        # the grids aren't aligned into their union.
+        grid_coords = [
+            model_profile["y coord"]["name"],
+            model_profile["x coord"]["name"],
+        ]
+        grid_coord_arrays = _read_static_coords(ds_paths[0], grid_coords)
+        ds = xarray.open_mfdataset(
+            ds_paths,
+            chunks=chunk_size,
+            compat="override",
+            coords="minimal",
+            data_vars="minimal",
+            join="override",
+            drop_variables=drop_vars | set(grid_coords),
+            parallel=parallel_read,
+            **io_limits.get_open_kwargs(),
+        )
+        ds = ds.assign_coords(grid_coord_arrays)
+    else:
+        ds = _open_synthesized_time_dataset(
+            ds_paths,
+            synthesized_ds_dates,
+            chunk_size,
+            drop_vars,
+            config,
+            model_profile,
+        )
+    if not ds.data_vars:
+        logger.error(
+            "no variables in source dataset",
+            extract_vars=extract_vars,
+            possible_reasons="typo in variable name, or incorrect variables group",
+        )
+        raise SystemExit(2)
+    logger.debug("opened dataset", ds=ds)
+    return ds
+
+
+def _is_stitched(config, model_profile):
+    """Return :py:obj:`True` if the dataset paths of an extraction are stitched from
+    the model profile and its successors by :py:func:`_calc_stitched_ds_paths`.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :rtype: bool
+    """
+    if model_profile is None:
+        return False
+    valid_end_date = model_profile.get("valid dates", {}).get("end date")
+    return valid_end_date is not None and arrow.get(config["end date"]) > arrow.get(
+        valid_end_date
+    )
+
+
+def _calc_ds_data_vars(ds_path, chunk_size, model_profile):
+    """Return the names of the data variables of a dataset netCDF4 file from the catalog
+    of the model profile if it has a current record of the file,
+    otherwise by opening the file.
+
+    :param ds_path: Dataset netCDF4 file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param dict model_profile: Model profile dictionary, or :py:obj:`None`.
+
+    :rtype: set
+    """
+    if model_profile is not None and "catalog" in model_profile:
+        variables = archive_catalog.load_variables(
+            model_profile["catalog"]["path"], ds_path
+        )
+        if variables is not None:
+            return {var["name"] for var in variables if not var["is_coord"]}
+    with xarray.open_dataset(ds_path, chunks=chunk_size, engine="h5netcdf") as ds:
+        return set(ds.data_vars)
+
+
+def _calc_synthesized_ds_dates(ds_paths, config, model_profile):
+    """Calculate the dates of the dataset netCDF4 files from which the time coordinate
+    of the source dataset is synthesized.
+
+    The time coordinate is only synthesized when the ``time coord`` stanza of the
+    model profile has ``synthesize: True``,
+    the time base has a fixed time step,
+    and the dates of all of the files can be parsed from their paths with the file
+    pattern of the model profile.
+    The paths of stitched successor model profiles don't match the file pattern,
+    so the time coordinates of extractions that span model profiles are read from
+    the files.
+
+    :param list ds_paths: Dataset netCDF4 file paths in date order.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary, or :py:obj:`None`.
+
+    :return: Mapping of absolute dataset file paths to the day or month start dates
+             of the files,
+             or :py:obj:`None` if the time coordinate is to be read from the files.
+    :rtype: dict
+    """
+    if model_profile is None or not model_profile["time coord"].get(
+        "synthesize", False
+    ):
+        return None
+    time_base = config["dataset"]["time base"]
+    if time_base not in SYNTHESIZED_TIME_STEPS:
+        logger.debug(
+            "time base has no fixed time step; reading time coordinate from dataset files",
+            time_base=time_base,
+        )
+        return None
+    vars_group = config["dataset"]["variables group"]
+    frame, _ = _calc_ds_dates(config, model_profile)
+    results_archive_path = Path(model_profile["results archive"]["path"])
+    file_pattern = model_profile["results archive"]["datasets"][time_base][vars_group][
+        "file pattern"
+    ]
+    ds_dates = {}
+    for ds_path in ds_paths:
+        ds_date = path_resolver.parse_path_date(
+            results_archive_path, file_pattern, ds_path
+        )
+        if ds_date is None:
+            logger.debug(
+                "dataset file date can't be parsed from file pattern; "
+                "reading time coordinate from dataset files",
+                ds_path=os.fspath(ds_path),
+                file_pattern=file_pattern,
+            )
+            return None
+        ds_dates[os.path.abspath(ds_path)] = path_resolver.calc_period_date(
+            ds_date, frame
+        )
+    return ds_dates
+
+
+def _open_synthesized_time_dataset(
+    ds_paths, ds_dates, chunk_size, drop_vars, config, model_profile
+):
+    """Open a list of dataset paths as a single dataset with a time coordinate that is
+    synthesized from the dataset file dates,
+    and static coordinates that are read from the 1st dataset file.
+
+    The time and static coordinates are dropped when the files are opened,
+    so only the array metadata of the variables is read from each file.
+
+    :param list ds_paths: Dataset netCDF4 file paths in date order.
+
+    :param dict ds_dates: Mapping of absolute dataset file paths to the day or month
+                          start dates of the files.
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param set drop_vars: Variables to drop from the dataset.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Multi-file dataset.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    time_base = config["dataset"]["time base"]
+    time_coord = model_profile["time coord"]["name"]
+    offset = pandas.Timedelta(
+        model_profile["time coord"]
+        .get("offsets", {})
+        .get(time_base, SYNTHESIZED_TIME_OFFSETS[time_base])
+    )
+    frame, _ = _calc_ds_dates(config, model_profile)
+    static_coords = [model_profile["y coord"]["name"], model_profile["x coord"]["name"]]
+    if "depth" in model_profile["chunk size"]:
+        datasets = model_profile["results archive"]["datasets"]
+        vars_group = config["dataset"]["variables group"]
+        static_coords.insert(0, datasets[time_base][vars_group]["depth coord"])
+    static_coord_arrays = _read_static_coords(ds_paths[0], static_coords)
+    ds = xarray.open_mfdataset(
+        ds_paths,
+        chunks=chunk_size,
+        compat="override",
+        coords="minimal",
+        data_vars="minimal",
+        join="override",
+        drop_variables=drop_vars | {time_coord} | set(static_coords),
+        parallel=config.get("parallel read", True),
+        **io_limits.get_open_kwargs(),
+        preprocess=functools.partial(
+            _synthesize_time_coord,
+            ds_dates=ds_dates,
+            time_coord=time_coord,
+            frame=frame,
+            step=SYNTHESIZED_TIME_STEPS[time_base],
+            offset=offset,
+        ),
+    )
+    ds = ds.assign_coords(static_coord_arrays)
+    logger.debug(
+        "synthesized time coordinate from dataset file dates",
+        time_coord=time_coord,
+        offset=str(offset),
+        static_coords=list(static_coord_arrays),
+    )
+    return ds
+
+
+def _read_static_coords(ds_path, coords):
+    """Read the values of coordinates that are the same for all of the dataset files
+    from a dataset netCDF4 file.
+
+    :param ds_path: Dataset netCDF4 file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :param list coords: Names of the coordinates.
+
+    :return: Mapping of the names of the coordinates that are variables in the file
+             to their loaded data arrays.
+    :rtype: dict
+    """
+    with xarray.open_dataset(ds_path, engine="h5netcdf") as ds:
+        return {coord: ds[coord].load() for coord in coords if coord in ds.variables}
+
+
+def _synthesize_time_coord(ds, ds_dates, time_coord, frame, step, offset):
+    """Assign the time coordinate of a dataset file that is calculated from the file date.
+
+    This is the ``preprocess`` function of :py:func:`xarray.open_mfdataset` for
+    :py:func:`_open_synthesized_time_dataset`.
+
+    :param ds: Dataset of a dataset netCDF4 file.
+    :type ds: :py:class:`xarray.Dataset`
+
+    :param dict ds_dates: Mapping of absolute dataset file paths to the day or month
+                          start dates of the files.
+
+    :param str time_coord: Name of the time coordinate.
+
+    :param str frame: Time frame of the dataset files (``day`` or ``month``).
+
+    :param step: Time step between time records.
+    :type step: :py:class:`pandas.Timedelta`
+
+    :param offset: Offset of the first time record from the start of the file date.
+    :type offset: :py:class:`pandas.Timedelta`
+
+    :return: Dataset with time coordinate.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`ValueError` if the number of time records in the file is not
+             the number of time steps in its days.
+    """
+    ds_path = ds.encoding["source"]
+    ds_date = ds_dates[os.path.abspath(ds_path)]
+    n_time_records = ds.sizes[time_coord]
+    n_steps = len(_calc_ds_file_days(ds_date, frame)) * (
+        pandas.Timedelta(days=1) // step
+    )
+    if n_time_records != n_steps:
+        raise ValueError(
+            f"{ds_path} has {n_time_records} time records instead of the {n_steps} "
+            f"that its time coordinate is synthesized for; "
+            f"remove synthesize: True from the model profile time coord stanza"
+        )
+    times = pandas.date_range(
+        pandas.Timestamp(ds_date) + offset, periods=n_time_records, freq=step
+    )
+    return ds.assign_coords({time_coord: times})
+
+
+def _open_source_dataset(ds_paths, chunk_size, config, model_profile):
+    """Open the source dataset of an extraction from the aggregate cache,
+    if it can answer the extraction,
+    otherwise from the dataset paths.
+
+    :param list ds_paths: Dataset netCDF4 file paths in date order.
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Source dataset.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    cache_levels = _resolve_aggregate_cache(config, model_profile)
+    if not cache_levels:
+        return _select_time_records(
+            open_dataset(ds_paths, chunk_size, config, model_profile),
+            config,
+            model_profile,
+        )
+    return _open_aggregate_cache_dataset(
+        cache_levels, chunk_size, config, model_profile
+    )
+
+
+def _select_time_records(source_ds, config, model_profile):
+    """Select the time records of the source dataset that match the time filters of
+    the ``selection`` stanza of an extraction.
+
+    :param source_ds: Source dataset.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Source dataset with the selected time records.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if no time records match the time filters.
+    """
+    time_filters = _calc_time_filters(config)
+    if not time_filters:
+        return source_ds
+    time_coord = model_profile["time coord"]["name"]
+    time_index = source_ds.indexes[time_coord]
+    selected = numpy.ones(len(time_index), dtype=bool)
+    if "months" in time_filters:
+        selected &= numpy.isin(time_index.month, sorted(time_filters["months"]))
+    if "days of week" in time_filters:
+        selected &= numpy.isin(
+            time_index.dayofweek, sorted(time_filters["days of week"])
+        )
+    if "hours" in time_filters:
+        selected &= numpy.isin(time_index.hour, sorted(time_filters["hours"]))
+    if "dates" in time_filters:
+        # Compare dates as YYYYMMDD integers so that cftime indexes work too
+        selected &= numpy.isin(
+            numpy.asarray(time_index.year) * 10000
+            + numpy.asarray(time_index.month) * 100
+            + numpy.asarray(time_index.day),
+            [
+                date.year * 10000 + date.month * 100 + date.day
+                for date in time_filters["dates"]
+            ],
+        )
+    if not selected.any():
+        logger.error(
+            "no time records match selection time filters",
+            time_filters={
+                name: sorted(values) for name, values in time_filters.items()
+            },
+        )
+        raise SystemExit(2)
+    logger.debug(
+        "selected time records",
+        n_time_records=int(selected.sum()),
+        n_source_time_records=len(time_index),
+    )
+    return source_ds.isel({time_coord: numpy.flatnonzero(selected)})
+
+
+def _open_aggregate_cache_dataset(cache_levels, chunk_size, config, model_profile):
+    """Open the source dataset of an extraction from the aggregate cache.
+
+    Cache entries that are missing or out of date are calculated first.
+    The dates that the cache levels don't cover are read from the results archive
+    files.
+
+    :param tuple cache_levels: Cache levels to read in order from coarsest to finest.
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Source dataset.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    stage_config = config.get("resample", config.get("climatology"))
+    aggregation = stage_config.get("aggregation", "mean")
+    entry_paths, ds_paths = _populate_aggregate_cache(
+        cache_levels, aggregation, chunk_size, config, model_profile
+    )
+    time_coord = model_profile["time coord"]["name"]
+    parallel_read = config.get("parallel read", True)
+    datasets = [
+        xarray.open_mfdataset(
+            var_entry_paths,
+            chunks={dim: size for dim, size in chunk_size.items() if dim != time_coord},
+            parallel=parallel_read,
+        )
+        for var_entry_paths in entry_paths.values()
+        if var_entry_paths
+    ]
+    if ds_paths:
+        datasets.append(
+            open_dataset(ds_paths, chunk_size, config, model_profile).reset_coords(
+                drop=True
+            )
+        )
+    source_ds = xarray.merge(
+        xarray.concat(
+            [ds[[var]] for ds in datasets if var in ds.data_vars],
+            dim=time_coord,
+            data_vars="minimal",
+            coords="minimal",
+            compat="override",
+        ).sortby(time_coord)
+        for var in entry_paths
+    )
+    logger.debug("opened dataset", ds=source_ds)
+    return source_ds
+
+
+def _populate_aggregate_cache(
+    cache_levels, aggregation, chunk_size, config, model_profile
+):
+    """Calculate the aggregate cache entries of an extraction that are missing
+    or out of date.
+
+    Each month of the extraction is covered by its month entry if the extraction
+    includes the whole month and ``month`` is one of the cache levels,
+    otherwise by the day entries of its dates if ``day`` is one of the cache levels.
+    Month entries are calculated from day entries when ``day`` is one of the cache
+    levels,
+    so the results archive files are only read for the dates of missing or out of date
+    day entries.
+
+    :param tuple cache_levels: Cache levels in order from coarsest to finest.
+
+    :param str aggregation: Aggregation; e.g. ``mean``.
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of variable names to their cache entry paths in date order,
+             and the dataset paths of the dates that the cache levels don't cover.
+    :rtype: 2-tuple
+    """
+    source_vars = sorted(_calc_source_vars(config))
+    time_coord = model_profile["time coord"]["name"]
+    start_date = arrow.get(config["start date"])
+    end_date = arrow.get(config["end date"])
+    entry_paths = {var: [] for var in source_vars}
+    ds_paths = []
+    n_entries = {level: 0 for level in cache_levels}
+    n_built = 0
+    for month_start, month_end in arrow.Arrow.span_range("month", start_date, end_date):
+        period_start = max(month_start, start_date)
+        period_end = min(month_end.floor("day"), end_date)
+        period_config = {
+            **config,
+            "start date": period_start.date(),
+            "end date": period_end.date(),
+        }
+        whole_month = (period_start, period_end) == (
+            month_start,
+            month_end.floor("day"),
+        )
+        if "month" in cache_levels and whole_month:
+            month_ds_paths = calc_ds_paths(period_config, model_profile)
+            month_entry_paths = _calc_aggregate_entry_paths(
+                "month", month_start, source_vars, aggregation, config, model_profile
+            )
+            stale_vars = [
+                var
+                for var, entry_path in month_entry_paths.items()
+                if not aggregate_cache.is_valid(entry_path, month_ds_paths)
+            ]
+            if stale_vars:
+                if "day" in cache_levels:
+                    day_entry_paths, n_day_built = _update_day_entries(
+                        stale_vars,
+                        aggregation,
+                        chunk_size,
+                        period_config,
+                        model_profile,
+                    )
+                    n_built += n_day_built
+                    month_source_ds = xarray.open_mfdataset(
+                        [
+                            entry_path
+                            for var_day_entry_paths in day_entry_paths.values()
+                            for entry_path in var_day_entry_paths
+                        ]
+                    )
+                else:
+                    month_source_ds = open_dataset(
+                        month_ds_paths,
+                        chunk_size,
+                        {**period_config, "extract variables": stale_vars},
+                        model_profile,
+                    )
+                with month_source_ds:
+                    month_ds = aggregate_cache.calc_entries(
+                        month_source_ds, "month", aggregation, time_coord
+                    )[pandas.Timestamp(month_start.date())]
+                    _write_aggregate_entries(
+                        [
+                            (
+                                month_ds,
+                                {var: month_entry_paths[var] for var in stale_vars},
+                            )
+                        ],
+                        time_coord,
+                    )
+                n_built += len(stale_vars)
+            for var, entry_path in month_entry_paths.items():
+                entry_paths[var].append(entry_path)
+            n_entries["month"] += 1
+        elif "day" in cache_levels:
+            day_entry_paths, n_day_built = _update_day_entries(
+                source_vars, aggregation, chunk_size, period_config, model_profile
+            )
+            n_built += n_day_built
+            for var, var_day_entry_paths in day_entry_paths.items():
+                entry_paths[var].extend(var_day_entry_paths)
+            n_entries["day"] += (period_end - period_start).days + 1
+        else:
+            ds_paths.extend(calc_ds_paths(period_config, model_profile))
+    logger.info(
+        "updated aggregate cache",
+        aggregation=aggregation,
+        n_entries=n_entries,
+        n_built_var_entries=n_built,
+        n_archive_datasets=len(ds_paths),
+    )
+    return entry_paths, ds_paths
+
+
+def _update_day_entries(source_vars, aggregation, chunk_size, config, model_profile):
+    """Calculate the day entries of the aggregate cache for the dates of the config
+    that are missing or out of date.
+
+    The results archive files of those dates are opened together,
+    and the entries of all of the days are written by :py:func:`write_netcdfs`,
+    in batches that fit in the memory of the dask cluster.
+
+    :param list source_vars: Names of variables to calculate entries for.
+
+    :param str aggregation: Aggregation; e.g. ``mean``.
+
+    :param dict chunk_size: Chunks size to use for loading datasets.
+
+    :param dict config: Processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of variable names to their day entry paths in date order,
+             and the number of variable entries that were calculated.
+    :rtype: 2-tuple
+    """
+    time_coord = model_profile["time coord"]["name"]
+    entry_paths = {var: [] for var in source_vars}
+    stale_entry_paths = {}
+    stale_ds_paths = []
+    for day in arrow.Arrow.range(
+        "day", arrow.get(config["start date"]), arrow.get(config["end date"])
+    ):
+        day_ds_paths = calc_ds_paths(
+            {**config, "start date": day.date(), "end date": day.date()},
+            model_profile,
+        )
+        day_entry_paths = _calc_aggregate_entry_paths(
+            "day", day, source_vars, aggregation, config, model_profile
+        )
+        stale_day_entry_paths = {
+            var: entry_path
+            for var, entry_path in day_entry_paths.items()
+            if not aggregate_cache.is_valid(entry_path, day_ds_paths)
+        }
+        if stale_day_entry_paths:
+            stale_entry_paths[pandas.Timestamp(day.date())] = stale_day_entry_paths
+            stale_ds_paths.extend(
+                ds_path for ds_path in day_ds_paths if ds_path not in stale_ds_paths
+            )
+        for var, entry_path in day_entry_paths.items():
+            entry_paths[var].append(entry_path)
+    if not stale_entry_paths:
+        return entry_paths, 0
+    stale_vars = sorted(
+        {
+            var
+            for day_entry_paths in stale_entry_paths.values()
+            for var in day_entry_paths
+        }
+    )
+    with open_dataset(
+        stale_ds_paths,
+        chunk_size,
+        {**config, "extract variables": stale_vars},
+        model_profile,
+    ) as source_ds:
+        day_datasets = aggregate_cache.calc_entries(
+            source_ds, "day", aggregation, time_coord
+        )
+        _write_aggregate_entries(
+            [
+                (day_datasets[day], day_entry_paths)
+                for day, day_entry_paths in stale_entry_paths.items()
+            ],
+            time_coord,
+        )
+    n_built = sum(
+        len(day_entry_paths) for day_entry_paths in stale_entry_paths.values()
+    )
+    return entry_paths, n_built
+
+
+def _calc_aggregate_entry_paths(
+    level, period, source_vars, aggregation, config, model_profile
+):
+    """Calculate the aggregate cache entry paths of the variables for a period.
+
+    :param str level: Cache level; ``day`` or ``month``.
+
+    :param period: Start of the day or month of the entries.
+    :type period: :py:class:`arrow.Arrow`
+
+    :param list source_vars: Variable names.
+
+    :param str aggregation: Aggregation; e.g. ``mean``.
+
+    :param dict config: Processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of variable names to cache entry paths.
+    :rtype: dict
+    """
+    return {
+        var: aggregate_cache.calc_entry_path(
+            model_profile["aggregate cache"]["path"],
+            config["dataset"]["time base"],
+            config["dataset"]["variables group"],
+            aggregation,
+            level,
+            var,
+            period,
+        )
+        for var in source_vars
+    }
+
+
+def _write_aggregate_entries(entries, time_coord):
+    """Write the variables of aggregate datasets to their cache entry files.
+
+    The entries are computed by :py:func:`write_netcdfs`,
+    together in batches that fit in the memory of the dask cluster.
+    The files are written to temporary paths and then renamed,
+    so that an interrupted write can't leave a partial entry that looks valid,
+    and out of date entries can be replaced while they are open.
+
+    :param list entries: 2-tuples of single time aggregate datasets,
+                         and mappings of their variable names to cache entry paths.
+
+    :param str time_coord: Name of the time coordinate.
+    """
+    writes = []
+    for entry_ds, entry_paths in entries:
+        for var, entry_path in entry_paths.items():
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            var_ds = entry_ds[[var]]
+            writes.append(
+                (
+                    var_ds,
+                    entry_path.with_suffix(".tmp"),
+                    *aggregate_cache.prep_entry_write(var_ds, time_coord),
+                )
+            )
+    write_netcdfs(writes)
+    for _, entry_paths in entries:
+        for entry_path in entry_paths.values():
+            entry_path.with_suffix(".tmp").replace(entry_path)
+
+
+def _calc_source_vars(config):
+    """Calculate the set of variables to load from the source dataset.
+
+    That is the ``extract variables`` from the extraction configuration,
+    plus any variables that are required by other processing stages;
+    e.g. cell thicknesses for depth reduction, or column kernel input variables.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :return: Names of variables to load from the source dataset.
+    :rtype: set
+    """
+    source_vars = {var for var in config["extract variables"]}
+    reduce_depth = config.get("reduce", {}).get("depth", {})
+    if reduce_depth and "mesh mask" not in reduce_depth:
+        # Depth reduction without a mesh mask uses the cell thickness variable from the
+        # source dataset as its weights
+        source_vars.add(reduce_depth.get("cell thickness var", "e3t"))
+    for kernel_config in config.get("column kernels", {}).values():
+        source_vars.add(kernel_config["variable"])
+    if "vector field" in config:
+        source_vars.add(config["vector field"]["u variable"])
+    for name, derived_config in config.get("derived variables", {}).items():
+        expression = derived_config["expression"]
+        try:
+            _, input_vars = expressions.compile_expression(expression)
+        except ValueError as exc:
+            logger.error(
+                "invalid derived variable expression",
+                derived_var=name,
+                expression=expression,
+                reason=str(exc),
+            )
+            raise SystemExit(2)
+        source_vars.update(input_vars)
+    isopycnals = config.get("selection", {}).get("isopycnals", {})
+    if isopycnals:
+        source_vars.add(isopycnals["density var"])
+    # Derived variables can be inputs of other derived variables or column kernels,
+    # but they aren't in the source dataset
+    source_vars -= set(config.get("derived variables", {}))
+    return source_vars
+
+
+def _load_compare_model_profile(config):
+    """Check the ``compare:`` stanza of an extraction configuration,
+    and load its model profile.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :return: ``compare:`` model profile dictionary,
+             or :py:obj:`None` if there is no ``compare:`` stanza in the extraction
+             configuration.
+    :rtype: dict
+
+    :raises: :py:exc:`SystemExit` if the ``compare:`` stanza is invalid,
+             if the extraction has a depth reduction without a ``mesh mask``,
+             or its model profile can't be loaded.
+    """
+    if "compare" not in config:
+        return None
+    outputs = config["compare"].get("output", ["difference"])
+    unknown_outputs = set(outputs) - COMPARE_OUTPUTS
+    if not outputs or unknown_outputs:
+        logger.error(
+            "unknown compare output",
+            outputs=outputs,
+            valid_outputs=sorted(COMPARE_OUTPUTS),
+        )
+        raise SystemExit(2)
+    if {"bias", "rmse"} & set(outputs) and {"resample", "climatology"} & set(config):
+        logger.error(
+            "resample and climatology of compare statistics are not supported",
+            outputs=outputs,
+        )
+        raise SystemExit(2)
+    if "vector field" in config:
+        logger.error("compare extractions of vector fields are not supported")
+        raise SystemExit(2)
+    reduce_depth = config.get("reduce", {}).get("depth", {})
+    if reduce_depth and "mesh mask" not in reduce_depth:
+        # The cell thickness variable would be compared like the extracted variables
+        # instead of weighting the depth reduction
+        logger.error(
+            "compare extractions with depth reduction require a reduce depth mesh mask",
+            cell_thickness_var=reduce_depth.get("cell thickness var", "e3t"),
+        )
+        raise SystemExit(2)
+    return _load_model_profile(Path(config["compare"]["model profile"]))
+
+
+def _open_compare_dataset(config, compare_model_profile):
+    """Open the source dataset of the ``compare:`` model profile of an extraction.
+
+    The dataset is opened with the same dataset, dates, variables,
+    and selection time filters as the extraction.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict compare_model_profile: ``compare:`` model profile dictionary.
+
+    :return: Multi-file dataset,
+             or a null context manager if there is no ``compare:`` stanza
+             in the extraction configuration.
+    :rtype: :py:class:`xarray.Dataset` or :py:class:`contextlib.nullcontext`
+    """
+    if compare_model_profile is None:
+        return contextlib.nullcontext()
+    compare_ds_paths = calc_ds_paths(config, compare_model_profile)
+    compare_chunk_size = calc_ds_chunk_size(config, compare_model_profile)
+    return _select_time_records(
+        open_dataset(
+            compare_ds_paths, compare_chunk_size, config, compare_model_profile
+        ),
+        config,
+        compare_model_profile,
+    )
+
+
+def _open_vector_v_dataset(config, model_profile):
+    """Open the dataset that contains the v-component of a vector field extraction.
+
+    The dataset is opened with the same dataset files and time records as the
+    u-component dataset,
+    including the pruning and selection of the ``selection:`` time filters.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Multi-file dataset containing the v-component variable,
+             or a null context manager if there is no ``vector field`` stanza
+             in the extraction configuration.
+    :rtype: :py:class:`xarray.Dataset` or :py:class:`contextlib.nullcontext`
+    """
+    if "vector field" not in config:
+        return contextlib.nullcontext()
+    vector_config = config["vector field"]
+    v_config = {
+        "dataset": {
+            **config["dataset"],
+            "variables group": vector_config["v variables group"],
+        },
+        "start date": config["start date"],
+        "end date": config["end date"],
+        "extract variables": [vector_config["v variable"]],
+        "selection": {
+            name: values
+            for name, values in config.get("selection", {}).items()
+            if name in TIME_FILTERS
+        },
+        "parallel read": config.get("parallel read", True),
+    }
+    v_ds_paths = calc_ds_paths(v_config, model_profile)
+    v_chunk_size = calc_ds_chunk_size(v_config, model_profile)
+    return _select_time_records(
+        open_dataset(v_ds_paths, v_chunk_size, v_config, model_profile),
+        v_config,
+        model_profile,
+    )
+
+
+def _calc_vector_field_vars(source_ds, v_source_ds, config, model_profile):
+    """Replace the staggered u and v components of a vector field in the source dataset
+    with components on the T-grid points, rotated to east and north if requested,
+    and optionally add speed and direction variables.
+
+    The u-component is averaged from the west and east faces of the T-grid cells,
+    and the v-component from their south and north faces.
+    Rotation uses the angle of the grid x-direction relative to east calculated from the
+    u-point longitudes and latitudes (``glamu``, ``gphiu``) in the mesh mask.
+
+    All of the calculations are lazy, so only the results on the T-grid points are
+    materialized when the extracted dataset is written.
+
+    :param source_ds: Dataset containing the u-component variable.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param v_source_ds: Dataset containing the v-component variable.
+    :type v_source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Source dataset with the vector field variables in place of the u-component
+             variable.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if speed and direction are requested without rotation,
+             or if rotation is requested and there is no mesh mask.
+    """
+    vector_config = config["vector field"]
+    u_var_name = vector_config["u variable"]
+    v_var_name = vector_config["v variable"]
+    rotate = vector_config.get("rotate", True)
+    speed_and_direction = vector_config.get("speed and direction", False)
+    if speed_and_direction and not rotate:
+        logger.error(
+            "vector field speed and direction require rotation to east and north"
+        )
+        raise SystemExit(2)
+    mesh_mask_path = _calc_mesh_mask_path(vector_config, model_profile)
+    if rotate and mesh_mask_path is None:
+        logger.error("vector field rotation requires a mesh mask")
+        raise SystemExit(2)
+    logger.info(
+        "calculating vector field variables",
+        u_var=u_var_name,
+        v_var=v_var_name,
+        rotate=rotate,
+        speed_and_direction=speed_and_direction,
+    )
+    time_base = config["dataset"]["time base"]
+    datasets = model_profile["results archive"]["datasets"][time_base]
+    u_depth_coord = datasets[config["dataset"]["variables group"]].get("depth coord")
+    v_depth_coord = datasets[vector_config["v variables group"]].get("depth coord")
+    y_coord = model_profile["y coord"]["name"]
+    x_coord = model_profile["x coord"]["name"]
+    u = source_ds[u_var_name].reset_coords(drop=True)
+    v = v_source_ds[v_var_name].reset_coords(drop=True)
+    if v_depth_coord in v.dims and v_depth_coord != u_depth_coord:
+        v = v.rename({v_depth_coord: u_depth_coord}).assign_coords(
+            {u_depth_coord: u[u_depth_coord]}
+        )
+    # Average from cell faces to T-grid points
+    u_t = 0.5 * (u + u.shift({x_coord: 1}))
+    v_t = 0.5 * (v + v.shift({y_coord: 1}))
+    if not rotate:
+        u_t.attrs = u.attrs.copy()
+        v_t.attrs = v.attrs.copy()
+        vector_vars = {u_var_name: u_t, v_var_name: v_t}
+    else:
+        mesh_fields = mesh_geometry.load_mesh_fields(
+            mesh_mask_path,
+            ("glamu", "gphiu"),
+            {
+                "depth": slice(0, None, 1),
+                "y": slice(0, None, 1),
+                "x": slice(0, None, 1),
+            },
+        )
+        angles = _calc_grid_angles(
+            mesh_fields["glamu"][1], mesh_fields["gphiu"][1], y_coord, x_coord
+        )
+        eastward = u_t * numpy.cos(angles) - v_t * numpy.sin(angles)
+        northward = u_t * numpy.sin(angles) + v_t * numpy.cos(angles)
+        eastward.attrs = {
+            "standard_name": "eastward_sea_water_velocity",
+            "long_name": "Eastward Velocity",
+            "units": u.attrs["units"],
+        }
+        northward.attrs = {
+            "standard_name": "northward_sea_water_velocity",
+            "long_name": "Northward Velocity",
+            "units": v.attrs["units"],
+        }
+        vector_vars = {"eastward_velocity": eastward, "northward_velocity": northward}
+        if speed_and_direction:
+            speed = numpy.hypot(eastward, northward)
+            speed.attrs = {
+                "standard_name": "sea_water_speed",
+                "long_name": "Current Speed",
+                "units": u.attrs["units"],
+            }
+            # Oceanographic convention: direction toward which the current flows,
+            # in degrees clockwise from north
+            direction = (90 - numpy.degrees(numpy.arctan2(northward, eastward))) % 360
+            direction.attrs = {
+                "standard_name": "direction_of_sea_water_velocity",
+                "long_name": "Current Direction",
+                "units": "degree",
+            }
+            vector_vars.update({"speed": speed, "direction": direction})
+    vector_ds = source_ds.drop_vars(u_var_name).assign(vector_vars)
+    logger.debug("vector field dataset", vector_ds=vector_ds)
+    return vector_ds
+
+
+def _calc_grid_angles(glamu, gphiu, y_coord, x_coord):
+    """Calculate the angles of the model grid x-direction relative to east at the
+    T-grid points.
+
+    The angle at each T-grid point is calculated from the longitudes and latitudes of the
+    u-points on the west and east faces of the grid cell.
+    The angles in the westernmost column of the grid are :py:obj:`numpy.nan`.
+
+    :param glamu: Longitudes of the u-grid points.
+    :type glamu: :py:class:`numpy.ndarray` or :py:class:`dask.array.Array`
+
+    :param gphiu: Latitudes of the u-grid points.
+    :type gphiu: :py:class:`numpy.ndarray` or :py:class:`dask.array.Array`
+
+    :param str y_coord: Name of the y dimension.
+
+    :param str x_coord: Name of the x dimension.
+
+    :return: Angles in radians, counter-clockwise from east.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    glamu = xarray.DataArray(glamu, dims=(y_coord, x_coord))
+    gphiu = xarray.DataArray(gphiu, dims=(y_coord, x_coord))
+    mean_lats = 0.5 * (gphiu + gphiu.shift({x_coord: 1}))
+    d_lons = (glamu - glamu.shift({x_coord: 1})) * numpy.cos(numpy.radians(mean_lats))
+    d_lats = gphiu - gphiu.shift({x_coord: 1})
+    return numpy.arctan2(d_lats, d_lons)
+
+
+def calc_output_coords(source_dataset, config, model_profile):
+    """Construct the coordinates for the dataset containing the extracted variable(s).
+
+    The returned coordinates container has the following mapping of attributes to
+    coordinate names:
+
+    * ``time``: ``time``
+    * ``depth``: ``depth``
+    * ``y_index``: ``gridY``
+    * ``x_index``: ``gridX``
+
+    except if ``extracted dataset: use model coords: True`` is set in the
+    extraction configuration, in which case the output coordinates will be the same as the
+    model coordinates.
+
+    :param source_dataset: Dataset from which variables are being extracted.
+    :type source_dataset: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of coordinate names to their data arrays.
+    :rtype: dict
+    """
+    use_model_coords = config["extracted dataset"].get("use model coords", False)
+    time_interval = config.get("selection", {}).get("time interval", 1)
+    # stop=None in slice() means the length of the array without having to know what that is
+    time_selector = {model_profile["time coord"]["name"]: slice(0, None, time_interval)}
+    output_time_coord_name = (
+        "time" if not use_model_coords else model_profile["time coord"]["name"]
+    )
+    times = create_dataarray(
+        output_time_coord_name,
+        source_dataset[model_profile["time coord"]["name"]].isel(time_selector),
+        attrs=calc_time_coord_attrs(config["dataset"]["time base"], model_profile),
+    )
+    logger.debug("extraction time coordinate", time=times)
+
+    # There are 2 special cases for which there is no depth coordinate:
+    #   1. The dataset does not have a depth coordinate; e.g. HRDPS surface forcing fields
+    #   2. The variable does not have a depth coordinate; e.g. sea surface height
+    #      in SalishSeaCast grid_T dataset
+    if "depth" not in model_profile["chunk size"]:
+        # Dataset does not have a depth coordinate; e.g. HRDPS surface forcing fields
+        include_depth_coord = False
+        output_depth_coord_name = None
+        depths = None
+    else:
+        datasets = model_profile["results archive"]["datasets"]
+        time_base = config["dataset"]["time base"]
+        vars_group = config["dataset"]["variables group"]
+        depth_coord = datasets[time_base][vars_group]["depth coord"]
+        include_depth_coord = any(
+            [depth_coord in var.coords for var in source_dataset.data_vars.values()]
+        )
+        if not include_depth_coord:
+            # Variable does not have a depth coordinate; e.g. sea surface height in SalishSeaCast
+            # grid_T dataset
+            output_depth_coord_name = None
+            depths = None
+        else:
+            # At least 1 variable has a depth coordinate, so include depth in output dataset
+            # coordinates
+            depth_min = config.get("selection", {}).get("depth", {}).get("depth min", 0)
+            depth_max = (
+                config.get("selection", {}).get("depth", {}).get("depth max", None)
+            )
+            depth_interval = (
+                config.get("selection", {}).get("depth", {}).get("depth interval", 1)
+            )
+            depth_selector = slice(depth_min, depth_max, depth_interval)
+            output_depth_coord_name = "depth" if not use_model_coords else depth_coord
+            depths = create_dataarray(
+                output_depth_coord_name,
+                source_dataset[depth_coord].isel({depth_coord: depth_selector}),
+                attrs={
+                    "standard_name": "sea_floor_depth",
+                    "long_name": "Sea Floor Depth",
+                    "units": "metres",
+                    "positive": "down",
+                },
+            )
+            logger.debug("extraction depth coordinate", depth=depths)
+
+    y_min = config.get("selection", {}).get("grid y", {}).get("y min", 0)
+    y_max = config.get("selection", {}).get("grid y", {}).get("y max", None)
+    y_interval = config.get("selection", {}).get("grid y", {}).get("y interval", 1)
+    y_selector = slice(y_min, y_max, y_interval)
+    y_coord = model_profile["y coord"]["name"]
+    output_y_coord_name = (
+        "gridY" if not use_model_coords else model_profile["y coord"]["name"]
+    )
+    y_indices = create_dataarray(
+        output_y_coord_name,
+        source_dataset[y_coord].isel({y_coord: y_selector}).astype(int),
+        attrs={
+            "standard_name": "y",
+            "long_name": "Grid Y",
+            "units": model_profile["y coord"].get("units", "count"),
+            "comment": model_profile["y coord"].get(
+                "comment",
+                f"{output_y_coord_name} values are grid indices in the model y-direction",
+            ),
+        },
+    )
+    logger.debug("extraction y coordinate", y_index=y_indices)
+
+    x_min = config.get("selection", {}).get("grid x", {}).get("x min", 0)
+    x_max = config.get("selection", {}).get("grid x", {}).get("x max", None)
+    x_interval = config.get("selection", {}).get("grid x", {}).get("x interval", 1)
+    x_selector = slice(x_min, x_max, x_interval)
+    x_coord = model_profile["x coord"]["name"]
+    output_x_coord_name = (
+        "gridX" if not use_model_coords else model_profile["x coord"]["name"]
+    )
+    x_indices = create_dataarray(
+        output_x_coord_name,
+        source_dataset[x_coord].isel({x_coord: x_selector}).astype(int),
+        attrs={
+            "standard_name": "x",
+            "long_name": "Grid X",
+            "units": model_profile["x coord"].get("units", "count"),
+            "comment": model_profile["x coord"].get(
+                "comment",
+                f"{output_x_coord_name} values are grid indices in the model x-direction",
+            ),
+        },
+    )
+    logger.debug("extraction x coordinate", x_index=x_indices)
+
+    return (
+        {
+            output_time_coord_name: times,
+            output_depth_coord_name: depths,
+            output_y_coord_name: y_indices,
+            output_x_coord_name: x_indices,
+        }
+        if include_depth_coord
+        else {
+            output_time_coord_name: times,
+            output_y_coord_name: y_indices,
+            output_x_coord_name: x_indices,
+        }
+    )
+
+
+def calc_time_coord_attrs(time_base, model_profile):
+    """
+    :param str time_base: Time base for extraction or time interval for resampling.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Time coordinate netCDF attributes.
+    :rtype: dict
+    """
+    extract_time_origin = model_profile["extraction time origin"]
+    match time_base:
+        case "hour":
+            time_offset = "00:30:00"
+            example = (
+                "e.g. the field average values for the first hour of 8 February 2022 have "
+                "a time value of 2022-02-08 00:30:00Z"
+            )
+        case "day":
+            time_offset = "12:00:00"
+            example = (
+                "e.g. the field average values for 8 February 2022 have "
+                "a time value of 2022-02-08 12:00:00Z"
+            )
+        case "month":
+            time_offset = "12:00:00"
+            example = (
+                "e.g. the field average values for January 2022 have "
+                "a time value of 2022-01-15 12:00:00Z, "
+                "and those for April 2022 have a time value of 2022-04-15 00:00:00Z"
+            )
+        case _:
+            time_offset = "00:30:00"
+            example = ""
+    comment = (
+        "time values are UTC at the centre of the intervals over which the "
+        "calculated model results are averaged"
+    )
+    comment = f"{comment}; {example}" if example else comment
+    time_attrs = {
+        "standard_name": "time",
+        "long_name": "Time Axis",
+        "time_origin": f"{extract_time_origin} {time_offset}",
+        "comment": comment,
+        # time_origin and units are provided by encoding when dataset is written to netCDF file
+    }
+    return time_attrs
+
+
+def calc_extracted_vars(source_dataset, output_coords, config, model_profile):
+    """Construct the data array for the extracted variable(s).
+
+    :param source_dataset: Dataset from which variable(s) are being extracted.
+    :type source_dataset: :py:class:`xarray.Dataset`
+
+    :param dict output_coords: Coordinate names to data array mapping for the extracted
+                               variable(s).
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Extracted variable data array(s).
+    :rtype: list
+    """
+    time_interval = config.get("selection", {}).get("time interval", 1)
+    # stop=None in slice() means the length of the array without having to know what that is
+    time_selector = slice(0, None, time_interval)
+    if "depth" in model_profile["chunk size"]:
+        depth_min = config.get("selection", {}).get("depth", {}).get("depth min", 0)
+        depth_max = config.get("selection", {}).get("depth", {}).get("depth max", None)
+        depth_interval = (
+            config.get("selection", {}).get("depth", {}).get("depth interval", 1)
+        )
+        depth_selector = slice(depth_min, depth_max, depth_interval)
+        time_base = config["dataset"]["time base"]
+        vars_group = config["dataset"]["variables group"]
+        datasets = model_profile["results archive"]["datasets"]
+        depth_coord = datasets[time_base][vars_group]["depth coord"]
+        include_depth_coord = True
+    else:
+        depth_coord, depth_selector = None, None
+        include_depth_coord = False
+    y_min = config.get("selection", {}).get("grid y", {}).get("y min", 0)
+    y_max = config.get("selection", {}).get("grid y", {}).get("y max", None)
+    y_interval = config.get("selection", {}).get("grid y", {}).get("y interval", 1)
+    y_selector = slice(y_min, y_max, y_interval)
+    x_min = config.get("selection", {}).get("grid x", {}).get("x min", 0)
+    x_max = config.get("selection", {}).get("grid x", {}).get("x max", None)
+    x_interval = config.get("selection", {}).get("grid x", {}).get("x interval", 1)
+    x_selector = slice(x_min, x_max, x_interval)
+    if include_depth_coord:
+        selector = {
+            model_profile["time coord"]["name"]: time_selector,
+            depth_coord: depth_selector,
+            model_profile["y coord"]["name"]: y_selector,
+            model_profile["x coord"]["name"]: x_selector,
+        }
+    else:
+        selector = {
+            model_profile["time coord"]["name"]: time_selector,
+            model_profile["y coord"]["name"]: y_selector,
+            model_profile["x coord"]["name"]: x_selector,
+        }
+    extracted_vars = []
+    use_model_coords = config["extracted dataset"].get("use model coords", False)
+    output_depth_coord = "depth" if not use_model_coords else depth_coord
+    for name, var in source_dataset.data_vars.items():
+        var_selector = (
+            selector
+            if depth_coord in var.coords
+            else {
+                c_name: c_selector
+                for c_name, c_selector in selector.items()
+                if c_name != depth_coord
+            }
+        )
+        var_output_coords = (
+            output_coords
+            if depth_coord in var.coords
+            else {
+                c_name: c_selector
+                for c_name, c_selector in output_coords.items()
+                if c_name != output_depth_coord
+            }
+        )
+        try:
+            std_name = var.attrs["standard_name"]
+        except KeyError:
+            # HRDPS lacks standard_name for many vars, but has short_name
+            try:
+                std_name = var.attrs["short_name"]
+            except KeyError:
+                # Fall back to variable name as standard_name as implied by
+                # https://cfconventions.org/Data/cf-conventions/cf-conventions-1.10/cf-conventions.html#long-name
+                std_name = name
+        extracted_var = create_dataarray(
+            name,
+            var.isel(var_selector),
+            attrs={
+                "standard_name": std_name,
+                "long_name": var.attrs["long_name"],
+                "units": var.attrs["units"],
+            },
+            coords=var_output_coords,
+        )
+        extracted_vars.append(extracted_var)
+        logger.debug(f"extracted {name}", extracted_var=extracted_var)
+    if not config.get("include lons lats", False):
+        return extracted_vars
+
+    # Add longitude and latitude variables from geo ref dataset
+    with xarray.open_dataset(model_profile["geo ref dataset"]["path"]) as grid_ds:
+        y_coord = model_profile["geo ref dataset"]["y coord"]
+        lon_var = model_profile["geo ref dataset"].get("longitude var", "longitude")
+        x_coord = model_profile["geo ref dataset"]["x coord"]
+        lat_var = model_profile["geo ref dataset"].get("latitude var", "latitude")
+        selector = {
+            y_coord: y_selector,
+            x_coord: x_selector,
+        }
+        lons = create_dataarray(
+            "longitude",
+            grid_ds[lon_var].isel(selector),
+            attrs={
+                "standard_name": "longitude",
+                "long_name": "Longitude",
+                "units": "degrees_east",
+            },
+            coords={
+                "gridY": output_coords["gridY"],
+                "gridX": output_coords["gridX"],
+            },
+        )
+        extracted_vars.append(lons)
+        logger.debug(f"extracted longitudes", lons=lons)
+
+        lats = create_dataarray(
+            "latitude",
+            grid_ds[lat_var].isel(selector),
+            attrs={
+                "standard_name": "latitude",
+                "long_name": "Latitude",
+                "units": "degrees_north",
+            },
+            coords={
+                "gridY": output_coords["gridY"],
+                "gridX": output_coords["gridX"],
+            },
+        )
+        extracted_vars.append(lats)
+        logger.debug(f"extracted latitudes", lats=lats)
+
+    return extracted_vars
+
+
+def create_dataarray(name, source_array, attrs, coords=None):
+    """Helper function to create :py:class:`xarray.DataArray` instances.
+
+    To create a data array to be used as a :py:class:`xarray.Dataset` coordinate,
+    call without a value for :kbd:`coords`.
+
+    To create a data array to be used as a dataset variable,
+    provide the variable's coordinates dict.
+
+    :param str name: Name of the data array.
+
+    :param source_array: Data array from which to take the array data.
+                         Also used as the coordinate values when creating a coordinate array.
+    :type source_array: :py:class:`xarray.DataArray`
+
+    :param dict attrs: Attributes of the data array.
+                       These become netCDF4 variable attributes.
+
+    :param dict coords: Coordinates of the data array.
+                        Use default empty dict to create a dataset coordinate array,
+                        or provide the variable's coordinates dict to create a
+                        dataset variable array.
+
+    :return: Data array for use a dataset coordinate or variable.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    if coords is None:
+        coords = {}
+    return xarray.DataArray(
+        name=name,
+        data=source_array.data,
+        coords={name: source_array.data} if coords == {} else coords,
+        attrs=attrs,
+    )
+
+
+def calc_extracted_dataset(
+    extracted_vars,
+    output_coords,
+    config,
+    generated_by,
+    override_start_date="",
+    override_end_date="",
+):
+    """Construct the dataset of the extracted variable(s).
+
+    :param list extracted_vars: Extracted variable data array(s).
+
+    :param dict output_coords: Coordinate names to data array mapping for the extracted
+                               variable(s).
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param str generated_by: Command-line or API call string to complete "Generated by"
+                             entry in dataset history attribute.
+
+    :param str override_start_date: Extraction start date to override value in config.
+
+    :param str override_end_date: Extraction end date to override value in config
+
+    :return: Dataset containing extracted variable(s).
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    ds_name_root = config["extracted dataset"]["name"]
+    start_date = (
+        arrow.get(override_start_date)
+        if override_start_date
+        else arrow.get(config["start date"])
+    )
+    end_date = (
+        arrow.get(override_end_date)
+        if override_end_date
+        else arrow.get(config["end date"])
+    )
+    ds_name = f"{ds_name_root}_{date_formatters.yyyymmdd(start_date)}_{date_formatters.yyyymmdd(end_date)}"
+    ds_desc = config["extracted dataset"]["description"]
+    history = f"{arrow.now('local').format('YYYY-MM-DD HH:mm ZZ')}: Generated by {generated_by}"
+    attrs = {
+        "name": ds_name,
+        "description": ds_desc,
+        "history": history,
+        "Conventions": "CF-1.6",
+    }
+    selection = config.get("selection", {})
+    for geo_selection in sorted(GEO_SELECTIONS & set(selection)):
+        # Record the grid indices that the geographic selection was resolved to
+        # so that the extraction can be reproduced
+        geo_items = ", ".join(
+            f"{key}: {value}" for key, value in selection[geo_selection].items()
+        )
+        y_sel, x_sel = selection["grid y"], selection["grid x"]
+        attrs["geo_selection"] = (
+            f"{geo_selection}: {geo_items}; "
+            f"resolved to grid y: {y_sel['y min']}:{y_sel['y max']}, "
+            f"grid x: {x_sel['x min']}:{x_sel['x max']}"
+        )
+    extracted_ds = xarray.Dataset(
+        coords=output_coords,
+        data_vars={var.name: var for var in extracted_vars},
+        attrs=attrs,
+    )
+    logger.debug("extracted dataset metadata", extracted_ds=extracted_ds)
+    return extracted_ds
+
+
+def _calc_derived_vars(extracted_ds, config):
+    """Calculate variables from expressions over extracted variables.
+
+    Each item in the ``derived variables`` stanza of the extraction configuration
+    produces a variable named by its key.
+    The expressions are evaluated in the order that they appear in the stanza,
+    so later expressions can use the results of earlier ones.
+    Evaluation adds operations to the dask task graph,
+    so the derived variables are calculated on the workers as the input variables are read.
+    Expression input variables that are not in ``extract variables``,
+    and are not column kernel input variables,
+    are dropped from the returned dataset.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :return: Dataset containing extracted and derived variable(s).
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if an expression is invalid,
+             or if a derived variable has no units.
+    """
+    derived_ds = extracted_ds
+    input_vars = set()
+    for name, derived_config in config["derived variables"].items():
+        expression = derived_config["expression"]
+        log = logger.bind(derived_var=name, expression=expression)
+        if "units" not in derived_config:
+            log.error("derived variable has no units")
+            raise SystemExit(2)
+        try:
+            _, expression_vars = expressions.compile_expression(expression)
+            if not expression_vars:
+                raise ValueError("expression has no variables")
+            derived_var = expressions.evaluate_expression(
+                expression,
+                {var: derived_ds[var] for var in expression_vars},
+            )
+        except (KeyError, NotImplementedError, TypeError, ValueError) as exc:
+            log.error("invalid derived variable expression", reason=str(exc))
+            raise SystemExit(2)
+        log.info("calculating derived variable")
+        derived_var.name = name
+        derived_var.attrs = {
+            "standard_name": derived_config.get("standard name", name),
+            "long_name": derived_config.get("long name", name),
+            "units": derived_config["units"],
+            "comment": f"calculated from expression: {expression}",
+        }
+        derived_ds = derived_ds.assign({name: derived_var})
+        input_vars.update(expression_vars)
+    keep_vars = set(config["extract variables"]) | set(config["derived variables"])
+    keep_vars.update(
+        kernel_config["variable"]
+        for kernel_config in config.get("column kernels", {}).values()
+    )
+    derived_ds = derived_ds.drop_vars(input_vars - keep_vars)
+    logger.debug("derived variables dataset metadata", derived_ds=derived_ds)
+    return derived_ds
+
+
+def _calc_column_kernel_vars(extracted_ds, config, model_profile):
+    """Calculate variables from the water columns of extracted variables with column
+    kernels.
+
+    Each item in the ``column kernels`` stanza of the extraction configuration produces
+    a variable named by its key.
+    Kernel input variables that are not in ``extract variables`` are dropped from the
+    returned dataset.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing extracted and column kernel variable(s).
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if a kernel is not registered,
+             or if a kernel input variable does not have a depth coordinate.
+    """
+    use_model_coords = config["extracted dataset"].get("use model coords", False)
+    time_base = config["dataset"]["time base"]
+    vars_group = config["dataset"]["variables group"]
+    datasets = model_profile["results archive"]["datasets"]
+    depth_coord = (
+        "depth"
+        if not use_model_coords
+        else datasets[time_base][vars_group]["depth coord"]
+    )
+    kernel_vars = {}
+    for name, kernel_config in config["column kernels"].items():
+        kernel_name = kernel_config["kernel"]
+        input_var = kernel_config["variable"]
+        # Parameter names in config files are space-separated words like the rest
+        # of the config keys
+        params = {
+            param.replace(" ", "_"): value
+            for param, value in kernel_config.get("parameters", {}).items()
+        }
+        log = logger.bind(kernel=kernel_name, variable=input_var, output_var=name)
+        try:
+            kernel = column_kernels.get_column_kernel(kernel_name)
+        except KeyError:
+            log.error("column kernel not found")
+            raise SystemExit(2)
+        var = extracted_ds[input_var]
+        if depth_coord not in var.dims:
+            log.error("column kernel input variable has no depth coordinate")
+            raise SystemExit(2)
+        log.info("calculating column kernel variable", params=params)
+        kernel_var = column_kernels.apply_column_kernel(
+            kernel, var, depth_coord, **params
+        )
+        kernel_var.name = name
+        kernel_var.attrs = {
+            "standard_name": name,
+            "long_name": getattr(kernel, "long_name", kernel_name.title()),
+            "units": getattr(kernel, "units", var.attrs["units"]),
+            "comment": f"calculated by {kernel_name} column kernel from {input_var}",
+        }
+        kernel_vars[name] = kernel_var
+    input_only_vars = {
+        kernel_config["variable"] for kernel_config in config["column kernels"].values()
+    } - set(config["extract variables"])
+    kernel_ds = extracted_ds.assign(kernel_vars).drop_vars(input_only_vars)
+    logger.debug("column kernel dataset metadata", kernel_ds=kernel_ds)
+    return kernel_ds
+
+
+def _select_transect(extracted_ds, config, model_profile):
+    """Select the grid points along a transect from the extracted dataset.
+
+    The extracted dataset is the transect bounding box that
+    :py:func:`_resolve_geo_selection` set the grid y/x selections to.
+    The grid points along the transect are selected with vectorized indexing,
+    so only the chunks that the transect crosses are read.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing extracted variable(s) with a ``distance`` dimension
+             in place of the y and x dimensions.
+             The y and x coordinates are grid index coordinates along the ``distance``
+             dimension.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    selection = config["selection"]
+    transect_config = selection["transect"]
+    transect = geo_index.load_transect(
+        model_profile["geo ref dataset"],
+        transect_config["waypoints"],
+        transect_config.get("spacing"),
+    )
+    coord_names = _calc_output_coord_names(config, model_profile)
+    y_min, x_min = selection["grid y"]["y min"], selection["grid x"]["x min"]
+    logger.info("selecting transect", n_points=len(transect["distance"]))
+    transect_ds = extracted_ds.isel(
+        {
+            coord_names["y"]: xarray.DataArray(transect["y"] - y_min, dims="distance"),
+            coord_names["x"]: xarray.DataArray(transect["x"] - x_min, dims="distance"),
+        }
+    )
+    return transect_ds.assign_coords(
+        distance=(
+            "distance",
+            transect["distance"],
+            {"long_name": "Distance Along Transect", "units": "m"},
+        )
+    )
+
+
+def _regrid(extracted_ds, config, model_profile):
+    """Regrid the variables in the extracted dataset to the regular longitude/latitude
+    grid of the ``regrid:`` stanza.
+
+    The extracted dataset is the box of model grid points that
+    :py:func:`_resolve_regrid` set the grid y/x selections to.
+    Variables that don't have both y and x dimensions are not changed.
+    The regridding is lazy,
+    so the regridded variables are calculated chunk by chunk as they are written.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing extracted variable(s) with ``latitude`` and
+             ``longitude`` dimensions in place of the y and x dimensions.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    weights, lons, lats = _load_regrid_weights(config, model_profile)
+    coord_names = _calc_output_coord_names(config, model_profile)
+    y_coord, x_coord = coord_names["y"], coord_names["x"]
+    logger.info(
+        "regridding variables",
+        method=config["regrid"].get("method", "bilinear"),
+        n_lats=len(lats),
+        n_lons=len(lons),
+    )
+    regridded_vars = {
+        name: regrid.regrid(var, y_coord, x_coord, weights, lons, lats)
+        for name, var in extracted_ds.data_vars.items()
+        if {y_coord, x_coord} <= set(var.dims)
+    }
+    regridded_ds = extracted_ds.drop_vars(list(regridded_vars)).drop_dims(
+        [y_coord, x_coord]
+    )
+    return regridded_ds.assign(regridded_vars)
+
+
+def _interpolate_vertical(extracted_ds, config, model_profile):
+    """Interpolate the variables in the extracted dataset to fixed depths or
+    to density surfaces.
+
+    ``selection: depths:`` is a list of depths in metres.
+    The variables are interpolated to those depths,
+    and they become the depth coordinate values.
+
+    ``selection: isopycnals:`` is a density variable and a list of its values.
+    The variables are interpolated to the depths at which the density variable has those
+    values, the depth dimension is replaced by an ``isopycnal`` dimension,
+    and an ``isopycnal_depth`` variable of the depths of the density surfaces is added.
+    The density variable is dropped.
+
+    The interpolations are vectorized linear interpolations along the depth dimension
+    of each chunk on the dask workers.
+    Variables without a depth dimension are unchanged.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing interpolated variable(s).
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if both depths and isopycnals are selected,
+             or if the extracted dataset has no depth coordinate.
+    """
+    selection = config["selection"]
+    if "depths" in selection and "isopycnals" in selection:
+        logger.error(
+            "vertical interpolation to both depths and isopycnals is not supported"
+        )
+        raise SystemExit(2)
+    depth_coord = _calc_output_coord_names(config, model_profile)["depth"]
+    if depth_coord not in extracted_ds.dims:
+        logger.error("vertical interpolation requires a depth coordinate")
+        raise SystemExit(2)
+    interpolated_vars = {}
+    if "depths" in selection:
+        depths = selection["depths"]
+        logger.info("interpolating dataset to depths", depths=depths)
+        for name, var in extracted_ds.data_vars.items():
+            interpolated_vars[name] = (
+                vertical_interp.interpolate_to_depths(var, depth_coord, depths)
+                if depth_coord in var.dims
+                else var
+            )
+    else:
+        density_var = selection["isopycnals"]["density var"]
+        isopycnals = selection["isopycnals"]["values"]
+        logger.info(
+            "interpolating dataset to isopycnals",
+            density_var=density_var,
+            isopycnals=isopycnals,
+        )
+        density = extracted_ds[density_var]
+        for name, var in extracted_ds.data_vars.items():
+            if name == density_var:
+                continue
+            interpolated_vars[name] = (
+                vertical_interp.interpolate_to_isopycnals(
+                    var, density, depth_coord, isopycnals, "isopycnal"
+                )
+                if depth_coord in var.dims
+                else var
+            )
+        depths = extracted_ds[depth_coord].broadcast_like(density)
+        if density.chunks is not None:
+            depths = depths.chunk(density.chunksizes)
+        isopycnal_depth = vertical_interp.interpolate_to_isopycnals(
+            depths, density, depth_coord, isopycnals, "isopycnal"
+        )
+        isopycnal_depth.attrs = {
+            "standard_name": "depth",
+            "long_name": "Isopycnal Depth",
+            "units": extracted_ds[depth_coord].attrs.get("units", "metres"),
+        }
+        interpolated_vars["isopycnal_depth"] = isopycnal_depth
+    interpolated_ds = xarray.Dataset(
+        data_vars=interpolated_vars, attrs=extracted_ds.attrs
+    )
+    if "isopycnals" in selection:
+        interpolated_ds = interpolated_ds.drop_vars(depth_coord, errors="ignore")
+        interpolated_ds.isopycnal.attrs = {
+            "long_name": "Isopycnal",
+            "units": extracted_ds[density_var].attrs.get("units", ""),
+            "comment": f"values of {density_var} at the density surfaces",
+        }
+    logger.debug("vertically interpolated dataset", interpolated_ds=interpolated_ds)
+    return interpolated_ds
+
+
+def _reduce(extracted_ds, config, model_profile):
+    """
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Reduced dataset containing extracted variable(s).
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    if "depth" in config["reduce"]:
+        extracted_ds = _reduce_depth(extracted_ds, config, model_profile)
+    if "space" in config["reduce"]:
+        extracted_ds = _reduce_space(extracted_ds, config, model_profile)
+    if "regions" in config["reduce"]:
+        extracted_ds = _reduce_regions(extracted_ds, config, model_profile)
+    return extracted_ds
+
+
+def _reduce_depth(extracted_ds, config, model_profile):
+    """Reduce the variables in the extracted dataset over their depth dimension.
+
+    The ``sum`` and ``mean`` aggregations are weighted by the model grid cell thicknesses
+    so that they are the depth integral and the depth average of the variables.
+    The ``min`` and ``max`` aggregations are unweighted.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing extracted variable(s) reduced over depth.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if the aggregation is not supported,
+             or if no cell thickness variable is available.
+    """
+    reduce_config = config["reduce"]["depth"]
+    aggregation = reduce_config.get("aggregation", "mean")
+    depth_range = reduce_config.get("depth range", None)
+    if aggregation not in {"sum", "mean", "min", "max"}:
+        logger.error(
+            "unsupported depth reduction aggregation",
+            aggregation=aggregation,
+            supported_aggregations=["sum", "mean", "min", "max"],
         )
+        raise SystemExit(2)
+    logger.info(
+        "reducing dataset over depth", aggregation=aggregation, depth_range=depth_range
+    )
+    use_model_coords = config["extracted dataset"].get("use model coords", False)
+    time_base = config["dataset"]["time base"]
+    vars_group = config["dataset"]["variables group"]
+    datasets = model_profile["results archive"]["datasets"]
+    depth_coord = (
+        "depth"
+        if not use_model_coords
+        else datasets[time_base][vars_group]["depth coord"]
+    )
+    cell_thickness, tmask = _get_cell_thickness(extracted_ds, config, model_profile)
+    thickness_var = reduce_config.get("cell thickness var", "e3t")
+    if "mesh mask" not in reduce_config:
+        extracted_ds = extracted_ds.drop_vars(thickness_var)
+    if depth_range is not None:
+        depths = extracted_ds[depth_coord]
+        in_range = (depths >= depth_range[0]) & (depths <= depth_range[1])
+        extracted_ds = extracted_ds.isel({depth_coord: in_range.values})
+        cell_thickness = cell_thickness.isel({depth_coord: in_range.values})
+        if tmask is not None:
+            tmask = tmask.isel({depth_coord: in_range.values})
+    # Land cells must not contribute weight to the sums and means
+    weights = cell_thickness.fillna(0)
+    if tmask is not None:
+        weights = weights.where(tmask, 0)
+    comments = []
+    if aggregation in {"sum", "mean"}:
+        comments.append("weighted by grid cell thickness")
+    if depth_range is not None:
+        comments.append(f"over {depth_range[0]} to {depth_range[1]} metres")
+    cell_methods = f"{depth_coord}: {aggregation}"
+    if comments:
+        cell_methods = f"{cell_methods} (comment: {', '.join(comments)})"
+    reduced_vars = {}
+    for name, var in extracted_ds.data_vars.items():
+        if depth_coord not in var.dims:
+            # Surface variables (e.g. sea surface height) and lons/lats pass through
+            reduced_vars[name] = var
+            continue
+        masked_var = var if tmask is None else var.where(tmask)
+        match aggregation:
+            case "sum":
+                reduced_var = masked_var.weighted(weights).sum(depth_coord)
+            case "mean":
+                reduced_var = masked_var.weighted(weights).mean(depth_coord)
+            case _:
+                reduced_var = getattr(masked_var, aggregation)(depth_coord)
+        reduced_var.attrs = var.attrs.copy()
+        match aggregation:
+            case "sum":
+                reduced_var.attrs["long_name"] = (
+                    f"Depth-integrated {var.attrs['long_name']}"
+                )
+                reduced_var.attrs["units"] = f"{var.attrs['units']} m"
+            case "mean":
+                reduced_var.attrs["long_name"] = (
+                    f"Depth-averaged {var.attrs['long_name']}"
+                )
+        reduced_var.attrs["cell_methods"] = cell_methods
+        reduced_vars[name] = reduced_var
+    reduced_ds = xarray.Dataset(data_vars=reduced_vars, attrs=extracted_ds.attrs)
+    logger.debug("depth reduced dataset metadata", reduced_ds=reduced_ds)
+    return reduced_ds
+
+
+def _get_cell_thickness(extracted_ds, config, model_profile):
+    """Get the grid cell thickness and land mask arrays to use for depth reduction.
+
+    If ``reduce: depth: mesh mask:`` is set in the extraction configuration,
+    the cell thicknesses are ``e3t_0`` from the NEMO mesh mask file,
+    and the land mask is its ``tmask``.
+    Otherwise, the cell thicknesses are the ``e3t`` variable
+    (or the ``cell thickness var`` variable)
+    from the extracted dataset,
+    and the land mask is the ``tmask`` of the model profile ``mesh mask``.
+    A warning is logged if the model profile has no mesh mask,
+    because then land cells are only excluded where the variables are missing values.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Cell thickness and land mask data arrays with the same coordinates as
+             the extracted dataset.
+             The land mask is :py:obj:`None` when there is no mesh mask.
+    :rtype: 2-tuple
+
+    :raises: :py:exc:`SystemExit` if the cell thickness variable is not in the
+             extracted dataset.
+    """
+    reduce_config = config["reduce"]["depth"]
+    if "mesh mask" not in reduce_config:
+        thickness_var = reduce_config.get("cell thickness var", "e3t")
         try:
-            std_name = var.attrs["standard_name"]
+            cell_thickness = extracted_ds[thickness_var]
         except KeyError:
-            # HRDPS lacks standard_name for many vars, but has short_name
-            try:
-                std_name = var.attrs["short_name"]
-            except KeyError:
-                # Fall back to variable name as standard_name as implied by
-                # https://cfconventions.org/Data/cf-conventions/cf-conventions-1.10/cf-conventions.html#long-name
-                std_name = name
-        extracted_var = create_dataarray(
-            name,
-            var.isel(var_selector),
-            attrs={
-                "standard_name": std_name,
-                "long_name": var.attrs["long_name"],
-                "units": var.attrs["units"],
-            },
-            coords=var_output_coords,
+            logger.error(
+                "cell thickness variable not in extracted dataset",
+                cell_thickness_var=thickness_var,
+                possible_reasons="variables group without cell thicknesses, and no mesh mask",
+            )
+            raise SystemExit(2)
+        mesh_mask_path = _calc_mesh_mask_path(reduce_config, model_profile)
+        if mesh_mask_path is None:
+            logger.warning(
+                "no mesh mask for depth reduction land mask; "
+                "land cells are only excluded where variables have missing values",
+                cell_thickness_var=thickness_var,
+            )
+            return cell_thickness, None
+        mesh_fields = _load_mesh_fields(
+            mesh_mask_path, ("tmask",), extracted_ds, config, model_profile
         )
-        extracted_vars.append(extracted_var)
-        logger.debug(f"extracted {name}", extracted_var=extracted_var)
-    if not config.get("include lons lats", False):
-        return extracted_vars
+        return cell_thickness, mesh_fields["tmask"].astype(bool)
+    mesh_fields = _load_mesh_fields(
+        reduce_config["mesh mask"],
+        ("e3t_0", "tmask"),
+        extracted_ds,
+        config,
+        model_profile,
+    )
+    return mesh_fields["e3t_0"], mesh_fields["tmask"].astype(bool)
 
-    # Add longitude and latitude variables from geo ref dataset
-    with xarray.open_dataset(model_profile["geo ref dataset"]["path"]) as grid_ds:
-        y_coord = model_profile["geo ref dataset"]["y coord"]
-        lon_var = model_profile["geo ref dataset"].get("longitude var", "longitude")
-        x_coord = model_profile["geo ref dataset"]["x coord"]
-        lat_var = model_profile["geo ref dataset"].get("latitude var", "latitude")
-        selector = {
-            y_coord: y_selector,
-            x_coord: x_selector,
+
+def _reduce_space(extracted_ds, config, model_profile):
+    """Reduce the variables in the extracted dataset over their horizontal dimensions,
+    or over all of their spatial dimensions.
+
+    The ``sum`` and ``mean`` aggregations are weighted by the model grid cell areas
+    (``e1t * e2t``) or volumes (``e1t * e2t * e3t_0``) from the NEMO mesh mask file
+    so that they are spatial integrals and spatial averages.
+    The ``min`` and ``max`` aggregations are unweighted.
+    Land cells are excluded by the mesh mask ``tmask``,
+    and the reduction can be limited to a region by a region mask.
+    The mesh mask is the one in the reduction configuration,
+    or the model profile ``mesh mask`` if the reduction configuration doesn't have one.
+
+    The reductions are lazy, so dask calculates partial reductions of each chunk on the
+    workers and combines them in a tree reduction.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing extracted variable(s) reduced over space.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if the aggregation or weights are not supported,
+             or if there is no mesh mask.
+    """
+    reduce_config = config["reduce"]["space"]
+    aggregation = reduce_config.get("aggregation", "mean")
+    weighting = reduce_config.get("weights", "area")
+    if aggregation not in {"sum", "mean", "min", "max"}:
+        logger.error(
+            "unsupported spatial reduction aggregation",
+            aggregation=aggregation,
+            supported_aggregations=["sum", "mean", "min", "max"],
+        )
+        raise SystemExit(2)
+    if weighting not in {"area", "volume"}:
+        logger.error(
+            "unsupported spatial reduction weights",
+            weights=weighting,
+            supported_weights=["area", "volume"],
+        )
+        raise SystemExit(2)
+    mesh_mask_path = _calc_mesh_mask_path(reduce_config, model_profile)
+    if mesh_mask_path is None:
+        logger.error("spatial reduction requires a mesh mask")
+        raise SystemExit(2)
+    logger.info(
+        "reducing dataset over space",
+        aggregation=aggregation,
+        weights=weighting,
+        region_mask=reduce_config.get("region mask", {}).get("var"),
+    )
+    coord_names = _calc_output_coord_names(config, model_profile)
+    y_coord, x_coord = coord_names["y"], coord_names["x"]
+    mesh_fields = _load_reduction_mesh_fields(
+        mesh_mask_path, extracted_ds, config, model_profile
+    )
+    region_mask = None
+    if "region mask" in reduce_config:
+        region_mask = _load_region_raster(
+            reduce_config["region mask"], extracted_ds, config, model_profile
+        ).astype(bool)
+    comment = f"{weighting}-weighted" if aggregation in {"sum", "mean"} else ""
+    if region_mask is not None:
+        region_comment = f"over {reduce_config['region mask']['var']} region"
+        comment = f"{comment} {region_comment}".strip()
+    reduced_vars = {}
+    for name, var in extracted_ds.data_vars.items():
+        if name in {"longitude", "latitude"}:
+            # Lons/lats have no meaning after spatial reduction
+            continue
+        if y_coord not in var.dims or x_coord not in var.dims:
+            reduced_vars[name] = var
+            continue
+        mask, weights, reduce_dims = _calc_var_reduction_weights(
+            var, mesh_fields, weighting, coord_names
+        )
+        if region_mask is not None:
+            mask = mask & region_mask
+        masked_var = var.where(mask)
+        match aggregation:
+            case "sum":
+                reduced_var = masked_var.weighted(weights.where(mask, 0)).sum(
+                    reduce_dims
+                )
+            case "mean":
+                reduced_var = masked_var.weighted(weights.where(mask, 0)).mean(
+                    reduce_dims
+                )
+            case _:
+                reduced_var = getattr(masked_var, aggregation)(reduce_dims)
+        reduced_vars[name] = _set_spatially_reduced_var_attrs(
+            reduced_var, var, aggregation, reduce_dims, comment, coord_names
+        )
+    reduced_ds = xarray.Dataset(data_vars=reduced_vars, attrs=extracted_ds.attrs)
+    logger.debug("space reduced dataset metadata", reduced_ds=reduced_ds)
+    return reduced_ds
+
+
+def _reduce_regions(extracted_ds, config, model_profile):
+    """Reduce the variables in the extracted dataset over each of the labelled regions
+    in a region label raster.
+
+    All of the regions are reduced in a single pass over the extracted variables using
+    :py:func:`flox.xarray.xarray_reduce` group-by reductions with the region labels.
+    The aggregations and their weights are the same as for :py:func:`_reduce_space`.
+    The reduced variables have a ``region`` dimension whose coordinate values are the
+    region names.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing extracted variable(s) reduced over regions.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if the aggregation or weights are not supported,
+             or if there is no mesh mask.
+    """
+    reduce_config = config["reduce"]["regions"]
+    aggregation = reduce_config.get("aggregation", "mean")
+    weighting = reduce_config.get("weights", "area")
+    if aggregation not in {"sum", "mean", "min", "max"}:
+        logger.error(
+            "unsupported regions reduction aggregation",
+            aggregation=aggregation,
+            supported_aggregations=["sum", "mean", "min", "max"],
+        )
+        raise SystemExit(2)
+    if weighting not in {"area", "volume"}:
+        logger.error(
+            "unsupported regions reduction weights",
+            weights=weighting,
+            supported_weights=["area", "volume"],
+        )
+        raise SystemExit(2)
+    mesh_mask_path = _calc_mesh_mask_path(reduce_config, model_profile)
+    if mesh_mask_path is None:
+        logger.error("regions reduction requires a mesh mask")
+        raise SystemExit(2)
+    coord_names = _calc_output_coord_names(config, model_profile)
+    y_coord, x_coord = coord_names["y"], coord_names["x"]
+    labels = _load_region_raster(
+        reduce_config["labels"], extracted_ds, config, model_profile
+    )
+    region_labels, region_names = _calc_region_names(labels, reduce_config)
+    logger.info(
+        "reducing dataset over regions",
+        aggregation=aggregation,
+        weights=weighting,
+        regions=region_names,
+    )
+    mesh_fields = _load_reduction_mesh_fields(
+        mesh_mask_path, extracted_ds, config, model_profile
+    )
+    # flox requires a named group-by array
+    labels = labels.rename("region")
+    comment = f"{weighting}-weighted" if aggregation in {"sum", "mean"} else ""
+    reduced_vars = {}
+    for name, var in extracted_ds.data_vars.items():
+        if name in {"longitude", "latitude"}:
+            # Lons/lats have no meaning after spatial reduction
+            continue
+        if y_coord not in var.dims or x_coord not in var.dims:
+            reduced_vars[name] = var
+            continue
+        mask, weights, reduce_dims = _calc_var_reduction_weights(
+            var, mesh_fields, weighting, coord_names
+        )
+        masked_var = var.where(mask)
+        weights = weights.where(masked_var.notnull(), 0)
+        # Dimensions other than y and x (i.e. depth for volume weighting) are reduced
+        # before the group-by reduction because flox can't reduce over dimensions
+        # that the region labels don't have
+        pre_reduce_dims = [dim for dim in reduce_dims if dim not in {y_coord, x_coord}]
+        groupby_kwargs = {
+            "expected_groups": (region_labels,),
+            "dim": (y_coord, x_coord),
+            "keep_attrs": False,
         }
-        lons = create_dataarray(
-            "longitude",
-            grid_ds[lon_var].isel(selector),
-            attrs={
-                "standard_name": "longitude",
-                "long_name": "Longitude",
-                "units": "degrees_east",
-            },
-            coords={
-                "gridY": output_coords["gridY"],
-                "gridX": output_coords["gridX"],
-            },
+        match aggregation:
+            case "sum" | "mean":
+                weighted_sums = flox.xarray.xarray_reduce(
+                    (masked_var * weights).sum(pre_reduce_dims),
+                    labels,
+                    func="nansum",
+                    **groupby_kwargs,
+                )
+                if aggregation == "sum":
+                    reduced_var = weighted_sums
+                else:
+                    sums_of_weights = flox.xarray.xarray_reduce(
+                        weights.sum(pre_reduce_dims),
+                        labels,
+                        func="sum",
+                        **groupby_kwargs,
+                    )
+                    reduced_var = weighted_sums / sums_of_weights
+            case _:
+                reduced_var = flox.xarray.xarray_reduce(
+                    getattr(masked_var, aggregation)(pre_reduce_dims),
+                    labels,
+                    func=f"nan{aggregation}",
+                    **groupby_kwargs,
+                )
+        reduced_var = reduced_var.transpose(
+            *(dim for dim in var.dims if dim not in reduce_dims), "region"
         )
-        extracted_vars.append(lons)
-        logger.debug(f"extracted longitudes", lons=lons)
+        reduced_var.name = name
+        reduced_vars[name] = _set_spatially_reduced_var_attrs(
+            reduced_var,
+            var,
+            aggregation,
+            reduce_dims,
+            comment,
+            coord_names,
+            where="region",
+        )
+    reduced_ds = xarray.Dataset(data_vars=reduced_vars, attrs=extracted_ds.attrs)
+    reduced_ds = reduced_ds.assign_coords(
+        region=("region", region_names),
+        region_label=("region", region_labels),
+    )
+    reduced_ds.region.attrs = {"long_name": "Region Name"}
+    reduced_ds.region_label.attrs = {
+        "long_name": "Region Label",
+        "comment": f"region label values in {reduce_config['labels']['var']} raster",
+    }
+    logger.debug("regions reduced dataset metadata", reduced_ds=reduced_ds)
+    return reduced_ds
 
-        lats = create_dataarray(
-            "latitude",
-            grid_ds[lat_var].isel(selector),
-            attrs={
-                "standard_name": "latitude",
-                "long_name": "Latitude",
-                "units": "degrees_north",
-            },
-            coords={
-                "gridY": output_coords["gridY"],
-                "gridX": output_coords["gridX"],
-            },
+
+def _calc_region_names(labels, reduce_config):
+    """Calculate the region label values and their names.
+
+    Region names are taken from the ``names`` mapping of label values to names in the
+    regions reduction configuration if it is present.
+    Otherwise, they are taken from the CF ``flag_values`` and ``flag_meanings`` attributes
+    of the region label raster if they are present.
+    Otherwise, the regions are the unique non-zero label values in the raster,
+    named ``region_<label>``.
+
+    :param labels: Region label raster.
+    :type labels: :py:class:`xarray.DataArray`
+
+    :param dict reduce_config: Regions reduction configuration dictionary.
+
+    :return: Region label values and region names.
+    :rtype: 2-tuple of lists
+    """
+    if "names" in reduce_config:
+        region_labels = [int(label) for label in reduce_config["names"]]
+        region_names = [str(name) for name in reduce_config["names"].values()]
+        return region_labels, region_names
+    if "flag_values" in labels.attrs and "flag_meanings" in labels.attrs:
+        region_labels = [int(label) for label in numpy.atleast_1d(labels.flag_values)]
+        region_names = labels.attrs["flag_meanings"].split()
+        return region_labels, region_names
+    region_labels = [int(label) for label in numpy.unique(labels) if label != 0]
+    region_names = [f"region_{label}" for label in region_labels]
+    return region_labels, region_names
+
+
+def _load_reduction_mesh_fields(mesh_mask_path, extracted_ds, config, model_profile):
+    """Load the NEMO mesh mask fields that are used for spatial reductions.
+
+    :param mesh_mask_path: File path and name of the NEMO mesh mask file.
+    :type mesh_mask_path: :py:class:`pathlib.Path` or str
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of ``cell areas``, ``e3t_0``, ``tmask``, and ``surface tmask``
+             to data arrays.
+             ``e3t_0`` and ``tmask`` are only included if the extracted dataset has a
+             depth dimension.
+    :rtype: dict
+    """
+    depth_coord = _calc_output_coord_names(config, model_profile)["depth"]
+    has_depth = depth_coord in extracted_ds.dims
+    mesh_vars = ("e1t", "e2t", "e3t_0", "tmask") if has_depth else ("e1t", "e2t")
+    mesh_fields = _load_mesh_fields(
+        mesh_mask_path, mesh_vars, extracted_ds, config, model_profile
+    )
+    surface_tmask = _load_mesh_fields(
+        mesh_mask_path, ("tmask",), extracted_ds, config, model_profile, surface=True
+    )["tmask"]
+    reduction_fields = {
+        "cell areas": mesh_fields["e1t"] * mesh_fields["e2t"],
+        "surface tmask": surface_tmask.astype(bool),
+    }
+    if has_depth:
+        reduction_fields["e3t_0"] = mesh_fields["e3t_0"]
+        reduction_fields["tmask"] = mesh_fields["tmask"].astype(bool)
+    return reduction_fields
+
+
+def _calc_var_reduction_weights(var, reduction_fields, weighting, coord_names):
+    """Calculate the land mask, weights, and dimensions for the spatial reduction of
+    a variable.
+
+    :param var: Variable to be reduced.
+    :type var: :py:class:`xarray.DataArray`
+
+    :param dict reduction_fields: Mesh mask fields from
+                                  :py:func:`_load_reduction_mesh_fields`.
+
+    :param str weighting: ``area`` or ``volume``.
+
+    :param dict coord_names: Output coordinate names from
+                             :py:func:`_calc_output_coord_names`.
+
+    :return: Land mask, weights, and dimensions to reduce over.
+             Variables without a depth dimension are always area-weighted.
+    :rtype: 3-tuple
+    """
+    depth_coord, y_coord, x_coord = (
+        coord_names["depth"],
+        coord_names["y"],
+        coord_names["x"],
+    )
+    if depth_coord not in var.dims:
+        return (
+            reduction_fields["surface tmask"],
+            reduction_fields["cell areas"],
+            (y_coord, x_coord),
         )
-        extracted_vars.append(lats)
-        logger.debug(f"extracted latitudes", lats=lats)
+    if weighting == "volume":
+        return (
+            reduction_fields["tmask"],
+            reduction_fields["cell areas"] * reduction_fields["e3t_0"],
+            (depth_coord, y_coord, x_coord),
+        )
+    return reduction_fields["tmask"], reduction_fields["cell areas"], (y_coord, x_coord)
 
-    return extracted_vars
 
+def _set_spatially_reduced_var_attrs(
+    reduced_var, var, aggregation, reduce_dims, comment, coord_names, where=None
+):
+    """Set the netCDF attributes of a spatially reduced variable.
 
-def create_dataarray(name, source_array, attrs, coords=None):
-    """Helper function to create :py:class:`xarray.DataArray` instances.
+    :param reduced_var: Reduced variable.
+    :type reduced_var: :py:class:`xarray.DataArray`
 
-    To create a data array to be used as a :py:class:`xarray.Dataset` coordinate,
-    call without a value for :kbd:`coords`.
+    :param var: Variable before reduction.
+    :type var: :py:class:`xarray.DataArray`
 
-    To create a data array to be used as a dataset variable,
-    provide the variable's coordinates dict.
+    :param str aggregation: Reduction aggregation.
 
-    :param str name: Name of the data array.
+    :param tuple reduce_dims: Dimensions that were reduced.
 
-    :param source_array: Data array from which to take the array data.
-                         Also used as the coordinate values when creating a coordinate array.
-    :type source_array: :py:class:`xarray.DataArray`
+    :param str comment: Comment to include in the ``cell_methods`` attribute.
 
-    :param dict attrs: Attributes of the data array.
-                       These become netCDF4 variable attributes.
+    :param dict coord_names: Output coordinate names from
+                             :py:func:`_calc_output_coord_names`.
 
-    :param dict coords: Coordinates of the data array.
-                        Use default empty dict to create a dataset coordinate array,
-                        or provide the variable's coordinates dict to create a
-                        dataset variable array.
+    :param str where: Name of the area type for a CF ``cell_methods`` ``where`` clause.
 
-    :return: Data array for use a dataset coordinate or variable.
+    :return: Reduced variable with attributes set.
     :rtype: :py:class:`xarray.DataArray`
     """
-    if coords is None:
-        coords = {}
-    return xarray.DataArray(
-        name=name,
-        data=source_array.data,
-        coords={name: source_array.data} if coords == {} else coords,
-        attrs=attrs,
+    var_weighting = "volume" if len(reduce_dims) == 3 else "area"
+    reduced_var.attrs = var.attrs.copy()
+    match aggregation:
+        case "sum":
+            reduced_var.attrs["long_name"] = (
+                f"{var_weighting.title()}-integrated {var.attrs['long_name']}"
+            )
+            units = "m3" if var_weighting == "volume" else "m2"
+            reduced_var.attrs["units"] = f"{var.attrs['units']} {units}"
+        case "mean":
+            reduced_var.attrs["long_name"] = (
+                f"{var_weighting.title()}-averaged {var.attrs['long_name']}"
+            )
+    cell_methods = (
+        f"{coord_names['depth']}: area: {aggregation}"
+        if var_weighting == "volume"
+        else f"area: {aggregation}"
     )
+    if where is not None:
+        cell_methods = f"{cell_methods} where {where}"
+    if comment:
+        cell_methods = f"{cell_methods} (comment: {comment})"
+    reduced_var.attrs["cell_methods"] = cell_methods
+    return reduced_var
 
 
-def calc_extracted_dataset(
-    extracted_vars,
-    output_coords,
-    config,
-    generated_by,
-    override_start_date="",
-    override_end_date="",
+def _load_mesh_fields(
+    mesh_mask_path, var_names, extracted_ds, config, model_profile, surface=False
 ):
-    """Construct the dataset of the extracted variable(s).
+    """Load fields from a NEMO mesh mask file on the output coordinates of the
+    extracted dataset.
+
+    The fields are subset to the grid selection of the extraction configuration,
+    and their dimensions are renamed to the output coordinate names.
+    The subset fields are provided by :py:func:`reshapr.utils.mesh_geometry.load_mesh_fields`
+    so they are read from the mesh mask file once per extraction and shared by all of the
+    dask workers.
+
+    :param mesh_mask_path: File path and name of the NEMO mesh mask file.
+    :type mesh_mask_path: :py:class:`pathlib.Path` or str
+
+    :param var_names: Names of the mesh mask variables to load.
+    :type var_names: tuple
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :param bool surface: Load the surface level of 3-dimensional fields as
+                         2-dimensional fields.
+
+    :return: Mapping of mesh mask variable names to data arrays.
+    :rtype: dict
+    """
+    coord_names = _calc_output_coord_names(config, model_profile)
+    output_dims = {
+        "z": coord_names["depth"],
+        "y": coord_names["y"],
+        "x": coord_names["x"],
+    }
+    mesh_fields = mesh_geometry.load_mesh_fields(
+        mesh_mask_path, var_names, _calc_grid_selectors(config), surface
+    )
+    field_arrays = {}
+    for var, (mesh_dims, field) in mesh_fields.items():
+        dims = tuple(output_dims[dim] for dim in mesh_dims)
+        field_arrays[var] = xarray.DataArray(
+            name=var,
+            data=field,
+            coords={dim: extracted_ds[dim] for dim in dims},
+            dims=dims,
+        )
+    return field_arrays
+
+
+def _calc_mesh_mask_path(stage_config, model_profile):
+    """Return the NEMO mesh mask file path to use for a processing stage.
+
+    The mesh mask in the processing stage configuration takes precedence over the
+    mesh mask in the model profile.
+
+    :param dict stage_config: Processing stage configuration dictionary;
+                              e.g. a reduction, or the vector field stanza.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: File path and name of the NEMO mesh mask file,
+             or :py:obj:`None` if there is no mesh mask.
+    :rtype: str
+    """
+    return stage_config.get("mesh mask", model_profile.get("mesh mask"))
+
+
+def _load_region_raster(region_config, extracted_ds, config, model_profile):
+    """Load a region raster variable on the output coordinates of the extracted dataset.
+
+    The region raster is a 2-dimensional variable on the full model grid whose last 2
+    dimensions are y and x.
+    It is subset to the grid y/x selection of the extraction configuration.
+    Fill values of the raster (e.g. over land) are set to 0,
+    so they are not in any region.
+
+    :param dict region_config: Region raster configuration dictionary containing the
+                               file ``path`` and the raster ``var`` name.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Region raster data array.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    coord_names = _calc_output_coord_names(config, model_profile)
+    y_coord, x_coord = coord_names["y"], coord_names["x"]
+    selectors = _calc_grid_selectors(config)
+    with xarray.open_dataset(region_config["path"]) as region_ds:
+        raster = region_ds[region_config["var"]]
+        # Fill values are decoded to NaN;
+        # the raster is cast back to its stored dtype so that region labels are integers
+        raster = raster.fillna(0).astype(raster.encoding.get("dtype", raster.dtype))
+        raster_y, raster_x = raster.dims[-2:]
+        raster = raster.isel({raster_y: selectors["y"], raster_x: selectors["x"]})
+        return xarray.DataArray(
+            name=region_config["var"],
+            data=raster.values,
+            coords={
+                y_coord: extracted_ds[y_coord],
+                x_coord: extracted_ds[x_coord],
+            },
+            dims=(y_coord, x_coord),
+            attrs=raster.attrs,
+        )
 
-    :param list extracted_vars: Extracted variable data array(s).
 
-    :param dict output_coords: Coordinate names to data array mapping for the extracted
-                               variable(s).
+def _calc_output_coord_names(config, model_profile):
+    """Calculate the names of the time, depth, y, and x coordinates of the extracted dataset.
 
     :param dict config: Extraction processing configuration dictionary.
 
-    :param str generated_by: Command-line or API call string to complete "Generated by"
-                             entry in dataset history attribute.
+    :param dict model_profile: Model profile dictionary.
 
-    :param str override_start_date: Extraction start date to override value in config.
+    :return: Mapping of ``time``, ``depth``, ``y``, and ``x`` to output coordinate names.
+             The depth coordinate name is :py:obj:`None` for model coordinates of datasets
+             that have no depth coordinate.
+    :rtype: dict
+    """
+    use_model_coords = config["extracted dataset"].get("use model coords", False)
+    if not use_model_coords:
+        return {"time": "time", "depth": "depth", "y": "gridY", "x": "gridX"}
+    time_base = config["dataset"]["time base"]
+    vars_group = config["dataset"]["variables group"]
+    datasets = model_profile["results archive"]["datasets"]
+    return {
+        "time": model_profile["time coord"]["name"],
+        "depth": datasets[time_base][vars_group].get("depth coord"),
+        "y": model_profile["y coord"]["name"],
+        "x": model_profile["x coord"]["name"],
+    }
 
-    :param str override_end_date: Extraction end date to override value in config
 
-    :return: Dataset containing extracted variable(s).
-    :rtype: :py:class:`xarray.Dataset`
+def _calc_grid_selectors(config):
+    """Calculate the depth, y, and x index slices for the selection in the extraction
+    configuration.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :return: Mapping of ``depth``, ``y``, and ``x`` to index slices.
+    :rtype: dict
     """
-    ds_name_root = config["extracted dataset"]["name"]
-    start_date = (
-        arrow.get(override_start_date)
-        if override_start_date
-        else arrow.get(config["start date"])
-    )
-    end_date = (
-        arrow.get(override_end_date)
-        if override_end_date
-        else arrow.get(config["end date"])
-    )
-    ds_name = f"{ds_name_root}_{date_formatters.yyyymmdd(start_date)}_{date_formatters.yyyymmdd(end_date)}"
-    ds_desc = config["extracted dataset"]["description"]
-    history = f"{arrow.now('local').format('YYYY-MM-DD HH:mm ZZ')}: Generated by {generated_by}"
-    extracted_ds = xarray.Dataset(
-        coords=output_coords,
-        data_vars={var.name: var for var in extracted_vars},
-        attrs={
-            "name": ds_name,
-            "description": ds_desc,
-            "history": history,
-            "Conventions": "CF-1.6",
-        },
-    )
-    logger.debug("extracted dataset metadata", extracted_ds=extracted_ds)
-    return extracted_ds
+    selection = config.get("selection", {})
+    depth_selection = selection.get("depth", {})
+    y_selection = selection.get("grid y", {})
+    x_selection = selection.get("grid x", {})
+    return {
+        "depth": slice(
+            depth_selection.get("depth min", 0),
+            depth_selection.get("depth max", None),
+            depth_selection.get("depth interval", 1),
+        ),
+        "y": slice(
+            y_selection.get("y min", 0),
+            y_selection.get("y max", None),
+            y_selection.get("y interval", 1),
+        ),
+        "x": slice(
+            x_selection.get("x min", 0),
+            x_selection.get("x max", None),
+            x_selection.get("x interval", 1),
+        ),
+    }
 
 
 def _resample(extracted_ds, config, model_profile):
@@ -1046,6 +4490,491 @@ def _calc_climatology(extracted_ds, config, model_profile):
     return climatology_ds
 
 
+def _split_boxes(extracted_ds, config, model_profile):
+    """Split the extracted dataset of the bounding box of a ``selection: boxes:`` stanza
+    into a dataset for each box.
+
+    :param extracted_ds: Dataset containing extracted variable(s) for the bounding box
+                         of all of the boxes.
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of box names to datasets containing the extracted variable(s)
+             for the boxes.
+             The box names are inserted in the dataset names after the extracted dataset
+             name from the config.
+    :rtype: dict
+    """
+    selection = config["selection"]
+    coord_names = _calc_output_coord_names(config, model_profile)
+    bbox_y_min = selection["grid y"]["y min"]
+    bbox_x_min = selection["grid x"]["x min"]
+    ds_name_root = config["extracted dataset"]["name"]
+    ds_name_dates = extracted_ds.attrs["name"][len(ds_name_root) :]
+    box_datasets = {}
+    for box_name, box in selection["boxes"].items():
+        y_min, y_max = box["grid y"].get("y min", 0), box["grid y"]["y max"]
+        x_min, x_max = box["grid x"].get("x min", 0), box["grid x"]["x max"]
+        box_ds = extracted_ds.isel(
+            {
+                coord_names["y"]: slice(y_min - bbox_y_min, y_max - bbox_y_min),
+                coord_names["x"]: slice(x_min - bbox_x_min, x_max - bbox_x_min),
+            }
+        )
+        box_ds.attrs = {
+            **extracted_ds.attrs,
+            "name": f"{ds_name_root}_{box_name}{ds_name_dates}",
+            "box": f"{box_name}: grid y: {y_min}:{y_max}, grid x: {x_min}:{x_max}",
+        }
+        box_datasets[box_name] = box_ds
+    return box_datasets
+
+
+def _calc_tile_configs(source_ds, config, model_profile):
+    """Calculate the processing configuration dictionaries of the tiles of a tiled
+    extraction.
+
+    The tiles cover the grid y/x selection of the extraction,
+    or the full source dataset grid if there is no selection,
+    in ``y size`` by ``x size`` blocks of grid points.
+    Tiles at the north and east edges of the extraction are truncated to fit.
+
+    :param source_ds: Source dataset of the extraction.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of tile names to extraction processing configuration dictionaries
+             that select the tiles' grid y/x index ranges.
+             The tile names are inserted in the extracted dataset names after the
+             extracted dataset name from the config.
+    :rtype: dict
+    """
+    tiles = config["tiles"]
+    selection = config.get("selection", {})
+    ranges = {}
+    for coord in ("y", "x"):
+        coord_selection = selection.get(f"grid {coord}", {})
+        grid_size = source_ds.sizes[model_profile[f"{coord} coord"]["name"]]
+        coord_max = coord_selection.get(f"{coord} max")
+        coord_max = grid_size if coord_max is None else min(coord_max, grid_size)
+        coord_min = coord_selection.get(f"{coord} min", 0)
+        tile_size = tiles[f"{coord} size"]
+        ranges[coord] = [
+            (tile_min, min(tile_min + tile_size, coord_max))
+            for tile_min in range(coord_min, coord_max, tile_size)
+        ]
+    ds_name_root = config["extracted dataset"]["name"]
+    tile_configs = {}
+    for row, (y_min, y_max) in enumerate(ranges["y"]):
+        for col, (x_min, x_max) in enumerate(ranges["x"]):
+            tile_name = f"tile_y{row:02d}_x{col:02d}"
+            tile_selection = {
+                **selection,
+                "grid y": {
+                    **selection.get("grid y", {}),
+                    "y min": y_min,
+                    "y max": y_max,
+                },
+                "grid x": {
+                    **selection.get("grid x", {}),
+                    "x min": x_min,
+                    "x max": x_max,
+                },
+            }
+            tile_configs[tile_name] = {
+                **{key: value for key, value in config.items() if key != "tiles"},
+                "selection": tile_selection,
+                "extracted dataset": {
+                    **config["extracted dataset"],
+                    "name": f"{ds_name_root}_{tile_name}",
+                },
+            }
+    logger.info(
+        "calculated tiles",
+        n_tiles=len(tile_configs),
+        n_rows=len(ranges["y"]),
+        n_cols=len(ranges["x"]),
+    )
+    return tile_configs
+
+
+def _extract_tiles(
+    source_ds,
+    config,
+    model_profile,
+    generated_by,
+    override_start_date="",
+    override_end_date="",
+    compare_source_ds=None,
+    compare_model_profile=None,
+):
+    """Extract the tiles of a tiled extraction one at a time,
+    and write their netCDF4 files and tile index file.
+
+    Each tile is processed through all of the extraction stages as an independent
+    extraction from the source dataset,
+    and written before the next one is processed,
+    so the dask task graphs and the memory that they need are limited to the size of
+    a tile.
+
+    :param source_ds: Source dataset of the extraction.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :param str generated_by: Command-line or API call string to complete "Generated by"
+                             entry in dataset history attribute.
+
+    :param str override_start_date: Extraction start date to override value in config.
+
+    :param str override_end_date: Extraction end date to override value in config
+
+    :param compare_source_ds: Source dataset of the ``compare:`` model profile.
+    :type compare_source_ds: :py:class:`xarray.Dataset`
+
+    :param dict compare_model_profile: ``compare:`` model profile dictionary.
+
+    :return: Mapping of tile names to the file paths that their netCDF4 files were
+             written to.
+    :rtype: dict
+    """
+    tile_configs = _calc_tile_configs(source_ds, config, model_profile)
+    tile_writes = {}
+    for tile_name, tile_config in tile_configs.items():
+        logger.info("extracting tile", tile=tile_name)
+        writes = _calc_extraction_writes(
+            source_ds,
+            tile_config,
+            model_profile,
+            generated_by,
+            override_start_date,
+            override_end_date,
+            compare_source_ds,
+            compare_model_profile,
+        )
+        write_netcdfs(writes.values())
+        tile_writes[tile_name] = writes[None]
+    if config["tiles"].get("index file", True):
+        _write_tile_index(tile_writes, tile_configs, config)
+    return {tile_name: write[1] for tile_name, write in tile_writes.items()}
+
+
+def _write_tile_index(tile_writes, tile_configs, config):
+    """Write the YAML index file that describes the layout of the tiles of a tiled
+    extraction.
+
+    The index file is written in the same directory as the tile netCDF4 files.
+    Its name is the extracted dataset name with ``_tiles`` inserted before the dates.
+
+    :param dict tile_writes: Mapping of tile names to 5-tuples of
+                             :py:func:`write_netcdf` parameters for the tiles.
+
+    :param dict tile_configs: Mapping of tile names to extraction processing
+                              configuration dictionaries of the tiles.
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :return: File path and name of the index file.
+    :rtype: :py:class:`pathlib.Path`
+    """
+    ds_name_root = config["extracted dataset"]["name"]
+    first_name, first_write = next(iter(tile_writes.items()))
+    tile_ds_name_root = f"{ds_name_root}_{first_name}"
+    ds_name_dates = first_write[0].attrs["name"][len(tile_ds_name_root) :]
+    tiles = {}
+    for tile_name, (_, nc_path, _, _, _) in tile_writes.items():
+        tile_selection = tile_configs[tile_name]["selection"]
+        tiles[tile_name] = {
+            "file": nc_path.name,
+            "grid y": {
+                "y min": tile_selection["grid y"]["y min"],
+                "y max": tile_selection["grid y"]["y max"],
+            },
+            "grid x": {
+                "x min": tile_selection["grid x"]["x min"],
+                "x max": tile_selection["grid x"]["x max"],
+            },
+        }
+    index = {
+        "extracted dataset": f"{ds_name_root}{ds_name_dates}",
+        "tile size": {
+            "y": config["tiles"]["y size"],
+            "x": config["tiles"]["x size"],
+        },
+        "grid y": {
+            "y min": min(tile["grid y"]["y min"] for tile in tiles.values()),
+            "y max": max(tile["grid y"]["y max"] for tile in tiles.values()),
+        },
+        "grid x": {
+            "x min": min(tile["grid x"]["x min"] for tile in tiles.values()),
+            "x max": max(tile["grid x"]["x max"] for tile in tiles.values()),
+        },
+        "tiles": tiles,
+    }
+    index_path = (
+        Path(config["extracted dataset"]["dest dir"])
+        / f"{ds_name_root}_tiles{ds_name_dates}.yaml"
+    )
+    with index_path.open("wt") as f:
+        yaml.safe_dump(index, f, sort_keys=False)
+    logger.info(
+        "wrote tile index file", index_path=os.fspath(index_path), n_tiles=len(tiles)
+    )
+    return index_path
+
+
+def _calc_extraction_writes(
+    source_ds,
+    config,
+    model_profile,
+    generated_by,
+    override_start_date="",
+    override_end_date="",
+    compare_source_ds=None,
+    compare_model_profile=None,
+):
+    """Calculate the extracted dataset(s) of an extraction from its source dataset,
+    and their netCDF4 write parameters.
+
+    The extracted datasets contain dask arrays,
+    so nothing is computed until they are written.
+
+    :param source_ds: Source dataset of the extraction.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :param str generated_by: Command-line or API call string to complete "Generated by"
+                             entry in dataset history attribute.
+
+    :param str override_start_date: Extraction start date to override value in config.
+
+    :param str override_end_date: Extraction end date to override value in config
+
+    :param compare_source_ds: Source dataset of the ``compare:`` model profile.
+    :type compare_source_ds: :py:class:`xarray.Dataset`
+
+    :param dict compare_model_profile: ``compare:`` model profile dictionary.
+
+    :return: Mapping of box names to 5-tuples of :py:func:`write_netcdf` parameters
+             for ``selection: boxes:`` extractions,
+             otherwise mapping of :py:obj:`None` to the parameters.
+    :rtype: dict
+    """
+    logger.info("extracting variables")
+    extracted_ds, output_coords = _calc_processed_dataset(
+        source_ds,
+        config,
+        model_profile,
+        generated_by,
+        override_start_date,
+        override_end_date,
+    )
+    if compare_source_ds is not None:
+        logger.info(
+            "extracting comparison variables",
+            compare_model_profile=os.fspath(config["compare"]["model profile"]),
+        )
+        compare_ds, _ = _calc_processed_dataset(
+            compare_source_ds,
+            config,
+            compare_model_profile,
+            generated_by,
+            override_start_date,
+            override_end_date,
+        )
+        extracted_ds = _compare(extracted_ds, compare_ds, config, model_profile)
+    return _calc_output_writes(extracted_ds, output_coords, config, model_profile)
+
+
+def _calc_processed_dataset(
+    source_ds,
+    config,
+    model_profile,
+    generated_by,
+    override_start_date,
+    override_end_date,
+):
+    """Calculate the extracted dataset of an extraction from its source dataset,
+    through the processing stages that precede reduction and resampling.
+
+    :param source_ds: Source dataset of the extraction.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :param str generated_by: Command-line or API call string to complete "Generated by"
+                             entry in dataset history attribute.
+
+    :param str override_start_date: Extraction start date to override value in config.
+
+    :param str override_end_date: Extraction end date to override value in config
+
+    :return: Dataset containing extracted variable(s),
+             and coordinate names to data array mapping for the extracted variable(s).
+    :rtype: 2-tuple
+    """
+    output_coords = calc_output_coords(source_ds, config, model_profile)
+    extracted_vars = calc_extracted_vars(
+        source_ds, output_coords, config, model_profile
+    )
+    extracted_ds = calc_extracted_dataset(
+        extracted_vars,
+        output_coords,
+        config,
+        generated_by,
+        override_start_date,
+        override_end_date,
+    )
+    if "derived variables" in config:
+        extracted_ds = _calc_derived_vars(extracted_ds, config)
+    if "column kernels" in config:
+        extracted_ds = _calc_column_kernel_vars(extracted_ds, config, model_profile)
+    if "transect" in config.get("selection", {}):
+        extracted_ds = _select_transect(extracted_ds, config, model_profile)
+    if {"depths", "isopycnals"} & set(config.get("selection", {})):
+        extracted_ds = _interpolate_vertical(extracted_ds, config, model_profile)
+    if "regrid" in config:
+        extracted_ds = _regrid(extracted_ds, config, model_profile)
+    return extracted_ds, output_coords
+
+
+def _compare(extracted_ds, compare_ds, config, model_profile):
+    """Calculate the differences between the variables of the extracted dataset and
+    those of the ``compare:`` model profile extraction,
+    and/or their bias and root mean square error statistics over time at each grid point.
+
+    The datasets are aligned on their common times.
+    Their other coordinates must have the same sizes,
+    and the coordinate values of the extracted dataset are used.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param compare_ds: Dataset containing the variable(s) extracted from the ``compare:``
+                       model profile.
+    :type compare_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset containing the ``{var}_difference``, ``{var}_bias``,
+             and/or ``{var}_rmse`` variables.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`SystemExit` if the datasets have no common times,
+             or different grids.
+    """
+    compare_config = config["compare"]
+    outputs = compare_config.get("output", ["difference"])
+    use_model_coords = config["extracted dataset"].get("use model coords", False)
+    time_coord = "time" if not use_model_coords else model_profile["time coord"]["name"]
+    other_dims = set(extracted_ds.dims) - {time_coord}
+    extracted_ds, compare_ds = xarray.align(
+        extracted_ds, compare_ds, join="inner", exclude=other_dims
+    )
+    if extracted_ds.sizes[time_coord] == 0:
+        logger.error(
+            "no common times in compared datasets",
+            compare_model_profile=os.fspath(compare_config["model profile"]),
+        )
+        raise SystemExit(2)
+    for dim in other_dims:
+        if compare_ds.sizes.get(dim) != extracted_ds.sizes[dim]:
+            logger.error(
+                "compared datasets have different grids",
+                dim=dim,
+                size=extracted_ds.sizes[dim],
+                compare_size=compare_ds.sizes.get(dim),
+            )
+            raise SystemExit(2)
+    compare_ds = compare_ds.assign_coords(
+        {dim: extracted_ds[dim] for dim in other_dims if dim in extracted_ds.coords}
+    )
+    compared_vars = {}
+    for name, var in extracted_ds.data_vars.items():
+        difference = var - compare_ds[name]
+        long_name = var.attrs.get("long_name", name)
+        if "difference" in outputs:
+            compared_vars[f"{name}_difference"] = difference.assign_attrs(
+                {**var.attrs, "long_name": f"{long_name} Difference"}
+            )
+        if "bias" in outputs:
+            compared_vars[f"{name}_bias"] = difference.mean(time_coord).assign_attrs(
+                {**var.attrs, "long_name": f"{long_name} Bias"}
+            )
+        if "rmse" in outputs:
+            compared_vars[f"{name}_rmse"] = numpy.sqrt(
+                (difference**2).mean(time_coord)
+            ).assign_attrs({**var.attrs, "long_name": f"{long_name} RMSE"})
+    attrs = {
+        **extracted_ds.attrs,
+        "comparison": (
+            f"{config['dataset']['model profile']} minus "
+            f"{compare_config['model profile']}"
+        ),
+    }
+    logger.info(
+        "compared datasets",
+        outputs=outputs,
+        n_times=extracted_ds.sizes[time_coord],
+    )
+    return xarray.Dataset(compared_vars, attrs=attrs)
+
+
+def _calc_output_writes(extracted_ds, output_coords, config, model_profile):
+    """Reduce and resample the extracted dataset,
+    or the datasets of the boxes of a ``selection: boxes:`` stanza,
+    and calculate their netCDF4 write parameters.
+
+    :param extracted_ds: Dataset containing extracted variable(s).
+    :type extracted_ds: :py:class:`xarray.Dataset`
+
+    :param dict output_coords: Coordinate names to data array mapping for the extracted
+                               variable(s).
+
+    :param dict config: Extraction processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of box names to 5-tuples of :py:func:`write_netcdf` parameters
+             for ``selection: boxes:`` extractions,
+             otherwise mapping of :py:obj:`None` to the parameters.
+    :rtype: dict
+    """
+    output_datasets = (
+        _split_boxes(extracted_ds, config, model_profile)
+        if "boxes" in config.get("selection", {})
+        else {None: extracted_ds}
+    )
+    writes = {}
+    for output_name, output_ds in output_datasets.items():
+        if "reduce" in config:
+            output_ds = _reduce(output_ds, config, model_profile)
+        if "resample" in config:
+            output_ds = _resample(output_ds, config, model_profile)
+        if "climatology" in config:
+            output_ds = _calc_climatology(output_ds, config, model_profile)
+        writes[output_name] = (
+            output_ds,
+            *prep_netcdf_write(output_ds, output_coords, config, model_profile),
+        )
+    return writes
+
+
 def calc_coord_encoding(ds, coord, config, model_profile):
     """Construct the netCDF4 encoding dictionary for a coordinate.
 
@@ -1088,12 +5017,30 @@ def calc_coord_encoding(ds, coord, config, model_profile):
                 "chunksizes": (1,),
                 "zlib": config["extracted dataset"].get("deflate", True),
             }
-        case "depth" | "deptht" | "depthu" | "depthv" | "depthw":
+        case "region":
+            # Region names are variable length strings that can't be chunked or compressed
+            return {}
+        case (
+            "depth"
+            | "deptht"
+            | "depthu"
+            | "depthv"
+            | "depthw"
+            | "isopycnal"
+            | "distance"
+        ):
             return {
                 "dtype": numpy.single,
                 "chunksizes": (ds.coords[coord].size,),
                 "zlib": config["extracted dataset"].get("deflate", True),
             }
+        case "latitude" | "longitude":
+            # regridded dataset coordinates
+            return {
+                "dtype": numpy.float64,
+                "chunksizes": (ds.coords[coord].size,),
+                "zlib": config["extracted dataset"].get("deflate", True),
+            }
         case _:
             return {
                 "dtype": int,
@@ -1120,19 +5067,14 @@ def calc_var_encoding(var, output_coords, config, model_profile):
     """
     use_model_coords = config["extracted dataset"].get("use model coords", False)
     time_coord = "time" if not use_model_coords else model_profile["time coord"]["name"]
-    non_time_coords = [name for name in output_coords if name != time_coord]
     if "climatology" in config:
         time_coord = config["climatology"]["group by"]
-    chunksizes = []
-    if time_coord in var.coords:
-        chunksizes = [1]
-    for name in non_time_coords:
-        try:
-            chunksizes.append(var.coords[name].size)
-        except KeyError:
-            # Handle variables that have fewer than the full set of output coordinates;
-            # e.g. lons and lats that only have gridY and gridX coordinates
-            pass
+    # Variables can have fewer than the full set of output coordinates;
+    # e.g. lons and lats that only have gridY and gridX coordinates,
+    # or depth or spatially reduced variables.
+    # They can also have dimensions that are not output coordinates;
+    # e.g. region from regions reduction.
+    chunksizes = [1 if dim == time_coord else var.sizes[dim] for dim in var.dims]
     return {
         "dtype": numpy.single,
         "chunksizes": tuple(chunksizes),
@@ -1179,6 +5121,9 @@ def prep_netcdf_write(extracted_ds, output_coords, config, model_profile):
     if "climatology" in config:
         # An unlimited time dimension doesn't make sense for climatology datasets
         unlimited_dim = None
+    elif "difference" not in config.get("compare", {}).get("output", ["difference"]):
+        # Datasets of compare bias and RMSE statistics have no time dimension
+        unlimited_dim = None
     else:
         unlimited_dim = (
             "time" if not use_model_coords else model_profile["time coord"]["name"]
@@ -1231,6 +5176,103 @@ def write_netcdf(extracted_ds, nc_path, encoding, nc_format, unlimited_dim):
     logger.info("wrote netCDF4 file", nc_path=os.fspath(nc_path))
 
 
+def write_netcdfs(writes):
+    """Write one or more extracted variable(s) datasets to disk.
+
+    A single dataset is written by :py:func:`write_netcdf`.
+    Several datasets are persisted together in dask computations so that
+    source dataset chunks that are used by more than one of them are read once,
+    and then they are written from the cluster memory.
+    The datasets are persisted in batches whose total size is no more than
+    :py:data:`PERSIST_MEMORY_FRACTION` of the memory of the workers of the cluster of
+    the default dask client;
+    source dataset chunks that are used by datasets in more than one batch are read
+    once for each batch.
+    Datasets that are larger than that are written one at a time by
+    :py:func:`write_netcdf` without being persisted.
+
+    :param writes: 5-tuples of :py:func:`write_netcdf` parameters for each dataset.
+    :type writes: :py:class:`collections.abc.Iterable`
+    """
+    writes = list(writes)
+    if len(writes) == 1:
+        write_netcdf(*writes[0])
+        return
+    batches = _calc_persist_batches(writes, _calc_persist_memory_budget())
+    logger.info(
+        "computing extracted datasets", n_datasets=len(writes), n_batches=len(batches)
+    )
+    for batch in batches:
+        if len(batch) == 1:
+            write_netcdf(*batch[0])
+            continue
+        persisted_datasets = dask.persist(*(write[0] for write in batch))
+        for persisted_ds, (_, nc_path, encoding, nc_format, unlimited_dim) in zip(
+            persisted_datasets, batch
+        ):
+            write_netcdf(persisted_ds, nc_path, encoding, nc_format, unlimited_dim)
+        # Release the persisted datasets from the cluster memory before the next batch
+        del persisted_datasets, persisted_ds
+
+
+def _calc_persist_memory_budget():
+    """Calculate the memory that :py:func:`write_netcdfs` may use to persist extracted
+    datasets in the cluster of the default dask client.
+
+    :return: Memory budget in bytes,
+             or :py:obj:`None` if there is no default client,
+             or its workers have no memory limits.
+    :rtype: int
+    """
+    try:
+        client = dask.distributed.default_client()
+    except ValueError:
+        return None
+    memory_limits = [
+        worker["memory_limit"] for worker in client.scheduler_info()["workers"].values()
+    ]
+    if not memory_limits or not all(memory_limits):
+        return None
+    return int(PERSIST_MEMORY_FRACTION * sum(memory_limits))
+
+
+def _calc_persist_batches(writes, memory_budget):
+    """Group extracted dataset writes into batches whose total dataset size fits in
+    a memory budget.
+
+    The writes are kept in order.
+    Datasets that are larger than the budget are in batches by themselves.
+
+    :param list writes: 5-tuples of :py:func:`write_netcdf` parameters for each dataset.
+
+    :param memory_budget: Memory budget in bytes,
+                          or :py:obj:`None` for no budget.
+    :type memory_budget: int or None
+
+    :return: Batches of writes.
+    :rtype: list of lists
+    """
+    if memory_budget is None:
+        return [writes]
+    batches = [[]]
+    batch_nbytes = 0
+    for write in writes:
+        nbytes = write[0].nbytes
+        if batches[-1] and batch_nbytes + nbytes > memory_budget:
+            batches.append([])
+            batch_nbytes = 0
+        batches[-1].append(write)
+        batch_nbytes += nbytes
+    if len(batches) > 1:
+        logger.info(
+            "extracted datasets don't fit in dask cluster memory; persisting in batches",
+            n_batches=len(batches),
+            nbytes=dask.utils.format_bytes(sum(write[0].nbytes for write in writes)),
+            memory_budget=dask.utils.format_bytes(memory_budget),
+        )
+    return batches
+
+
 # This stanza facilitates running the extract sub-command in a Python debugger
 if __name__ == "__main__":  # pragma: nocover
     config_file = Path(sys.argv[1])
@@ -17,6 +17,7 @@
 
 """Provide information about reshapr, dask clusters, and model profiles."""
 
+import datetime
 import os
 import sys
 import textwrap
@@ -31,6 +32,8 @@ from rich.markup import escape
 from rich.padding import Padding
 from rich.syntax import Syntax
 
+from reshapr.utils import archive_catalog, path_resolver
+
 CLUSTER_CONFIGS_PATH = Path(__file__).parent.parent.parent / "cluster_configs"
 MODEL_PROFILES_PATH = Path(__file__).parent.parent.parent / "model_profiles"
 
@@ -218,33 +221,63 @@ def _vars_list(model_profile, time_interval, vars_group, console):
     except KeyError:
         logger.error("variables group is not in model profile", vars_group=vars_group)
         return
-    nc_files_pattern = dataset["file pattern"].format(
-        ddmmmyy="*",
-        yyyymmdd="*",
-        yyyymm01="*",
-        yyyymm_end="*",
-        yyyy="*",
-        nemo_yyyymm="*",
-        nemo_yyyymmdd="*",
-    )
-    try:
-        ds_path = next(results_archive_path.glob(nc_files_pattern))
-    except StopIteration:
-        logger.error(
-            "model profile results archive path not found",
-            results_archive_path=f"{results_archive_path}/",
+    coverage = None
+    if "catalog" in model_profile:
+        coverage = archive_catalog.calc_coverage(
+            model_profile["catalog"]["path"], time_interval, vars_group
         )
-        return
+    variables = None
+    if coverage is not None and coverage["latest_path"] is not None:
+        variables = archive_catalog.load_variables(
+            model_profile["catalog"]["path"], coverage["latest_path"]
+        )
+    if variables is None:
+        nc_files_pattern = path_resolver.calc_glob_pattern(dataset["file pattern"])
+        try:
+            ds_path = next(results_archive_path.glob(nc_files_pattern))
+        except StopIteration:
+            logger.error(
+                "model profile results archive path not found",
+                results_archive_path=f"{results_archive_path}/",
+            )
+            return
+        with xarray.open_dataset(ds_path, drop_variables=drop_vars) as ds:
+            variables = [
+                {
+                    "name": var,
+                    "long_name": ds[var].attrs["long_name"],
+                    "units": ds[var].attrs["units"],
+                }
+                for var in ds.data_vars
+            ]
+    else:
+        variables = [
+            var
+            for var in variables
+            if not var["is_coord"] and var["name"] not in drop_vars
+        ]
     console.print(
         f"[magenta]{time_interval}[/magenta]-averaged variables in [cyan]{vars_group}[/cyan] group:"
     )
-    with xarray.open_dataset(ds_path, drop_variables=drop_vars) as ds:
-        for var in ds.data_vars:
-            long_name = ds[var].attrs["long_name"]
-            units = f"[{ds[var].attrs['units']}]"
-            console.print(
-                f"  - [red]{var}[/red] : {long_name} {escape(units)}", highlight=False
-            )
+    for var in variables:
+        units = f"[{var['units']}]"
+        console.print(
+            f"  - [red]{var['name']}[/red] : {var['long_name']} {escape(units)}",
+            highlight=False,
+        )
+    if coverage is not None:
+        frame = "month" if vars_groups.get("days per file") == "month" else "day"
+        console.print(
+            f"\n[cyan]catalog[/cyan]: {coverage['n_files']} files from "
+            f"{coverage['start_date']} to {coverage['end_date']}; "
+            f"{coverage['n_missing']} missing, {coverage['n_unreadable']} unreadable",
+            highlight=False,
+        )
+        gap_dates = [
+            datetime.date.fromisoformat(date) for date in coverage["gap_dates"]
+        ]
+        for gap in path_resolver.calc_gaps(gap_dates, frame):
+            console.print(f"  - gap: {gap}", highlight=False)
 
     console.print(
         "\nPlease use [blue]reshapr info --help[/blue] to learn how to get other information,"
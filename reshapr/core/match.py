@@ -0,0 +1,493 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Match model variable values to scattered observations."""
+
+import os
+import time
+from pathlib import Path
+
+import arrow
+import numpy
+import pandas
+import structlog
+import xarray
+import yaml
+
+from reshapr.core import extract
+from reshapr.utils import geo_index, mesh_geometry
+
+logger = structlog.get_logger()
+
+OBS_COLUMNS = {
+    "time column": "time",
+    "lon column": "lon",
+    "lat column": "lat",
+    "depth column": "depth",
+}
+
+
+def cli_match(config_yaml):
+    """Match model variable values to observations from a table file and write them to
+    a table file via command-line interface.
+
+    :param config_yaml: File path and name of the YAML file to read processing configuration
+                        dictionary from.
+                        Please see :ref:`ReshaprMatchYAMLFile` for details.
+    :type config_yaml: :py:class:`pathlib.Path`
+
+    :raises: :py:exc:`SystemExit` if processing configuration YAML file cannot be found.
+    """
+    t_start = time.time()
+    try:
+        config = load_config(config_yaml)
+    except FileNotFoundError:
+        logger.error("config file not found", config_file=os.fspath(config_yaml))
+        raise SystemExit(2)
+    model_profile = extract._load_model_profile(
+        Path(config["dataset"]["model profile"])
+    )
+    obs = read_obs_table(Path(config["observations"]["path"]))
+    dask_client = extract.get_dask_client(config["dask cluster"])
+    matches = match_obs(obs, config, model_profile)
+    write_obs_table(matches, Path(config["output"]["path"]))
+    logger.info("total time", t_total=time.time() - t_start)
+    mesh_geometry.clear_cache()
+    dask_client.close()
+
+
+def load_config(config_yaml):
+    """Read a matchup processing configuration YAML file and return a config dict.
+
+    :param config_yaml: File path and name of the YAML file to read matchup processing
+                        configuration dictionary from.
+                        Please see :ref:`ReshaprMatchYAMLFile` for details.
+    :type config_yaml: :py:class:`pathlib.Path`
+
+    :return: Matchup processing configuration dictionary.
+    :rtype: dict
+    """
+    with config_yaml.open("rt") as f:
+        config = yaml.safe_load(f)
+    logger.info("loaded config", config_file=os.fspath(config_yaml))
+    return config
+
+
+def read_obs_table(obs_path):
+    """Read an observations table from a CSV or Parquet file.
+
+    :param obs_path: File path and name of the observations table.
+                     The file format is chosen by its extension;
+                     :file:`.parquet` files are read as Parquet,
+                     and all others as CSV.
+    :type obs_path: :py:class:`pathlib.Path`
+
+    :return: Observations table.
+    :rtype: :py:class:`pandas.DataFrame`
+
+    :raises: :py:exc:`SystemExit` if the file cannot be found,
+             or if there is no Parquet engine installed to read a Parquet file.
+    """
+    log = logger.bind(obs_path=os.fspath(obs_path))
+    try:
+        if obs_path.suffix == ".parquet":
+            obs = pandas.read_parquet(obs_path)
+        else:
+            obs = pandas.read_csv(obs_path)
+    except FileNotFoundError:
+        log.error("observations file not found")
+        raise SystemExit(2)
+    except ImportError as exc:
+        log.error("no Parquet engine installed", reason=str(exc))
+        raise SystemExit(2)
+    log.info("read observations", n_obs=len(obs))
+    return obs
+
+
+def write_obs_table(matches, output_path):
+    """Write a table of observations and matched model values to a CSV or Parquet file.
+
+    :param matches: Observations and matched model values table.
+    :type matches: :py:class:`pandas.DataFrame`
+
+    :param output_path: File path and name to write the table to.
+                        The file format is chosen by its extension;
+                        :file:`.parquet` files are written as Parquet,
+                        and all others as CSV.
+    :type output_path: :py:class:`pathlib.Path`
+
+    :raises: :py:exc:`SystemExit` if there is no Parquet engine installed to write
+             a Parquet file.
+    """
+    log = logger.bind(output_path=os.fspath(output_path))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if output_path.suffix == ".parquet":
+            matches.to_parquet(output_path)
+        else:
+            matches.to_csv(output_path, index=False)
+    except ImportError as exc:
+        log.error("no Parquet engine installed", reason=str(exc))
+        raise SystemExit(2)
+    log.info("wrote matched observations", n_obs=len(matches))
+
+
+def match_obs(obs, config, model_profile):
+    """Match model variable values to observations.
+
+    The observations are grouped by the model dataset file that contains their times,
+    and each file is opened once.
+    The model values at all of the observations in a file are calculated with vectorized
+    pointwise indexing of the file's dask arrays,
+    so each chunk of the file that contains observations is read once,
+    regardless of how many observations it contains.
+
+    :param obs: Observations table.
+    :type obs: :py:class:`pandas.DataFrame`
+
+    :param dict config: Matchup processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Copy of the observations table with the grid indices of the nearest
+             model grid points, their distances from the observations,
+             and the matched model variable values appended as columns.
+             The rows are in the same order as in :kbd:`obs`.
+             Observations that could not be matched have missing values.
+    :rtype: :py:class:`pandas.DataFrame`
+    """
+    columns = _calc_obs_columns(config)
+    grid_indices = calc_obs_grid_indices(obs, columns, config, model_profile)
+    obs_times = _calc_obs_times(obs[columns["time column"]])
+    matched = {
+        f"model_{var}": numpy.full(len(obs), numpy.nan)
+        for var in config["match variables"]
+    }
+    valid = grid_indices["matched"] & ~obs_times.isna().to_numpy()
+    ds_paths = calc_obs_ds_paths(obs_times, valid, config, model_profile)
+    chunk_size = extract.calc_ds_chunk_size(config, model_profile)
+    for ds_path, rows in sorted(ds_paths.items()):
+        log = logger.bind(ds_path=os.fspath(ds_path), n_obs=len(rows))
+        if not ds_path.exists():
+            log.warning("model dataset file not found; observations not matched")
+            continue
+        obs_depths = (
+            obs[columns["depth column"]].to_numpy()[rows]
+            if columns["depth column"] in obs
+            else None
+        )
+        file_values = match_ds_file(
+            ds_path,
+            chunk_size,
+            obs_times.to_numpy()[rows],
+            obs_depths,
+            grid_indices["y"][rows],
+            grid_indices["x"][rows],
+            config,
+            model_profile,
+        )
+        for var, values in file_values.items():
+            matched[f"model_{var}"][rows] = values
+        log.debug("matched observations in model dataset file")
+    matches = obs.copy()
+    for axis in ("y", "x"):
+        matches[f"model_grid_{axis}"] = pandas.Series(
+            grid_indices[axis], index=obs.index, dtype="Int64"
+        ).mask(~grid_indices["matched"])
+    matches["model_distance"] = grid_indices["distance"]
+    for column, values in matched.items():
+        matches[column] = values
+    logger.info(
+        "matched model values to observations",
+        n_obs=len(obs),
+        n_matched=int(numpy.isfinite(matches[next(iter(matched))]).sum()),
+        n_files=len(ds_paths),
+    )
+    return matches
+
+
+def _calc_obs_columns(config):
+    """Calculate the observations table column names from the config.
+
+    :param dict config: Matchup processing configuration dictionary.
+
+    :return: Mapping of column config keys to observations table column names.
+    :rtype: dict
+    """
+    obs_config = config["observations"]
+    return {key: obs_config.get(key, default) for key, default in OBS_COLUMNS.items()}
+
+
+def _calc_obs_times(obs_times):
+    """Convert observation times to timezone-naive UTC times.
+
+    Model dataset times are timezone-naive UTC,
+    so timezone-aware observation times are converted to UTC before their timezones
+    are removed.
+    Timezone-naive observation times are assumed to be UTC.
+
+    :param obs_times: Observation times column.
+    :type obs_times: :py:class:`pandas.Series`
+
+    :rtype: :py:class:`pandas.Series`
+    """
+    times = pandas.to_datetime(obs_times, errors="coerce", utc=True)
+    return times.dt.tz_localize(None)
+
+
+def calc_obs_grid_indices(obs, columns, config, model_profile):
+    """Calculate the model grid indices of the grid points nearest to observations.
+
+    The nearest grid points of the unique observation locations are found together
+    by a batched search of the geographic index of the model grid from
+    :py:mod:`reshapr.utils.geo_index`.
+
+    :param obs: Observations table.
+    :type obs: :py:class:`pandas.DataFrame`
+
+    :param dict columns: Mapping of column config keys to observations table column names.
+
+    :param dict config: Matchup processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of ``y`` and ``x`` to the grid indices of the observations,
+             ``distance`` to their distances in metres from the grid points,
+             and ``matched`` to a boolean array that is :py:obj:`True` for observations
+             that are within the ``max distance`` of a grid point.
+    :rtype: dict
+
+    :raises: :py:exc:`SystemExit` if nearest wet point matching is requested
+             without a mesh mask.
+    """
+    match_config = config.get("grid point", {})
+    wet_mask = None
+    if match_config.get("wet point", False):
+        mesh_mask_path = extract._calc_mesh_mask_path(match_config, model_profile)
+        if mesh_mask_path is None:
+            logger.error("nearest wet point matching requires a mesh mask")
+            raise SystemExit(2)
+        full_grid = {
+            "depth": slice(0, None, 1),
+            "y": slice(0, None, 1),
+            "x": slice(0, None, 1),
+        }
+        tmask = mesh_geometry.load_mesh_fields(
+            mesh_mask_path, ("tmask",), full_grid, surface=True
+        )["tmask"][1]
+        wet_mask = numpy.asarray(tmask).astype(bool)
+    max_distance = match_config.get("max distance", numpy.inf)
+    grid_geo_index = geo_index.load_geo_index(model_profile["geo ref dataset"])
+    lons = obs[columns["lon column"]].to_numpy(dtype=numpy.float64)
+    lats = obs[columns["lat column"]].to_numpy(dtype=numpy.float64)
+    y_indices = numpy.zeros(len(obs), dtype=int)
+    x_indices = numpy.zeros(len(obs), dtype=int)
+    distances = numpy.full(len(obs), numpy.nan)
+    located = numpy.isfinite(lons) & numpy.isfinite(lats)
+    # Observations are often repeated at the same locations (e.g. casts and moorings),
+    # so only search for each unique location once
+    locations, inverse = numpy.unique(
+        numpy.column_stack((lons[located], lats[located])), axis=0, return_inverse=True
+    )
+    location_y, location_x, location_distances = geo_index.find_nearest_indices(
+        grid_geo_index, locations[:, 0], locations[:, 1], wet_mask
+    )
+    inverse = inverse.reshape(-1)
+    y_indices[located] = location_y[inverse]
+    x_indices[located] = location_x[inverse]
+    distances[located] = location_distances[inverse]
+    matched = located & (distances <= max_distance)
+    logger.debug(
+        "calculated observation grid indices",
+        n_locations=len(locations),
+        n_unmatched=int((~matched).sum()),
+    )
+    return {"y": y_indices, "x": x_indices, "distance": distances, "matched": matched}
+
+
+def calc_obs_ds_paths(obs_times, valid, config, model_profile):
+    """Group observations by the model dataset file that contains their times.
+
+    :param obs_times: Timezone-naive UTC observation times.
+    :type obs_times: :py:class:`pandas.Series`
+
+    :param valid: Boolean array that is :py:obj:`True` for observations to match.
+    :type valid: :py:class:`numpy.ndarray`
+
+    :param dict config: Matchup processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of model dataset file paths to the row numbers of the observations
+             whose times they contain.
+    :rtype: dict
+    """
+    obs_dates = obs_times.dt.floor("D").to_numpy()
+    ds_paths = {}
+    for obs_date in numpy.unique(obs_dates[valid]):
+        date = arrow.get(pandas.Timestamp(obs_date).to_pydatetime()).date()
+        date_config = {
+            "dataset": config["dataset"],
+            "start date": date,
+            "end date": date,
+        }
+        (ds_path,) = extract.calc_ds_paths(date_config, model_profile)
+        rows = numpy.flatnonzero(valid & (obs_dates == obs_date))
+        ds_paths[ds_path] = numpy.concatenate(
+            (ds_paths.get(ds_path, numpy.array([], dtype=int)), rows)
+        )
+    return ds_paths
+
+
+def match_ds_file(
+    ds_path,
+    chunk_size,
+    obs_times,
+    obs_depths,
+    y_indices,
+    x_indices,
+    config,
+    model_profile,
+):
+    """Calculate the model variable values at observations from a model dataset file.
+
+    :param ds_path: Model dataset file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :param dict chunk_size: Chunks size to use for loading the dataset.
+
+    :param obs_times: Timezone-naive UTC observation times.
+    :type obs_times: :py:class:`numpy.ndarray`
+
+    :param obs_depths: Observation depths in metres,
+                       or :py:obj:`None` to match the surface level.
+    :type obs_depths: :py:class:`numpy.ndarray`
+
+    :param y_indices: Grid y indices of the observations.
+    :type y_indices: :py:class:`numpy.ndarray`
+
+    :param x_indices: Grid x indices of the observations.
+    :type x_indices: :py:class:`numpy.ndarray`
+
+    :param dict config: Matchup processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of model variable names to their values at the observations.
+    :rtype: dict
+    """
+    time_coord = model_profile["time coord"]["name"]
+    y_coord = model_profile["y coord"]["name"]
+    x_coord = model_profile["x coord"]["name"]
+    time_base = config["dataset"]["time base"]
+    vars_group = config["dataset"]["variables group"]
+    datasets = model_profile["results archive"]["datasets"]
+    depth_coord = datasets[time_base][vars_group].get("depth coord")
+    interp_config = config.get("interpolation", {})
+    with xarray.open_dataset(ds_path, chunks=chunk_size) as ds:
+        time_indices, time_weights = calc_interp_indices(
+            ds[time_coord].values.astype("datetime64[ns]").astype(numpy.float64),
+            obs_times.astype("datetime64[ns]").astype(numpy.float64),
+            interp_config.get("time", "nearest"),
+        )
+        indexers = {
+            y_coord: xarray.DataArray(y_indices, dims="obs"),
+            x_coord: xarray.DataArray(x_indices, dims="obs"),
+        }
+        corners = [
+            ({time_coord: xarray.DataArray(t_index, dims="obs")}, t_weight)
+            for t_index, t_weight in zip(time_indices, time_weights)
+        ]
+        if depth_coord is not None and depth_coord in ds.dims:
+            depths = (
+                numpy.zeros(len(obs_times)) if obs_depths is None else obs_depths
+            ).astype(numpy.float64)
+            missing_depths = ~numpy.isfinite(depths)
+            depth_indices, depth_weights = calc_interp_indices(
+                ds[depth_coord].values.astype(numpy.float64),
+                numpy.where(missing_depths, 0, depths),
+                interp_config.get("depth", "nearest"),
+            )
+            corners = [
+                (
+                    {**t_indexers, depth_coord: xarray.DataArray(k_index, dims="obs")},
+                    t_weight * k_weight,
+                )
+                for t_indexers, t_weight in corners
+                for k_index, k_weight in zip(depth_indices, depth_weights)
+            ]
+        matched, depth_vars = {}, set()
+        for var in config["match variables"]:
+            var_da = ds[var]
+            if depth_coord in var_da.dims:
+                depth_vars.add(var)
+            matched[var] = sum(
+                var_da.isel(
+                    {
+                        dim: indexer
+                        for dim, indexer in {**corner_indexers, **indexers}.items()
+                        if dim in var_da.dims
+                    }
+                )
+                * xarray.DataArray(weight, dims="obs")
+                for corner_indexers, weight in corners
+            )
+        # Compute all of the variables together so that each chunk is only read once
+        matched_ds = xarray.Dataset(matched).compute()
+    return {
+        var: (
+            numpy.where(missing_depths, numpy.nan, matched_ds[var].values)
+            if var in depth_vars
+            else matched_ds[var].values
+        )
+        for var in config["match variables"]
+    }
+
+
+def calc_interp_indices(coord_values, targets, method):
+    """Calculate the indices and weights to interpolate along a coordinate.
+
+    Targets beyond the ends of the coordinate use the end values.
+
+    :param coord_values: Monotonically increasing coordinate values.
+    :type coord_values: :py:class:`numpy.ndarray`
+
+    :param targets: Coordinate values to interpolate to.
+    :type targets: :py:class:`numpy.ndarray`
+
+    :param str method: Interpolation method;
+                       ``nearest`` for nearest neighbour,
+                       or ``linear`` for linear interpolation.
+
+    :return: Lists of index arrays and weight arrays for the coordinate points
+             that are combined to interpolate to the targets.
+    :rtype: 2-tuple
+
+    :raises: :py:exc:`SystemExit` if the interpolation method is not supported.
+    """
+    positions = numpy.interp(targets, coord_values, numpy.arange(len(coord_values)))
+    match method:
+        case "nearest":
+            return [numpy.rint(positions).astype(int)], [numpy.ones(len(targets))]
+        case "linear":
+            lower = numpy.floor(positions).astype(int)
+            upper = numpy.minimum(lower + 1, len(coord_values) - 1)
+            fraction = positions - lower
+            return [lower, upper], [1 - fraction, fraction]
+        case _:
+            logger.error("unsupported interpolation method", method=method)
+            raise SystemExit(2)
@@ -0,0 +1,296 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Build and maintain spatial overview pyramids of model products.
+
+An overview pyramid level is a copy of the model results archive files of selected
+variables in which the fields are block averaged over ``N`` by ``N`` grid points.
+The level files have the same relative paths and names as the results archive files,
+so :command:`reshapr extract` can read them with ``resolution: overview-N``
+in the same way that it reads the full resolution files.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import numpy
+import structlog
+import xarray
+
+from reshapr.core import extract
+from reshapr.utils import io_limits, mesh_geometry
+
+logger = structlog.get_logger()
+
+
+def cli_pyramid(config_yaml, cli_start_date, cli_end_date):
+    """Build or update the overview pyramid levels of a model product via command-line
+    interface.
+
+    Overview files that are newer than the results archive files that they are
+    calculated from are not rebuilt,
+    so the pyramid can be maintained by running the command for the dates of
+    new or updated results.
+
+    :param config_yaml: File path and name of the YAML file to read processing configuration
+                        dictionary from.
+                        Please see :ref:`ReshaprPyramidYAMLFile` for details.
+    :type config_yaml: :py:class:`pathlib.Path`
+
+    :param str cli_start_date: Start date for pyramid. Overrides start date in config file.
+
+    :param str cli_end_date: End date for pyramid. Overrides end date in config file.
+
+    :raises: :py:exc:`SystemExit` if processing configuration YAML file cannot be found,
+             or the model profile has no ``overview pyramid`` stanza.
+    """
+    t_start = time.time()
+    try:
+        config = extract.load_config(config_yaml, cli_start_date, cli_end_date)
+    except FileNotFoundError:
+        logger.error("config file not found", config_file=os.fspath(config_yaml))
+        raise SystemExit(2)
+    model_profile = extract._load_model_profile(
+        Path(config["dataset"]["model profile"])
+    )
+    if "overview pyramid" not in model_profile:
+        logger.error(
+            "model profile has no overview pyramid",
+            model_profile=os.fspath(config["dataset"]["model profile"]),
+        )
+        raise SystemExit(2)
+    ds_paths = extract.calc_ds_paths(config, model_profile)
+    chunk_size = extract.calc_ds_chunk_size(config, model_profile)
+    dask_client = extract.get_dask_client(config["dask cluster"])
+    n_built = 0
+    for ds_path in ds_paths:
+        overview_paths = calc_overview_paths(ds_path, model_profile)
+        stale_levels = [
+            level
+            for level, overview_path in overview_paths.items()
+            if _is_stale(overview_path, ds_path)
+        ]
+        if not stale_levels:
+            logger.debug("overviews are up to date", ds_path=os.fspath(ds_path))
+            continue
+        with extract.open_dataset([ds_path], chunk_size, config) as source_ds:
+            source_ds = _select_depths(source_ds, config, model_profile)
+            source_ds = _mask_land(source_ds, config, model_profile)
+            writes = []
+            for level in stale_levels:
+                overview_ds = calc_overview(source_ds, level, model_profile)
+                overview_paths[level].parent.mkdir(parents=True, exist_ok=True)
+                writes.append(
+                    (
+                        overview_ds,
+                        overview_paths[level],
+                        *_prep_overview_write(overview_ds, model_profile),
+                    )
+                )
+            # All of the levels are computed together from a single read of the file
+            extract.write_netcdfs(writes)
+        n_built += len(writes)
+    logger.info(
+        "built overview pyramid files",
+        n_ds_paths=len(ds_paths),
+        n_overviews=n_built,
+    )
+    logger.info("total time", t_total=time.time() - t_start)
+    mesh_geometry.clear_cache()
+    io_limits.log_io_stats(dask_client)
+    dask_client.close()
+
+
+def calc_overview_paths(ds_path, model_profile):
+    """Calculate the overview file paths of the pyramid levels of a results archive file.
+
+    :param ds_path: Results archive file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Mapping of pyramid levels to overview file paths.
+    :rtype: dict
+    """
+    overview_pyramid = model_profile["overview pyramid"]
+    relative_path = ds_path.relative_to(model_profile["results archive"]["path"])
+    return {
+        level: Path(overview_pyramid["path"]) / f"overview-{level}" / relative_path
+        for level in overview_pyramid["levels"]
+    }
+
+
+def _is_stale(overview_path, ds_path):
+    """Return :py:obj:`True` if an overview file is missing,
+    or older than the results archive file that it is calculated from.
+
+    :param overview_path: Overview file path.
+    :type overview_path: :py:class:`pathlib.Path`
+
+    :param ds_path: Results archive file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :rtype: bool
+    """
+    try:
+        return overview_path.stat().st_mtime < ds_path.stat().st_mtime
+    except FileNotFoundError:
+        return True
+
+
+def _select_depths(source_ds, config, model_profile):
+    """Select the depth levels of the ``selection: depth:`` stanza of the config
+    from the source dataset.
+
+    :param source_ds: Source dataset.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Pyramid processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset with the selected depth levels.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    depth_coord = _calc_depth_coord(config, model_profile)
+    if depth_coord not in source_ds.dims:
+        return source_ds
+    depth_selector = extract._calc_grid_selectors(config)["depth"]
+    return source_ds.isel({depth_coord: depth_selector})
+
+
+def _calc_depth_coord(config, model_profile):
+    """Return the name of the depth coordinate of the source dataset.
+
+    :param dict config: Pyramid processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Depth coordinate name,
+             or :py:obj:`None` for datasets that have no depth coordinate.
+    :rtype: str
+    """
+    time_base = config["dataset"]["time base"]
+    vars_group = config["dataset"]["variables group"]
+    datasets = model_profile["results archive"]["datasets"]
+    return datasets[time_base][vars_group].get("depth coord")
+
+
+def _mask_land(source_ds, config, model_profile):
+    """Replace the land values of the source dataset variables with :py:obj:`numpy.nan`
+    so that they are excluded from the block averages.
+
+    The land mask is the ``tmask`` field of the mesh mask in the config,
+    or in the model profile.
+    If there is no mesh mask the source dataset is returned unchanged.
+
+    :param source_ds: Source dataset.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param dict config: Pyramid processing configuration dictionary.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Dataset with land values masked.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    mesh_mask_path = extract._calc_mesh_mask_path(config, model_profile)
+    if mesh_mask_path is None:
+        return source_ds
+    selectors = extract._calc_grid_selectors(config)
+    selectors.update({"y": slice(0, None, 1), "x": slice(0, None, 1)})
+    depth_coord = _calc_depth_coord(config, model_profile)
+    y_coord = model_profile["y coord"]["name"]
+    x_coord = model_profile["x coord"]["name"]
+    masked_vars = {}
+    for name, var in source_ds.data_vars.items():
+        surface = depth_coord not in var.dims
+        tmask = mesh_geometry.load_mesh_fields(
+            mesh_mask_path, ("tmask",), selectors, surface=surface
+        )["tmask"][1]
+        dims = (y_coord, x_coord) if surface else (depth_coord, y_coord, x_coord)
+        masked_vars[name] = var.where(xarray.DataArray(tmask, dims=dims) > 0)
+    return source_ds.assign(masked_vars)
+
+
+def calc_overview(source_ds, level, model_profile):
+    """Calculate an overview pyramid level dataset by block averaging the source dataset
+    variables over ``level`` by ``level`` grid points.
+
+    Missing values are excluded from the averages,
+    and blocks at the north and east edges of the grid are averaged over the grid
+    points that they contain.
+    The y/x coordinates of the overview are the full resolution grid indices of the
+    south-west corners of the blocks.
+
+    :param source_ds: Source dataset.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param int level: Number of grid points in the y and x directions of the blocks.
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Overview dataset.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    y_coord = model_profile["y coord"]["name"]
+    x_coord = model_profile["x coord"]["name"]
+    overview_ds = source_ds.coarsen(
+        {y_coord: level, x_coord: level}, boundary="pad"
+    ).mean(keep_attrs=True)
+    overview_ds = overview_ds.assign_coords(
+        {
+            y_coord: numpy.arange(0, source_ds.sizes[y_coord], level),
+            x_coord: numpy.arange(0, source_ds.sizes[x_coord], level),
+        }
+    )
+    overview_ds.attrs = {
+        **source_ds.attrs,
+        "overview_level": level,
+        "overview_comment": (
+            f"block averages over {level} by {level} grid points; "
+            f"{y_coord} and {x_coord} values are the full resolution grid indices of "
+            f"the south-west corners of the blocks"
+        ),
+    }
+    return overview_ds
+
+
+def _prep_overview_write(overview_ds, model_profile):
+    """Prepare the :py:func:`reshapr.core.extract.write_netcdf` parameters for an
+    overview dataset, other than the dataset and its file path.
+
+    :param overview_ds: Overview dataset.
+    :type overview_ds: :py:class:`xarray.Dataset`
+
+    :param dict model_profile: Model profile dictionary.
+
+    :return: Encoding, netCDF4 format, and unlimited dimension.
+    :rtype: 3-tuple
+    """
+    time_coord = model_profile["time coord"]["name"]
+    encoding = {
+        var: {"dtype": numpy.single, "zlib": True, "complevel": 4}
+        for var in overview_ds.data_vars
+    }
+    encoding[time_coord] = {
+        key: value
+        for key, value in overview_ds[time_coord].encoding.items()
+        if key in {"units", "calendar", "dtype"}
+    }
+    return encoding, "NETCDF4", time_coord
@@ -0,0 +1,189 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Cache of day and month aggregates of model variables.
+
+A cache entry is a netCDF4 file that contains the aggregate (e.g. mean) of a
+variable over a day or a month at every grid point of the model domain,
+with a single time value at the middle of the period.
+Entries are stored in the directory given by the ``aggregate cache`` stanza of the
+model profile, in the layout::
+
+  {path}/{time base}/{variables group}/{aggregation}/{level}/{var}/{var}_{period}.nc
+
+where ``{period}`` is ``YYYYMMDD`` for day entries and ``YYYYMM`` for month entries.
+
+An entry is valid if it is newer than all of the results archive files that it is
+calculated from.
+"""
+
+from pathlib import Path
+
+import pandas
+
+#: Cache levels in order from coarsest to finest.
+LEVELS = ("month", "day")
+
+#: Aggregations whose values for a period can be calculated from the values for the
+#: equal length sub-periods that it contains.
+AGGREGATIONS = {"mean", "min", "max", "sum"}
+
+_LEVEL_FREQS = {"day": "1D", "month": "MS"}
+_LEVEL_OFFSETS = {"day": pandas.offsets.Day(1), "month": pandas.offsets.MonthBegin(1)}
+
+
+def calc_levels(time_base):
+    """Return the cache levels that are coarser than a results archive time base.
+
+    :param str time_base: Time base of the results archive files.
+
+    :return: Cache levels in order from coarsest to finest.
+    :rtype: tuple
+    """
+    match time_base:
+        case "hour":
+            return LEVELS
+        case "day":
+            return ("month",)
+        case _:
+            return ()
+
+
+def calc_entry_path(cache_path, time_base, vars_group, aggregation, level, var, period):
+    """Calculate the file path of a cache entry.
+
+    :param cache_path: Aggregate cache directory from the model profile.
+    :type cache_path: :py:class:`pathlib.Path` or str
+
+    :param str time_base: Time base of the results archive files.
+
+    :param str vars_group: Variables group of the results archive files.
+
+    :param str aggregation: Aggregation; e.g. ``mean``.
+
+    :param str level: Cache level; ``day`` or ``month``.
+
+    :param str var: Variable name.
+
+    :param period: Start of the day or month of the entry.
+    :type period: :py:class:`arrow.Arrow` or :py:class:`pandas.Timestamp`
+
+    :rtype: :py:class:`pathlib.Path`
+    """
+    period_str = period.strftime("%Y%m%d" if level == "day" else "%Y%m")
+    return (
+        Path(cache_path)
+        / time_base
+        / vars_group.replace(" ", "_")
+        / aggregation
+        / level
+        / var
+        / f"{var}_{period_str}.nc"
+    )
+
+
+def is_valid(entry_path, source_paths):
+    """Return :py:obj:`True` if a cache entry exists,
+    and is not older than any of the results archive files that it is calculated from.
+
+    Results archive files that no longer exist don't invalidate the entry.
+
+    :param entry_path: Cache entry file path.
+    :type entry_path: :py:class:`pathlib.Path`
+
+    :param list source_paths: Results archive file paths.
+
+    :rtype: bool
+    """
+    try:
+        entry_mtime = entry_path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    for source_path in source_paths:
+        try:
+            if source_path.stat().st_mtime > entry_mtime:
+                return False
+        except FileNotFoundError:
+            continue
+    return True
+
+
+def calc_entries(source_ds, level, aggregation, time_coord):
+    """Aggregate the variables of a dataset over the days or months of its times.
+
+    The time value of each entry is the middle of its period.
+    Non-index coordinates are dropped so that entries can be combined with each other,
+    and with results archive datasets.
+
+    :param source_ds: Dataset to aggregate.
+    :type source_ds: :py:class:`xarray.Dataset`
+
+    :param str level: Cache level; ``day`` or ``month``.
+
+    :param str aggregation: Aggregation; one of :py:data:`AGGREGATIONS`.
+
+    :param str time_coord: Name of the time coordinate.
+
+    :return: Mapping of period starts to single time datasets.
+    :rtype: dict
+    """
+    time_encoding = source_ds[time_coord].encoding
+    resampler = source_ds.reset_coords(drop=True).resample(
+        {time_coord: _LEVEL_FREQS[level]},
+        label="left",
+        # Missing values in the source dataset must propagate to the entries so that
+        # they aren't hidden in aggregates of aggregates
+        skipna=False,
+    )
+    aggregated_ds = getattr(resampler, aggregation)(time_coord, keep_attrs=True)
+    period_starts = aggregated_ds.get_index(time_coord)
+    period_middles = (
+        period_starts + ((period_starts + _LEVEL_OFFSETS[level]) - period_starts) / 2
+    )
+    aggregated_ds = aggregated_ds.assign_coords({time_coord: period_middles})
+    # The middles of periods may not be representable in the integer time units of
+    # the source dataset
+    aggregated_ds[time_coord].encoding = {
+        **{
+            key: value
+            for key, value in time_encoding.items()
+            if key in {"units", "calendar"}
+        },
+        "dtype": "float64",
+    }
+    aggregated_ds.attrs = {"aggregate_level": level, "aggregation": aggregation}
+    return {
+        period_start: aggregated_ds.isel({time_coord: slice(i, i + 1)})
+        for i, period_start in enumerate(period_starts)
+    }
+
+
+def prep_entry_write(entry_ds, time_coord):
+    """Prepare the :py:func:`reshapr.core.extract.write_netcdf` parameters for a cache
+    entry dataset, other than the dataset and its file path.
+
+    :param entry_ds: Cache entry dataset.
+    :type entry_ds: :py:class:`xarray.Dataset`
+
+    :param str time_coord: Name of the time coordinate.
+
+    :return: Encoding, netCDF4 format, and unlimited dimension.
+    :rtype: 3-tuple
+    """
+    encoding = {var: {"zlib": True, "complevel": 4} for var in entry_ds.data_vars}
+    encoding[time_coord] = dict(entry_ds[time_coord].encoding)
+    return encoding, "NETCDF4", time_coord
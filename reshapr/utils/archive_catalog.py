@@ -0,0 +1,418 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SQLite catalog of the results archive files of a model product.
+
+The catalog is stored in the file given by the ``catalog`` stanza of the model profile.
+It records the date, size, modification time, and integrity status of each results
+archive file,
+and the dimensions, shape, chunking, data type, and metadata of each of its variables,
+so that coverage, gap, and schema questions can be answered without opening the
+files.
+
+The integrity status of a file is ``ok`` if its metadata can be read,
+``missing`` if it doesn't exist,
+and ``unreadable`` otherwise.
+A catalog record is current if the size and modification time of the file are the
+same as when it was scanned.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import xarray
+
+#: Integrity statuses of catalogued files.
+STATUSES = ("ok", "missing", "unreadable")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    time_base TEXT NOT NULL,
+    vars_group TEXT NOT NULL,
+    date TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    status TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_dataset_date ON files (time_base, vars_group, date);
+CREATE TABLE IF NOT EXISTS variables (
+    path TEXT NOT NULL REFERENCES files (path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    is_coord INTEGER NOT NULL,
+    dims TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    chunks TEXT,
+    dtype TEXT NOT NULL,
+    long_name TEXT,
+    units TEXT,
+    PRIMARY KEY (path, name)
+);
+"""
+
+
+def connect(catalog_path):
+    """Connect to a catalog for updating,
+    creating it if it doesn't exist.
+
+    :param catalog_path: Catalog file path.
+    :type catalog_path: :py:class:`pathlib.Path` or str
+
+    :rtype: :py:class:`sqlite3.Connection`
+    """
+    catalog_path = Path(catalog_path)
+    catalog_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(catalog_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _connect_read_only(catalog_path):
+    """Connect to an existing catalog for reading.
+
+    :param catalog_path: Catalog file path.
+    :type catalog_path: :py:class:`pathlib.Path` or str
+
+    :return: Connection,
+             or :py:obj:`None` if the catalog doesn't exist.
+    :rtype: :py:class:`sqlite3.Connection`
+    """
+    catalog_path = Path(catalog_path)
+    if not catalog_path.exists():
+        return None
+    return sqlite3.connect(f"{catalog_path.absolute().as_uri()}?mode=ro", uri=True)
+
+
+def scan_file(ds_path):
+    """Scan the metadata of a results archive file.
+
+    Only the file metadata is read,
+    so scanning is fast enough to be done for many files in parallel.
+
+    :param ds_path: Results archive file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :return: Catalog record with ``path``, ``size``, ``mtime``, ``status``, ``error``,
+             and ``variables`` items.
+    :rtype: dict
+    """
+    record = {
+        "path": os.fspath(ds_path),
+        "size": None,
+        "mtime": None,
+        "status": "ok",
+        "error": None,
+        "variables": [],
+    }
+    try:
+        stat = ds_path.stat()
+    except FileNotFoundError:
+        record["status"] = "missing"
+        return record
+    record.update(size=stat.st_size, mtime=stat.st_mtime)
+    try:
+        with xarray.open_dataset(
+            ds_path, engine="h5netcdf", decode_times=False, mask_and_scale=False
+        ) as ds:
+            record["variables"] = [
+                {
+                    "name": name,
+                    "is_coord": name in ds.coords,
+                    "dims": list(var.dims),
+                    "shape": list(var.shape),
+                    "chunks": (
+                        list(var.encoding["chunksizes"])
+                        if var.encoding.get("chunksizes") is not None
+                        else None
+                    ),
+                    "dtype": str(var.dtype),
+                    "long_name": var.attrs.get("long_name"),
+                    "units": var.attrs.get("units"),
+                }
+                for name, var in ds.variables.items()
+            ]
+    except Exception as exc:
+        record.update(status="unreadable", error=f"{type(exc).__name__}: {exc}")
+    return record
+
+
+def calc_stale_paths(connection, ds_paths):
+    """Calculate the results archive file paths whose catalog records are missing or
+    not current.
+
+    :param connection: Catalog connection.
+    :type connection: :py:class:`sqlite3.Connection`
+
+    :param list ds_paths: Results archive file paths.
+
+    :return: File paths to scan.
+    :rtype: list
+    """
+    records = {
+        path: (size, mtime, status)
+        for path, size, mtime, status in connection.execute(
+            "SELECT path, size, mtime, status FROM files"
+        )
+    }
+    stale_paths = []
+    for ds_path in ds_paths:
+        record = records.get(os.fspath(ds_path))
+        try:
+            stat = ds_path.stat()
+        except FileNotFoundError:
+            if record is None or record[2] != "missing":
+                stale_paths.append(ds_path)
+            continue
+        if record is None or record[:2] != (stat.st_size, stat.st_mtime):
+            stale_paths.append(ds_path)
+    return stale_paths
+
+
+def store_records(connection, records, time_base, vars_group):
+    """Store the records of scanned results archive files in a catalog,
+    replacing their previous records.
+
+    :param connection: Catalog connection.
+    :type connection: :py:class:`sqlite3.Connection`
+
+    :param list records: Catalog records from :py:func:`scan_file` with an added
+                         ``date`` item that is the ISO format day or month start date
+                         of the file.
+
+    :param str time_base: Time base of the results archive files.
+
+    :param str vars_group: Variables group of the results archive files.
+    """
+    with connection:
+        for record in records:
+            connection.execute("DELETE FROM files WHERE path = ?", (record["path"],))
+            connection.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record["path"],
+                    time_base,
+                    vars_group,
+                    record["date"],
+                    record["size"],
+                    record["mtime"],
+                    record["status"],
+                    record["error"],
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO variables VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        record["path"],
+                        var["name"],
+                        var["is_coord"],
+                        json.dumps(var["dims"]),
+                        json.dumps(var["shape"]),
+                        (
+                            json.dumps(var["chunks"])
+                            if var["chunks"] is not None
+                            else None
+                        ),
+                        var["dtype"],
+                        var["long_name"],
+                        var["units"],
+                    )
+                    for var in record["variables"]
+                ],
+            )
+
+
+def load_statuses(catalog_path, time_base, vars_group):
+    """Load the dates and integrity statuses of the catalogued files of a dataset.
+
+    :param catalog_path: Catalog file path.
+    :type catalog_path: :py:class:`pathlib.Path` or str
+
+    :param str time_base: Time base of the results archive files.
+
+    :param str vars_group: Variables group of the results archive files.
+
+    :return: Mapping of file paths to 2-tuples of their ISO format dates and
+             integrity statuses;
+             empty if the catalog doesn't exist.
+    :rtype: dict
+    """
+    connection = _connect_read_only(catalog_path)
+    if connection is None:
+        return {}
+    try:
+        return {
+            Path(path): (date, status)
+            for path, date, status in connection.execute(
+                "SELECT path, date, status FROM files "
+                "WHERE time_base = ? AND vars_group = ?",
+                (time_base, vars_group),
+            )
+        }
+    finally:
+        connection.close()
+
+
+def load_current_gaps(catalog_path, time_base, vars_group, ds_paths):
+    """Load the dates and integrity statuses of the files of a dataset whose current
+    catalog records are ``missing`` or ``unreadable``.
+
+    A ``missing`` record is current if the file still doesn't exist,
+    and an ``unreadable`` record is current if the size and modification time of
+    the file are the same as when it was scanned,
+    so files that were written or repaired after the catalog was updated are not
+    gaps.
+
+    :param catalog_path: Catalog file path.
+    :type catalog_path: :py:class:`pathlib.Path` or str
+
+    :param str time_base: Time base of the results archive files.
+
+    :param str vars_group: Variables group of the results archive files.
+
+    :param list ds_paths: Results archive file paths.
+
+    :return: Mapping of the gap file paths to 2-tuples of their ISO format dates and
+             integrity statuses;
+             empty if the catalog doesn't exist.
+    :rtype: dict
+    """
+    connection = _connect_read_only(catalog_path)
+    if connection is None:
+        return {}
+    try:
+        records = {
+            Path(path): (date, size, mtime, status)
+            for path, date, size, mtime, status in connection.execute(
+                "SELECT path, date, size, mtime, status FROM files "
+                "WHERE time_base = ? AND vars_group = ? AND status != 'ok'",
+                (time_base, vars_group),
+            )
+        }
+    finally:
+        connection.close()
+    gaps = {}
+    for ds_path in ds_paths:
+        if ds_path not in records:
+            continue
+        date, size, mtime, status = records[ds_path]
+        try:
+            stat = ds_path.stat()
+        except FileNotFoundError:
+            gaps[ds_path] = (date, "missing")
+            continue
+        if status == "unreadable" and (size, mtime) == (stat.st_size, stat.st_mtime):
+            gaps[ds_path] = (date, status)
+    return gaps
+
+
+def load_variables(catalog_path, ds_path):
+    """Load the catalogued variables of a results archive file if its record is current.
+
+    :param catalog_path: Catalog file path.
+    :type catalog_path: :py:class:`pathlib.Path` or str
+
+    :param ds_path: Results archive file path.
+    :type ds_path: :py:class:`pathlib.Path`
+
+    :return: Variable records with ``name``, ``is_coord``, ``dims``, ``shape``,
+             ``chunks``, ``dtype``, ``long_name``, and ``units`` items,
+             or :py:obj:`None` if the catalog doesn't exist,
+             or doesn't have a current ``ok`` record of the file.
+    :rtype: list
+    """
+    connection = _connect_read_only(catalog_path)
+    if connection is None:
+        return None
+    try:
+        record = connection.execute(
+            "SELECT size, mtime, status FROM files WHERE path = ?",
+            (os.fspath(ds_path),),
+        ).fetchone()
+        try:
+            stat = ds_path.stat()
+        except FileNotFoundError:
+            return None
+        if record is None or record != (stat.st_size, stat.st_mtime, "ok"):
+            return None
+        return [
+            {
+                "name": name,
+                "is_coord": bool(is_coord),
+                "dims": json.loads(dims),
+                "shape": json.loads(shape),
+                "chunks": json.loads(chunks) if chunks is not None else None,
+                "dtype": dtype,
+                "long_name": long_name,
+                "units": units,
+            }
+            for name, is_coord, dims, shape, chunks, dtype, long_name, units in (
+                connection.execute(
+                    "SELECT name, is_coord, dims, shape, chunks, dtype, long_name, units "
+                    "FROM variables WHERE path = ? ORDER BY rowid",
+                    (os.fspath(ds_path),),
+                )
+            )
+        ]
+    finally:
+        connection.close()
+
+
+def calc_coverage(catalog_path, time_base, vars_group):
+    """Calculate the coverage of the catalogued files of a dataset.
+
+    :param catalog_path: Catalog file path.
+    :type catalog_path: :py:class:`pathlib.Path` or str
+
+    :param str time_base: Time base of the results archive files.
+
+    :param str vars_group: Variables group of the results archive files.
+
+    :return: Coverage with ``n_files``, ``start_date``, and ``end_date`` items,
+             the number of files of each integrity status,
+             the ISO format dates of the files that are not ``ok`` as ``gap_dates``,
+             and the path of the latest ``ok`` file as ``latest_path``;
+             or :py:obj:`None` if the catalog doesn't exist or has no files of the
+             dataset.
+    :rtype: dict
+    """
+    statuses = load_statuses(catalog_path, time_base, vars_group)
+    if not statuses:
+        return None
+    dates = sorted(date for date, _ in statuses.values())
+    ok_paths = sorted(
+        (date, path) for path, (date, status) in statuses.items() if status == "ok"
+    )
+    return {
+        "n_files": len(statuses),
+        "start_date": dates[0],
+        "end_date": dates[-1],
+        **{
+            f"n_{status}": sum(
+                file_status == status for _, file_status in statuses.values()
+            )
+            for status in STATUSES
+        },
+        "gap_dates": sorted(
+            date for date, status in statuses.values() if status != "ok"
+        ),
+        "latest_path": ok_paths[-1][1] if ok_paths else None,
+    }
@@ -0,0 +1,257 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Column kernel functions and registry.
+
+Column kernels calculate a scalar diagnostic like mixed layer depth from each
+water column of a variable.
+They are NumPy functions that operate on arrays whose last axis is depth,
+so they are vectorized over all of the other axes.
+
+Kernels are registered by name with the :py:func:`column_kernel` decorator.
+Kernels in other packages are registered via the ``reshapr.column_kernels``
+entry point group;
+e.g. in the package's :file:`pyproject.toml`:
+
+.. code-block:: toml
+
+    [project.entry-points."reshapr.column_kernels"]
+    "euphotic depth" = "my_pkg.kernels:euphotic_depth"
+"""
+
+from importlib import metadata
+
+import numpy
+import xarray
+
+ENTRY_POINT_GROUP = "reshapr.column_kernels"
+
+_registry = {}
+
+
+def column_kernel(name, long_name, units):
+    """Decorator to register a function as a column kernel.
+
+    The decorated function must accept an array whose last axis is depth as its first
+    argument, a 1-dimensional array of depths as its second argument,
+    and optional keyword arguments for kernel parameters.
+    It must return an array with the shape of its first argument without the last axis.
+
+    :param str name: Name of the kernel for use in extraction configurations.
+
+    :param str long_name: ``long_name`` attribute for kernel results.
+
+    :param str units: ``units`` attribute for kernel results.
+
+    :return: Decorator function.
+    :rtype: Callable
+    """
+
+    def register(func):
+        func.kernel_name = name
+        func.long_name = long_name
+        func.units = units
+        _registry[name] = func
+        return func
+
+    return register
+
+
+def get_column_kernel(name):
+    """Return the column kernel function registered as :kbd:`name`.
+
+    Kernels registered via the ``reshapr.column_kernels`` entry point group are loaded
+    on the first call.
+
+    :param str name: Name of the kernel.
+
+    :return: Column kernel function.
+    :rtype: Callable
+
+    :raises: :py:exc:`KeyError` if there is no kernel registered as :kbd:`name`.
+    """
+    if name not in _registry:
+        for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name not in _registry:
+                kernel = entry_point.load()
+                if not hasattr(kernel, "kernel_name"):
+                    kernel.kernel_name = entry_point.name
+                _registry[entry_point.name] = kernel
+    return _registry[name]
+
+
+def apply_column_kernel(kernel, var, depth_coord, **params):
+    """Apply a column kernel to each water column of a data array.
+
+    The kernel is applied lazily on the dask workers via :py:func:`xarray.apply_ufunc`.
+    The depth dimension of the data array is rechunked to a single chunk if necessary
+    so that each call of the kernel sees whole columns.
+
+    :param Callable kernel: Column kernel function.
+
+    :param var: Data array to apply the kernel to.
+    :type var: :py:class:`xarray.DataArray`
+
+    :param str depth_coord: Name of the depth coordinate of :kbd:`var`.
+
+    :param params: Kernel parameters.
+
+    :return: Kernel result data array with the dimensions of :kbd:`var`
+             except for depth.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    if var.chunks is not None:
+        var = var.chunk({depth_coord: -1})
+    return xarray.apply_ufunc(
+        kernel,
+        var,
+        var[depth_coord],
+        input_core_dims=[[depth_coord], [depth_coord]],
+        kwargs=params,
+        dask="parallelized",
+        output_dtypes=[numpy.float64],
+    )
+
+
+def _crossing_depth(values, targets, depths, start_index=0):
+    """Calculate the depth at which the values in columns first reach their target values
+    at or below the :kbd:`start_index` level.
+
+    Depths are linearly interpolated between the levels on either side of the crossing.
+    Columns that do not reach their targets have a result of :py:obj:`numpy.nan`.
+
+    :param :py:class:`numpy.ndarray` values: Column values with depth as the last axis.
+
+    :param :py:class:`numpy.ndarray` targets: Target value for each column.
+
+    :param :py:class:`numpy.ndarray` depths: Depths of the levels.
+
+    :param int start_index: Index of the level at which to start searching.
+
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    reached = values >= targets[..., numpy.newaxis]
+    reached[..., :start_index] = False
+    found = reached.any(axis=-1)
+    k = numpy.argmax(reached, axis=-1)
+    k_above = numpy.maximum(k - 1, 0)
+    v_above = numpy.take_along_axis(values, k_above[..., numpy.newaxis], axis=-1)[
+        ..., 0
+    ]
+    v_below = numpy.take_along_axis(values, k[..., numpy.newaxis], axis=-1)[..., 0]
+    d_above, d_below = depths[k_above], depths[k]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        fraction = numpy.where(
+            k > k_above, (targets - v_above) / (v_below - v_above), 0
+        )
+    crossing_depths = d_above + fraction * (d_below - d_above)
+    return numpy.where(found, crossing_depths, numpy.nan)
+
+
+@column_kernel("mixed layer depth", long_name="Mixed Layer Depth", units="m")
+def mixed_layer_depth(sigma_theta, depths, threshold=0.03, reference_depth=10):
+    """Calculate the mixed layer depth from potential density anomaly using a
+    density threshold criterion.
+
+    The mixed layer depth is the depth at which the potential density anomaly first exceeds
+    its value at the level nearest to :kbd:`reference_depth` by :kbd:`threshold`.
+    Columns in which the threshold is never exceeded are mixed to their deepest
+    non-missing level.
+
+    :param :py:class:`numpy.ndarray` sigma_theta: Potential density anomaly with depth as
+                                                  the last axis.
+
+    :param :py:class:`numpy.ndarray` depths: Depths of the levels.
+
+    :param float threshold: Density difference from the reference level that defines the
+                            base of the mixed layer.
+                            Default is 0.03 kg m-3.
+
+    :param float reference_depth: Depth of the reference level.
+                                  Default is 10 m.
+
+    :return: Mixed layer depth of each column.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    ref_index = int(numpy.argmin(numpy.abs(depths - reference_depth)))
+    targets = sigma_theta[..., ref_index] + threshold
+    mld = _crossing_depth(sigma_theta, targets, depths, start_index=ref_index)
+    valid = ~numpy.isnan(sigma_theta)
+    deepest = depths[valid.shape[-1] - 1 - numpy.argmax(valid[..., ::-1], axis=-1)]
+    mixed_to_bottom = numpy.where(numpy.isnan(targets), numpy.nan, deepest)
+    return numpy.where(numpy.isnan(mld), mixed_to_bottom, mld)
+
+
+@column_kernel("threshold depth", long_name="Threshold Crossing Depth", units="m")
+def threshold_depth(values, depths, threshold=1.0):
+    """Calculate the depth at which the values first reach :kbd:`threshold`;
+    e.g. the nitracline depth from nitrate concentration.
+
+    Columns whose surface values are at or above the threshold have a result of the
+    surface level depth.
+    Columns that never reach the threshold have a result of :py:obj:`numpy.nan`.
+
+    :param :py:class:`numpy.ndarray` values: Column values with depth as the last axis.
+
+    :param :py:class:`numpy.ndarray` depths: Depths of the levels.
+
+    :param float threshold: Threshold value.
+                            Default is 1.0.
+
+    :return: Threshold crossing depth of each column.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    targets = numpy.full(values.shape[:-1], threshold, dtype=numpy.float64)
+    return _crossing_depth(values, targets, depths)
+
+
+@column_kernel("nitracline depth", long_name="Nitracline Depth", units="m")
+def nitracline_depth(nitrate, depths, threshold=1.0):
+    """Calculate the nitracline depth as the depth at which nitrate concentration
+    first reaches :kbd:`threshold`.
+
+    :param :py:class:`numpy.ndarray` nitrate: Nitrate concentration with depth as
+                                              the last axis.
+
+    :param :py:class:`numpy.ndarray` depths: Depths of the levels.
+
+    :param float threshold: Nitrate concentration that defines the nitracline.
+                            Default is 1.0 mmol m-3.
+
+    :return: Nitracline depth of each column.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    return threshold_depth(nitrate, depths, threshold)
+
+
+@column_kernel("depth of maximum", long_name="Depth of Column Maximum", units="m")
+def depth_of_maximum(values, depths):
+    """Calculate the depth of the maximum value in each column;
+    e.g. the depth of the subsurface chlorophyll maximum.
+
+    Columns that contain only missing values have a result of :py:obj:`numpy.nan`.
+
+    :param :py:class:`numpy.ndarray` values: Column values with depth as the last axis.
+
+    :param :py:class:`numpy.ndarray` depths: Depths of the levels.
+
+    :return: Depth of the maximum value of each column.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    all_missing = numpy.isnan(values).all(axis=-1)
+    k = numpy.argmax(numpy.where(numpy.isnan(values), -numpy.inf, values), axis=-1)
+    return numpy.where(all_missing, numpy.nan, depths[k])
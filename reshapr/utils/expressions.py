@@ -0,0 +1,163 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Safe arithmetic expressions for derived variables.
+
+Expressions are Python arithmetic expressions over variable names;
+e.g. ``sqrt(u_wind**2 + v_wind**2)``, or ``nitrate + ammonium + diatoms``.
+They are parsed and checked against a small grammar of arithmetic and comparison
+operators, numeric constants, and NumPy ufuncs before they are compiled,
+so arbitrary Python code can't be executed.
+
+Evaluating an expression with :py:class:`xarray.DataArray` variables that contain
+dask arrays adds its operations to the dask task graph without computing anything.
+"""
+
+import ast
+import functools
+
+import numpy
+import xarray
+
+FUNCTIONS = {
+    "abs": numpy.abs,
+    "arccos": numpy.arccos,
+    "arcsin": numpy.arcsin,
+    "arctan": numpy.arctan,
+    "arctan2": numpy.arctan2,
+    "cos": numpy.cos,
+    "degrees": numpy.degrees,
+    "exp": numpy.exp,
+    "hypot": numpy.hypot,
+    "log": numpy.log,
+    "log10": numpy.log10,
+    "maximum": numpy.maximum,
+    "minimum": numpy.minimum,
+    "radians": numpy.radians,
+    "sin": numpy.sin,
+    "sqrt": numpy.sqrt,
+    "tan": numpy.tan,
+    "where": xarray.where,
+}
+
+# Number of arguments of each function; the NumPy ufuncs know theirs
+_FUNCTION_N_ARGS = {
+    name: func.nin if isinstance(func, numpy.ufunc) else 3
+    for name, func in FUNCTIONS.items()
+}
+
+CONSTANTS = {
+    "e": numpy.e,
+    "pi": numpy.pi,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+
+@functools.lru_cache
+def compile_expression(expression):
+    """Parse, check, and compile an expression.
+
+    Expressions are compiled once and cached.
+
+    :param str expression: Arithmetic expression over variable names.
+
+    :return: Compiled expression, and the names of the variables in the expression.
+    :rtype: 2-tuple of :py:class:`types.CodeType` and :py:class:`frozenset`
+
+    :raises: :py:exc:`ValueError` if the expression is not valid Python syntax,
+             or if it contains anything other than arithmetic and comparison operators,
+             numeric constants, variable names, and calls of the functions in
+             :py:data:`FUNCTIONS` with their number of arguments.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"invalid expression syntax: {exc.msg}") from exc
+    var_names = set()
+    called_funcs = {node.func for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"unsupported expression element: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"unsupported expression constant: {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ValueError(
+                    f"unsupported expression function: {ast.unparse(node.func)}"
+                )
+            if node.keywords:
+                raise ValueError("keyword arguments are not supported in expressions")
+            n_args = _FUNCTION_N_ARGS[node.func.id]
+            if len(node.args) != n_args:
+                raise ValueError(
+                    f"expression function {node.func.id} takes {n_args} argument(s), "
+                    f"not {len(node.args)}"
+                )
+        if isinstance(node, ast.Name):
+            if node.id in FUNCTIONS:
+                if node not in called_funcs:
+                    raise ValueError(f"expression function {node.id} is not called")
+            elif node.id not in CONSTANTS:
+                var_names.add(node.id)
+    code = compile(tree, "<expression>", "eval")
+    return code, frozenset(var_names)
+
+
+def evaluate_expression(expression, variables):
+    """Evaluate an expression with variable values.
+
+    :param str expression: Arithmetic expression over variable names.
+
+    :param dict variables: Mapping of the variable names in the expression to their values;
+                           e.g. :py:class:`xarray.DataArray` objects.
+
+    :return: Expression value.
+
+    :raises: :py:exc:`ValueError` if the expression is invalid.
+
+    :raises: :py:exc:`KeyError` if a variable in the expression is not in
+             :kbd:`variables`.
+    """
+    code, var_names = compile_expression(expression)
+    namespace = {**FUNCTIONS, **CONSTANTS}
+    namespace.update({name: variables[name] for name in var_names})
+    return eval(code, {"__builtins__": {}}, namespace)
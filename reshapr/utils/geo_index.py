@@ -0,0 +1,639 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Geographic index of model grids for resolving longitude/latitude selections
+to grid indices.
+
+The longitudes and latitudes of a model grid are read from its geo ref dataset
+the first time that they are needed,
+and cached in a NumPy :file:`.npz` file in the :file:`reshapr/geo_index/`
+directory of the user's cache directory
+(:envvar:`XDG_CACHE_HOME`, or :file:`~/.cache/` by default)
+so that later extractions don't have to read the geo ref dataset,
+which is often on a remote ERDDAP server.
+
+Nearest point searches use the chord distances between points on the unit sphere.
+They start from the nearest points of a coarse subset of the grid,
+and are refined in windows of the full grid around them,
+vectorized over batches of points.
+The grid points along transects are cached beside the geographic index of their grid.
+Fractional grid indices of points, for interpolation,
+are found by inverting the bilinear interpolation of the grid point coordinates.
+"""
+
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+import numpy
+import structlog
+import xarray
+
+logger = structlog.get_logger()
+
+EARTH_RADIUS = 6_371_009  # metres
+
+# Maximum number of sample/grid point distances calculated at once in transect searches
+_SEARCH_BATCH_POINTS = 2_000_000
+# Approximate number of grid points in the coarse grid that nearest point and
+# fractional index searches start from
+_COARSE_GRID_POINTS = 4096
+# Half-width in coarse grid strides of the windows of the full grid in which nearest
+# point searches are refined
+_REFINE_WINDOW_STRIDES = 1
+
+
+def default_cache_dir():
+    """Return the directory in which geographic indices are cached.
+
+    :rtype: :py:class:`pathlib.Path`
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(cache_home) / "reshapr" / "geo_index"
+
+
+def load_geo_index(geo_ref_dataset, cache_dir=None):
+    """Return the geographic index of a model grid.
+
+    :param dict geo_ref_dataset: ``geo ref dataset`` stanza from a model profile.
+
+    :param cache_dir: Directory in which geographic indices are cached.
+                      Defaults to :py:func:`default_cache_dir`.
+    :type cache_dir: :py:class:`pathlib.Path`
+
+    :return: Mapping of ``lons`` and ``lats`` to the longitudes and latitudes of
+             the grid points as 2-dimensional (y, x) arrays,
+             and ``xyz`` to their unit vectors on the sphere.
+    :rtype: dict
+    """
+    cache_dir = default_cache_dir() if cache_dir is None else Path(cache_dir)
+    return _load_geo_index(
+        geo_ref_dataset["path"],
+        geo_ref_dataset["y coord"],
+        geo_ref_dataset["x coord"],
+        geo_ref_dataset.get("longitude var", "longitude"),
+        geo_ref_dataset.get("latitude var", "latitude"),
+        cache_dir,
+    )
+
+
+@functools.cache
+def _load_geo_index(path, y_coord, x_coord, lon_var, lat_var, cache_dir):
+    """Return the geographic index of a model grid from the disk cache,
+    or from its geo ref dataset.
+
+    The index is also cached in memory for the life of the process.
+
+    :rtype: dict
+    """
+    cache_file = (
+        cache_dir / f"{_cache_key(path, y_coord, x_coord, lon_var, lat_var)}.npz"
+    )
+    log = logger.bind(geo_ref_dataset=os.fspath(path), cache_file=os.fspath(cache_file))
+    if cache_file.exists():
+        with numpy.load(cache_file) as cached:
+            lons, lats = cached["lons"], cached["lats"]
+        log.debug("loaded geographic index from cache")
+        return {"lons": lons, "lats": lats, "xyz": _unit_vectors(lons, lats)}
+    with xarray.open_dataset(path) as geo_ref:
+        lons, lats = (
+            geo_ref[var]
+            .isel(
+                {dim: 0 for dim in geo_ref[var].dims if dim not in {y_coord, x_coord}}
+            )
+            .transpose(y_coord, x_coord)
+            .values
+            for var in (lon_var, lat_var)
+        )
+    lons = _normalize_lons(lons)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    numpy.savez(cache_file, lons=lons, lats=lats)
+    log.info("cached geographic index")
+    return {"lons": lons, "lats": lats, "xyz": _unit_vectors(lons, lats)}
+
+
+def load_transect(geo_ref_dataset, waypoints, spacing=None, cache_dir=None):
+    """Return the grid points along a transect through longitude/latitude waypoints.
+
+    The transect grid points are calculated by :py:func:`find_transect_indices` the
+    first time that they are needed for a geo ref dataset, waypoints, and spacing,
+    and cached beside the geographic index of the grid.
+
+    :param dict geo_ref_dataset: ``geo ref dataset`` stanza from a model profile.
+
+    :param list waypoints: Longitude/latitude pairs of the transect waypoints.
+
+    :param float spacing: Spacing in metres of the points along the transect at which
+                          the nearest grid points are found.
+                          Defaults to half of the median grid spacing.
+
+    :param cache_dir: Directory in which geographic indices are cached.
+                      Defaults to :py:func:`default_cache_dir`.
+    :type cache_dir: :py:class:`pathlib.Path`
+
+    :return: Mapping of ``y`` and ``x`` to the grid indices of the grid points along
+             the transect in transect order,
+             and ``distance`` to their distances in metres along the transect.
+    :rtype: dict
+    """
+    cache_dir = default_cache_dir() if cache_dir is None else Path(cache_dir)
+    return _load_transect(
+        geo_ref_dataset["path"],
+        geo_ref_dataset["y coord"],
+        geo_ref_dataset["x coord"],
+        geo_ref_dataset.get("longitude var", "longitude"),
+        geo_ref_dataset.get("latitude var", "latitude"),
+        tuple((float(lon), float(lat)) for lon, lat in waypoints),
+        spacing,
+        cache_dir,
+    )
+
+
+@functools.cache
+def _load_transect(
+    path, y_coord, x_coord, lon_var, lat_var, waypoints, spacing, cache_dir
+):
+    """Return the grid points along a transect from the disk cache,
+    or calculate them.
+
+    The transect is also cached in memory for the life of the process.
+
+    :rtype: dict
+    """
+    geo_key = _cache_key(path, y_coord, x_coord, lon_var, lat_var)
+    transect_key = hashlib.sha256(repr((waypoints, spacing)).encode()).hexdigest()[:16]
+    cache_file = cache_dir / f"{geo_key}-transect-{transect_key}.npz"
+    log = logger.bind(geo_ref_dataset=os.fspath(path), cache_file=os.fspath(cache_file))
+    if cache_file.exists():
+        with numpy.load(cache_file) as cached:
+            transect = {var: cached[var] for var in ("y", "x", "distance")}
+        log.debug("loaded transect grid points from cache")
+        return transect
+    grid_geo_index = _load_geo_index(
+        path, y_coord, x_coord, lon_var, lat_var, cache_dir
+    )
+    transect = find_transect_indices(grid_geo_index, waypoints, spacing)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    numpy.savez(cache_file, **transect)
+    log.info("cached transect grid points", n_points=len(transect["distance"]))
+    return transect
+
+
+def find_box_indices(geo_index, lon_min, lon_max, lat_min, lat_max):
+    """Calculate the grid index ranges that contain the grid points in a longitude/latitude
+    bounding box.
+
+    :param dict geo_index: Geographic index from :py:func:`load_geo_index`.
+
+    :param float lon_min: Western edge of the box.
+
+    :param float lon_max: Eastern edge of the box.
+
+    :param float lat_min: Southern edge of the box.
+
+    :param float lat_max: Northern edge of the box.
+
+    :return: Minimum and maximum y and x indices of the grid points in the box.
+             The maxima are exclusive,
+             like the ``y max`` and ``x max`` items of ``selection: grid y:`` and
+             ``selection: grid x:``.
+    :rtype: dict
+
+    :raises: :py:exc:`ValueError` if there are no grid points in the box.
+    """
+    lons, lats = geo_index["lons"], geo_index["lats"]
+    lon_min, lon_max = _normalize_lons(numpy.array([lon_min, lon_max]))
+    in_lons = (
+        (lons >= lon_min) & (lons <= lon_max)
+        if lon_min <= lon_max
+        # Box crosses the antimeridian
+        else (lons >= lon_min) | (lons <= lon_max)
+    )
+    in_box = in_lons & (lats >= lat_min) & (lats <= lat_max)
+    if not in_box.any():
+        raise ValueError("no grid points in longitude/latitude box")
+    y_indices, x_indices = numpy.nonzero(in_box)
+    return {
+        "y min": int(y_indices.min()),
+        "y max": int(y_indices.max()) + 1,
+        "x min": int(x_indices.min()),
+        "x max": int(x_indices.max()) + 1,
+    }
+
+
+def find_nearest_index(geo_index, lon, lat, wet_mask=None):
+    """Find the grid point nearest to a longitude/latitude point.
+
+    :param dict geo_index: Geographic index from :py:func:`load_geo_index`.
+
+    :param float lon: Longitude of the point.
+
+    :param float lat: Latitude of the point.
+
+    :param wet_mask: Boolean (y, x) array that is :py:obj:`True` at water grid points.
+                     If it is provided, the search is limited to water grid points.
+    :type wet_mask: :py:class:`numpy.ndarray`
+
+    :return: y and x indices of the nearest grid point,
+             and its distance in metres from the point.
+    :rtype: 3-tuple
+
+    :raises: :py:exc:`ValueError` if the wet mask shape doesn't match the grid,
+             or if there are no water grid points.
+    """
+    y_indices, x_indices, distances = find_nearest_indices(
+        geo_index, [lon], [lat], wet_mask
+    )
+    return int(y_indices[0]), int(x_indices[0]), float(distances[0])
+
+
+def find_nearest_indices(geo_index, lons, lats, wet_mask=None):
+    """Find the grid points nearest to longitude/latitude points.
+
+    The search for each point starts from the nearest point of a coarse subset of
+    the grid,
+    and is refined in a window of the full grid around it.
+    Points for which a grid point outside of their window may be nearer than the one
+    in it,
+    or for which there are no water grid points in their window,
+    are searched for over the whole grid.
+
+    :param dict geo_index: Geographic index from :py:func:`load_geo_index`.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the points.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the points.
+
+    :param wet_mask: Boolean (y, x) array that is :py:obj:`True` at water grid points.
+                     If it is provided, the search is limited to water grid points.
+    :type wet_mask: :py:class:`numpy.ndarray`
+
+    :return: y and x indices of the nearest grid points,
+             and their distances in metres from the points.
+    :rtype: 3-tuple of :py:class:`numpy.ndarray`
+
+    :raises: :py:exc:`ValueError` if the wet mask shape doesn't match the grid,
+             or if there are no water grid points.
+    """
+    grid_xyz = geo_index["xyz"]
+    ny, nx = grid_xyz.shape[:2]
+    if wet_mask is not None:
+        if wet_mask.shape != (ny, nx):
+            raise ValueError(
+                f"wet mask shape {wet_mask.shape} does not match grid shape {(ny, nx)}"
+            )
+        if not wet_mask.any():
+            raise ValueError("no water grid points in wet mask")
+    points_xyz = _unit_vectors(
+        numpy.asarray(lons, dtype=numpy.float64).ravel(),
+        numpy.asarray(lats, dtype=numpy.float64).ravel(),
+    )
+    y_coarse, x_coarse, stride = _find_coarse_nearest(grid_xyz, points_xyz)
+    half_width = _REFINE_WINDOW_STRIDES * stride
+    offset_y, offset_x = (
+        offsets.ravel()
+        for offsets in numpy.mgrid[
+            -half_width : half_width + 1, -half_width : half_width + 1
+        ]
+    )
+    on_border = (abs(offset_y) == half_width) | (abs(offset_x) == half_width)
+    nearest = numpy.empty(len(points_xyz), dtype=int)
+    nearest_chords = numpy.empty(len(points_xyz))
+    refined = numpy.empty(len(points_xyz), dtype=bool)
+    batch_size = max(_SEARCH_BATCH_POINTS // len(offset_y), 1)
+    for start in range(0, len(points_xyz), batch_size):
+        batch = slice(start, start + batch_size)
+        window_y = y_coarse[batch, numpy.newaxis] + offset_y
+        window_x = x_coarse[batch, numpy.newaxis] + offset_x
+        in_grid = (window_y >= 0) & (window_y < ny) & (window_x >= 0) & (window_x < nx)
+        window_y, window_x = window_y.clip(0, ny - 1), window_x.clip(0, nx - 1)
+        chords = numpy.sqrt(
+            (
+                (grid_xyz[window_y, window_x] - points_xyz[batch, numpy.newaxis, :])
+                ** 2
+            ).sum(axis=-1)
+        )
+        # Grid points beyond the window are at least as far from the point as the
+        # nearest window border point that isn't on the edge of the grid
+        border_chords = numpy.where(in_grid & on_border, chords, numpy.inf).min(axis=1)
+        if wet_mask is not None:
+            chords = numpy.where(wet_mask[window_y, window_x], chords, numpy.inf)
+        window_nearest = chords.argmin(axis=1)
+        rows = numpy.arange(len(window_nearest))
+        nearest[batch] = numpy.ravel_multi_index(
+            (window_y[rows, window_nearest], window_x[rows, window_nearest]), (ny, nx)
+        )
+        nearest_chords[batch] = chords[rows, window_nearest]
+        refined[batch] = nearest_chords[batch] < border_chords
+    unrefined = numpy.flatnonzero(~refined)
+    if unrefined.size:
+        candidates = (
+            numpy.flatnonzero(wet_mask)
+            if wet_mask is not None
+            else numpy.arange(ny * nx)
+        )
+        candidates_xyz = grid_xyz.reshape(-1, 3)[candidates]
+        batch_size = max(_SEARCH_BATCH_POINTS // len(candidates), 1)
+        for start in range(0, len(unrefined), batch_size):
+            batch = unrefined[start : start + batch_size]
+            # The nearest unit vectors have the largest dot products
+            candidate_nearest = (points_xyz[batch] @ candidates_xyz.T).argmax(axis=1)
+            nearest[batch] = candidates[candidate_nearest]
+            nearest_chords[batch] = numpy.linalg.norm(
+                candidates_xyz[candidate_nearest] - points_xyz[batch], axis=-1
+            )
+    y_indices, x_indices = numpy.unravel_index(nearest, (ny, nx))
+    distances = 2 * EARTH_RADIUS * numpy.arcsin(nearest_chords / 2)
+    return y_indices, x_indices, distances
+
+
+def find_transect_indices(geo_index, waypoints, spacing=None):
+    """Find the grid points along a transect through longitude/latitude waypoints.
+
+    Points are sampled at :kbd:`spacing` along the great circle segments between
+    the waypoints,
+    and the nearest grid point to each sample is found.
+    Runs of samples that have the same nearest grid point are collapsed to a single
+    transect point whose distance along the transect is that of the grid point's
+    projection onto the transect at the sample that is closest to it.
+
+    :param dict geo_index: Geographic index from :py:func:`load_geo_index`.
+
+    :param list waypoints: Longitude/latitude pairs of the transect waypoints.
+
+    :param float spacing: Spacing in metres of the samples along the transect.
+                          Defaults to half of the median grid spacing.
+
+    :return: Mapping of ``y`` and ``x`` to the grid indices of the grid points along
+             the transect in transect order,
+             and ``distance`` to their distances in metres along the transect.
+    :rtype: dict
+
+    :raises: :py:exc:`ValueError` if there are fewer than 2 waypoints,
+             or if the transect is outside of the grid.
+    """
+    if len(waypoints) < 2:
+        raise ValueError("transect requires at least 2 waypoints")
+    grid_xyz = geo_index["xyz"]
+    grid_spacing = EARTH_RADIUS * numpy.median(
+        numpy.sqrt(((grid_xyz[:, 1:] - grid_xyz[:, :-1]) ** 2).sum(axis=-1))
+    )
+    spacing = grid_spacing / 2 if spacing is None else spacing
+    lons, lats = numpy.array(waypoints, dtype=numpy.float64).T
+    samples_xyz, sample_distances = _sample_great_circles(
+        _unit_vectors(lons, lats), spacing
+    )
+    # Limit the nearest grid point search to the grid points within a few grid spacings
+    # of the transect bounding box
+    margin = numpy.degrees(3 * grid_spacing / EARTH_RADIUS)
+    lon_margin = margin / numpy.cos(numpy.radians(min(abs(lats).max(), 89)))
+    box = find_box_indices(
+        geo_index,
+        lons.min() - lon_margin,
+        lons.max() + lon_margin,
+        lats.min() - margin,
+        lats.max() + margin,
+    )
+    box_xyz = grid_xyz[box["y min"] : box["y max"], box["x min"] : box["x max"]]
+    box_shape = box_xyz.shape[:2]
+    box_xyz = box_xyz.reshape(1, -1, 3)
+    nearest = numpy.empty(len(samples_xyz), dtype=int)
+    nearest_chords = numpy.empty(len(samples_xyz))
+    # Search for the nearest grid points of batches of samples to limit memory use
+    batch_size = max(_SEARCH_BATCH_POINTS // box_xyz.shape[1], 1)
+    for start in range(0, len(samples_xyz), batch_size):
+        batch = slice(start, start + batch_size)
+        chords = numpy.sqrt(
+            ((samples_xyz[batch, numpy.newaxis, :] - box_xyz) ** 2).sum(axis=-1)
+        )
+        nearest[batch] = chords.argmin(axis=1)
+        nearest_chords[batch] = chords.min(axis=1)
+    run_starts = numpy.flatnonzero(numpy.diff(nearest, prepend=-1))
+    run_ends = numpy.append(run_starts[1:], len(nearest))
+    closest_samples = numpy.array(
+        [
+            start + nearest_chords[start:end].argmin()
+            for start, end in zip(run_starts, run_ends)
+        ]
+    )
+    y_indices, x_indices = numpy.unravel_index(nearest[run_starts], box_shape)
+    # Project the grid points onto the transect at their closest samples so that their
+    # distances along the transect aren't quantized to the sample spacing
+    tangents = numpy.gradient(samples_xyz, axis=0)
+    tangents /= numpy.linalg.norm(tangents, axis=-1, keepdims=True)
+    offsets = (
+        (box_xyz[0, nearest[run_starts]] - samples_xyz[closest_samples])
+        * tangents[closest_samples]
+    ).sum(axis=-1)
+    return {
+        "y": y_indices + box["y min"],
+        "x": x_indices + box["x min"],
+        "distance": sample_distances[closest_samples] + EARTH_RADIUS * offsets,
+    }
+
+
+def find_fractional_indices(geo_index, lons, lats, start=None, max_iterations=50):
+    """Find the fractional grid indices of longitude/latitude points.
+
+    The fractional indices are found by Newton iteration of the inverse of the bilinear
+    interpolation of the grid point longitudes and latitudes in each grid cell,
+    so the fractional parts of the indices are the bilinear interpolation coordinates
+    of the points in their grid cells.
+    The iterations start from the nearest points of a coarse subset of the grid,
+    or from :kbd:`start`.
+
+    :param dict geo_index: Geographic index from :py:func:`load_geo_index`.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the points.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the points.
+
+    :param start: Fractional y and x indices to start the iterations from;
+                  e.g. those of nearby points.
+    :type start: 2-tuple of :py:class:`numpy.ndarray`
+
+    :param int max_iterations: Maximum number of Newton iterations.
+
+    :return: Fractional y and x indices of the points.
+             The indices of points that are outside of the grid are :py:obj:`numpy.nan`.
+    :rtype: 2-tuple of :py:class:`numpy.ndarray`
+    """
+    lons = _normalize_lons(numpy.asarray(lons, dtype=numpy.float64).ravel())
+    lats = numpy.asarray(lats, dtype=numpy.float64).ravel()
+    grid_lons, grid_lats = geo_index["lons"], geo_index["lats"]
+    ny, nx = grid_lons.shape
+    if start is None:
+        y_coarse, x_coarse, _ = _find_coarse_nearest(
+            geo_index["xyz"], _unit_vectors(lons, lats)
+        )
+        fy, fx = y_coarse.astype(float), x_coarse.astype(float)
+    else:
+        fy = numpy.nan_to_num(numpy.asarray(start[0], dtype=numpy.float64).ravel())
+        fx = numpy.nan_to_num(numpy.asarray(start[1], dtype=numpy.float64).ravel())
+    # Newton iterations in local equirectangular coordinates centred on each point
+    cos_lats = numpy.cos(numpy.radians(lats))
+    for _ in range(max_iterations):
+        residual, jacobian, _ = _bilinear_residual(
+            grid_lons, grid_lats, lons, lats, cos_lats, fy, fx
+        )
+        det = jacobian[0, 0] * jacobian[1, 1] - jacobian[0, 1] * jacobian[1, 0]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            ds = (jacobian[1, 1] * residual[0] - jacobian[0, 1] * residual[1]) / det
+            dt = (jacobian[0, 0] * residual[1] - jacobian[1, 0] * residual[0]) / det
+        ds, dt = numpy.nan_to_num(ds), numpy.nan_to_num(dt)
+        fx = numpy.clip(fx - ds, 0, nx - 1)
+        fy = numpy.clip(fy - dt, 0, ny - 1)
+        if max(abs(ds).max(initial=0), abs(dt).max(initial=0)) < 1e-9:
+            break
+    residual, _, cell_size = _bilinear_residual(
+        grid_lons, grid_lats, lons, lats, cos_lats, fy, fx
+    )
+    # Iterations for points outside of the grid stop on its edge, away from the points
+    outside = numpy.hypot(*residual) > 1e-3 * cell_size
+    fy[outside], fx[outside] = numpy.nan, numpy.nan
+    return fy, fx
+
+
+def _find_coarse_nearest(grid_xyz, points_xyz):
+    """Find the points of a coarse subset of a grid that are nearest to points.
+
+    :param :py:class:`numpy.ndarray` grid_xyz: Unit vectors of the grid points.
+
+    :param :py:class:`numpy.ndarray` points_xyz: Unit vectors of the points.
+
+    :return: y and x indices in the full grid of the nearest coarse grid points,
+             and the stride of the coarse grid.
+    :rtype: 3-tuple
+    """
+    ny, nx = grid_xyz.shape[:2]
+    stride = max(int(numpy.sqrt(ny * nx / _COARSE_GRID_POINTS)), 1)
+    coarse_xyz = grid_xyz[::stride, ::stride]
+    coarse_shape = coarse_xyz.shape[:2]
+    coarse_xyz = coarse_xyz.reshape(-1, 3)
+    nearest = numpy.empty(len(points_xyz), dtype=int)
+    batch_size = max(_SEARCH_BATCH_POINTS // len(coarse_xyz), 1)
+    for start in range(0, len(points_xyz), batch_size):
+        batch = slice(start, start + batch_size)
+        # The nearest unit vectors have the largest dot products
+        nearest[batch] = (points_xyz[batch] @ coarse_xyz.T).argmax(axis=1)
+    y_coarse, x_coarse = numpy.unravel_index(nearest, coarse_shape)
+    return y_coarse * stride, x_coarse * stride, stride
+
+
+def _bilinear_residual(grid_lons, grid_lats, lons, lats, cos_lats, fy, fx):
+    """Calculate the residuals and Jacobians of the bilinear interpolation of grid
+    point longitudes and latitudes at fractional grid indices.
+
+    :return: Residuals in degrees with x and y offsets as the first axis,
+             Jacobians with respect to the x and y cell coordinates
+             as the first 2 axes,
+             and the cell sizes in degrees.
+    :rtype: 3-tuple
+    """
+    ny, nx = grid_lons.shape
+    j0 = numpy.clip(numpy.floor(fy).astype(int), 0, max(ny - 2, 0))
+    i0 = numpy.clip(numpy.floor(fx).astype(int), 0, max(nx - 2, 0))
+    j1, i1 = numpy.minimum(j0 + 1, ny - 1), numpy.minimum(i0 + 1, nx - 1)
+    t, s = fy - j0, fx - i0
+
+    def corner(j, i):
+        return numpy.stack(
+            (
+                _normalize_lons(grid_lons[j, i] - lons) * cos_lats,
+                grid_lats[j, i] - lats,
+            )
+        )
+
+    p00, p01, p10, p11 = corner(j0, i0), corner(j0, i1), corner(j1, i0), corner(j1, i1)
+    a, b, c = p01 - p00, p10 - p00, p00 - p01 - p10 + p11
+    residual = p00 + s * a + t * b + s * t * c
+    jacobian = numpy.stack((a + t * c, b + s * c), axis=1)
+    cell_size = numpy.maximum(numpy.hypot(*a), numpy.hypot(*b))
+    return residual, jacobian, cell_size
+
+
+def _sample_great_circles(waypoints_xyz, spacing):
+    """Sample points along the great circle segments between waypoints.
+
+    :param :py:class:`numpy.ndarray` waypoints_xyz: Unit vectors of the waypoints.
+
+    :param float spacing: Maximum spacing in metres of the samples.
+
+    :return: Unit vectors of the samples,
+             and their distances in metres along the segments from the first waypoint.
+    :rtype: 2-tuple of :py:class:`numpy.ndarray`
+    """
+    samples, distances = [waypoints_xyz[:1]], [numpy.zeros(1)]
+    start_distance = 0
+    for start, end in zip(waypoints_xyz[:-1], waypoints_xyz[1:]):
+        angle = numpy.arccos(numpy.clip(numpy.dot(start, end), -1, 1))
+        n_samples = max(int(numpy.ceil(angle * EARTH_RADIUS / spacing)), 1)
+        fractions = numpy.arange(1, n_samples + 1) / n_samples
+        if angle == 0:
+            segment = numpy.repeat(start[numpy.newaxis, :], n_samples, axis=0)
+        else:
+            # Spherical linear interpolation
+            segment = (
+                numpy.sin((1 - fractions) * angle)[:, numpy.newaxis] * start
+                + numpy.sin(fractions * angle)[:, numpy.newaxis] * end
+            ) / numpy.sin(angle)
+        samples.append(segment)
+        distances.append(start_distance + fractions * angle * EARTH_RADIUS)
+        start_distance += angle * EARTH_RADIUS
+    return numpy.concatenate(samples), numpy.concatenate(distances)
+
+
+def _cache_key(path, y_coord, x_coord, lon_var, lat_var):
+    """Calculate the disk cache key of the geographic index of a geo ref dataset.
+
+    :rtype: str
+    """
+    return hashlib.sha256(
+        "|".join((os.fspath(path), y_coord, x_coord, lon_var, lat_var)).encode()
+    ).hexdigest()[:16]
+
+
+def _unit_vectors(lons, lats):
+    """Calculate the Cartesian unit vectors of points on a sphere.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the points.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the points.
+
+    :return: Unit vectors with x, y, and z as the last axis.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    lons, lats = numpy.radians(lons), numpy.radians(lats)
+    return numpy.stack(
+        (
+            numpy.cos(lats) * numpy.cos(lons),
+            numpy.cos(lats) * numpy.sin(lons),
+            numpy.sin(lats),
+        ),
+        axis=-1,
+    )
+
+
+def _normalize_lons(lons):
+    """Normalize longitudes to the range [-180, 180).
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes.
+
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    return (lons + 180) % 360 - 180
@@ -0,0 +1,352 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Cap the concurrent reads and read bandwidth of results archive files across the
+workers of a dask cluster,
+and collect the I/O statistics of the reads.
+
+The caps are set by the ``io limits`` stanza of a dask cluster configuration file.
+Reads are limited by opening dataset files with the
+:py:class:`IOLimitedNetCDF4BackendEntrypoint` xarray backend,
+which wraps the arrays of the variables of the files in :py:class:`IOLimitedArray`
+backend arrays.
+Each read of a chunk of a variable holds a lease of a
+:py:class:`dask.distributed.Semaphore` that is shared by all of the workers,
+so no more than ``max concurrent reads`` chunks are read at a time.
+When a ``max read bandwidth`` is set,
+each read holds its lease until its share of the bandwidth has elapsed,
+so the total read rate of the cluster doesn't exceed the cap.
+The netCDF/HDF5 metadata reads of opening files,
+and the reads of the dimension coordinates of the files,
+are not limited.
+"""
+
+import os
+import threading
+import time
+
+import dask.distributed
+import dask.utils
+import structlog
+import xarray
+from xarray.backends import BackendArray
+from xarray.backends.netCDF4_ import (
+    NetCDF4ArrayWrapper,
+    NetCDF4BackendEntrypoint,
+    NetCDF4DataStore,
+)
+from xarray.backends.store import StoreBackendEntrypoint
+from xarray.core import indexing
+
+logger = structlog.get_logger()
+
+# Key of the I/O limits in the dask scheduler metadata
+METADATA_KEY = "reshapr-io-limits"
+
+# I/O statistics of the reads in the process
+_io_stats = {
+    "n_reads": 0,
+    "read_bytes": 0,
+    "read_time": 0.0,
+    "lease_wait_time": 0.0,
+    "throttle_time": 0.0,
+}
+# Reads run in several worker threads when the cluster has more than 1 thread per worker
+_io_stats_lock = threading.Lock()
+
+
+class IOLimiter:
+    """Limiter for reads of chunks of dataset file variables that holds a lease of
+    the cluster I/O semaphore for each read,
+    paces reads to their share of the cluster read bandwidth,
+    and records the I/O statistics of the reads.
+
+    :param semaphore: Semaphore that limits concurrent reads.
+    :type semaphore: :py:class:`dask.distributed.Semaphore`
+
+    :param int max_reads: Maximum number of concurrent reads;
+                          the number of leases of the semaphore.
+
+    :param bandwidth: Maximum read bandwidth in bytes per second,
+                      or :py:obj:`None` for no bandwidth cap.
+    :type bandwidth: int or None
+    """
+
+    def __init__(self, semaphore, max_reads, bandwidth):
+        self.semaphore = semaphore
+        self.max_reads = max_reads
+        self.bandwidth = bandwidth
+
+    def __reduce__(self):
+        return type(self), (self.semaphore, self.max_reads, self.bandwidth)
+
+    def read(self, array, key):
+        """Read a chunk of a backend array while holding a lease of the semaphore.
+
+        The bytes read are the size of the chunk array that is returned.
+
+        :param array: Backend array to read from.
+        :type array: :py:class:`xarray.backends.BackendArray`
+
+        :param key: Indexer of the chunk.
+        :type key: :py:class:`xarray.core.indexing.ExplicitIndexer`
+
+        :return: Chunk array.
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        t_wait_start = time.time()
+        self.semaphore.acquire()
+        try:
+            t_read_start = time.time()
+            data = array[key]
+            read_time = time.time() - t_read_start
+            n_bytes = data.nbytes
+            throttle_time = 0.0
+            if self.bandwidth is not None:
+                throttle_time = max(
+                    n_bytes * self.max_reads / self.bandwidth - read_time, 0.0
+                )
+                if throttle_time > 0:
+                    time.sleep(throttle_time)
+        finally:
+            self.semaphore.release()
+        with _io_stats_lock:
+            _io_stats["n_reads"] += 1
+            _io_stats["read_bytes"] += n_bytes
+            _io_stats["read_time"] += read_time
+            _io_stats["lease_wait_time"] += t_read_start - t_wait_start
+            _io_stats["throttle_time"] += throttle_time
+        return data
+
+
+class IOLimitedArray(BackendArray):
+    """Backend array that reads the chunks of the array that it wraps through an
+    :py:class:`IOLimiter`.
+
+    :param array: Backend array to wrap.
+    :type array: :py:class:`xarray.backends.BackendArray`
+
+    :param io_limiter: I/O limiter for the reads.
+    :type io_limiter: :py:class:`IOLimiter`
+    """
+
+    __slots__ = ("array", "dtype", "io_limiter", "shape")
+
+    def __init__(self, array, io_limiter):
+        self.array = array
+        self.io_limiter = io_limiter
+        self.shape = array.shape
+        self.dtype = array.dtype
+
+    def __getitem__(self, key):
+        return self.io_limiter.read(self.array, key)
+
+
+class _IOLimitedNetCDF4DataStore(NetCDF4DataStore):
+    """netCDF4 data store that wraps the arrays of the non-dimension variables of the
+    file in :py:class:`IOLimitedArray` backend arrays.
+    """
+
+    __slots__ = ("io_limiter",)
+
+    def open_store_variable(self, name, var):
+        variable = super().open_store_variable(name, var)
+        if name in variable.dims:
+            return variable
+        data = indexing.LazilyIndexedArray(
+            IOLimitedArray(NetCDF4ArrayWrapper(name, self), self.io_limiter)
+        )
+        return xarray.Variable(
+            variable.dims, data, variable.attrs, variable.encoding, fastpath=True
+        )
+
+
+class IOLimitedNetCDF4BackendEntrypoint(NetCDF4BackendEntrypoint):
+    """xarray backend that opens netCDF4 files with the reads of the chunks of their
+    variables limited by an :py:class:`IOLimiter`.
+
+    The limiter is passed in the ``io_limiter`` item of the ``backend_kwargs``
+    argument of :py:func:`xarray.open_dataset` or :py:func:`xarray.open_mfdataset`.
+    """
+
+    description = "Open netCDF4 files with dask cluster I/O limits on variable reads"
+
+    def open_dataset(
+        self,
+        filename_or_obj,
+        *,
+        mask_and_scale=True,
+        decode_times=True,
+        concat_characters=True,
+        decode_coords=True,
+        drop_variables=None,
+        use_cftime=None,
+        decode_timedelta=None,
+        io_limiter=None,
+        lock=None,
+        autoclose=False,
+    ):
+        store = _IOLimitedNetCDF4DataStore.open(
+            os.fspath(filename_or_obj), lock=lock, autoclose=autoclose
+        )
+        store.io_limiter = io_limiter
+        try:
+            return StoreBackendEntrypoint().open_dataset(
+                store,
+                mask_and_scale=mask_and_scale,
+                decode_times=decode_times,
+                concat_characters=concat_characters,
+                decode_coords=decode_coords,
+                drop_variables=drop_variables,
+                use_cftime=use_cftime,
+                decode_timedelta=decode_timedelta,
+            )
+        except Exception:
+            store.close()
+            raise
+
+
+def configure(client, cluster_config):
+    """Set up the I/O limits of the ``io limits`` stanza of a dask cluster configuration
+    on the cluster of a client.
+
+    The limits are stored in the scheduler metadata so that
+    :py:func:`get_open_kwargs` can calculate the I/O limiter for the cluster of the
+    default client.
+
+    :param client: Dask cluster client.
+    :type client: :py:class:`dask.distributed.Client`
+
+    :param dict cluster_config: Dask cluster configuration dictionary.
+
+    :raises: :py:exc:`ValueError` if the limits are not positive numbers.
+    """
+    io_limits = cluster_config.get("io limits") or {}
+    # Without a concurrent reads cap,
+    # every worker thread may be reading,
+    # so each read's share of the bandwidth is calculated for that many reads
+    max_reads = int(
+        io_limits.get(
+            "max concurrent reads",
+            cluster_config["number of workers"] * cluster_config["threads per worker"],
+        )
+    )
+    bandwidth = io_limits.get("max read bandwidth")
+    if bandwidth is not None:
+        bandwidth = (
+            dask.utils.parse_bytes(bandwidth)
+            if isinstance(bandwidth, str)
+            else int(bandwidth)
+        )
+    if max_reads < 1 or (bandwidth is not None and bandwidth < 1):
+        raise ValueError(
+            "max concurrent reads and max read bandwidth must be positive numbers"
+        )
+    semaphore_name = f"{METADATA_KEY}-{client.id}"
+    # Create the semaphore on the scheduler with its number of leases
+    dask.distributed.Semaphore(max_leases=max_reads, name=semaphore_name)
+    client.set_metadata(
+        METADATA_KEY,
+        {
+            "semaphore name": semaphore_name,
+            "max reads": max_reads,
+            "bandwidth": bandwidth,
+        },
+    )
+    logger.info(
+        "dask cluster I/O limits",
+        max_concurrent_reads=max_reads,
+        max_read_bandwidth=(
+            f"{dask.utils.format_bytes(bandwidth)}/s" if bandwidth is not None else None
+        ),
+    )
+
+
+def get_open_kwargs():
+    """Return the :py:func:`xarray.open_mfdataset` keyword arguments that limit the
+    reads of the opened dataset files to the I/O limits of the cluster of the default
+    dask client.
+
+    :return: Keyword arguments;
+             empty if there is no default client,
+             or the cluster has no I/O limits.
+    :rtype: dict
+    """
+    try:
+        client = dask.distributed.default_client()
+    except ValueError:
+        return {}
+    io_limits = client.get_metadata(METADATA_KEY, None)
+    if io_limits is None:
+        return {}
+    semaphore = dask.distributed.Semaphore(
+        max_leases=io_limits["max reads"], name=io_limits["semaphore name"]
+    )
+    io_limiter = IOLimiter(semaphore, io_limits["max reads"], io_limits["bandwidth"])
+    return {
+        "engine": IOLimitedNetCDF4BackendEntrypoint,
+        "backend_kwargs": {"io_limiter": io_limiter},
+    }
+
+
+def log_io_stats(client):
+    """Log the I/O statistics of the reads of the workers of the cluster of a client,
+    and of the client process,
+    since they were last logged.
+
+    Nothing is logged if the cluster has no I/O limits.
+
+    :param client: Dask cluster client.
+    :type client: :py:class:`dask.distributed.Client`
+    """
+    if client.get_metadata(METADATA_KEY, None) is None:
+        return
+    process_stats = list(client.run(pop_io_stats).values())
+    process_stats.append(pop_io_stats())
+    io_stats = {stat: sum(stats[stat] for stats in process_stats) for stat in _io_stats}
+    logger.info(
+        "I/O statistics",
+        n_reads=io_stats["n_reads"],
+        read_bytes=dask.utils.format_bytes(io_stats["read_bytes"]),
+        read_time=io_stats["read_time"],
+        mean_read_rate=(
+            f"{dask.utils.format_bytes(io_stats['read_bytes'] / io_stats['read_time'])}/s"
+            if io_stats["read_time"]
+            else None
+        ),
+        lease_wait_time=io_stats["lease_wait_time"],
+        throttle_time=io_stats["throttle_time"],
+    )
+
+
+def pop_io_stats():
+    """Return the I/O statistics of the reads in the process,
+    and reset them.
+
+    This function is run on the workers of the cluster by :py:func:`log_io_stats`.
+
+    :rtype: dict
+    """
+    with _io_stats_lock:
+        io_stats = _io_stats.copy()
+        _io_stats.update(
+            {
+                stat: 0 if isinstance(value, int) else 0.0
+                for stat, value in io_stats.items()
+            }
+        )
+    return io_stats
@@ -0,0 +1,173 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Mesh geometry fields from NEMO mesh mask files.
+
+Grid cell sizes (``e1t``, ``e2t``, ``e3t_0``, etc.),
+land masks (``tmask``, ``umask``, etc.),
+and geographic coordinates (``glamt``, ``gphit``, etc.)
+are static fields that several extraction stages need.
+They are read from the mesh mask file once per extraction,
+subset to the grid selection,
+and cached.
+When there is a :py:class:`dask.distributed.Client`,
+the subset fields are scattered to all of the workers with ``broadcast=True``
+so that the tasks that use them don't have to transfer or re-read them.
+"""
+
+import os
+
+import dask
+import dask.array
+import dask.distributed
+import structlog
+import xarray
+
+logger = structlog.get_logger()
+
+_cache = {}
+
+
+def load_mesh_fields(mesh_mask_path, var_names, selectors, surface=False):
+    """Return fields from a NEMO mesh mask file subset to a grid selection.
+
+    The fields are read from the file the first time they are requested for a
+    mesh mask file, selection, and dask client,
+    and returned from the cache after that.
+
+    :param mesh_mask_path: File path and name of the NEMO mesh mask file.
+    :type mesh_mask_path: :py:class:`pathlib.Path` or str
+
+    :param var_names: Names of the mesh mask variables to load.
+    :type var_names: tuple
+
+    :param dict selectors: Mapping of ``depth``, ``y``, and ``x`` to index slices.
+
+    :param bool surface: Return the surface level of 3-dimensional fields as
+                         2-dimensional fields.
+
+    :return: Mapping of mesh mask variable names to 2-tuples of the mesh mask
+             dimension names of the field (``z``, ``y``, ``x``) and the field array.
+             The arrays are dask arrays backed by futures that have been scattered to all
+             of the workers if there is a dask client,
+             otherwise they are NumPy arrays.
+    :rtype: dict
+    """
+    client = _get_client()
+    selection_key = tuple(
+        (dim, sel.start, sel.stop, sel.step) for dim, sel in sorted(selectors.items())
+    )
+    cache_keys = {
+        var: (
+            os.fspath(mesh_mask_path),
+            var,
+            selection_key,
+            surface,
+            client.id if client is not None else None,
+        )
+        for var in var_names
+    }
+    missing_vars = [var for var in var_names if cache_keys[var] not in _cache]
+    if missing_vars:
+        loaded_fields = _read_mesh_fields(
+            mesh_mask_path, missing_vars, selectors, surface
+        )
+        for var, (dims, values) in loaded_fields.items():
+            _cache[cache_keys[var]] = (dims, _scatter(values, client))
+    return {var: _cache[cache_keys[var]] for var in var_names}
+
+
+def clear_cache():
+    """Discard all of the cached mesh mask fields.
+
+    Scattered fields are released on the dask workers when their futures are
+    garbage collected.
+    """
+    _cache.clear()
+
+
+def _read_mesh_fields(mesh_mask_path, var_names, selectors, surface):
+    """Read fields from a NEMO mesh mask file and subset them to a grid selection.
+
+    :param mesh_mask_path: File path and name of the NEMO mesh mask file.
+    :type mesh_mask_path: :py:class:`pathlib.Path` or str
+
+    :param list var_names: Names of the mesh mask variables to read.
+
+    :param dict selectors: Mapping of ``depth``, ``y``, and ``x`` to index slices.
+
+    :param bool surface: Read the surface level of 3-dimensional fields as
+                         2-dimensional fields.
+
+    :return: Mapping of mesh mask variable names to 2-tuples of the mesh mask
+             dimension names of the field and the field NumPy array.
+    :rtype: dict
+    """
+    mesh_selector = {
+        "z": 0 if surface else selectors["depth"],
+        "y": selectors["y"],
+        "x": selectors["x"],
+    }
+    logger.debug(
+        "reading mesh mask fields",
+        mesh_mask=os.fspath(mesh_mask_path),
+        var_names=var_names,
+        surface=surface,
+    )
+    mesh_fields = {}
+    with xarray.open_dataset(mesh_mask_path) as mesh_ds:
+        for var in var_names:
+            field = mesh_ds[var]
+            if "t" in field.dims:
+                field = field.isel(t=0)
+            field = field.isel(
+                {dim: sel for dim, sel in mesh_selector.items() if dim in field.dims}
+            )
+            mesh_fields[var] = (field.dims, field.values)
+    return mesh_fields
+
+
+def _get_client():
+    """Return the current dask distributed client, if there is one.
+
+    :rtype: :py:class:`dask.distributed.Client` or :py:obj:`None`
+    """
+    try:
+        return dask.distributed.get_client()
+    except ValueError:
+        return None
+
+
+def _scatter(values, client):
+    """Scatter an array to all of the workers of a dask cluster.
+
+    :param values: Array to scatter.
+    :type values: :py:class:`numpy.ndarray`
+
+    :param client: Dask client, or :py:obj:`None` if there is no cluster.
+    :type client: :py:class:`dask.distributed.Client`
+
+    :return: Single chunk dask array backed by the scattered array,
+             or :kbd:`values` if there is no client.
+    :rtype: :py:class:`dask.array.Array` or :py:class:`numpy.ndarray`
+    """
+    if client is None:
+        return values
+    future = client.scatter(values, broadcast=True)
+    return dask.array.from_delayed(
+        dask.delayed(future), shape=values.shape, dtype=values.dtype
+    )
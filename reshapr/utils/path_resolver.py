@@ -0,0 +1,393 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Resolve model profile results archive file patterns to dataset file paths.
+
+A file pattern like ``{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc`` is
+compiled once into its literal text and the formatters of the date placeholders
+that it uses,
+so that the paths for long date ranges are calculated with plain :py:mod:`datetime`
+arithmetic.
+The placeholders produce the same strings as the :ref:`DateFormatters` functions.
+
+Results archives in which files are missing,
+or have names that can't be calculated from their dates,
+can instead be resolved by discovering the files that exist by scanning the
+archive directories.
+"""
+
+import calendar
+import datetime
+import functools
+import os
+import re
+import string
+from pathlib import Path
+
+_MONTH_ABBRS = (
+    "jan",
+    "feb",
+    "mar",
+    "apr",
+    "may",
+    "jun",
+    "jul",
+    "aug",
+    "sep",
+    "oct",
+    "nov",
+    "dec",
+)
+
+
+def _ddmmmyy(date):
+    return f"{date.day:02d}{_MONTH_ABBRS[date.month - 1]}{date.year % 100:02d}"
+
+
+def _yyyymmdd(date):
+    return f"{date.year:04d}{date.month:02d}{date.day:02d}"
+
+
+def _yyyymm01(date):
+    return f"{date.year:04d}{date.month:02d}01"
+
+
+def _yyyymm_end(date):
+    month_end = calendar.monthrange(date.year, date.month)[1]
+    return f"{date.year:04d}{date.month:02d}{month_end:02d}"
+
+
+def _yyyy(date):
+    return f"{date.year:04d}"
+
+
+def _nemo_yyyymm(date):
+    return f"y{date.year:04d}m{date.month:02d}"
+
+
+def _nemo_yyyymmdd(date):
+    return f"y{date.year:04d}m{date.month:02d}d{date.day:02d}"
+
+
+#: Formatters of the date placeholders of file patterns.
+#: They accept any date object that has ``year``, ``month``, and ``day`` attributes;
+#: e.g. :py:class:`datetime.date` or :py:class:`arrow.arrow.Arrow`.
+FORMATTERS = {
+    "ddmmmyy": _ddmmmyy,
+    "yyyymmdd": _yyyymmdd,
+    "yyyymm01": _yyyymm01,
+    "yyyymm_end": _yyyymm_end,
+    "yyyy": _yyyy,
+    "nemo_yyyymm": _nemo_yyyymm,
+    "nemo_yyyymmdd": _nemo_yyyymmdd,
+}
+
+# Regular expressions that match the date placeholders,
+# in order from the most to the least precise date that they can be parsed to
+_PLACEHOLDER_REGEXES = {
+    "yyyymmdd": r"\d{8}",
+    "nemo_yyyymmdd": r"y\d{4}m\d{2}d\d{2}",
+    "ddmmmyy": r"\d{2}[a-z]{3}\d{2}",
+    "yyyymm01": r"\d{6}01",
+    "yyyymm_end": r"\d{8}",
+    "nemo_yyyymm": r"y\d{4}m\d{2}",
+    "yyyy": r"\d{4}",
+}
+
+
+def _parse_placeholders(file_pattern):
+    """Split a file pattern into its literal text and date placeholder names.
+
+    :param str file_pattern: Results archive file pattern.
+
+    :return: Pairs of literal text and the name of the placeholder that follows it,
+             or :py:obj:`None` for the literal text at the end of the pattern.
+    :rtype: list
+
+    :raises: :py:exc:`ValueError` if the pattern contains a placeholder that is not
+             a date placeholder.
+    """
+    parts = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(
+        file_pattern
+    ):
+        if field is not None and (field not in FORMATTERS or format_spec or conversion):
+            raise ValueError(f"unsupported file pattern placeholder: {{{field}}}")
+        parts.append((literal, field))
+    return parts
+
+
+@functools.cache
+def compile_pattern(file_pattern):
+    """Compile a file pattern into a function that formats it for a date.
+
+    Only the placeholders that the pattern contains are formatted.
+    Compiled patterns are cached,
+    so a pattern is only parsed once.
+
+    :param str file_pattern: Results archive file pattern.
+
+    :return: Function that returns the file pattern formatted for a date.
+    :rtype: :py:class:`collections.abc.Callable`
+
+    :raises: :py:exc:`ValueError` if the pattern contains a placeholder that is not
+             a date placeholder.
+    """
+    parts = tuple(
+        (literal, FORMATTERS[field] if field is not None else None)
+        for literal, field in _parse_placeholders(file_pattern)
+    )
+
+    def format_pattern(date):
+        return "".join(
+            literal + (formatter(date) if formatter is not None else "")
+            for literal, formatter in parts
+        )
+
+    return format_pattern
+
+
+def calc_glob_pattern(file_pattern):
+    """Calculate the glob pattern that matches the files of a file pattern for all dates.
+
+    :param str file_pattern: Results archive file pattern.
+
+    :rtype: str
+
+    :raises: :py:exc:`ValueError` if the pattern contains a placeholder that is not
+             a date placeholder.
+    """
+    return "".join(
+        literal + ("*" if field is not None else "")
+        for literal, field in _parse_placeholders(file_pattern)
+    )
+
+
+def calc_period_date(date, frame):
+    """Return the start date of the day or month of a date.
+
+    :param date: Date.
+    :type date: :py:class:`datetime.date` or :py:class:`arrow.arrow.Arrow`
+
+    :param str frame: Time frame of the dataset files; ``day`` or ``month``.
+
+    :rtype: :py:class:`datetime.date`
+    """
+    return datetime.date(date.year, date.month, 1 if frame == "month" else date.day)
+
+
+def discover_paths(archive_path, file_pattern, dates, frame):
+    """Discover the dataset file paths for dates by scanning the directories of a
+    results archive.
+
+    The file pattern may contain ``*`` and ``?`` wildcards for the parts of the
+    paths that can't be calculated from their dates; e.g. run identifiers.
+    Only the directories that the pattern gives for the dates are scanned.
+    The date of a file is parsed from the most precise date placeholder in the pattern.
+
+    :param archive_path: Results archive directory.
+    :type archive_path: :py:class:`pathlib.Path`
+
+    :param str file_pattern: Results archive file pattern.
+
+    :param list dates: Dates of the dataset files.
+
+    :param str frame: Time frame of the dataset files; ``day`` or ``month``.
+
+    :return: Mapping of the day or month start dates that files are found for
+             to the file paths.
+             If several files match a date,
+             the first in sorted order is used.
+    :rtype: dict
+
+    :raises: :py:exc:`ValueError` if the pattern contains a placeholder that is not
+             a date placeholder.
+    """
+    dir_pattern, _, _ = file_pattern.rpartition("/")
+    format_dir = compile_pattern(dir_pattern)
+    path_regex = _compile_path_regex(file_pattern)
+    period_dates = {calc_period_date(date, frame) for date in dates}
+    scan_dirs = set()
+    for dir_name in {format_dir(date) for date in period_dates}:
+        if re.search(r"[*?\[]", dir_name):
+            scan_dirs.update(path for path in archive_path.glob(dir_name))
+        else:
+            scan_dirs.add(archive_path / dir_name)
+    found_paths = {}
+    for scan_dir in sorted(scan_dirs):
+        try:
+            entries = sorted(os.scandir(scan_dir), key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            path = Path(entry.path)
+            match = path_regex.fullmatch(path.relative_to(archive_path).as_posix())
+            if match is None:
+                continue
+            try:
+                path_date = _parse_path_date(match.groupdict())
+            except ValueError:
+                continue
+            period_date = calc_period_date(path_date, frame)
+            if period_date in period_dates:
+                found_paths.setdefault(period_date, path)
+    return found_paths
+
+
+def parse_path_date(archive_path, file_pattern, path):
+    """Parse the date of a dataset file from its path.
+
+    :param archive_path: Results archive directory.
+    :type archive_path: :py:class:`pathlib.Path`
+
+    :param str file_pattern: Results archive file pattern.
+
+    :param path: Dataset file path.
+    :type path: :py:class:`pathlib.Path`
+
+    :return: Date parsed from the most precise date placeholder in the pattern,
+             or :py:obj:`None` if the path doesn't match the pattern below the
+             results archive directory,
+             or doesn't contain a valid date.
+    :rtype: :py:class:`datetime.date`
+
+    :raises: :py:exc:`ValueError` if the pattern contains a placeholder that is not
+             a date placeholder.
+    """
+    try:
+        relative_path = Path(path).relative_to(archive_path)
+    except ValueError:
+        return None
+    match = _compile_path_regex(file_pattern).fullmatch(relative_path.as_posix())
+    if match is None:
+        return None
+    try:
+        return _parse_path_date(match.groupdict())
+    except ValueError:
+        return None
+
+
+@functools.cache
+def _compile_path_regex(file_pattern):
+    """Compile the regular expression that matches the relative paths of the files of
+    a file pattern, and captures their date placeholders.
+
+    :param str file_pattern: Results archive file pattern.
+
+    :rtype: :py:class:`re.Pattern`
+    """
+    regex = []
+    fields = set()
+    for literal, field in _parse_placeholders(file_pattern):
+        regex.append(
+            "".join(
+                {"*": "[^/]*", "?": "[^/]"}.get(char, re.escape(char))
+                for char in literal
+            )
+        )
+        if field is None:
+            continue
+        # Repeated placeholders have to match the same text
+        regex.append(
+            f"(?P={field})"
+            if field in fields
+            else f"(?P<{field}>{_PLACEHOLDER_REGEXES[field]})"
+        )
+        fields.add(field)
+    return re.compile("".join(regex))
+
+
+def _parse_path_date(placeholders):
+    """Parse the date of a file from the text that its date placeholders matched.
+
+    :param dict placeholders: Mapping of placeholder names to matched text.
+
+    :rtype: :py:class:`datetime.date`
+
+    :raises: :py:exc:`ValueError` if the text is not a valid date.
+    """
+    for field in _PLACEHOLDER_REGEXES:
+        if field not in placeholders:
+            continue
+        text = placeholders[field]
+        match field:
+            case "yyyymmdd" | "nemo_yyyymmdd":
+                digits = re.sub(r"\D", "", text)
+                return datetime.date(
+                    int(digits[:4]), int(digits[4:6]), int(digits[6:8])
+                )
+            case "ddmmmyy":
+                if text[2:5] not in _MONTH_ABBRS:
+                    raise ValueError(f"invalid month abbreviation: {text}")
+                return datetime.date(
+                    2000 + int(text[5:7]),
+                    _MONTH_ABBRS.index(text[2:5]) + 1,
+                    int(text[:2]),
+                )
+            case "yyyymm01" | "yyyymm_end" | "nemo_yyyymm":
+                digits = re.sub(r"\D", "", text)
+                return datetime.date(int(digits[:4]), int(digits[4:6]), 1)
+            case "yyyy":
+                return datetime.date(int(text), 1, 1)
+    raise ValueError("file pattern has no date placeholders")
+
+
+def calc_gaps(missing_dates, frame):
+    """Collapse dates that have no dataset files into ranges of consecutive days or
+    months for reporting.
+
+    :param list missing_dates: Day or month start dates in ascending order.
+
+    :param str frame: Time frame of the dataset files; ``day`` or ``month``.
+
+    :return: Gaps formatted as ``YYYY-MM-DD`` or ``YYYY-MM-DD to YYYY-MM-DD``
+             for day frames,
+             and ``YYYY-MM`` or ``YYYY-MM to YYYY-MM`` for month frames.
+    :rtype: list
+    """
+    date_format = "%Y-%m" if frame == "month" else "%Y-%m-%d"
+    gaps = []
+    for date in missing_dates:
+        if gaps and date == _next_period_date(gaps[-1][1], frame):
+            gaps[-1][1] = date
+        else:
+            gaps.append([date, date])
+    return [
+        (
+            f"{start:{date_format}}"
+            if start == end
+            else f"{start:{date_format}} to {end:{date_format}}"
+        )
+        for start, end in gaps
+    ]
+
+
+def _next_period_date(date, frame):
+    """Return the start date of the day or month after a day or month start date.
+
+    :param date: Day or month start date.
+    :type date: :py:class:`datetime.date`
+
+    :param str frame: Time frame of the dataset files; ``day`` or ``month``.
+
+    :rtype: :py:class:`datetime.date`
+    """
+    if frame == "month":
+        return datetime.date(
+            date.year + date.month // 12, date.month % 12 + 1, date.day
+        )
+    return date + datetime.timedelta(days=1)
@@ -0,0 +1,446 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Regridding of model grid fields to regular longitude/latitude grids.
+
+Regridding is a sparse matrix multiplication of the model grid values by a matrix of
+weights that is calculated from the geo ref dataset of the model grid.
+The weights are stored in fixed width sparse format:
+each regular grid point has the same number of model grid point indices and weights,
+padded with zero weights.
+They are calculated the first time that they are needed for a model grid,
+regular grid, method, and mesh mask,
+and cached in a NumPy :file:`.npz` file in the geographic index cache directory
+(:py:func:`reshapr.utils.geo_index.default_cache_dir`),
+and in memory for the life of the process.
+
+The weights are applied lazily on the dask workers with :py:func:`xarray.apply_ufunc`,
+one chunk at a time.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy
+import structlog
+import xarray
+
+from reshapr.utils import geo_index
+
+logger = structlog.get_logger()
+
+METHODS = {"bilinear", "conservative"}
+
+_cache = {}
+
+
+def calc_regular_axis(axis_min, axis_max, step):
+    """Calculate the coordinate values of an axis of a regular grid.
+
+    :param float axis_min: First coordinate value.
+
+    :param float axis_max: Largest possible coordinate value.
+                           It is included if it is a whole number of steps from
+                           :kbd:`axis_min`.
+
+    :param float step: Coordinate value step.
+
+    :rtype: :py:class:`numpy.ndarray`
+
+    :raises: :py:exc:`ValueError` if the step is not positive,
+             or if :kbd:`axis_max` is less than :kbd:`axis_min`.
+    """
+    if step <= 0:
+        raise ValueError(f"step must be positive: {step}")
+    if axis_max < axis_min:
+        raise ValueError(f"axis max {axis_max} is less than axis min {axis_min}")
+    n_values = int(numpy.floor((axis_max - axis_min) / step + 1e-9)) + 1
+    return numpy.round(axis_min + step * numpy.arange(n_values), 10)
+
+
+def load_regrid_weights(
+    geo_ref_dataset,
+    lons,
+    lats,
+    method,
+    wet_mask=None,
+    mask_key=None,
+    cache_dir=None,
+):
+    """Return the weights to regrid model grid fields to a regular longitude/latitude
+    grid.
+
+    :param dict geo_ref_dataset: ``geo ref dataset`` stanza from a model profile.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the regular grid.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the regular grid.
+
+    :param str method: Regridding method; ``bilinear`` or ``conservative``.
+
+    :param wet_mask: Boolean (y, x) array that is :py:obj:`True` at water grid points.
+                     If it is provided, land grid points have zero weight.
+    :type wet_mask: :py:class:`numpy.ndarray`
+
+    :param str mask_key: Identifier of the wet mask for the weights cache keys;
+                         e.g. the mesh mask file path.
+
+    :param cache_dir: Directory in which regridding weights are cached.
+                      Defaults to :py:func:`reshapr.utils.geo_index.default_cache_dir`.
+    :type cache_dir: :py:class:`pathlib.Path`
+
+    :return: Mapping of ``y min``, ``y max``, ``x min``, and ``x max`` to the index
+             ranges of the model grid box that the regular grid covers,
+             ``indices`` to the (regular grid points, weights) array of flat indices of
+             the box grid points,
+             and ``weights`` to their weights.
+    :rtype: dict
+
+    :raises: :py:exc:`ValueError` if the method is unknown,
+             or if the regular grid is outside of the model grid.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown regrid method: {method}")
+    cache_dir = geo_index.default_cache_dir() if cache_dir is None else Path(cache_dir)
+    weights_key = hashlib.sha256(
+        repr(
+            (
+                sorted(geo_ref_dataset.items()),
+                numpy.asarray(lons).tolist(),
+                numpy.asarray(lats).tolist(),
+                method,
+                mask_key if wet_mask is not None else None,
+            )
+        ).encode()
+    ).hexdigest()[:16]
+    if weights_key in _cache:
+        return _cache[weights_key]
+    cache_file = cache_dir / f"regrid-{weights_key}.npz"
+    log = logger.bind(
+        geo_ref_dataset=os.fspath(geo_ref_dataset["path"]),
+        method=method,
+        cache_file=os.fspath(cache_file),
+    )
+    if cache_file.exists():
+        with numpy.load(cache_file) as cached:
+            weights = {var: cached[var] for var in cached.files}
+        for key in ("y min", "y max", "x min", "x max"):
+            weights[key] = int(weights.pop(key.replace(" ", "_")))
+        log.debug("loaded regrid weights from cache")
+        _cache[weights_key] = weights
+        return weights
+    grid_geo_index = geo_index.load_geo_index(geo_ref_dataset, cache_dir)
+    calc_weights = (
+        calc_bilinear_weights if method == "bilinear" else calc_conservative_weights
+    )
+    indices, point_weights = calc_weights(grid_geo_index, lons, lats, wet_mask)
+    weights = _calc_box_weights(indices, point_weights, grid_geo_index["lons"].shape)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    numpy.savez(
+        cache_file,
+        **{key.replace(" ", "_"): value for key, value in weights.items()},
+    )
+    log.info(
+        "cached regrid weights",
+        n_points=len(weights["indices"]),
+        n_weights=weights["indices"].shape[1],
+    )
+    _cache[weights_key] = weights
+    return weights
+
+
+def calc_bilinear_weights(grid_geo_index, lons, lats, wet_mask=None):
+    """Calculate bilinear interpolation weights of the model grid points for the points
+    of a regular longitude/latitude grid.
+
+    Each regular grid point has the weights of the 4 corners of the model grid cell that
+    contains it.
+    Land corners have zero weight,
+    and the weights of the other corners are normalized to sum to 1.
+
+    :param dict grid_geo_index: Geographic index from
+                                :py:func:`reshapr.utils.geo_index.load_geo_index`.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the regular grid.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the regular grid.
+
+    :param wet_mask: Boolean (y, x) array that is :py:obj:`True` at water grid points.
+    :type wet_mask: :py:class:`numpy.ndarray`
+
+    :return: (regular grid points, 4) arrays of flat model grid indices and weights.
+             The regular grid points are in (lat, lon) order.
+    :rtype: 2-tuple of :py:class:`numpy.ndarray`
+    """
+    grid_lons, grid_lats = numpy.meshgrid(lons, lats)
+    fy, fx = geo_index.find_fractional_indices(grid_geo_index, grid_lons, grid_lats)
+    ny, nx = grid_geo_index["lons"].shape
+    inside = ~numpy.isnan(fy)
+    fy, fx = numpy.nan_to_num(fy), numpy.nan_to_num(fx)
+    j0 = numpy.clip(numpy.floor(fy).astype(int), 0, max(ny - 2, 0))
+    i0 = numpy.clip(numpy.floor(fx).astype(int), 0, max(nx - 2, 0))
+    j1, i1 = numpy.minimum(j0 + 1, ny - 1), numpy.minimum(i0 + 1, nx - 1)
+    t, s = fy - j0, fx - i0
+    y_indices = numpy.stack((j0, j0, j1, j1), axis=-1)
+    x_indices = numpy.stack((i0, i1, i0, i1), axis=-1)
+    weights = (
+        numpy.stack(((1 - s) * (1 - t), s * (1 - t), (1 - s) * t, s * t), axis=-1)
+        * inside[:, numpy.newaxis]
+    )
+    return _normalize_weights(y_indices, x_indices, weights, nx, wet_mask)
+
+
+def calc_conservative_weights(grid_geo_index, lons, lats, wet_mask=None):
+    """Calculate area weighted averaging weights of the model grid points for the cells
+    of a regular longitude/latitude grid.
+
+    The cells of the regular grid are centred on its points.
+    Each cell is sampled by a regular array of sub-points that are spaced at no more than
+    half of the median model grid spacing,
+    and the model grid cell that contains each sub-point is found.
+    The weight of each model grid point is the area of the regular grid cell that its
+    model grid cell covers,
+    approximated by the areas of the sub-points that it contains.
+    Land grid points have zero weight,
+    and the weights of the other grid points are normalized to sum to 1.
+
+    :param dict grid_geo_index: Geographic index from
+                                :py:func:`reshapr.utils.geo_index.load_geo_index`.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the regular grid.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the regular grid.
+
+    :param wet_mask: Boolean (y, x) array that is :py:obj:`True` at water grid points.
+    :type wet_mask: :py:class:`numpy.ndarray`
+
+    :return: (regular grid points, sub-points) arrays of flat model grid indices and
+             weights.
+             The regular grid points are in (lat, lon) order.
+    :rtype: 2-tuple of :py:class:`numpy.ndarray`
+    """
+    lons, lats = numpy.asarray(lons), numpy.asarray(lats)
+    lon_step = abs(lons[1] - lons[0]) if len(lons) > 1 else 0
+    lat_step = abs(lats[1] - lats[0]) if len(lats) > 1 else 0
+    grid_xyz = grid_geo_index["xyz"]
+    grid_spacing = numpy.degrees(
+        numpy.median(numpy.sqrt(((grid_xyz[:, 1:] - grid_xyz[:, :-1]) ** 2).sum(-1)))
+    )
+    cos_lat = numpy.cos(numpy.radians(numpy.abs(lats).min()))
+    cell_size = max(lon_step * cos_lat, lat_step)
+    n_sub = max(int(numpy.ceil(2 * cell_size / grid_spacing)), 1)
+    offsets = (numpy.arange(n_sub) + 0.5) / n_sub - 0.5
+    grid_lons, grid_lats = numpy.meshgrid(lons, lats)
+    grid_lons, grid_lats = grid_lons.ravel(), grid_lats.ravel()
+    # Locate the regular grid points first so that the sub-point searches can start
+    # from them
+    fy, fx = geo_index.find_fractional_indices(grid_geo_index, grid_lons, grid_lats)
+    sub_lat_offsets, sub_lon_offsets = numpy.meshgrid(offsets, offsets, indexing="ij")
+    sub_lons = grid_lons[:, numpy.newaxis] + lon_step * sub_lon_offsets.ravel()
+    sub_lats = grid_lats[:, numpy.newaxis] + lat_step * sub_lat_offsets.ravel()
+    n_subpoints = n_sub * n_sub
+    start = (numpy.repeat(fy, n_subpoints), numpy.repeat(fx, n_subpoints))
+    sub_fy, sub_fx = geo_index.find_fractional_indices(
+        grid_geo_index, sub_lons, sub_lats, start
+    )
+    # Points that weren't found from the regular grid point searches are searched for
+    # again from the coarse grid
+    lost = numpy.isnan(sub_fy)
+    if lost.any():
+        sub_fy[lost], sub_fx[lost] = geo_index.find_fractional_indices(
+            grid_geo_index, sub_lons.ravel()[lost], sub_lats.ravel()[lost]
+        )
+    inside = ~numpy.isnan(sub_fy)
+    y_indices = numpy.rint(numpy.nan_to_num(sub_fy)).astype(int)
+    x_indices = numpy.rint(numpy.nan_to_num(sub_fx)).astype(int)
+    weights = numpy.cos(numpy.radians(sub_lats.ravel())) * inside
+    shape = (len(grid_lons), n_subpoints)
+    _, nx = grid_geo_index["lons"].shape
+    return _normalize_weights(
+        y_indices.reshape(shape),
+        x_indices.reshape(shape),
+        weights.reshape(shape),
+        nx,
+        wet_mask,
+    )
+
+
+def regrid(var, y_dim, x_dim, weights, lons, lats):
+    """Regrid a data array from the model grid box of a set of regridding weights
+    to a regular longitude/latitude grid.
+
+    The regridding is a lazy operation on dask arrays;
+    each chunk is regridded separately,
+    so the y and x dimensions are rechunked to single chunks if necessary.
+    Missing values are excluded,
+    and the weights of the other values are normalized to sum to 1.
+
+    :param var: Data array with y and x dimensions of the model grid box.
+    :type var: :py:class:`xarray.DataArray`
+
+    :param str y_dim: Name of the y dimension of :kbd:`var`.
+
+    :param str x_dim: Name of the x dimension of :kbd:`var`.
+
+    :param dict weights: Regridding weights from :py:func:`load_regrid_weights`.
+
+    :param :py:class:`numpy.ndarray` lons: Longitudes of the regular grid.
+
+    :param :py:class:`numpy.ndarray` lats: Latitudes of the regular grid.
+
+    :return: Regridded data array with ``latitude`` and ``longitude`` dimensions in
+             place of the y and x dimensions.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    box_shape = (
+        weights["y max"] - weights["y min"],
+        weights["x max"] - weights["x min"],
+    )
+    if (var.sizes[y_dim], var.sizes[x_dim]) != box_shape:
+        raise ValueError(
+            f"grid shape {(var.sizes[y_dim], var.sizes[x_dim])} does not match "
+            f"regrid weights grid shape {box_shape}"
+        )
+    if var.chunks is not None:
+        var = var.chunk({y_dim: -1, x_dim: -1})
+    regridded = xarray.apply_ufunc(
+        apply_weights,
+        var,
+        xarray.DataArray(weights["indices"], dims=("regrid_point", "regrid_weight")),
+        xarray.DataArray(weights["weights"], dims=("regrid_point", "regrid_weight")),
+        kwargs={"shape": (len(lats), len(lons))},
+        input_core_dims=[
+            [y_dim, x_dim],
+            ["regrid_point", "regrid_weight"],
+            ["regrid_point", "regrid_weight"],
+        ],
+        output_core_dims=[["latitude", "longitude"]],
+        dask="parallelized",
+        dask_gufunc_kwargs={
+            "output_sizes": {"latitude": len(lats), "longitude": len(lons)}
+        },
+        output_dtypes=[numpy.float64],
+        keep_attrs=True,
+    )
+    dims = []
+    for dim in var.dims:
+        if dim == y_dim:
+            dims.append("latitude")
+        elif dim == x_dim:
+            dims.append("longitude")
+        else:
+            dims.append(dim)
+    return regridded.transpose(*dims).assign_coords(
+        latitude=(
+            "latitude",
+            lats,
+            {
+                "standard_name": "latitude",
+                "long_name": "Latitude",
+                "units": "degrees_north",
+            },
+        ),
+        longitude=(
+            "longitude",
+            lons,
+            {
+                "standard_name": "longitude",
+                "long_name": "Longitude",
+                "units": "degrees_east",
+            },
+        ),
+    )
+
+
+def apply_weights(values, indices, weights, shape):
+    """Multiply model grid values by a fixed width sparse matrix of regridding weights.
+
+    :param :py:class:`numpy.ndarray` values: Model grid values with y and x as the last
+                                             2 axes.
+
+    :param :py:class:`numpy.ndarray` indices: (regular grid points, weights) array of
+                                              flat indices of the y and x axes of
+                                              :kbd:`values`.
+
+    :param :py:class:`numpy.ndarray` weights: Weights of the values at :kbd:`indices`.
+
+    :param tuple shape: (lat, lon) shape of the regular grid.
+
+    :return: Regridded values with latitude and longitude as the last 2 axes.
+             Values of regular grid points that have no non-missing model grid values
+             are :py:obj:`numpy.nan`.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    flat_values = values.reshape(values.shape[:-2] + (-1,))
+    gathered = flat_values[..., indices]
+    valid = numpy.isfinite(gathered) & (weights > 0)
+    valid_weights = numpy.where(valid, weights, 0)
+    total_weights = valid_weights.sum(axis=-1)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        regridded = (numpy.where(valid, gathered, 0) * valid_weights).sum(
+            axis=-1
+        ) / total_weights
+    regridded = numpy.where(total_weights > 0, regridded, numpy.nan)
+    return regridded.reshape(values.shape[:-2] + tuple(shape))
+
+
+def clear_cache():
+    """Discard all of the regridding weights that are cached in memory."""
+    _cache.clear()
+
+
+def _normalize_weights(y_indices, x_indices, weights, nx, wet_mask):
+    """Zero the weights of land grid points and normalize the weights of each regular
+    grid point to sum to 1.
+
+    :return: Arrays of flat model grid indices and weights.
+    :rtype: 2-tuple of :py:class:`numpy.ndarray`
+    """
+    if wet_mask is not None:
+        weights = weights * wet_mask[y_indices, x_indices]
+    totals = weights.sum(axis=-1, keepdims=True)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        weights = numpy.where(totals > 0, weights / totals, 0)
+    return y_indices * nx + x_indices, weights
+
+
+def _calc_box_weights(indices, weights, grid_shape):
+    """Limit regridding weights to the box of model grid points that have non-zero
+    weights.
+
+    :return: Regridding weights dictionary with flat indices of the box grid points.
+    :rtype: dict
+
+    :raises: :py:exc:`ValueError` if no model grid points have non-zero weights.
+    """
+    y_indices, x_indices = numpy.unravel_index(indices, grid_shape)
+    used = weights > 0
+    if not used.any():
+        raise ValueError("regular grid is outside of the model grid")
+    y_min, y_max = int(y_indices[used].min()), int(y_indices[used].max()) + 1
+    x_min, x_max = int(x_indices[used].min()), int(x_indices[used].max()) + 1
+    box_y = numpy.clip(y_indices - y_min, 0, y_max - y_min - 1)
+    box_x = numpy.clip(x_indices - x_min, 0, x_max - x_min - 1)
+    return {
+        "y min": y_min,
+        "y max": y_max,
+        "x min": x_min,
+        "x max": x_max,
+        "indices": box_y * (x_max - x_min) + box_x,
+        "weights": numpy.where(used, weights, 0),
+    }
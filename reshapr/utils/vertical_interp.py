@@ -0,0 +1,164 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Vertical interpolation of water columns to fixed depths or to density surfaces.
+
+The interpolation functions are NumPy functions that operate on arrays whose last axis
+is depth, so they are vectorized over all of the other axes.
+They are applied lazily on the dask workers with :py:func:`xarray.apply_ufunc`.
+"""
+
+import numpy
+import xarray
+
+
+def interpolate_columns(values, coords, targets):
+    """Linearly interpolate the values in columns to target values of a vertical
+    coordinate.
+
+    The vertical coordinate must increase downward in each column;
+    e.g. depth, or potential density in a stably stratified column.
+    Each target is interpolated between the levels on either side of the first level at
+    which the coordinate reaches it.
+    Targets that are shallower than the top level or deeper than the deepest
+    non-missing level of a column have a result of :py:obj:`numpy.nan`.
+
+    :param :py:class:`numpy.ndarray` values: Column values with depth as the last axis.
+
+    :param :py:class:`numpy.ndarray` coords: Vertical coordinate values;
+                                             either 1-dimensional, like depths,
+                                             or with the shape of :kbd:`values`,
+                                             like densities.
+
+    :param :py:class:`numpy.ndarray` targets: 1-dimensional array of vertical coordinate
+                                              values to interpolate to.
+
+    :return: Interpolated values with the targets as the last axis.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    coords = numpy.broadcast_to(coords, values.shape)
+    interpolated = numpy.empty(values.shape[:-1] + (len(targets),), dtype=numpy.float64)
+    for i, target in enumerate(targets):
+        reached = coords >= target
+        found = reached.any(axis=-1)
+        k = numpy.argmax(reached, axis=-1)
+        k_above = numpy.maximum(k - 1, 0)
+        c_above = numpy.take_along_axis(coords, k_above[..., numpy.newaxis], axis=-1)
+        c_below = numpy.take_along_axis(coords, k[..., numpy.newaxis], axis=-1)
+        v_above = numpy.take_along_axis(values, k_above[..., numpy.newaxis], axis=-1)
+        v_below = numpy.take_along_axis(values, k[..., numpy.newaxis], axis=-1)
+        c_above, c_below = c_above[..., 0], c_below[..., 0]
+        v_above, v_below = v_above[..., 0], v_below[..., 0]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            fraction = numpy.where(
+                k > k_above, (target - c_above) / (c_below - c_above), 0
+            )
+        # Targets above the top level are only found at the top level if they are on it
+        in_column = found & ((k > 0) | (c_below == target))
+        interpolated[..., i] = numpy.where(
+            in_column, v_above + fraction * (v_below - v_above), numpy.nan
+        )
+    return interpolated
+
+
+def interpolate_to_depths(var, depth_coord, depths):
+    """Interpolate a data array to fixed depths.
+
+    :param var: Data array with a depth dimension.
+    :type var: :py:class:`xarray.DataArray`
+
+    :param str depth_coord: Name of the depth coordinate of :kbd:`var`.
+
+    :param list depths: Depths to interpolate to.
+
+    :return: Interpolated data array with the depths as the depth coordinate values.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    targets = numpy.asarray(depths, dtype=numpy.float64)
+    interpolated = _apply_interpolation(
+        var, var[depth_coord], depth_coord, targets, depth_coord
+    )
+    return interpolated.assign_coords(
+        {depth_coord: (depth_coord, targets, var[depth_coord].attrs)}
+    )
+
+
+def interpolate_to_isopycnals(var, density, depth_coord, isopycnals, isopycnal_dim):
+    """Interpolate a data array to density surfaces.
+
+    :param var: Data array with a depth dimension.
+    :type var: :py:class:`xarray.DataArray`
+
+    :param density: Density data array with the same dimensions as :kbd:`var`.
+    :type density: :py:class:`xarray.DataArray`
+
+    :param str depth_coord: Name of the depth coordinate of :kbd:`var`.
+
+    :param list isopycnals: Density values to interpolate to.
+
+    :param str isopycnal_dim: Name of the isopycnal dimension of the result.
+
+    :return: Interpolated data array with the isopycnal dimension in place of the depth
+             dimension.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    targets = numpy.asarray(isopycnals, dtype=numpy.float64)
+    interpolated = _apply_interpolation(
+        var, density, depth_coord, targets, isopycnal_dim
+    )
+    return interpolated.assign_coords({isopycnal_dim: targets})
+
+
+def _apply_interpolation(var, coords, depth_coord, targets, output_dim):
+    """Apply :py:func:`interpolate_columns` lazily to a data array.
+
+    :param var: Data array with a depth dimension.
+    :type var: :py:class:`xarray.DataArray`
+
+    :param coords: Vertical coordinate data array.
+    :type coords: :py:class:`xarray.DataArray`
+
+    :param str depth_coord: Name of the depth coordinate of :kbd:`var`.
+
+    :param :py:class:`numpy.ndarray` targets: Vertical coordinate values to
+                                              interpolate to.
+
+    :param str output_dim: Name of the interpolated dimension of the result.
+
+    :return: Interpolated data array with the dimensions of :kbd:`var`,
+             with :kbd:`output_dim` in place of the depth dimension.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    if var.chunks is not None:
+        var = var.chunk({depth_coord: -1})
+    if coords.chunks is not None:
+        coords = coords.chunk({depth_coord: -1})
+    interpolated = xarray.apply_ufunc(
+        interpolate_columns,
+        var,
+        coords,
+        kwargs={"targets": targets},
+        input_core_dims=[[depth_coord], [depth_coord]],
+        output_core_dims=[[output_dim]],
+        exclude_dims={depth_coord},
+        dask="parallelized",
+        dask_gufunc_kwargs={"output_sizes": {output_dim: len(targets)}},
+        output_dtypes=[numpy.float64],
+        keep_attrs=True,
+    )
+    dims = [output_dim if dim == depth_coord else dim for dim in var.dims]
+    return interpolated.transpose(*dims)
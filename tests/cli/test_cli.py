@@ -83,3 +83,124 @@ class TestExtract:
         structlog.reset_defaults()
 
         assert result.exit_code == 0
+
+    def test_multiple_config_files_shared_scan(self, tmp_path, monkeypatch):
+        config_files = []
+
+        def mock_cli_extract_shared_scan(config_yamls, start_date, end_date):
+            config_files.extend(config_yamls)
+
+        monkeypatch.setattr(
+            reshapr.cli.extract.reshapr.core.extract,
+            "cli_extract_shared_scan",
+            mock_cli_extract_shared_scan,
+        )
+        config_yamls = [tmp_path / "foo.yaml", tmp_path / "bar.yaml"]
+        for config_yaml in config_yamls:
+            config_yaml.write_text(textwrap.dedent("""\
+                    dataset:
+                      model profile: bar
+                    """))
+
+        runner = CliRunner()
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            result = runner.invoke(
+                commands.reshapr,
+                ["extract", *(os.fspath(config_yaml) for config_yaml in config_yamls)],
+            )
+        structlog.reset_defaults()
+
+        assert result.exit_code == 0
+        assert config_files == config_yamls
+
+
+class TestMatch:
+    """Unit test for match() CLI function."""
+
+    def test_config_file_is_path(self, tmp_path):
+        """Expect SystemExit exception due to model profile not found."""
+        config_yaml = tmp_path / "foo.yaml"
+        config_yaml.write_text(textwrap.dedent("""\
+                dataset:
+                  model profile: bar
+                """))
+
+        runner = CliRunner()
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            result = runner.invoke(commands.reshapr, ["match", os.fspath(config_yaml)])
+        structlog.reset_defaults()
+
+        assert result.exit_code == 2
+        assert isinstance(result.exception, SystemExit)
+
+
+class TestAggregate:
+    """Unit test for aggregate() CLI function."""
+
+    def test_config_file_is_path(self, tmp_path):
+        """Expect SystemExit exception due to model profile not found."""
+        config_yaml = tmp_path / "foo.yaml"
+        config_yaml.write_text(textwrap.dedent("""\
+                dataset:
+                  model profile: bar
+                start date: 2015-01-01
+                end date: 2015-01-01
+                """))
+
+        runner = CliRunner()
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            result = runner.invoke(
+                commands.reshapr, ["aggregate", os.fspath(config_yaml)]
+            )
+        structlog.reset_defaults()
+
+        assert result.exit_code == 2
+        assert isinstance(result.exception, SystemExit)
+
+
+class TestCatalog:
+    """Unit test for catalog() CLI function."""
+
+    def test_config_file_is_path(self, tmp_path):
+        """Expect SystemExit exception due to model profile not found."""
+        config_yaml = tmp_path / "foo.yaml"
+        config_yaml.write_text(textwrap.dedent("""\
+                dataset:
+                  model profile: bar
+                start date: 2015-01-01
+                end date: 2015-01-01
+                """))
+
+        runner = CliRunner()
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            result = runner.invoke(
+                commands.reshapr, ["catalog", os.fspath(config_yaml)]
+            )
+        structlog.reset_defaults()
+
+        assert result.exit_code == 2
+        assert isinstance(result.exception, SystemExit)
+
+
+class TestPyramid:
+    """Unit test for pyramid() CLI function."""
+
+    def test_config_file_is_path(self, tmp_path):
+        """Expect SystemExit exception due to model profile not found."""
+        config_yaml = tmp_path / "foo.yaml"
+        config_yaml.write_text(textwrap.dedent("""\
+                dataset:
+                  model profile: bar
+                start date: 2015-01-01
+                end date: 2015-01-01
+                """))
+
+        runner = CliRunner()
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            result = runner.invoke(
+                commands.reshapr, ["pyramid", os.fspath(config_yaml)]
+            )
+        structlog.reset_defaults()
+
+        assert result.exit_code == 2
+        assert isinstance(result.exception, SystemExit)
@@ -17,8 +17,13 @@
 
 """Fixtures for Reshapr test suite."""
 
+import datetime
+
+import pandas
 import pytest
 import structlog
+import xarray
+import yaml
 
 
 @pytest.fixture(name="log_output")
@@ -37,3 +42,80 @@ def fixture_configure_structlog(log_output):
     Reference: https://www.structlog.org/en/stable/testing.html
     """
     structlog.configure(processors=[log_output])
+
+
+@pytest.fixture(name="make_archive")
+def fixture_make_archive(tmp_path):
+    """Factory that writes a results archive of daily netCDF4 dataset files of a
+    ``physics tracers`` variables group,
+    and a :file:`test_profile.yaml` model profile for it,
+    in :kbd:`tmp_path`.
+
+    The factory arguments are:
+
+    * ``dates``: Dates of the dataset files.
+    * ``data_vars``: Function of a date that returns the data variables of its dataset
+      as a mapping of variable names to ``(dims, data, attrs)`` tuples.
+    * ``depths``: ``deptht`` coordinate values.
+    * ``chunk size``: Model profile ``chunk size`` stanza.
+    * ``time_base``: ``day`` or ``hour``; default ``day``.
+    * ``time_offset``: Offset from the start of the day of the first time record;
+      default ``12h``.
+    * ``file_pattern``: Results archive file pattern; default
+      ``{ddmmmyy}/SalishSea_1d_{yyyymmdd}_grid_T.nc``.
+    * ``profile_stanzas``: Other stanzas of the model profile;
+      e.g. ``aggregate cache``.
+
+    The factory returns :kbd:`tmp_path`.
+    """
+
+    def make_archive(
+        dates,
+        data_vars,
+        depths,
+        chunk_size,
+        time_base="day",
+        time_offset="12h",
+        file_pattern="{ddmmmyy}/SalishSea_1d_{yyyymmdd}_grid_T.nc",
+        profile_stanzas=None,
+    ):
+        archive = tmp_path / "results"
+        time_freq, n_times = {"day": ("1D", 1), "hour": ("1h", 24)}[time_base]
+        for date in dates:
+            ds_path = archive / file_pattern.format(
+                ddmmmyy=date.strftime("%d%b%y").lower(),
+                yyyymmdd=date.strftime("%Y%m%d"),
+            )
+            ds_path.parent.mkdir(parents=True, exist_ok=True)
+            times = pandas.date_range(
+                date + pandas.Timedelta(time_offset), periods=n_times, freq=time_freq
+            )
+            xarray.Dataset(
+                data_vars(date), coords={"time_counter": times, "deptht": depths}
+            ).to_netcdf(ds_path, unlimited_dims="time_counter", engine="netcdf4")
+        model_profile = {
+            "description": "model profile for test",
+            "time coord": {"name": "time_counter"},
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
+            "chunk size": chunk_size,
+            "extraction time origin": datetime.date(2007, 1, 1),
+            **(profile_stanzas or {}),
+            "results archive": {
+                "path": str(archive),
+                "datasets": {
+                    time_base: {
+                        "physics tracers": {
+                            "file pattern": file_pattern,
+                            "depth coord": "deptht",
+                        }
+                    }
+                },
+            },
+        }
+        (tmp_path / "test_profile.yaml").write_text(
+            yaml.safe_dump(model_profile, sort_keys=False)
+        )
+        return tmp_path
+
+    return make_archive
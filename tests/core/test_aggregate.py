@@ -0,0 +1,405 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for core aggregate module."""
+
+import os
+import textwrap
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from reshapr.core import aggregate, extract
+
+
+@pytest.fixture(name="archive")
+def fixture_archive(make_archive, tmp_path):
+    rng = numpy.random.default_rng(42)
+
+    def data_vars(date):
+        votemper = rng.uniform(5, 15, (24, 2, 3, 2)).astype(numpy.single)
+        return {
+            "votemper": (
+                ("time_counter", "deptht", "y", "x"),
+                votemper,
+                {"long_name": "Conservative Temperature", "units": "degree_C"},
+            ),
+            "sossheig": (
+                ("time_counter", "y", "x"),
+                votemper[:, 0, :, :] / 10,
+                {"long_name": "Sea Surface Height", "units": "m"},
+            ),
+        }
+
+    return make_archive(
+        pandas.date_range("2020-01-01", "2020-02-02", freq="1D"),
+        data_vars,
+        depths=[0.5, 1.5],
+        chunk_size={"time": 24, "depth": 2, "y": 3, "x": 2},
+        time_base="hour",
+        time_offset="30min",
+        file_pattern="{ddmmmyy}/SalishSea_1h_{yyyymmdd}_grid_T.nc",
+        profile_stanzas={"aggregate cache": {"path": str(tmp_path / "aggregates")}},
+    )
+
+
+def _write_config(tmp_path, extra=""):
+    config_yaml = tmp_path / "aggregate.yaml"
+    config_yaml.write_text(textwrap.dedent(f"""\
+            dataset:
+              model profile: {tmp_path / "test_profile.yaml"}
+              time base: hour
+              variables group: physics tracers
+
+            dask cluster: unit_test_cluster.yaml
+
+            start date: 2020-01-01
+            end date: 2020-02-02
+
+            extract variables:
+              - votemper
+              - sossheig
+            """) + textwrap.dedent(extra))
+    return config_yaml
+
+
+def _write_extract_config(tmp_path, name, extra=""):
+    config_yaml = tmp_path / f"{name}.yaml"
+    config_yaml.write_text(textwrap.dedent(f"""\
+            dataset:
+              model profile: {tmp_path / "test_profile.yaml"}
+              time base: hour
+              variables group: physics tracers
+
+            dask cluster: unit_test_cluster.yaml
+
+            start date: 2020-01-01
+            end date: 2020-02-02
+
+            extract variables:
+              - votemper
+              - sossheig
+
+            extracted dataset:
+              name: {name}
+              description: test extraction
+              dest dir: {tmp_path}
+            """) + textwrap.dedent(extra))
+    return config_yaml
+
+
+class TestCliAggregate:
+    """Unit tests for cli_aggregate() function."""
+
+    def test_build_entries(self, archive, log_output):
+        aggregate.cli_aggregate(_write_config(archive), "", "")
+
+        cache = archive / "aggregates" / "hour" / "physics_tracers" / "mean"
+        with (
+            xarray.open_mfdataset(
+                sorted((archive / "results").glob("*jan20/*.nc"))
+            ) as source_ds,
+            xarray.open_dataset(
+                cache / "month" / "votemper" / "votemper_202001.nc"
+            ) as entry_ds,
+        ):
+            numpy.testing.assert_array_equal(
+                entry_ds.time_counter, [numpy.datetime64("2020-01-16T12:00")]
+            )
+            numpy.testing.assert_allclose(
+                entry_ds.votemper.isel(time_counter=0),
+                source_ds.votemper.mean("time_counter"),
+                rtol=1e-6,
+            )
+            assert entry_ds.votemper.attrs["units"] == "degree_C"
+            assert entry_ds.attrs["aggregate_level"] == "month"
+        assert sorted(path.name for path in (cache / "day" / "sossheig").glob("*")) == [
+            *(f"sossheig_202001{day:02d}.nc" for day in range(1, 32)),
+            "sossheig_20200201.nc",
+            "sossheig_20200202.nc",
+        ]
+        assert not (cache / "month" / "sossheig" / "sossheig_202002.nc").exists()
+        assert log_output.entries[-2]["event"] == "updated aggregate cache"
+        assert log_output.entries[-2]["n_entries"] == {"month": 1, "day": 2}
+        # 33 day entries and 1 month entry for each of 2 variables
+        assert log_output.entries[-2]["n_built_var_entries"] == 68
+
+    def test_up_to_date_entries_not_rebuilt(self, archive, log_output):
+        config_yaml = _write_config(archive)
+        aggregate.cli_aggregate(config_yaml, "", "")
+        source = archive / "results" / "10jan20" / "SalishSea_1h_20200110_grid_T.nc"
+        entry = (
+            archive
+            / "aggregates"
+            / "hour"
+            / "physics_tracers"
+            / "mean"
+            / "month"
+            / "votemper"
+            / "votemper_202001.nc"
+        )
+        updated_mtime = entry.stat().st_mtime + 60
+        os.utime(source, (updated_mtime, updated_mtime))
+
+        aggregate.cli_aggregate(config_yaml, "", "")
+
+        # 10jan20 day entries and Jan month entries of 2 variables
+        assert log_output.entries[-2]["n_built_var_entries"] == 4
+
+    def test_no_aggregate_cache(self, archive, log_output):
+        model_profile_yaml = archive / "test_profile.yaml"
+        model_profile_yaml.write_text(
+            model_profile_yaml.read_text().replace("aggregate cache", "unused")
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            aggregate.cli_aggregate(_write_config(archive), "", "")
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert log_output.entries[-1]["event"] == "model profile has no aggregate cache"
+
+    @pytest.mark.parametrize(
+        "extra, expected",
+        (
+            (
+                "levels: [week]",
+                "aggregate cache levels must be coarser than the time base",
+            ),
+            (
+                "aggregations: [mean, median]",
+                "unsupported aggregate cache aggregations",
+            ),
+        ),
+    )
+    def test_invalid_config(self, extra, expected, archive, log_output):
+        with pytest.raises(SystemExit) as exc_info:
+            aggregate.cli_aggregate(_write_config(archive, extra), "", "")
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert log_output.entries[-1]["event"] == expected
+
+
+class TestExtractAggregateCache:
+    """Integration tests of core.extract.cli_extract() function answered from the
+    aggregate cache."""
+
+    @pytest.mark.parametrize(
+        "stage",
+        (
+            """\
+            resample:
+              time interval: 1M
+            """,
+            """\
+            resample:
+              time interval: 1D
+              aggregation: max
+            """,
+        ),
+    )
+    def test_same_results_as_archive(self, stage, archive, log_output):
+        extract.cli_extract(
+            _write_extract_config(
+                archive, "from_archive", stage + "aggregate cache: False\n"
+            ),
+            "",
+            "",
+        )
+        assert not (archive / "aggregates").exists()
+
+        extract.cli_extract(_write_extract_config(archive, "from_cache", stage), "", "")
+
+        assert "using aggregate cache" in [
+            entry["event"] for entry in log_output.entries
+        ]
+        from_archive = next(archive.glob("from_archive*.nc"))
+        from_cache = next(archive.glob("from_cache*.nc"))
+        with (
+            xarray.open_dataset(from_archive) as archive_ds,
+            xarray.open_dataset(from_cache) as cache_ds,
+        ):
+            xarray.testing.assert_allclose(
+                cache_ds.drop_attrs(), archive_ds.drop_attrs(), rtol=1e-6
+            )
+
+    def test_archive_not_read_for_cached_dates(self, archive, log_output, monkeypatch):
+        extract.cli_extract(
+            _write_extract_config(
+                archive,
+                "first",
+                """\
+                resample:
+                  time interval: 1M
+                """,
+            ),
+            "",
+            "",
+        )
+
+        def _open_dataset(ds_paths, chunk_size, config):
+            raise AssertionError(f"results archive read: {ds_paths}")
+
+        monkeypatch.setattr(extract, "open_dataset", _open_dataset)
+
+        extract.cli_extract(
+            _write_extract_config(
+                archive,
+                "second",
+                """\
+                resample:
+                  time interval: 1M
+                """,
+            ),
+            "",
+            "",
+        )
+
+        cache_entries = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "updated aggregate cache"
+        ]
+        assert cache_entries[-1]["n_built_var_entries"] == 0
+
+
+class TestExtractSharedScanSources:
+    """Integration test of core.extract.cli_extract_shared_scan() function with
+    extractions that are answered from a month-avg profile and the aggregate cache."""
+
+    @pytest.fixture(name="month_avg_archive")
+    def fixture_month_avg_archive(self, archive):
+        (archive / "month").mkdir()
+        xarray.Dataset(
+            {
+                "votemper": (
+                    ("time_counter", "deptht", "y", "x"),
+                    numpy.full((1, 2, 3, 2), 42, dtype=numpy.single),
+                    {"long_name": "Conservative Temperature", "units": "degree_C"},
+                ),
+                "sossheig": (
+                    ("time_counter", "y", "x"),
+                    numpy.full((1, 3, 2), 4.2, dtype=numpy.single),
+                    {"long_name": "Sea Surface Height", "units": "m"},
+                ),
+            },
+            coords={
+                "time_counter": pandas.date_range("2020-01-16 12:00", periods=1),
+                "deptht": [0.5, 1.5],
+            },
+        ).to_netcdf(archive / "month" / "SalishSea_1m_20200101_20200131_grid_T.nc")
+        model_profile_yaml = archive / "test_profile.yaml"
+        model_profile = model_profile_yaml.read_text()
+        (archive / "month_avg_profile.yaml").write_text(
+            model_profile.replace(os.fspath(archive / "results"), os.fspath(archive))
+            .replace("hour:", "month:\n      days per file: month")
+            .replace(
+                "{ddmmmyy}/SalishSea_1h_{yyyymmdd}_grid_T.nc",
+                "month/SalishSea_1m_{yyyymm01}_{yyyymm_end}_grid_T.nc",
+            )
+        )
+        model_profile_yaml.write_text(
+            model_profile.replace(
+                "results archive:",
+                f"month-avg profile: {archive / 'month_avg_profile.yaml'}\n"
+                "results archive:",
+            )
+        )
+        return archive
+
+    @staticmethod
+    def _write_config(tmp_path, name, dest_dir, end_date, extra=""):
+        config_yaml = dest_dir / f"{name}.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {tmp_path / "test_profile.yaml"}
+                  time base: hour
+                  variables group: physics tracers
+
+                dask cluster: unit_test_cluster.yaml
+
+                start date: 2020-01-01
+                end date: {end_date}
+
+                extract variables:
+                  - votemper
+                  - sossheig
+
+                extracted dataset:
+                  name: {name}
+                  description: test extraction
+                  dest dir: {dest_dir}
+                """) + textwrap.dedent(extra))
+        return config_yaml
+
+    def test_same_results_as_single_extractions(self, month_avg_archive, log_output):
+        archive = month_avg_archive
+        single_dir, shared_dir = archive / "single", archive / "shared"
+        single_dir.mkdir()
+        shared_dir.mkdir()
+        extras = {
+            "month_avg": (
+                "2020-01-31",
+                """\
+                resample:
+                  time interval: 1M
+                """,
+            ),
+            "cached": (
+                "2020-02-02",
+                """\
+                resample:
+                  time interval: 1M
+                month-avg source: False
+                """,
+            ),
+            "hourly": ("2020-01-02", ""),
+        }
+        for dest_dir in (shared_dir, single_dir):
+            config_yamls = [
+                self._write_config(archive, name, dest_dir, *extra)
+                for name, extra in extras.items()
+            ]
+            if dest_dir == single_dir:
+                for config_yaml in config_yamls:
+                    extract.cli_extract(config_yaml, "", "")
+            else:
+                extract.cli_extract_shared_scan(config_yamls, "", "")
+
+        for nc_file in (
+            "month_avg_20200101_20200131.nc",
+            "cached_20200101_20200202.nc",
+            "hourly_20200101_20200102.nc",
+        ):
+            with (
+                xarray.open_dataset(single_dir / nc_file) as single_ds,
+                xarray.open_dataset(shared_dir / nc_file) as shared_ds,
+            ):
+                xarray.testing.assert_identical(
+                    single_ds.drop_attrs(), shared_ds.drop_attrs()
+                )
+        with xarray.open_dataset(shared_dir / "month_avg_20200101_20200131.nc") as ds:
+            numpy.testing.assert_array_equal(ds.votemper, 42)
+        scans = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "scanning source dataset for extractions"
+        ]
+        assert [scan["n_configs"] for scan in scans] == [1, 1]
@@ -0,0 +1,324 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for core catalog module."""
+
+import datetime
+import textwrap
+
+import numpy
+import pandas
+import pytest
+import xarray
+from rich.console import Console
+
+from reshapr.core import catalog, extract, info
+from reshapr.utils import archive_catalog
+
+
+@pytest.fixture(name="archive")
+def fixture_archive(make_archive, tmp_path):
+    def data_vars(date):
+        return {
+            "votemper": (
+                ("time_counter", "deptht", "y", "x"),
+                numpy.full((1, 2, 3, 2), date.day, dtype=numpy.single),
+                {"long_name": "Conservative Temperature", "units": "degree_C"},
+            ),
+            "vosaline": (
+                ("time_counter", "deptht", "y", "x"),
+                numpy.ones((1, 2, 3, 2), dtype=numpy.single),
+                {"long_name": "Reference Salinity", "units": "g/kg"},
+            ),
+        }
+
+    dates = pandas.date_range("2020-01-01", "2020-01-05", freq="1D")
+    make_archive(
+        # Gap in the archive
+        dates[dates.day != 3],
+        data_vars,
+        depths=[0.5, 1.5],
+        chunk_size={"time": 1, "depth": 2, "y": 3, "x": 2},
+        file_pattern="SalishSea_1d_{yyyymmdd}_grid_T.nc",
+        profile_stanzas={
+            "catalog": {"path": str(tmp_path / "catalogs" / "test_profile.sqlite")}
+        },
+    )
+    # Truncated file
+    (tmp_path / "results" / "SalishSea_1d_20200105_grid_T.nc").write_bytes(
+        b"\x89HDF\r\n"
+    )
+    (tmp_path / "catalog.yaml").write_text(textwrap.dedent(f"""\
+            dataset:
+              model profile: {tmp_path / "test_profile.yaml"}
+
+            dask cluster: unit_test_cluster.yaml
+
+            start date: 2020-01-01
+            end date: 2020-01-05
+            """))
+    return tmp_path
+
+
+class TestCliCatalog:
+    """Unit tests for cli_catalog() function."""
+
+    def test_catalog(self, archive, log_output):
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+
+        catalog_path = archive / "catalogs" / "test_profile.sqlite"
+        coverage = archive_catalog.calc_coverage(catalog_path, "day", "physics tracers")
+        assert coverage["n_files"] == 5
+        assert coverage["n_ok"] == 3
+        assert coverage["n_missing"] == 1
+        assert coverage["n_unreadable"] == 1
+        assert coverage["gap_dates"] == ["2020-01-03", "2020-01-05"]
+        updated = [
+            entry for entry in log_output.entries if entry["event"] == "updated catalog"
+        ]
+        assert updated[0]["n_datasets"] == 5
+        assert updated[0]["n_scanned"] == 5
+
+    def test_update_scans_only_stale_files(self, archive, log_output):
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+        (archive / "results" / "SalishSea_1d_20200105_grid_T.nc").unlink()
+
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+
+        updated = [
+            entry for entry in log_output.entries if entry["event"] == "updated catalog"
+        ]
+        assert updated[-1]["n_scanned"] == 1
+        assert updated[-1]["n_missing"] == 1
+        assert updated[-1]["n_unreadable"] == 0
+
+    def test_no_catalog_stanza(self, archive, log_output):
+        model_profile_yaml = archive / "test_profile.yaml"
+        model_profile_yaml.write_text(
+            model_profile_yaml.read_text().replace("catalog:", "not catalog:")
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            catalog.cli_catalog(archive / "catalog.yaml", "", "")
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["event"] == "model profile has no catalog"
+
+    def test_extract_drops_catalogued_gaps(self, archive, log_output):
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+        (archive / "extract.yaml").write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {archive / "test_profile.yaml"}
+                  time base: day
+                  variables group: physics tracers
+
+                dask cluster: unit_test_cluster.yaml
+
+                start date: 2020-01-01
+                end date: 2020-01-05
+
+                extract variables: [votemper]
+
+                extracted dataset:
+                  name: votemper
+                  description: test extraction
+                  dest dir: {archive}
+                """))
+
+        extract.cli_extract(archive / "extract.yaml", "", "")
+
+        with xarray.open_dataset(archive / "votemper_20200101_20200105.nc") as ds:
+            numpy.testing.assert_array_equal(ds.time.dt.day, [1, 2, 4])
+        dropped = [
+            entry
+            for entry in log_output.entries
+            if entry["event"]
+            == "dropped dataset files that catalog records as missing or unreadable"
+        ]
+        assert dropped[0]["gaps"] == ["2020-01-03", "2020-01-05"]
+        assert dropped[0]["n_missing_datasets"] == 1
+        assert dropped[0]["n_unreadable_datasets"] == 1
+
+    def test_extract_keeps_files_written_after_catalog(self, archive, log_output):
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+        # Fill the gap and repair the truncated file after the catalog run
+        with xarray.open_dataset(
+            archive / "results" / "SalishSea_1d_20200104_grid_T.nc"
+        ) as ds:
+            day_ds = ds.load()
+        for day in (3, 5):
+            day_ds.assign_coords(
+                time_counter=day_ds.time_counter + numpy.timedelta64(day - 4, "D")
+            ).to_netcdf(
+                archive / "results" / f"SalishSea_1d_2020010{day}_grid_T.nc",
+                unlimited_dims="time_counter",
+                engine="netcdf4",
+            )
+        (archive / "extract.yaml").write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {archive / "test_profile.yaml"}
+                  time base: day
+                  variables group: physics tracers
+
+                dask cluster: unit_test_cluster.yaml
+
+                start date: 2020-01-01
+                end date: 2020-01-05
+
+                extract variables: [votemper]
+
+                extracted dataset:
+                  name: votemper
+                  description: test extraction
+                  dest dir: {archive}
+                """))
+
+        extract.cli_extract(archive / "extract.yaml", "", "")
+
+        with xarray.open_dataset(archive / "votemper_20200101_20200105.nc") as ds:
+            assert ds.sizes["time"] == 5
+        assert (
+            "dropped dataset files that catalog records as missing or unreadable"
+            not in [entry["event"] for entry in log_output.entries]
+        )
+
+    def test_open_dataset_reads_catalogued_variables(
+        self, archive, log_output, monkeypatch
+    ):
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+        model_profile = extract._load_model_profile(archive / "test_profile.yaml")
+        config = {
+            "dataset": {"time base": "day", "variables group": "physics tracers"},
+            "start date": datetime.date(2020, 1, 1),
+            "end date": datetime.date(2020, 1, 2),
+            "extract variables": ["votemper"],
+        }
+        ds_paths = extract.calc_ds_paths(config, model_profile)
+
+        def _open_dataset(*args, **kwargs):
+            raise AssertionError("dataset file opened")
+
+        monkeypatch.setattr(extract.xarray, "open_dataset", _open_dataset)
+
+        with extract.open_dataset(
+            ds_paths, {"time_counter": 1}, config, model_profile
+        ) as ds:
+            assert list(ds.data_vars) == ["votemper"]
+
+    def test_info_vars_list(self, archive, capsys):
+        catalog.cli_catalog(archive / "catalog.yaml", "", "")
+        model_profile = extract._load_model_profile(archive / "test_profile.yaml")
+        capsys.readouterr()
+
+        info._vars_list(model_profile, "day", "physics tracers", Console())
+
+        stdout = capsys.readouterr().out
+        assert "votemper : Conservative Temperature [degree_C]" in stdout
+        assert "vosaline : Reference Salinity [g/kg]" in stdout
+        assert (
+            "catalog: 5 files from 2020-01-01 to 2020-01-05; 1 missing, 1 unreadable"
+            in stdout
+        )
+        assert "gap: 2020-01-03" in stdout
+        assert "gap: 2020-01-05" in stdout
+
+
+class TestCalcCatalogDatasets:
+    """Unit tests for _calc_catalog_datasets() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {
+            "results archive": {
+                "datasets": {
+                    "day": {"biology": {}, "physics tracers": {}},
+                    "month": {"days per file": "month", "biology": {}},
+                },
+            },
+        }
+
+    @pytest.mark.parametrize(
+        "dataset, expected",
+        (
+            (
+                {},
+                [
+                    ("day", "biology"),
+                    ("day", "physics tracers"),
+                    ("month", "biology"),
+                ],
+            ),
+            ({"time bases": ["month"]}, [("month", "biology")]),
+            (
+                {"variables groups": ["biology"]},
+                [("day", "biology"), ("month", "biology")],
+            ),
+        ),
+    )
+    def test_catalog_datasets(self, dataset, expected, model_profile):
+        config = {"dataset": dataset}
+
+        catalog_datasets = catalog._calc_catalog_datasets(config, model_profile)
+
+        assert catalog_datasets == expected
+
+    @pytest.mark.parametrize(
+        "dataset, event",
+        (
+            ({"time bases": ["hour"]}, "time bases are not in model profile"),
+            (
+                {"time bases": ["month"], "variables groups": ["physics tracers"]},
+                "variables groups are not in model profile time bases",
+            ),
+        ),
+    )
+    def test_not_in_model_profile(self, dataset, event, model_profile, log_output):
+        config = {"dataset": dataset}
+
+        with pytest.raises(SystemExit) as exc_info:
+            catalog._calc_catalog_datasets(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == event
+
+
+class TestCalcCatalogDsDates:
+    """Unit tests for calc_catalog_ds_dates() function."""
+
+    def test_limited_to_valid_dates(self):
+        config = {
+            "start date": datetime.date(2020, 1, 1),
+            "end date": datetime.date(2020, 1, 31),
+        }
+        model_profile = {
+            "valid dates": {"end date": datetime.date(2020, 1, 2)},
+            "results archive": {
+                "path": "/results/",
+                "datasets": {"day": {"biology": {"file pattern": "{yyyymmdd}.nc"}}},
+            },
+        }
+
+        ds_dates = catalog.calc_catalog_ds_dates(
+            config, model_profile, "day", "biology"
+        )
+
+        assert {
+            ds_path.name: period_date for ds_path, period_date in ds_dates.items()
+        } == {
+            "20200101.nc": datetime.date(2020, 1, 1),
+            "20200102.nc": datetime.date(2020, 1, 2),
+        }
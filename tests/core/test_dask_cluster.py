@@ -152,3 +152,56 @@ class TestGetDaskClient:
         )
         assert log_output.entries[1]["dashboard_link"] == dashboard_link
         assert log_output.entries[1]["event"] == "dask cluster dashboard"
+
+    def test_close_launched_cluster(self, log_output):
+        client = get_dask_client(Path("unit_test_cluster.yaml"))
+        cluster = client.cluster
+        client.close()
+
+        assert cluster.status == dask.distributed.core.Status.closed
+
+    def test_io_limits(self, log_output, tmp_path):
+        dask_config_yaml = tmp_path / "test_cluster.yaml"
+        dask_config_yaml.write_text(textwrap.dedent("""\
+                name: test dask cluster
+                processes: True
+                number of workers: 1
+                threads per worker: 1
+                io limits:
+                  max concurrent reads: 2
+                  max read bandwidth: 100 MiB
+                """))
+
+        client = get_dask_client(dask_config_yaml)
+        client.close()
+
+        assert log_output.entries[2]["log_level"] == "info"
+        assert log_output.entries[2]["event"] == "dask cluster I/O limits"
+        assert log_output.entries[2]["max_concurrent_reads"] == 2
+        assert log_output.entries[2]["max_read_bandwidth"] == "100.00 MiB/s"
+
+    @pytest.mark.parametrize(
+        "io_limits",
+        (
+            "max concurrent reads: 0",
+            "max read bandwidth: -1",
+            "max read bandwidth: 100 furlongs",
+        ),
+    )
+    def test_invalid_io_limits(self, io_limits, log_output, tmp_path):
+        dask_config_yaml = tmp_path / "test_cluster.yaml"
+        dask_config_yaml.write_text(textwrap.dedent(f"""\
+                name: test dask cluster
+                processes: False
+                number of workers: 1
+                threads per worker: 1
+                io limits:
+                  {io_limits}
+                """))
+
+        with pytest.raises(SystemExit) as exc_info:
+            get_dask_client(dask_config_yaml)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert log_output.entries[-1]["event"] == "invalid dask cluster I/O limits"
@@ -23,13 +23,16 @@ import textwrap
 from pathlib import Path
 
 import arrow
+import dask.array
 import numpy
 import pandas
 import pandas.tseries.offsets
 import pytest
 import xarray
+import yaml
 
 from reshapr.core import extract
+from reshapr.utils import mesh_geometry, regrid
 
 
 class TestCliExtract:
@@ -348,601 +351,4205 @@ class TestCliExtract:
         assert (tmp_path / "SalishSeaCast_1d_diatoms_20150401_20150401.nc").exists()
 
 
-class TestLoadConfig:
-    """Unit tests for core.extract._load_config() function."""
+class TestCalcPersistBatches:
+    """Unit tests for _calc_persist_batches() function."""
 
-    @pytest.mark.parametrize(
-        "start_date_override, end_date_override",
-        (
-            ("", ""),
-            (None, ""),
-            ("", None),
-            (None, None),
-        ),
-    )
-    def test_load_config_no_date_overrides(
-        self, start_date_override, end_date_override, log_output, tmp_path
-    ):
-        extract_config_yaml = tmp_path / "extract_config.yaml"
-        extract_config_yaml.write_text(textwrap.dedent("""\
-                dask cluster: docs/subcommands/salish_cluster.yaml
+    @pytest.fixture(name="writes")
+    def fixture_writes(self):
+        return [
+            (
+                xarray.Dataset({"var": ("x", numpy.zeros(n_values))}),
+                name,
+                {},
+                None,
+                None,
+            )
+            for name, n_values in (("a", 10), ("b", 20), ("c", 40), ("d", 5))
+        ]
 
-                start date: 2007-01-01
-                end date: 2007-01-10
-                """))
+    def test_no_budget(self, writes, log_output):
+        batches = extract._calc_persist_batches(writes, None)
 
-        config = extract.load_config(
-            extract_config_yaml, start_date_override, end_date_override
-        )
+        assert batches == [writes]
 
-        assert config["dask cluster"] == "docs/subcommands/salish_cluster.yaml"
-        assert config["start date"] == datetime.date(2007, 1, 1)
-        assert config["end date"] == datetime.date(2007, 1, 10)
+    def test_batches_fit_budget(self, writes, log_output):
+        batches = extract._calc_persist_batches(writes, 240)
 
-        assert log_output.entries[0]["log_level"] == "info"
-        assert log_output.entries[0]["config_file"] == os.fspath(extract_config_yaml)
-        assert log_output.entries[0]["event"] == "loaded config"
+        assert [[write[1] for write in batch] for batch in batches] == [
+            ["a", "b"],
+            ["c"],
+            ["d"],
+        ]
+        assert log_output.entries[-1]["n_batches"] == 3
 
-    def test_no_config_file(self, log_output, tmp_path):
-        nonexistent_config_yaml = tmp_path / "nonexistent.yaml"
+    def test_all_fit_budget(self, writes, log_output):
+        batches = extract._calc_persist_batches(writes, 600)
 
-        with pytest.raises(FileNotFoundError):
-            extract.load_config(nonexistent_config_yaml, None, None)
+        assert batches == [writes]
+        assert log_output.entries == []
 
-    @pytest.mark.parametrize(
-        "start_date_override, end_date_override, expected_start_date, expected_end_date",
-        (
-            ("2022-11-01", "", datetime.date(2022, 11, 1), datetime.date(2007, 1, 10)),
-            (
-                "2022-11-01",
-                None,
-                datetime.date(2022, 11, 1),
-                datetime.date(2007, 1, 10),
-            ),
-            ("", "2022-11-02", datetime.date(2007, 1, 1), datetime.date(2022, 11, 2)),
-            (None, "2022-11-02", datetime.date(2007, 1, 1), datetime.date(2022, 11, 2)),
-            (
-                "2022-11-01",
-                "2022-11-02",
-                datetime.date(2022, 11, 1),
-                datetime.date(2022, 11, 2),
-            ),
-            (
-                arrow.get("2022-11-01"),
-                arrow.get("2022-11-02"),
-                datetime.date(2022, 11, 1),
-                datetime.date(2022, 11, 2),
-            ),
-            (
-                datetime.date(2022, 11, 1),
-                datetime.date(2022, 11, 2),
-                datetime.date(2022, 11, 1),
-                datetime.date(2022, 11, 2),
-            ),
-        ),
-    )
-    def test_load_config_date_overrides(
-        self,
-        start_date_override,
-        end_date_override,
-        expected_start_date,
-        expected_end_date,
-        log_output,
-        tmp_path,
-    ):
-        extract_config_yaml = tmp_path / "extract_config.yaml"
-        extract_config_yaml.write_text(textwrap.dedent("""\
-                dask cluster: docs/subcommands/salish_cluster.yaml
 
-                start date: 2007-01-01
-                end date: 2007-01-10
+class TestCalcPersistMemoryBudget:
+    """Unit tests for _calc_persist_memory_budget() function."""
+
+    def test_no_client(self):
+        assert extract._calc_persist_memory_budget() is None
+
+    def test_memory_budget(self, tmp_path):
+        dask_config_yaml = tmp_path / "test_cluster.yaml"
+        dask_config_yaml.write_text(textwrap.dedent("""\
+                name: test dask cluster
+                processes: False
+                number of workers: 2
+                threads per worker: 1
+                memory limit: 1 GiB
                 """))
+        client = extract.get_dask_client(dask_config_yaml)
+        try:
+            assert extract._calc_persist_memory_budget() == 2**30
+        finally:
+            client.close()
 
-        config = extract.load_config(
-            extract_config_yaml, start_date_override, end_date_override
-        )
 
-        assert config["start date"] == expected_start_date
-        assert config["end date"] == expected_end_date
+class TestCliExtractSharedScan:
+    """Unit tests for core.extract.cli_extract_shared_scan() function."""
 
+    @pytest.fixture(name="archive")
+    def fixture_archive(self, tmp_path):
+        for day in (1, 2):
+            time_counter = pandas.date_range(
+                f"2015-04-0{day} 00:30", periods=24, freq="1h"
+            )
+            coords = {
+                "time_counter": time_counter,
+                "deptht": numpy.arange(0, 4, 0.5),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            }
+            diatoms = numpy.arange(24 * 8 * 9 * 4, dtype=numpy.single).reshape(
+                (24, 8, 9, 4)
+            )
+            xarray.Dataset(
+                coords=coords,
+                data_vars={
+                    "diatoms": (
+                        ("time_counter", "deptht", "y", "x"),
+                        diatoms + day,
+                        {"long_name": "Diatoms Concentration", "units": "mmol m-3"},
+                    ),
+                    "flagellates": (
+                        ("time_counter", "deptht", "y", "x"),
+                        2 * diatoms + day,
+                        {"long_name": "Flagellates Concentration", "units": "mmol m-3"},
+                    ),
+                },
+            ).to_netcdf(
+                tmp_path / f"SalishSea_1h_2015040{day}_2015040{day}_biol_T.nc",
+                unlimited_dims="time_counter",
+                engine="netcdf4",
+            )
+        model_profile_yaml = tmp_path / "test_profile.yaml"
+        model_profile_yaml.write_text(textwrap.dedent(f"""\
+                description: model profile for test
 
-class TestNormalizeEndDate:
-    """Unit tests for _normalize_end_date() function."""
+                time coord:
+                  name: time_counter
+                y coord:
+                  name: y
+                x coord:
+                  name: x
 
-    @pytest.mark.parametrize(
-        "cli_end_date, expected",
-        (
-            ("", ""),
-            ("2022-01-31", "2022-01-31"),
-            ("2022-02-31", "2022-02-28"),
-            ("2020-02-31", "2020-02-29"),
-            ("2022-06-31", "2022-06-30"),
-        ),
-    )
-    def test_normalize_end_date(self, cli_end_date, expected):
-        normalized_end_date = extract._normalize_end_date(cli_end_date)
+                chunk size:
+                  time: 24
+                  depth: 8
+                  y: 9
+                  x: 4
 
-        assert normalized_end_date == expected
+                extraction time origin: 2007-01-01
 
+                results archive:
+                  path: {tmp_path}
+                  datasets:
+                    hour:
+                      biology:
+                        file pattern: "SalishSea_1h_{{yyyymmdd}}_{{yyyymmdd}}_biol_T.nc"
+                        depth coord: deptht
+                """))
+        return tmp_path
 
-class TestOverrideStartEndDate:
-    """Unit tests for _override_start_end_date() function."""
+    @staticmethod
+    def _write_config(tmp_path, name, dest_dir, end_date, extract_vars, extra=""):
+        config_yaml = tmp_path / f"{name}.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {tmp_path / "test_profile.yaml"}
+                  time base: hour
+                  variables group: biology
 
-    def test_no_override(self):
-        config = {
-            "start date": datetime.date(2007, 1, 1),
-            "end date": datetime.date(2007, 12, 31),
-        }
-        cli_start_date, cli_end_date = "", ""
+                dask cluster: unit_test_cluster.yaml
 
-        start_date, end_date = extract._override_start_end_date(
-            config, cli_start_date, cli_end_date
-        )
+                start date: 2015-04-01
+                end date: {end_date}
 
-        assert start_date == datetime.date(2007, 1, 1)
-        assert end_date == datetime.date(2007, 12, 31)
+                extract variables: {extract_vars}
 
-    def test_override(self):
-        config = {
-            "start date": datetime.date(2007, 1, 1),
-            "end date": datetime.date(2007, 12, 31),
+                extracted dataset:
+                  name: {name}
+                  description: test extraction
+                  dest dir: {dest_dir}
+                """) + textwrap.dedent(extra))
+        return config_yaml
+
+    def test_same_results_as_single_extractions(self, archive, log_output):
+        single_dir, shared_dir = archive / "single", archive / "shared"
+        single_dir.mkdir()
+        shared_dir.mkdir()
+        extras = {
+            "diatoms_1h": ("2015-04-01", "[diatoms]", ""),
+            "phyto_1d": (
+                "2015-04-02",
+                "[diatoms, flagellates]",
+                """\
+                selection:
+                  grid y:
+                    y min: 2
+                    y max: 6
+                resample:
+                  time interval: 1D
+                """,
+            ),
         }
-        cli_start_date, cli_end_date = "2022-06-15", "2022-06-16"
-
-        start_date, end_date = extract._override_start_end_date(
-            config, cli_start_date, cli_end_date
+        for dest_dir in (single_dir, shared_dir):
+            config_yamls = [
+                self._write_config(archive, name, dest_dir, *extra)
+                for name, extra in extras.items()
+            ]
+            if dest_dir == single_dir:
+                for config_yaml in config_yamls:
+                    extract.cli_extract(config_yaml, "", "")
+            else:
+                extract.cli_extract_shared_scan(config_yamls, "", "")
+
+        for nc_file in (
+            "diatoms_1h_20150401_20150401.nc",
+            "phyto_1d_20150401_20150402.nc",
+        ):
+            with (
+                xarray.open_dataset(single_dir / nc_file) as single_ds,
+                xarray.open_dataset(shared_dir / nc_file) as shared_ds,
+            ):
+                xarray.testing.assert_identical(
+                    single_ds.drop_attrs(), shared_ds.drop_attrs()
+                )
+        scans = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "scanning source dataset for extractions"
+        ]
+        assert scans[0]["n_configs"] == 2
+        assert scans[0]["n_datasets"] == 2
+
+    def test_vector_field_not_supported(self, archive, log_output):
+        config_yaml = self._write_config(
+            archive,
+            "currents",
+            archive,
+            "2015-04-01",
+            "[vozocrtx]",
+            """\
+            vector field:
+              u variable: vozocrtx
+              v variable: vomecrty
+              v variables group: v velocity
+            """,
         )
 
-        assert start_date == datetime.date(2022, 6, 15)
-        assert end_date == datetime.date(2022, 6, 16)
-
+        with pytest.raises(SystemExit) as exc_info:
+            extract.cli_extract_shared_scan([config_yaml], "", "")
 
-class TestReconstructCmdLine:
-    """Unit tests for _reconstruct_cmd_line() function."""
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert log_output.entries[-1]["config_file"] == os.fspath(config_yaml)
+        expected = "vector field extractions are not supported in shared scans"
+        assert log_output.entries[-1]["event"] == expected
+
+    def test_compare_not_supported(self, archive, log_output):
+        config_yaml = self._write_config(
+            archive,
+            "diatoms_diff",
+            archive,
+            "2015-04-01",
+            "[diatoms]",
+            f"""\
+            compare:
+              model profile: {archive / "test_profile.yaml"}
+            """,
+        )
 
-    def test_no_start_end_date_override(self):
-        config_yaml = Path("test_extract.yaml")
-        cli_start_date, cli_end_date = "", ""
+        with pytest.raises(SystemExit) as exc_info:
+            extract.cli_extract_shared_scan([config_yaml], "", "")
 
-        cmd_line = extract._reconstruct_cmd_line(
-            config_yaml, cli_start_date, cli_end_date
+        assert exc_info.value.code == 2
+        expected = "compare extractions are not supported in shared scans"
+        assert log_output.entries[-1]["event"] == expected
+
+    def test_tiles_not_supported(self, archive, log_output):
+        config_yaml = self._write_config(
+            archive,
+            "diatoms_tiled",
+            archive,
+            "2015-04-01",
+            "[diatoms]",
+            """\
+            tiles:
+              y size: 4
+              x size: 2
+            """,
         )
 
-        assert cmd_line == f"`reshapr extract {config_yaml.absolute()}`"
-
-    def test_with_start_end_date_override(self):
-        config_yaml = Path("test_extract.yaml")
-        cli_start_date, cli_end_date = "2022-06-02", "2022-06-15"
+        with pytest.raises(SystemExit) as exc_info:
+            extract.cli_extract_shared_scan([config_yaml], "", "")
 
-        cmd_line = extract._reconstruct_cmd_line(
-            config_yaml, cli_start_date, cli_end_date
-        )
+        assert exc_info.value.code == 2
+        expected = "tiled extractions are not supported in shared scans"
+        assert log_output.entries[-1]["event"] == expected
 
-        expected = (
-            f"`reshapr extract {config_yaml.absolute()}"
-            f" --start-date 2022-06-02 --end-date 2022-06-15`"
-        )
-        assert cmd_line == expected
 
-    def test_with_start_date_override(self):
-        config_yaml = Path("test_extract.yaml")
-        cli_start_date, cli_end_date = "2022-06-02", ""
+class TestCliExtractTiles:
+    """Integration test of core.extract.cli_extract() function with a tiles stanza."""
 
-        cmd_line = extract._reconstruct_cmd_line(
-            config_yaml, cli_start_date, cli_end_date
+    @pytest.fixture(name="archive")
+    def fixture_archive(self, tmp_path):
+        coords = {
+            "time_counter": pandas.date_range(
+                "2015-04-01 00:30", periods=24, freq="1h"
+            ),
+            "deptht": numpy.arange(0, 4, 0.5),
+            "y": numpy.arange(9),
+            "x": numpy.arange(4),
+        }
+        diatoms = numpy.arange(24 * 8 * 9 * 4, dtype=numpy.single).reshape(
+            (24, 8, 9, 4)
         )
-
-        assert (
-            cmd_line
-            == f"`reshapr extract {config_yaml.absolute()} --start-date 2022-06-02`"
+        xarray.Dataset(
+            coords=coords,
+            data_vars={
+                "diatoms": (
+                    ("time_counter", "deptht", "y", "x"),
+                    diatoms,
+                    {"long_name": "Diatoms Concentration", "units": "mmol m-3"},
+                ),
+            },
+        ).to_netcdf(
+            tmp_path / "SalishSea_1h_20150401_20150401_biol_T.nc",
+            unlimited_dims="time_counter",
+            engine="netcdf4",
         )
+        model_profile_yaml = tmp_path / "test_profile.yaml"
+        model_profile_yaml.write_text(textwrap.dedent(f"""\
+                description: model profile for test
 
-    def test_with_end_date_override(self):
-        config_yaml = Path("test_extract.yaml")
-        cli_start_date, cli_end_date = "", "2022-06-15"
+                time coord:
+                  name: time_counter
+                y coord:
+                  name: y
+                x coord:
+                  name: x
 
-        cmd_line = extract._reconstruct_cmd_line(
-            config_yaml, cli_start_date, cli_end_date
-        )
+                chunk size:
+                  time: 24
+                  depth: 8
+                  y: 9
+                  x: 4
 
-        assert (
-            cmd_line
-            == f"`reshapr extract {config_yaml.absolute()} --end-date 2022-06-15`"
-        )
+                extraction time origin: 2007-01-01
 
+                results archive:
+                  path: {tmp_path}
+                  datasets:
+                    hour:
+                      biology:
+                        file pattern: "SalishSea_1h_{{yyyymmdd}}_{{yyyymmdd}}_biol_T.nc"
+                        depth coord: deptht
+                """))
+        return tmp_path
 
-class TestLoadModelProfile:
-    """Unit tests for core.extract._load_model_profile() function."""
-
-    def test_load_model_profile_from_path(self, log_output, tmp_path):
-        model_results_archive = tmp_path / "model_results/"
-        model_results_archive.mkdir()
-        model_profile_yaml = tmp_path / "model_profile.yaml"
-        model_profile_yaml.write_text(textwrap.dedent(f"""\
-                name: SomeModel
+    @staticmethod
+    def _write_config(tmp_path, dest_dir, extra=""):
+        config_yaml = tmp_path / f"{dest_dir.name}.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {tmp_path / "test_profile.yaml"}
+                  time base: hour
+                  variables group: biology
 
-                results archive:
-                  path: {os.fspath(model_results_archive)}
-                """))
+                dask cluster: unit_test_cluster.yaml
 
-        model_profile = extract._load_model_profile(model_profile_yaml)
+                start date: 2015-04-01
+                end date: 2015-04-01
 
-        assert model_profile["name"] == "SomeModel"
+                extract variables: [diatoms]
 
-        assert log_output.entries[0]["log_level"] == "info"
-        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
-            model_profile_yaml
-        )
-        assert log_output.entries[0]["event"] == "loaded model profile"
+                selection:
+                  grid y:
+                    y min: 1
 
-    def test_load_model_profile_from_model_profiles_dir(self, log_output, monkeypatch):
-        def mock_exists(path):
-            return True
+                resample:
+                  time interval: 1D
 
-        monkeypatch.setattr(Path, "exists", mock_exists)
+                extracted dataset:
+                  name: diatoms_1d
+                  description: test extraction
+                  dest dir: {dest_dir}
+                """) + textwrap.dedent(extra))
+        return config_yaml
+
+    def test_tiles_same_results_as_untiled(self, archive, log_output):
+        untiled_dir, tiled_dir = archive / "untiled", archive / "tiled"
+        untiled_dir.mkdir()
+        tiled_dir.mkdir()
+        extract.cli_extract(self._write_config(archive, untiled_dir), "", "")
+        tiled_config_yaml = self._write_config(
+            archive,
+            tiled_dir,
+            """\
+            tiles:
+              y size: 3
+              x size: 3
+            """,
+        )
+
+        extract.cli_extract(tiled_config_yaml, "", "")
+
+        index = yaml.safe_load(
+            (tiled_dir / "diatoms_1d_tiles_20150401_20150401.yaml").read_text()
+        )
+        assert index["extracted dataset"] == "diatoms_1d_20150401_20150401"
+        assert index["tile size"] == {"y": 3, "x": 3}
+        assert index["grid y"] == {"y min": 1, "y max": 9}
+        assert index["grid x"] == {"x min": 0, "x max": 4}
+        assert list(index["tiles"]) == [
+            "tile_y00_x00",
+            "tile_y00_x01",
+            "tile_y01_x00",
+            "tile_y01_x01",
+            "tile_y02_x00",
+            "tile_y02_x01",
+        ]
+        assert index["tiles"]["tile_y02_x01"] == {
+            "file": "diatoms_1d_tile_y02_x01_20150401_20150401.nc",
+            "grid y": {"y min": 7, "y max": 9},
+            "grid x": {"x min": 3, "x max": 4},
+        }
+        tile_paths = [tiled_dir / tile["file"] for tile in index["tiles"].values()]
+        with (
+            xarray.open_dataset(untiled_dir / "diatoms_1d_20150401_20150401.nc") as ds,
+            xarray.open_mfdataset(tile_paths, combine="by_coords") as tiled_ds,
+        ):
+            xarray.testing.assert_equal(ds, tiled_ds)
+        tiles = [
+            entry for entry in log_output.entries if entry["event"] == "extracting tile"
+        ]
+        assert len(tiles) == 6
+
+    def test_no_index_file(self, archive):
+        tiled_dir = archive / "tiled"
+        tiled_dir.mkdir()
+        tiled_config_yaml = self._write_config(
+            archive,
+            tiled_dir,
+            """\
+            tiles:
+              y size: 8
+              x size: 4
+              index file: false
+            """,
+        )
+
+        extract.cli_extract(tiled_config_yaml, "", "")
+
+        assert sorted(path.name for path in tiled_dir.iterdir()) == [
+            "diatoms_1d_tile_y00_x00_20150401_20150401.nc"
+        ]
 
-        model_profile_yaml = Path("SalishSeaCast-201812.yaml")
 
-        model_profile = extract._load_model_profile(model_profile_yaml)
+class TestCliExtractCompare:
+    """Integration test of core.extract.cli_extract() function with a compare stanza."""
 
-        assert model_profile["description"].startswith(
-            "SalishSeaCast version 201812 NEMO results"
+    @staticmethod
+    def _write_archive(archive, model_profile_yaml, offset):
+        archive.mkdir()
+        time_counter = pandas.date_range("2015-04-01 00:30", periods=24, freq="1h")
+        diatoms = numpy.arange(24 * 2 * 3 * 2, dtype=numpy.single).reshape(
+            (24, 2, 3, 2)
         )
-
-        assert log_output.entries[0]["log_level"] == "info"
-        model_profiles_path = Path(__file__).parent.parent.parent / "model_profiles"
-        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
-            model_profiles_path / model_profile_yaml
+        xarray.Dataset(
+            coords={
+                "time_counter": time_counter,
+                "deptht": numpy.array([0.5, 1.5]),
+                "y": numpy.arange(3),
+                "x": numpy.arange(2),
+            },
+            data_vars={
+                "diatoms": (
+                    ("time_counter", "deptht", "y", "x"),
+                    diatoms + offset,
+                    {"long_name": "Diatoms Concentration", "units": "mmol m-3"},
+                ),
+            },
+        ).to_netcdf(
+            archive / "SalishSea_1h_20150401_20150401_biol_T.nc",
+            unlimited_dims="time_counter",
+            engine="netcdf4",
         )
-        assert log_output.entries[0]["event"] == "loaded model profile"
+        model_profile_yaml.write_text(textwrap.dedent(f"""\
+                description: model profile for test
 
-    def test_no_model_profile_file_from_path(self, log_output, tmp_path):
-        nonexistent_model_profile_yaml = tmp_path / "nonexistent.yaml"
+                time coord:
+                  name: time_counter
+                y coord:
+                  name: y
+                x coord:
+                  name: x
 
-        with pytest.raises(SystemExit) as exc_info:
-            extract._load_model_profile(nonexistent_model_profile_yaml)
+                chunk size:
+                  time: 24
+                  depth: 2
+                  y: 3
+                  x: 2
 
-        assert exc_info.value.code == 2
-        assert log_output.entries[0]["log_level"] == "error"
-        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
-            nonexistent_model_profile_yaml
-        )
-        assert log_output.entries[0]["event"] == "model profile file not found"
+                extraction time origin: 2007-01-01
 
-    def test_no_model_profile_in_model_profiles_dir(self, log_output):
-        nonexistent_model_profile_yaml = Path("nonexistent.yaml")
+                results archive:
+                  path: {archive}
+                  datasets:
+                    hour:
+                      biology:
+                        file pattern: "SalishSea_1h_{{yyyymmdd}}_{{yyyymmdd}}_biol_T.nc"
+                        depth coord: deptht
+                """))
 
-        with pytest.raises(SystemExit) as exc_info:
-            extract._load_model_profile(nonexistent_model_profile_yaml)
+    def test_compare(self, tmp_path):
+        self._write_archive(tmp_path / "new", tmp_path / "new_profile.yaml", 1.5)
+        self._write_archive(tmp_path / "old", tmp_path / "old_profile.yaml", 0)
+        config_yaml = tmp_path / "test_extract_config.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {tmp_path / "new_profile.yaml"}
+                  time base: hour
+                  variables group: biology
 
-        assert exc_info.value.code == 2
-        assert log_output.entries[0]["log_level"] == "error"
-        model_profiles_path = Path(__file__).parent.parent.parent / "model_profiles"
-        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
-            model_profiles_path / nonexistent_model_profile_yaml
-        )
-        assert log_output.entries[0]["event"] == "model profile file not found"
+                dask cluster: unit_test_cluster.yaml
 
-    def test_no_results_archive(self, log_output, tmp_path):
-        nonexistent_path = Path("/this/path/does/not/exist/")
-        model_profile_yaml = tmp_path / "model_profile.yaml"
-        model_profile_yaml.write_text(textwrap.dedent(f"""\
-                name: SomeModel
+                start date: 2015-04-01
+                end date: 2015-04-01
 
-                results archive:
-                  path: {os.fspath(nonexistent_path)}
+                extract variables:
+                  - diatoms
+
+                compare:
+                  model profile: {tmp_path / "old_profile.yaml"}
+                  output:
+                    - difference
+                    - bias
+                    - rmse
+
+                extracted dataset:
+                  name: diatoms_new_vs_old
+                  description: Hour-averaged diatoms differences
+                  dest dir: {tmp_path}
                 """))
 
-        with pytest.raises(SystemExit) as exc_info:
-            extract._load_model_profile(model_profile_yaml)
+        extract.cli_extract(config_yaml, "", "")
 
-        assert exc_info.value.code == 2
-        assert log_output.entries[1]["log_level"] == "error"
-        assert log_output.entries[1]["model_profile_yaml"] == os.fspath(
-            model_profile_yaml
-        )
-        assert log_output.entries[1]["results_archive"] == os.fspath(nonexistent_path)
-        assert log_output.entries[1]["event"] == "model results archive not found"
+        nc_path = tmp_path / "diatoms_new_vs_old_20150401_20150401.nc"
+        with xarray.open_dataset(nc_path) as ds:
+            assert ds.diatoms_difference.dims == ("time", "depth", "gridY", "gridX")
+            numpy.testing.assert_allclose(ds.diatoms_difference, 1.5)
+            assert ds.diatoms_bias.dims == ("depth", "gridY", "gridX")
+            numpy.testing.assert_allclose(ds.diatoms_bias, 1.5)
+            numpy.testing.assert_allclose(ds.diatoms_rmse, 1.5)
+            assert ds.diatoms_rmse.attrs["long_name"] == "Diatoms Concentration RMSE"
+            assert ds.attrs["comparison"] == (
+                f"{tmp_path / 'new_profile.yaml'} minus {tmp_path / 'old_profile.yaml'}"
+            )
 
 
-class TestCalcDsPaths:
-    """Unit tests for calc_ds_paths() function."""
+class TestCalcSharedScanConfig:
+    """Unit test for _calc_shared_scan_config() function."""
 
-    def test_SalishSeaCast_ds_paths_day_per_file(self, log_output):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+    def test_calc_shared_scan_config(self):
+        dataset = {"time base": "hour", "variables group": "biology"}
+        configs = [
+            {
+                "dataset": dataset,
+                "start date": datetime.date(2015, 4, 3),
+                "end date": datetime.date(2015, 4, 5),
+                "extract variables": ["diatoms"],
             },
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 2),
-        }
+            {
+                "dataset": dataset,
+                "start date": datetime.date(2015, 4, 1),
+                "end date": datetime.date(2015, 4, 2),
+                "extract variables": ["flagellates"],
+                "reduce": {"depth": {"method": "depth integral"}},
+                "parallel read": False,
+            },
+        ]
+
+        scan_config = extract._calc_shared_scan_config(configs)
+
+        assert scan_config["dataset"] == dataset
+        assert scan_config["start date"] == arrow.get("2015-04-01")
+        assert scan_config["end date"] == arrow.get("2015-04-05")
+        assert scan_config["extract variables"] == ["diatoms", "e3t", "flagellates"]
+        assert scan_config["parallel read"] is False
+
+
+class TestCalcSharedScanDsPaths:
+    """Unit test for _calc_shared_scan_ds_paths() function."""
+
+    def test_gap_between_extractions(self, log_output):
         model_profile = {
             "results archive": {
-                "path": "/results/SalishSea/nowcast-green.201812/",
+                "path": "/results/",
                 "datasets": {
-                    "day": {
-                        "biology": {
-                            "file pattern": "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc"
-                        },
-                    },
+                    "day": {"biology": {"file pattern": "SalishSea_1d_{yyyymmdd}.nc"}}
                 },
-            },
+            }
+        }
+        dataset = {"time base": "day", "variables group": "biology"}
+        configs = [
+            {"dataset": dataset, "start date": "2015-04-04", "end date": "2015-04-05"},
+            {"dataset": dataset, "start date": "2015-04-01", "end date": "2015-04-02"},
+        ]
+        scan_config = {
+            "dataset": dataset,
+            "start date": "2015-04-01",
+            "end date": "2015-04-05",
         }
 
-        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+        ds_paths = extract._calc_shared_scan_ds_paths(
+            configs, scan_config, model_profile
+        )
 
-        expected_paths = [
-            Path(
-                "/results/SalishSea/nowcast-green.201812/01jan15/SalishSea_1d_20150101_20150101_ptrc_T.nc"
-            ),
-            Path(
-                "/results/SalishSea/nowcast-green.201812/02jan15/SalishSea_1d_20150102_20150102_ptrc_T.nc"
-            ),
+        assert ds_paths == [
+            Path("/results/SalishSea_1d_20150401.nc"),
+            Path("/results/SalishSea_1d_20150402.nc"),
+            Path("/results/SalishSea_1d_20150404.nc"),
+            Path("/results/SalishSea_1d_20150405.nc"),
         ]
-        assert ds_paths == expected_paths
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        expected = os.fspath(Path(model_profile["results archive"]["path"]))
-        assert log_output.entries[0]["results_archive_path"] == expected
-        assert log_output.entries[0]["time_base"] == "day"
-        assert log_output.entries[0]["vars_group"] == "biology"
-        assert (
-            log_output.entries[0]["nc_files_pattern"]
-            == "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc"
-        )
-        assert log_output.entries[0]["days_per_file"] == 1
-        assert log_output.entries[0]["start_date"] == "2015-01-01"
-        assert log_output.entries[0]["end_date"] == "2015-01-02"
-        assert log_output.entries[0]["n_datasets"] == 2
-        assert log_output.entries[0]["event"] == "collected dataset paths"
 
-    def test_SalishSeaCast_ds_paths_month_per_file(self, log_output):
-        extract_config = {
-            "dataset": {
-                "time base": "month",
-                "variables group": "biology",
+class TestSelectSharedScanSource:
+    """Unit tests for _select_shared_scan_source() function."""
+
+    @pytest.fixture(name="scan_ds")
+    def fixture_scan_ds(self):
+        time_counter = pandas.date_range("2015-03-16 12:00", periods=4, freq="15D")
+        return xarray.Dataset(
+            coords={"time_counter": time_counter},
+            data_vars={
+                "diatoms": ("time_counter", numpy.arange(4)),
+                "flagellates": ("time_counter", numpy.arange(4)),
             },
-            "start date": datetime.date(2023, 11, 1),
-            "end date": datetime.date(2023, 12, 31),
+        )
+
+    @pytest.mark.parametrize(
+        "days_per_file, start_date, end_date, expected",
+        (
+            (1, "2015-03-31", "2015-04-15", ["2015-03-31 12:00", "2015-04-15 12:00"]),
+            (1, "2015-04-01", "2015-04-15", ["2015-04-15 12:00"]),
+            (
+                "month",
+                "2015-04-10",
+                "2015-04-20",
+                ["2015-04-15 12:00", "2015-04-30 12:00"],
+            ),
+        ),
+    )
+    def test_select_time_records(
+        self, scan_ds, days_per_file, start_date, end_date, expected
+    ):
+        config = {
+            "dataset": {"time base": "day", "variables group": "biology"},
+            "start date": start_date,
+            "end date": end_date,
+            "extract variables": ["diatoms"],
         }
         model_profile = {
-            "results archive": {
-                "path": "/results2/SalishSea/month-avg.202111/",
-                "datasets": {
-                    "month": {
-                        "days per file": "month",
-                        "biology": {
-                            "file pattern": "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc"
-                        },
-                    },
-                },
-            },
+            "time coord": {"name": "time_counter"},
+            "results archive": {"datasets": {"day": {"days per file": days_per_file}}},
         }
 
-        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
-
-        expected_paths = [
-            Path(
-                "/results2/SalishSea/month-avg.202111/SalishSeaCast_1m_biol_T_20231101_20231130.nc"
-            ),
-            Path(
-                "/results2/SalishSea/month-avg.202111/SalishSeaCast_1m_biol_T_20231201_20231231.nc"
-            ),
-        ]
-        assert ds_paths == expected_paths
+        ds = extract._select_shared_scan_source(scan_ds, config, model_profile)
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        expected = os.fspath(Path(model_profile["results archive"]["path"]))
-        assert log_output.entries[0]["results_archive_path"] == expected
-        assert log_output.entries[0]["time_base"] == "month"
-        assert log_output.entries[0]["vars_group"] == "biology"
-        assert (
-            log_output.entries[0]["nc_files_pattern"]
-            == "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc"
+        numpy.testing.assert_array_equal(
+            ds.time_counter, pandas.to_datetime(expected).values
         )
-        assert log_output.entries[0]["days_per_file"] == "month"
-        assert log_output.entries[0]["start_date"] == "2023-11-01"
-        assert log_output.entries[0]["end_date"] == "2023-12-31"
-        assert log_output.entries[0]["n_datasets"] == 2
-        assert log_output.entries[0]["event"] == "collected dataset paths"
+        assert list(ds.data_vars) == ["diatoms"]
 
-    def test_HRDPS_ds_paths(self, log_output):
-        extract_config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "surface fields",
-            },
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 2),
+    def test_select_time_filtered_records(self, scan_ds):
+        config = {
+            "dataset": {"time base": "day", "variables group": "biology"},
+            "start date": "2015-03-01",
+            "end date": "2015-04-30",
+            "extract variables": ["diatoms"],
+            "selection": {"months": [4]},
         }
         model_profile = {
-            "results archive": {
-                "path": "/results/forcing/atmospheric/GEM2.5/operational/",
-                "datasets": {
-                    "hour": {
-                        "surface fields": {"file pattern": "ops_{nemo_yyyymmdd}.nc"},
-                    },
-                },
-            },
+            "time coord": {"name": "time_counter"},
+            "results archive": {"datasets": {"day": {"days per file": 1}}},
         }
 
-        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+        ds = extract._select_shared_scan_source(scan_ds, config, model_profile)
 
-        expected_paths = [
-            Path("/results/forcing/atmospheric/GEM2.5/operational/ops_y2015m01d01.nc"),
-            Path("/results/forcing/atmospheric/GEM2.5/operational/ops_y2015m01d02.nc"),
-        ]
-        assert ds_paths == expected_paths
+        numpy.testing.assert_array_equal(
+            ds.time_counter,
+            pandas.to_datetime(["2015-04-15 12:00", "2015-04-30 12:00"]).values,
+        )
+
+
+class TestLoadConfig:
+    """Unit tests for core.extract._load_config() function."""
+
+    @pytest.mark.parametrize(
+        "start_date_override, end_date_override",
+        (
+            ("", ""),
+            (None, ""),
+            ("", None),
+            (None, None),
+        ),
+    )
+    def test_load_config_no_date_overrides(
+        self, start_date_override, end_date_override, log_output, tmp_path
+    ):
+        extract_config_yaml = tmp_path / "extract_config.yaml"
+        extract_config_yaml.write_text(textwrap.dedent("""\
+                dask cluster: docs/subcommands/salish_cluster.yaml
+
+                start date: 2007-01-01
+                end date: 2007-01-10
+                """))
+
+        config = extract.load_config(
+            extract_config_yaml, start_date_override, end_date_override
+        )
+
+        assert config["dask cluster"] == "docs/subcommands/salish_cluster.yaml"
+        assert config["start date"] == datetime.date(2007, 1, 1)
+        assert config["end date"] == datetime.date(2007, 1, 10)
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["config_file"] == os.fspath(extract_config_yaml)
+        assert log_output.entries[0]["event"] == "loaded config"
+
+    def test_no_config_file(self, log_output, tmp_path):
+        nonexistent_config_yaml = tmp_path / "nonexistent.yaml"
+
+        with pytest.raises(FileNotFoundError):
+            extract.load_config(nonexistent_config_yaml, None, None)
+
+    @pytest.mark.parametrize(
+        "start_date_override, end_date_override, expected_start_date, expected_end_date",
+        (
+            ("2022-11-01", "", datetime.date(2022, 11, 1), datetime.date(2007, 1, 10)),
+            (
+                "2022-11-01",
+                None,
+                datetime.date(2022, 11, 1),
+                datetime.date(2007, 1, 10),
+            ),
+            ("", "2022-11-02", datetime.date(2007, 1, 1), datetime.date(2022, 11, 2)),
+            (None, "2022-11-02", datetime.date(2007, 1, 1), datetime.date(2022, 11, 2)),
+            (
+                "2022-11-01",
+                "2022-11-02",
+                datetime.date(2022, 11, 1),
+                datetime.date(2022, 11, 2),
+            ),
+            (
+                arrow.get("2022-11-01"),
+                arrow.get("2022-11-02"),
+                datetime.date(2022, 11, 1),
+                datetime.date(2022, 11, 2),
+            ),
+            (
+                datetime.date(2022, 11, 1),
+                datetime.date(2022, 11, 2),
+                datetime.date(2022, 11, 1),
+                datetime.date(2022, 11, 2),
+            ),
+        ),
+    )
+    def test_load_config_date_overrides(
+        self,
+        start_date_override,
+        end_date_override,
+        expected_start_date,
+        expected_end_date,
+        log_output,
+        tmp_path,
+    ):
+        extract_config_yaml = tmp_path / "extract_config.yaml"
+        extract_config_yaml.write_text(textwrap.dedent("""\
+                dask cluster: docs/subcommands/salish_cluster.yaml
+
+                start date: 2007-01-01
+                end date: 2007-01-10
+                """))
+
+        config = extract.load_config(
+            extract_config_yaml, start_date_override, end_date_override
+        )
+
+        assert config["start date"] == expected_start_date
+        assert config["end date"] == expected_end_date
+
+
+class TestNormalizeEndDate:
+    """Unit tests for _normalize_end_date() function."""
+
+    @pytest.mark.parametrize(
+        "cli_end_date, expected",
+        (
+            ("", ""),
+            ("2022-01-31", "2022-01-31"),
+            ("2022-02-31", "2022-02-28"),
+            ("2020-02-31", "2020-02-29"),
+            ("2022-06-31", "2022-06-30"),
+        ),
+    )
+    def test_normalize_end_date(self, cli_end_date, expected):
+        normalized_end_date = extract._normalize_end_date(cli_end_date)
+
+        assert normalized_end_date == expected
+
+
+class TestOverrideStartEndDate:
+    """Unit tests for _override_start_end_date() function."""
+
+    def test_no_override(self):
+        config = {
+            "start date": datetime.date(2007, 1, 1),
+            "end date": datetime.date(2007, 12, 31),
+        }
+        cli_start_date, cli_end_date = "", ""
+
+        start_date, end_date = extract._override_start_end_date(
+            config, cli_start_date, cli_end_date
+        )
+
+        assert start_date == datetime.date(2007, 1, 1)
+        assert end_date == datetime.date(2007, 12, 31)
+
+    def test_override(self):
+        config = {
+            "start date": datetime.date(2007, 1, 1),
+            "end date": datetime.date(2007, 12, 31),
+        }
+        cli_start_date, cli_end_date = "2022-06-15", "2022-06-16"
+
+        start_date, end_date = extract._override_start_end_date(
+            config, cli_start_date, cli_end_date
+        )
+
+        assert start_date == datetime.date(2022, 6, 15)
+        assert end_date == datetime.date(2022, 6, 16)
+
+
+class TestReconstructCmdLine:
+    """Unit tests for _reconstruct_cmd_line() function."""
+
+    def test_no_start_end_date_override(self):
+        config_yaml = Path("test_extract.yaml")
+        cli_start_date, cli_end_date = "", ""
+
+        cmd_line = extract._reconstruct_cmd_line(
+            config_yaml, cli_start_date, cli_end_date
+        )
+
+        assert cmd_line == f"`reshapr extract {config_yaml.absolute()}`"
+
+    def test_with_start_end_date_override(self):
+        config_yaml = Path("test_extract.yaml")
+        cli_start_date, cli_end_date = "2022-06-02", "2022-06-15"
+
+        cmd_line = extract._reconstruct_cmd_line(
+            config_yaml, cli_start_date, cli_end_date
+        )
+
+        expected = (
+            f"`reshapr extract {config_yaml.absolute()}"
+            f" --start-date 2022-06-02 --end-date 2022-06-15`"
+        )
+        assert cmd_line == expected
+
+    def test_with_start_date_override(self):
+        config_yaml = Path("test_extract.yaml")
+        cli_start_date, cli_end_date = "2022-06-02", ""
+
+        cmd_line = extract._reconstruct_cmd_line(
+            config_yaml, cli_start_date, cli_end_date
+        )
+
+        assert (
+            cmd_line
+            == f"`reshapr extract {config_yaml.absolute()} --start-date 2022-06-02`"
+        )
+
+    def test_with_end_date_override(self):
+        config_yaml = Path("test_extract.yaml")
+        cli_start_date, cli_end_date = "", "2022-06-15"
+
+        cmd_line = extract._reconstruct_cmd_line(
+            config_yaml, cli_start_date, cli_end_date
+        )
+
+        assert (
+            cmd_line
+            == f"`reshapr extract {config_yaml.absolute()} --end-date 2022-06-15`"
+        )
+
+
+class TestLoadModelProfile:
+    """Unit tests for core.extract._load_model_profile() function."""
+
+    def test_load_model_profile_from_path(self, log_output, tmp_path):
+        model_results_archive = tmp_path / "model_results/"
+        model_results_archive.mkdir()
+        model_profile_yaml = tmp_path / "model_profile.yaml"
+        model_profile_yaml.write_text(textwrap.dedent(f"""\
+                name: SomeModel
+
+                results archive:
+                  path: {os.fspath(model_results_archive)}
+                """))
+
+        model_profile = extract._load_model_profile(model_profile_yaml)
+
+        assert model_profile["name"] == "SomeModel"
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
+            model_profile_yaml
+        )
+        assert log_output.entries[0]["event"] == "loaded model profile"
+
+    def test_load_model_profile_from_model_profiles_dir(self, log_output, monkeypatch):
+        def mock_exists(path):
+            return True
+
+        monkeypatch.setattr(Path, "exists", mock_exists)
+
+        model_profile_yaml = Path("SalishSeaCast-201812.yaml")
+
+        model_profile = extract._load_model_profile(model_profile_yaml)
+
+        assert model_profile["description"].startswith(
+            "SalishSeaCast version 201812 NEMO results"
+        )
+
+        assert log_output.entries[0]["log_level"] == "info"
+        model_profiles_path = Path(__file__).parent.parent.parent / "model_profiles"
+        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
+            model_profiles_path / model_profile_yaml
+        )
+        assert log_output.entries[0]["event"] == "loaded model profile"
+
+    def test_no_model_profile_file_from_path(self, log_output, tmp_path):
+        nonexistent_model_profile_yaml = tmp_path / "nonexistent.yaml"
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_model_profile(nonexistent_model_profile_yaml)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
+            nonexistent_model_profile_yaml
+        )
+        assert log_output.entries[0]["event"] == "model profile file not found"
+
+    def test_no_model_profile_in_model_profiles_dir(self, log_output):
+        nonexistent_model_profile_yaml = Path("nonexistent.yaml")
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_model_profile(nonexistent_model_profile_yaml)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        model_profiles_path = Path(__file__).parent.parent.parent / "model_profiles"
+        assert log_output.entries[0]["model_profile_yaml"] == os.fspath(
+            model_profiles_path / nonexistent_model_profile_yaml
+        )
+        assert log_output.entries[0]["event"] == "model profile file not found"
+
+    def test_no_results_archive(self, log_output, tmp_path):
+        nonexistent_path = Path("/this/path/does/not/exist/")
+        model_profile_yaml = tmp_path / "model_profile.yaml"
+        model_profile_yaml.write_text(textwrap.dedent(f"""\
+                name: SomeModel
+
+                results archive:
+                  path: {os.fspath(nonexistent_path)}
+                """))
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_model_profile(model_profile_yaml)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[1]["log_level"] == "error"
+        assert log_output.entries[1]["model_profile_yaml"] == os.fspath(
+            model_profile_yaml
+        )
+        assert log_output.entries[1]["results_archive"] == os.fspath(nonexistent_path)
+        assert log_output.entries[1]["event"] == "model results archive not found"
+
+
+class TestResolveTimeFilters:
+    """Unit tests for _resolve_time_filters() and _calc_time_filters() functions."""
+
+    @pytest.mark.parametrize(
+        "selection, expected",
+        (
+            ({"months": [6, 7, 8]}, {"months": {6, 7, 8}}),
+            ({"days of week": ["Monday", "sat"]}, {"days of week": {0, 5}}),
+            ({"hours": [0, 12]}, {"hours": {0, 12}}),
+            (
+                {"dates": [datetime.date(2015, 6, 1), "2015-06-03"]},
+                {"dates": {datetime.date(2015, 6, 1), datetime.date(2015, 6, 3)}},
+            ),
+            (
+                {"months": [6], "hours": [12], "grid y": {"y min": 0}},
+                {"months": {6}, "hours": {12}},
+            ),
+        ),
+    )
+    def test_calc_time_filters(self, selection, expected):
+        config = {"selection": selection}
+
+        time_filters = extract._calc_time_filters(config)
+
+        assert time_filters == expected
+
+    def test_no_time_filters(self):
+        assert extract._calc_time_filters({}) == {}
+
+    @pytest.mark.parametrize(
+        "time_filter, values",
+        (
+            ("months", [0]),
+            ("months", [13]),
+            ("months", ["Jun"]),
+            ("days of week", ["Funday"]),
+            ("days of week", [1]),
+            ("hours", [24]),
+            ("hours", [True]),
+            ("dates", ["2015-06-31"]),
+            ("months", 6),
+            ("hours", []),
+        ),
+    )
+    def test_invalid_time_filter(self, time_filter, values, log_output):
+        config = {"selection": {time_filter: values}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_time_filters(config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["time_filter"] == time_filter
+
+    def test_dates_match(self, log_output):
+        config = {
+            "start date": datetime.date(2015, 5, 1),
+            "end date": datetime.date(2015, 9, 30),
+            "selection": {"months": [6, 7, 8], "days of week": ["Sun"]},
+        }
+
+        extract._resolve_time_filters(config)
+
+        assert log_output.entries == []
+
+    def test_no_dates_match(self, log_output):
+        config = {
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 3, 31),
+            "selection": {"months": [6, 7, 8]},
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_time_filters(config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert (
+            log_output.entries[0]["event"]
+            == "no dates in extraction date range match selection time filters"
+        )
+        assert log_output.entries[0]["time_filters"] == {"months": [6, 7, 8]}
+
+
+class TestResolveGeoSelection:
+    """Unit tests for _resolve_geo_selection() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", os.fspath(tmp_path / "cache"))
+        lons, lats = numpy.meshgrid(
+            -124.0 + 0.1 * numpy.arange(3), 49.0 + 0.1 * numpy.arange(4)
+        )
+        xarray.Dataset(
+            {
+                "longitude": (("gridY", "gridX"), lons),
+                "latitude": (("gridY", "gridX"), lats),
+            }
+        ).to_netcdf(tmp_path / "geo_ref.nc")
+        tmask = numpy.ones((1, 2, 4, 3), dtype=numpy.int8)
+        tmask[0, :, 2, 1] = 0
+        xarray.Dataset({"tmask": (("t", "z", "y", "x"), tmask)}).to_netcdf(
+            tmp_path / "mesh_mask.nc"
+        )
+        return {
+            "geo ref dataset": {
+                "path": tmp_path / "geo_ref.nc",
+                "y coord": "gridY",
+                "x coord": "gridX",
+            },
+            "mesh mask": tmp_path / "mesh_mask.nc",
+        }
+
+    def test_lon_lat_box(self, model_profile, log_output):
+        config = {
+            "selection": {
+                "lon lat box": {
+                    "lon min": -123.95,
+                    "lon max": -123.75,
+                    "lat min": 49.05,
+                    "lat max": 49.25,
+                }
+            }
+        }
+
+        extract._resolve_geo_selection(config, model_profile)
+
+        assert config["selection"]["grid y"] == {"y min": 1, "y max": 3}
+        assert config["selection"]["grid x"] == {"x min": 1, "x max": 3}
+        assert log_output.entries[-1]["log_level"] == "info"
+        assert (
+            log_output.entries[-1]["event"]
+            == "resolved geographic selection to grid indices"
+        )
+
+    def test_lon_lat_point(self, model_profile, log_output):
+        config = {"selection": {"lon lat point": {"lon": -123.9, "lat": 49.16}}}
+
+        extract._resolve_geo_selection(config, model_profile)
+
+        assert config["selection"]["grid y"] == {"y min": 2, "y max": 3}
+        assert config["selection"]["grid x"] == {"x min": 1, "x max": 2}
+        assert log_output.entries[-1]["distance"] == pytest.approx(4448, rel=1e-2)
+
+    def test_lon_lat_wet_point(self, model_profile, log_output):
+        mesh_geometry.clear_cache()
+        config = {
+            "selection": {
+                "lon lat point": {"lon": -123.9, "lat": 49.16, "wet point": True}
+            }
+        }
+
+        extract._resolve_geo_selection(config, model_profile)
+        mesh_geometry.clear_cache()
+
+        assert config["selection"]["grid y"] == {"y min": 1, "y max": 2}
+        assert config["selection"]["grid x"] == {"x min": 1, "x max": 2}
+
+    def test_wet_point_no_mesh_mask(self, model_profile, log_output):
+        del model_profile["mesh mask"]
+        config = {
+            "selection": {
+                "lon lat point": {"lon": -123.9, "lat": 49.16, "wet point": True}
+            }
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_geo_selection(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert (
+            log_output.entries[-1]["event"]
+            == "nearest wet point selection requires a mesh mask"
+        )
+
+    def test_box_outside_grid(self, model_profile, log_output):
+        config = {
+            "selection": {
+                "lon lat box": {
+                    "lon min": -120,
+                    "lon max": -119,
+                    "lat min": 49,
+                    "lat max": 50,
+                }
+            }
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_geo_selection(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["event"] == "lon lat box selection failed"
+        assert (
+            log_output.entries[-1]["reason"]
+            == "no grid points in longitude/latitude box"
+        )
+
+    @pytest.mark.parametrize(
+        "selection",
+        (
+            {
+                "lon lat point": {"lon": -123.9, "lat": 49.16},
+                "grid y": {"y min": 0, "y max": 2},
+            },
+            {
+                "lon lat point": {"lon": -123.9, "lat": 49.16},
+                "lon lat box": {
+                    "lon min": -124,
+                    "lon max": -123,
+                    "lat min": 49,
+                    "lat max": 50,
+                },
+            },
+        ),
+    )
+    def test_multiple_selections(self, selection, model_profile, log_output):
+        config = {"selection": selection}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_geo_selection(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == (
+            "only one of lon lat box, lon lat point, transect, or grid y/x selections "
+            "is supported"
+        )
+
+    def test_transect(self, model_profile, log_output):
+        config = {
+            "selection": {"transect": {"waypoints": [[-124.0, 49.1], [-123.9, 49.3]]}}
+        }
+
+        extract._resolve_geo_selection(config, model_profile)
+
+        assert config["selection"]["grid y"] == {"y min": 1, "y max": 4}
+        assert config["selection"]["grid x"] == {"x min": 0, "x max": 2}
+        assert log_output.entries[-1]["n_points"] == 4
+
+    def test_transect_space_reduction(self, model_profile, log_output):
+        config = {
+            "selection": {"transect": {"waypoints": [[-124.0, 49.1], [-123.9, 49.3]]}},
+            "reduce": {"space": {"aggregation": "mean"}},
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_geo_selection(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[0]["event"]
+            == "space and regions reductions of transects are not supported"
+        )
+
+    def test_transect_one_waypoint(self, model_profile, log_output):
+        config = {"selection": {"transect": {"waypoints": [[-124.0, 49.1]]}}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_geo_selection(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["event"] == "transect selection failed"
+
+
+class TestResolveRegrid:
+    """Unit tests for _resolve_regrid() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", os.fspath(tmp_path / "cache"))
+        lons, lats = numpy.meshgrid(
+            -124.0 + 0.1 * numpy.arange(3), 49.0 + 0.1 * numpy.arange(4)
+        )
+        xarray.Dataset(
+            {
+                "longitude": (("gridY", "gridX"), lons),
+                "latitude": (("gridY", "gridX"), lats),
+            }
+        ).to_netcdf(tmp_path / "geo_ref.nc")
+        tmask = numpy.ones((1, 2, 4, 3), dtype=numpy.int8)
+        tmask[0, :, 2, 1] = 0
+        xarray.Dataset({"tmask": (("t", "z", "y", "x"), tmask)}).to_netcdf(
+            tmp_path / "mesh_mask.nc"
+        )
+        return {
+            "geo ref dataset": {
+                "path": tmp_path / "geo_ref.nc",
+                "y coord": "gridY",
+                "x coord": "gridX",
+            },
+        }
+
+    @pytest.fixture(name="config")
+    def fixture_config(self):
+        return {
+            "regrid": {
+                "lon min": -123.95,
+                "lon max": -123.85,
+                "lon step": 0.05,
+                "lat min": 49.05,
+                "lat max": 49.15,
+                "lat step": 0.05,
+            }
+        }
+
+    @pytest.fixture(autouse=True)
+    def fixture_clear_caches(self):
+        regrid.clear_cache()
+        mesh_geometry.clear_cache()
+        yield
+        regrid.clear_cache()
+        mesh_geometry.clear_cache()
+
+    def test_resolve_regrid(self, config, model_profile, log_output):
+        extract._resolve_regrid(config, model_profile)
+
+        assert config["selection"]["grid y"] == {"y min": 0, "y max": 3}
+        assert config["selection"]["grid x"] == {"x min": 0, "x max": 3}
+        assert log_output.entries[-1]["log_level"] == "info"
+        assert log_output.entries[-1]["event"] == "resolved regrid to grid indices"
+
+    def test_mesh_mask(self, config, model_profile, tmp_path, log_output):
+        config["regrid"]["mesh mask"] = tmp_path / "mesh_mask.nc"
+
+        extract._resolve_regrid(config, model_profile)
+        weights, _, _ = extract._load_regrid_weights(config, model_profile)
+
+        # The land grid point at y=2, x=1 has zero weight
+        land_index = (2 - 0) * 3 + (1 - 0)
+        assert weights["weights"][weights["indices"] == land_index].sum() == 0
+
+    @pytest.mark.parametrize(
+        "selection",
+        (
+            {"grid y": {"y min": 1, "y max": 3}},
+            {"lon lat point": {"lon": -123.9, "lat": 49.1}},
+            {"boxes": {}},
+        ),
+    )
+    def test_horizontal_selection_conflict(
+        self, selection, config, model_profile, log_output
+    ):
+        config["selection"] = selection
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_regrid(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert (
+            log_output.entries[-1]["event"]
+            == "regrid can't be combined with horizontal selections"
+        )
+
+    def test_space_reduction(self, config, model_profile, log_output):
+        config["reduce"] = {"space": {"method": "mean"}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_regrid(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[-1]["event"]
+            == "space and regions reductions of regridded datasets are not supported"
+        )
+
+    def test_outside_grid(self, config, model_profile, log_output):
+        config["regrid"].update({"lon min": -126.0, "lon max": -125.9})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_regrid(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["event"] == "regrid weights calculation failed"
+        assert log_output.entries[-1]["reason"] == (
+            "regular grid is outside of the model grid"
+        )
+
+    def test_regrid(self, config, model_profile, log_output):
+        model_profile.update(
+            {
+                "time coord": {"name": "time_counter"},
+                "y coord": {"name": "y"},
+                "x coord": {"name": "x"},
+            }
+        )
+        config["extracted dataset"] = {}
+        extract._resolve_regrid(config, model_profile)
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "gridY": numpy.arange(3),
+            "gridX": numpy.arange(3),
+        }
+        lons = numpy.broadcast_to(-124.0 + 0.1 * numpy.arange(3), (2, 3, 3))
+        extracted_ds = xarray.Dataset(
+            coords=coords,
+            data_vars={
+                "lon_field": xarray.DataArray(
+                    data=dask.array.from_array(lons, chunks=(1, 3, 3)),
+                    coords=coords,
+                    attrs={"units": "degrees_east"},
+                ),
+                "time_series": ("time", numpy.arange(2)),
+            },
+            attrs={"name": "test_20150401_20150402"},
+        )
+
+        regridded_ds = extract._regrid(extracted_ds, config, model_profile)
+
+        assert regridded_ds.lon_field.dims == ("time", "latitude", "longitude")
+        assert isinstance(regridded_ds.lon_field.data, dask.array.Array)
+        numpy.testing.assert_allclose(
+            regridded_ds.lon_field.isel(time=0),
+            [[-123.95, -123.9, -123.85]] * 3,
+        )
+        numpy.testing.assert_allclose(regridded_ds.latitude, [49.05, 49.1, 49.15])
+        assert "gridY" not in regridded_ds.coords
+        assert regridded_ds.time_series.dims == ("time",)
+        assert regridded_ds.attrs["name"] == "test_20150401_20150402"
+        assert log_output.entries[-1]["event"] == "regridding variables"
+
+
+class TestResolveBoxSelections:
+    """Unit tests for _resolve_box_selections() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", os.fspath(tmp_path / "cache"))
+        lons, lats = numpy.meshgrid(
+            -124.0 + 0.1 * numpy.arange(3), 49.0 + 0.1 * numpy.arange(4)
+        )
+        xarray.Dataset(
+            {
+                "longitude": (("gridY", "gridX"), lons),
+                "latitude": (("gridY", "gridX"), lats),
+            }
+        ).to_netcdf(tmp_path / "geo_ref.nc")
+        return {
+            "geo ref dataset": {
+                "path": tmp_path / "geo_ref.nc",
+                "y coord": "gridY",
+                "x coord": "gridX",
+            },
+        }
+
+    def test_grid_boxes(self, model_profile, log_output):
+        config = {
+            "selection": {
+                "boxes": {
+                    "north": {
+                        "grid y": {"y min": 2, "y max": 4},
+                        "grid x": {"x min": 1, "x max": 3},
+                    },
+                    "south": {
+                        "grid y": {"y max": 1},
+                        "grid x": {"x min": 0, "x max": 2},
+                    },
+                }
+            }
+        }
+
+        extract._resolve_box_selections(config, model_profile)
+
+        assert config["selection"]["grid y"] == {"y min": 0, "y max": 4}
+        assert config["selection"]["grid x"] == {"x min": 0, "x max": 3}
+        assert log_output.entries[-1]["event"] == (
+            "resolved box selections to grid indices"
+        )
+        assert log_output.entries[-1]["boxes"] == ["north", "south"]
+
+    def test_lon_lat_box(self, model_profile, log_output):
+        config = {
+            "selection": {
+                "boxes": {
+                    "mooring": {
+                        "lon lat box": {
+                            "lon min": -123.95,
+                            "lon max": -123.75,
+                            "lat min": 49.05,
+                            "lat max": 49.25,
+                        }
+                    },
+                    "corner": {
+                        "grid y": {"y min": 0, "y max": 1},
+                        "grid x": {"x min": 0, "x max": 1},
+                    },
+                }
+            }
+        }
+
+        extract._resolve_box_selections(config, model_profile)
+
+        boxes = config["selection"]["boxes"]
+        assert boxes["mooring"]["grid y"] == {"y min": 1, "y max": 3}
+        assert boxes["mooring"]["grid x"] == {"x min": 1, "x max": 3}
+        assert config["selection"]["grid y"] == {"y min": 0, "y max": 3}
+        assert config["selection"]["grid x"] == {"x min": 0, "x max": 3}
+
+    def test_other_horizontal_selection(self, model_profile, log_output):
+        config = {
+            "selection": {
+                "boxes": {
+                    "corner": {
+                        "grid y": {"y min": 0, "y max": 1},
+                        "grid x": {"x min": 0, "x max": 1},
+                    }
+                },
+                "grid y": {"y min": 0, "y max": 2},
+            }
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_box_selections(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == (
+            "boxes selection can't be combined with other horizontal selections"
+        )
+
+    def test_incomplete_box(self, model_profile, log_output):
+        config = {
+            "selection": {"boxes": {"corner": {"grid y": {"y min": 0, "y max": 1}}}}
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_box_selections(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == (
+            "box requires grid y and grid x index ranges, or a lon lat box"
+        )
+        assert log_output.entries[0]["box"] == "corner"
+
+
+class TestResolveResolution:
+    """Unit tests for _resolve_resolution() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {
+            "chunk size": {"time": 24, "depth": 40, "y": 898, "x": 398},
+            "overview pyramid": {"path": "/results/pyramid/", "levels": [2, 4, 8]},
+            "results archive": {"path": "/results/SalishSea/nowcast-green.202111/"},
+        }
+
+    def test_full_resolution(self, model_profile, log_output):
+        config = {"resolution": "full"}
+
+        overview_model_profile = extract._resolve_resolution(config, model_profile)
+
+        assert overview_model_profile is model_profile
+        assert log_output.entries == []
+
+    def test_overview_resolution(self, model_profile, log_output):
+        selection = {
+            "grid y": {"y min": 10, "y max": 21},
+            "grid x": {"x max": 12},
+        }
+        config = {"resolution": "overview-4", "selection": selection}
+
+        overview_model_profile = extract._resolve_resolution(config, model_profile)
+
+        assert overview_model_profile["results archive"]["path"] == os.fspath(
+            Path("/results/pyramid/overview-4")
+        )
+        assert overview_model_profile["chunk size"] == {
+            "time": 24,
+            "depth": 40,
+            "y": 225,
+            "x": 100,
+        }
+        assert model_profile["chunk size"]["y"] == 898
+        assert config["selection"] == {
+            "grid y": {"y min": 2, "y max": 6},
+            "grid x": {"x max": 3},
+        }
+        assert selection == {
+            "grid y": {"y min": 10, "y max": 21},
+            "grid x": {"x max": 12},
+        }
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["resolution"] == "overview-4"
+        assert log_output.entries[0]["event"] == "reading overview pyramid level"
+
+    @pytest.mark.parametrize(
+        "resolution, expected",
+        (
+            ("coarse", "unknown resolution"),
+            ("overview-3", "resolution is not an overview pyramid level"),
+        ),
+    )
+    def test_exit_when_bad_resolution(
+        self, resolution, expected, model_profile, log_output
+    ):
+        config = {"resolution": resolution}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_resolution(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["resolution"] == resolution
+        assert log_output.entries[0]["event"] == expected
+
+    def test_exit_when_no_overview_pyramid(self, model_profile, log_output):
+        config = {"resolution": "overview-2"}
+        del model_profile["overview pyramid"]
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_resolution(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == "model profile has no overview pyramid"
+
+    def test_exit_when_full_resolution_stages(self, model_profile, log_output):
+        config = {
+            "resolution": "overview-2",
+            "selection": {"transect": {}},
+            "reduce": {"depth": {}},
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_resolution(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["stanzas"] == ["reduce", "transect"]
+
+    @pytest.mark.parametrize(
+        "selection, expected",
+        (
+            ({"grid y": {"y interval": 2}}, {"y interval": 2}),
+            ({"grid x": {"x min": 4, "x interval": 3}}, {"x interval": 3}),
+        ),
+    )
+    def test_exit_when_grid_interval(
+        self, selection, expected, model_profile, log_output
+    ):
+        config = {"resolution": "overview-2", "selection": selection}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_resolution(config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[0]["event"]
+            == "grid y/x intervals can't be combined with overview resolutions"
+        )
+        assert log_output.entries[0]["intervals"] == expected
+
+
+class TestResolveMonthAvgSource:
+    """Unit tests for _resolve_month_avg_source() function."""
+
+    @pytest.fixture(name="archive")
+    def fixture_archive(self, tmp_path):
+        (tmp_path / "day").mkdir()
+        (tmp_path / "month").mkdir()
+        xarray.Dataset(
+            {
+                "votemper": (
+                    ("time_counter", "deptht", "y", "x"),
+                    numpy.ones((1, 2, 3, 2), dtype=numpy.single),
+                    {"long_name": "Conservative Temperature", "units": "degree_C"},
+                ),
+            },
+            coords={
+                "time_counter": pandas.date_range("2020-02-01 12:00", periods=1),
+                "deptht": [0.5, 1.5],
+            },
+        ).to_netcdf(tmp_path / "day" / "SalishSea_1d_20200201_grid_T.nc")
+        xarray.Dataset(
+            {
+                "votemper": (
+                    ("time", "depth", "gridY", "gridX"),
+                    numpy.full((1, 2, 3, 2), 42, dtype=numpy.single),
+                    {"long_name": "Conservative Temperature", "units": "degree_C"},
+                ),
+            },
+            coords={
+                "time": pandas.date_range("2020-02-15", periods=1),
+                "depth": [0.5, 1.5],
+                "gridY": numpy.arange(3),
+                "gridX": numpy.arange(2),
+            },
+        ).to_netcdf(tmp_path / "month" / "SalishSeaCast_1m_grid_T_20200201_20200229.nc")
+        (tmp_path / "month_avg_profile.yaml").write_text(textwrap.dedent(f"""\
+                description: month-avg model profile for test
+
+                time coord:
+                  name: time
+                y coord:
+                  name: gridY
+                x coord:
+                  name: gridX
+
+                chunk size:
+                  time: 1
+                  depth: 2
+                  y: 3
+                  x: 2
+
+                extraction time origin: 2007-01-01
+
+                results archive:
+                  path: {tmp_path / "month"}
+                  datasets:
+                    month:
+                      days per file: "month"
+                      physics tracers:
+                        file pattern: "SalishSeaCast_1m_grid_T_{{yyyymm01}}_{{yyyymm_end}}.nc"
+                        depth coord: depth
+                """))
+        (tmp_path / "test_profile.yaml").write_text(textwrap.dedent(f"""\
+                description: model profile for test
+
+                time coord:
+                  name: time_counter
+                y coord:
+                  name: y
+                x coord:
+                  name: x
+
+                chunk size:
+                  time: 1
+                  depth: 2
+                  y: 3
+                  x: 2
+
+                extraction time origin: 2007-01-01
+
+                month-avg profile: {tmp_path / "month_avg_profile.yaml"}
+
+                results archive:
+                  path: {tmp_path / "day"}
+                  datasets:
+                    day:
+                      physics tracers:
+                        file pattern: "SalishSea_1d_{{yyyymmdd}}_grid_T.nc"
+                        depth coord: deptht
+                """))
+        return tmp_path
+
+    @staticmethod
+    def _calc_config(tmp_path, **items):
+        return {
+            "dataset": {
+                "model profile": os.fspath(tmp_path / "test_profile.yaml"),
+                "time base": "day",
+                "variables group": "physics tracers",
+            },
+            "start date": arrow.get("2020-02-01").date(),
+            "end date": arrow.get("2020-02-29").date(),
+            "extract variables": ["votemper"],
+            "resample": {"time interval": "1M"},
+            "extracted dataset": {},
+            **items,
+        }
+
+    def test_month_avg_source(self, archive, log_output):
+        config = self._calc_config(archive)
+        model_profile = extract._load_model_profile(archive / "test_profile.yaml")
+
+        source_profile = extract._resolve_month_avg_source(config, model_profile)
+
+        assert source_profile["time coord"]["name"] == "time"
+        assert config["dataset"] == {
+            "model profile": os.fspath(archive / "month_avg_profile.yaml"),
+            "time base": "month",
+            "variables group": "physics tracers",
+        }
+        assert log_output.entries[-1]["log_level"] == "info"
+        assert log_output.entries[-1]["event"] == "reading month-avg profile results"
+        assert log_output.entries[-1]["month_avg_profile"] == os.fspath(
+            archive / "month_avg_profile.yaml"
+        )
+
+    @pytest.mark.parametrize(
+        "items",
+        (
+            {"month-avg source": False},
+            {"resample": {"time interval": "1D"}},
+            {"resample": {"time interval": "1M", "aggregation": "max"}},
+            {"start date": arrow.get("2020-02-02").date()},
+            {"end date": arrow.get("2020-02-28").date()},
+            {"reduce": {"depth": {}}},
+            {"extracted dataset": {"use model coords": True}},
+        ),
+    )
+    def test_not_substituted(self, items, archive):
+        config = self._calc_config(archive, **items)
+        model_profile = extract._load_model_profile(archive / "test_profile.yaml")
+
+        source_profile = extract._resolve_month_avg_source(config, model_profile)
+
+        assert source_profile is model_profile
+        assert config["dataset"]["time base"] == "day"
+
+    def test_month_avg_files_missing(self, archive, log_output):
+        config = self._calc_config(
+            archive,
+            **{
+                "start date": arrow.get("2020-02-01").date(),
+                "end date": arrow.get("2020-03-31").date(),
+            },
+        )
+        model_profile = extract._load_model_profile(archive / "test_profile.yaml")
+
+        source_profile = extract._resolve_month_avg_source(config, model_profile)
+
+        assert source_profile is model_profile
+        assert log_output.entries[-1]["log_level"] == "warning"
+        assert log_output.entries[-1]["n_missing_ds_paths"] == 1
+
+    @pytest.mark.parametrize(
+        "month_avg_votemper, expected",
+        (
+            ({"name": "thetao"}, {"votemper": "missing"}),
+            (
+                {"isel": {"gridY": slice(0, 2)}},
+                {"votemper": "shape (2, 2, 2) instead of (2, 3, 2)"},
+            ),
+        ),
+    )
+    def test_mismatched_month_avg_files(
+        self, month_avg_votemper, expected, archive, log_output
+    ):
+        month_avg_path = (
+            archive / "month" / "SalishSeaCast_1m_grid_T_20200201_20200229.nc"
+        )
+        month_avg_ds = xarray.load_dataset(month_avg_path)
+        if "name" in month_avg_votemper:
+            month_avg_ds = month_avg_ds.rename({"votemper": month_avg_votemper["name"]})
+        else:
+            month_avg_ds = month_avg_ds.isel(month_avg_votemper["isel"])
+        month_avg_ds.to_netcdf(month_avg_path)
+        config = self._calc_config(archive)
+        model_profile = extract._load_model_profile(archive / "test_profile.yaml")
+
+        source_profile = extract._resolve_month_avg_source(config, model_profile)
+
+        assert source_profile is model_profile
+        assert config["dataset"]["time base"] == "day"
+        assert log_output.entries[-1]["log_level"] == "warning"
+        assert log_output.entries[-1]["mismatches"] == expected
+
+    def test_cli_extract_reads_month_avg_files(self, archive):
+        config_yaml = archive / "extract.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {archive / "test_profile.yaml"}
+                  time base: day
+                  variables group: physics tracers
+
+                dask cluster: unit_test_cluster.yaml
+
+                start date: 2020-02-01
+                end date: 2020-02-29
+
+                extract variables: [votemper]
+
+                resample:
+                  time interval: 1M
+
+                extracted dataset:
+                  name: votemper_month
+                  description: test extraction
+                  dest dir: {archive}
+                """))
+
+        # Only the 2020-02-01 day file exists, so the extraction can only succeed by
+        # reading the month-averaged file
+        extract.cli_extract(config_yaml, "", "")
+
+        with xarray.open_dataset(
+            archive / "votemper_month_20200201_20200229.nc"
+        ) as extracted_ds:
+            numpy.testing.assert_array_equal(extracted_ds.votemper, 42)
+            numpy.testing.assert_array_equal(extracted_ds.time.dt.month, [2])
+
+
+class TestResolveAggregateCache:
+    """Unit tests for _resolve_aggregate_cache() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {"aggregate cache": {"path": "/results/aggregates/"}}
+
+    @pytest.mark.parametrize(
+        "time_base, stage, expected",
+        (
+            ("hour", {"resample": {"time interval": "1M"}}, ("month", "day")),
+            ("day", {"resample": {"time interval": "1M"}}, ("month",)),
+            ("hour", {"resample": {"time interval": "1D"}}, ("day",)),
+            (
+                "hour",
+                {"resample": {"time interval": "1M", "aggregation": "max"}},
+                ("month", "day"),
+            ),
+            ("hour", {"climatology": {"group by": "month"}}, ("day",)),
+            (
+                "hour",
+                {"climatology": {"group by": "month", "aggregation": "min"}},
+                ("month", "day"),
+            ),
+        ),
+    )
+    def test_cache_levels(self, time_base, stage, expected, model_profile, log_output):
+        config = {"dataset": {"time base": time_base}, **stage}
+
+        cache_levels = extract._resolve_aggregate_cache(config, model_profile)
+
+        assert cache_levels == expected
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "using aggregate cache"
+
+    @pytest.mark.parametrize(
+        "time_base, stage",
+        (
+            ("day", {"resample": {"time interval": "1D"}}),
+            ("month", {"resample": {"time interval": "1M"}}),
+            ("hour", {"resample": {"time interval": "7D"}}),
+            ("hour", {"resample": {"time interval": "1M", "aggregation": "median"}}),
+            ("day", {"climatology": {"group by": "month"}}),
+        ),
+    )
+    def test_unanswerable_stages(self, time_base, stage, model_profile, log_output):
+        config = {"dataset": {"time base": time_base}, **stage}
+
+        cache_levels = extract._resolve_aggregate_cache(config, model_profile)
+
+        assert cache_levels == ()
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert (
+            log_output.entries[0]["event"]
+            == "aggregate cache can't be used for extraction"
+        )
+
+    def test_stages_before_time_aggregation(self, model_profile, log_output):
+        config = {
+            "dataset": {"time base": "hour"},
+            "resample": {"time interval": "1M"},
+            "selection": {"depths": {}, "time interval": 2, "months": [6]},
+            "derived variables": {},
+        }
+
+        cache_levels = extract._resolve_aggregate_cache(config, model_profile)
+
+        assert cache_levels == ()
+        assert log_output.entries[0]["stanzas"] == [
+            "depths",
+            "derived variables",
+            "months",
+            "time interval",
+        ]
+
+    @pytest.mark.parametrize(
+        "config",
+        (
+            {"resample": {"time interval": "1M"}, "aggregate cache": False},
+            {"dataset": {"time base": "hour"}},
+        ),
+    )
+    def test_cache_not_used(self, config, model_profile, log_output):
+        cache_levels = extract._resolve_aggregate_cache(config, model_profile)
+
+        assert cache_levels == ()
+        assert log_output.entries == []
+
+    def test_no_aggregate_cache(self, log_output):
+        config = {"resample": {"time interval": "1M"}}
+
+        cache_levels = extract._resolve_aggregate_cache(config, {})
+
+        assert cache_levels == ()
+        assert log_output.entries == []
+
+
+class TestResolveTiles:
+    """Unit tests for _resolve_tiles() function."""
+
+    def test_tiles(self, log_output):
+        config = {
+            "selection": {"grid y": {"y interval": 2}},
+            "tiles": {"y size": 100, "x size": 50},
+        }
+
+        extract._resolve_tiles(config)
+
+        assert log_output.entries == []
+
+    @pytest.mark.parametrize(
+        "selection",
+        (
+            {"boxes": {"north": {}}},
+            {"lon lat point": {"lon": -123.5, "lat": 49}},
+            {"transect": {"waypoints": []}},
+        ),
+    )
+    def test_exit_when_other_selections(self, selection, log_output):
+        config = {"selection": selection, "tiles": {"y size": 100, "x size": 50}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_tiles(config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["selections"] == list(selection)
+        expected = (
+            "tiles can't be combined with boxes, lon lat point, or transect selections"
+        )
+        assert log_output.entries[0]["event"] == expected
+
+    def test_exit_when_regrid(self, log_output):
+        config = {"regrid": {}, "tiles": {"y size": 100, "x size": 50}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_tiles(config)
+
+        assert exc_info.value.code == 2
+        expected = "tiled extractions of regridded datasets are not supported"
+        assert log_output.entries[0]["event"] == expected
+
+    def test_exit_when_space_reduction(self, log_output):
+        config = {"reduce": {"space": {}}, "tiles": {"y size": 100, "x size": 50}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_tiles(config)
+
+        assert exc_info.value.code == 2
+        expected = "space and regions reductions of tiled datasets are not supported"
+        assert log_output.entries[0]["event"] == expected
+
+    @pytest.mark.parametrize(
+        "tiles, selection",
+        (
+            ({"x size": 50}, {}),
+            ({"y size": 0, "x size": 50}, {}),
+            ({"y size": 100, "x size": 50}, {"grid x": {"x interval": 3}}),
+        ),
+    )
+    def test_exit_when_bad_tile_size(self, tiles, selection, log_output):
+        config = {"selection": selection, "tiles": tiles}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._resolve_tiles(config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        expected = "tile sizes must be positive multiples of the selection intervals"
+        assert log_output.entries[0]["event"] == expected
+
+
+class TestCalcTileConfigs:
+    """Unit tests for _calc_tile_configs() function."""
+
+    @pytest.fixture(name="source_ds")
+    def fixture_source_ds(self):
+        return xarray.Dataset(coords={"y": numpy.arange(10), "x": numpy.arange(5)})
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {"y coord": {"name": "y"}, "x coord": {"name": "x"}}
+
+    def test_full_grid(self, source_ds, model_profile, log_output):
+        config = {
+            "tiles": {"y size": 4, "x size": 5},
+            "extracted dataset": {"name": "test"},
+        }
+
+        tile_configs = extract._calc_tile_configs(source_ds, config, model_profile)
+
+        assert list(tile_configs) == ["tile_y00_x00", "tile_y01_x00", "tile_y02_x00"]
+        last_tile = tile_configs["tile_y02_x00"]
+        assert last_tile["selection"] == {
+            "grid y": {"y min": 8, "y max": 10},
+            "grid x": {"x min": 0, "x max": 5},
+        }
+        assert last_tile["extracted dataset"] == {"name": "test_tile_y02_x00"}
+        assert "tiles" not in last_tile
+        assert config["extracted dataset"] == {"name": "test"}
+        assert log_output.entries[0]["n_tiles"] == 3
+        assert log_output.entries[0]["n_rows"] == 3
+        assert log_output.entries[0]["n_cols"] == 1
+        assert log_output.entries[0]["event"] == "calculated tiles"
+
+    def test_grid_selection(self, source_ds, model_profile):
+        config = {
+            "selection": {
+                "depth": {"depth max": 10},
+                "grid y": {"y min": 2, "y max": 8, "y interval": 2},
+                "grid x": {"x min": 1, "x max": 20},
+            },
+            "tiles": {"y size": 4, "x size": 2},
+            "extracted dataset": {"name": "test"},
+        }
+
+        tile_configs = extract._calc_tile_configs(source_ds, config, model_profile)
+
+        assert list(tile_configs) == [
+            "tile_y00_x00",
+            "tile_y00_x01",
+            "tile_y01_x00",
+            "tile_y01_x01",
+        ]
+        assert tile_configs["tile_y01_x01"]["selection"] == {
+            "depth": {"depth max": 10},
+            "grid y": {"y min": 6, "y max": 8, "y interval": 2},
+            "grid x": {"x min": 3, "x max": 5},
+        }
+
+
+class TestCalcDsPaths:
+    """Unit tests for calc_ds_paths() function."""
+
+    def test_SalishSeaCast_ds_paths_day_per_file(self, log_output):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 2),
+        }
+        model_profile = {
+            "results archive": {
+                "path": "/results/SalishSea/nowcast-green.201812/",
+                "datasets": {
+                    "day": {
+                        "biology": {
+                            "file pattern": "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc"
+                        },
+                    },
+                },
+            },
+        }
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        expected_paths = [
+            Path(
+                "/results/SalishSea/nowcast-green.201812/01jan15/SalishSea_1d_20150101_20150101_ptrc_T.nc"
+            ),
+            Path(
+                "/results/SalishSea/nowcast-green.201812/02jan15/SalishSea_1d_20150102_20150102_ptrc_T.nc"
+            ),
+        ]
+        assert ds_paths == expected_paths
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        expected = os.fspath(Path(model_profile["results archive"]["path"]))
+        assert log_output.entries[0]["results_archive_path"] == expected
+        assert log_output.entries[0]["time_base"] == "day"
+        assert log_output.entries[0]["vars_group"] == "biology"
+        assert (
+            log_output.entries[0]["nc_files_pattern"]
+            == "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc"
+        )
+        assert log_output.entries[0]["days_per_file"] == 1
+        assert log_output.entries[0]["start_date"] == "2015-01-01"
+        assert log_output.entries[0]["end_date"] == "2015-01-02"
+        assert log_output.entries[0]["n_datasets"] == 2
+        assert log_output.entries[0]["event"] == "collected dataset paths"
+
+    @pytest.mark.parametrize(
+        "selection, expected_days",
+        (
+            ({"months": [2]}, [32]),
+            ({"days of week": ["Sat", "Sun"]}, [3, 4, 10, 11, 17, 18, 24, 25, 31, 32]),
+            (
+                {"dates": [datetime.date(2015, 1, 2), datetime.date(2015, 2, 1)]},
+                [2, 32],
+            ),
+            ({"months": [1], "days of week": ["Fri"]}, [2, 9, 16, 23, 30]),
+            ({"hours": [12]}, list(range(1, 33))),
+        ),
+    )
+    def test_time_filters_prune_day_files(self, selection, expected_days, log_output):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 2, 1),
+            "selection": selection,
+        }
+        model_profile = {
+            "results archive": {
+                "path": "/results/SalishSea/nowcast-green.201812/",
+                "datasets": {
+                    "day": {
+                        "biology": {
+                            "file pattern": "SalishSea_1d_{yyyymmdd}_ptrc_T.nc"
+                        },
+                    },
+                },
+            },
+        }
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        expected_paths = [
+            Path("/results/SalishSea/nowcast-green.201812/").joinpath(
+                arrow.get("2014-12-31")
+                .shift(days=+day)
+                .format("[SalishSea_1d_]YYYYMMDD[_ptrc_T.nc]")
+            )
+            for day in expected_days
+        ]
+        assert ds_paths == expected_paths
+        assert log_output.entries[0]["n_datasets"] == len(expected_days)
+        assert log_output.entries[0]["n_pruned_datasets"] == 32 - len(expected_days)
+
+    @pytest.mark.parametrize(
+        "selection, expected_months",
+        (
+            ({"months": [6, 7, 8]}, [6, 7, 8]),
+            ({"days of week": ["Mon"]}, [5, 6, 7, 8, 9]),
+            ({"dates": [datetime.date(2015, 7, 14)]}, [7]),
+        ),
+    )
+    def test_time_filters_prune_month_files(self, selection, expected_months):
+        extract_config = {
+            "dataset": {
+                "time base": "month",
+                "variables group": "biology",
+            },
+            "start date": datetime.date(2015, 5, 1),
+            "end date": datetime.date(2015, 9, 30),
+            "selection": selection,
+        }
+        model_profile = {
+            "results archive": {
+                "path": "/results/SalishSea/month-avg.201905/",
+                "datasets": {
+                    "month": {
+                        "days per file": "month",
+                        "biology": {
+                            "file pattern": "SalishSeaCast_1m_ptrc_T_{yyyymm01}_{yyyymm_end}.nc"
+                        },
+                    },
+                },
+            },
+        }
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        assert [ds_path.name[24:30] for ds_path in ds_paths] == [
+            f"2015{month:02d}" for month in expected_months
+        ]
+
+    def test_discover_files(self, tmp_path, log_output):
+        for day in (1, 2, 3, 6):
+            (tmp_path / f"ops_y2015m01d{day:02d}_v2.nc").touch()
+        extract_config = {
+            "dataset": {"time base": "hour", "variables group": "surface fields"},
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 7),
+        }
+        model_profile = {
+            "results archive": {
+                "path": os.fspath(tmp_path),
+                "datasets": {
+                    "hour": {
+                        "surface fields": {
+                            "file pattern": "ops_{nemo_yyyymmdd}_v*.nc",
+                            "discover files": True,
+                        },
+                    },
+                },
+            },
+        }
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        assert ds_paths == [
+            tmp_path / f"ops_y2015m01d{day:02d}_v2.nc" for day in (1, 2, 3, 6)
+        ]
+        assert log_output.entries[0]["log_level"] == "warning"
+        assert (
+            log_output.entries[0]["event"]
+            == "dataset files missing from results archive"
+        )
+        assert log_output.entries[0]["n_missing_datasets"] == 3
+        assert log_output.entries[0]["gaps"] == [
+            "2015-01-04 to 2015-01-05",
+            "2015-01-07",
+        ]
+        assert log_output.entries[1]["n_datasets"] == 4
+
+    def test_discover_no_files(self, tmp_path, log_output):
+        extract_config = {
+            "dataset": {"time base": "hour", "variables group": "surface fields"},
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 7),
+        }
+        model_profile = {
+            "results archive": {
+                "path": os.fspath(tmp_path),
+                "datasets": {
+                    "hour": {
+                        "surface fields": {
+                            "file pattern": "ops_{nemo_yyyymmdd}.nc",
+                            "discover files": True,
+                        },
+                    },
+                },
+            },
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract.calc_ds_paths(extract_config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert (
+            log_output.entries[0]["event"]
+            == "no dataset files found in results archive"
+        )
+
+    def test_unsupported_file_pattern_placeholder(self, log_output):
+        extract_config = {
+            "dataset": {"time base": "hour", "variables group": "surface fields"},
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 7),
+        }
+        model_profile = {
+            "results archive": {
+                "path": "/results/forcing/atmospheric/GEM2.5/operational/",
+                "datasets": {
+                    "hour": {
+                        "surface fields": {"file pattern": "ops_{yyyy_mm_dd}.nc"},
+                    },
+                },
+            },
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract.calc_ds_paths(extract_config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == "invalid model profile file pattern"
+
+    def test_SalishSeaCast_ds_paths_month_per_file(self, log_output):
+        extract_config = {
+            "dataset": {
+                "time base": "month",
+                "variables group": "biology",
+            },
+            "start date": datetime.date(2023, 11, 1),
+            "end date": datetime.date(2023, 12, 31),
+        }
+        model_profile = {
+            "results archive": {
+                "path": "/results2/SalishSea/month-avg.202111/",
+                "datasets": {
+                    "month": {
+                        "days per file": "month",
+                        "biology": {
+                            "file pattern": "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc"
+                        },
+                    },
+                },
+            },
+        }
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        expected_paths = [
+            Path(
+                "/results2/SalishSea/month-avg.202111/SalishSeaCast_1m_biol_T_20231101_20231130.nc"
+            ),
+            Path(
+                "/results2/SalishSea/month-avg.202111/SalishSeaCast_1m_biol_T_20231201_20231231.nc"
+            ),
+        ]
+        assert ds_paths == expected_paths
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        expected = os.fspath(Path(model_profile["results archive"]["path"]))
+        assert log_output.entries[0]["results_archive_path"] == expected
+        assert log_output.entries[0]["time_base"] == "month"
+        assert log_output.entries[0]["vars_group"] == "biology"
+        assert (
+            log_output.entries[0]["nc_files_pattern"]
+            == "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc"
+        )
+        assert log_output.entries[0]["days_per_file"] == "month"
+        assert log_output.entries[0]["start_date"] == "2023-11-01"
+        assert log_output.entries[0]["end_date"] == "2023-12-31"
+        assert log_output.entries[0]["n_datasets"] == 2
+        assert log_output.entries[0]["event"] == "collected dataset paths"
+
+    def test_HRDPS_ds_paths(self, log_output):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 2),
+        }
+        model_profile = {
+            "results archive": {
+                "path": "/results/forcing/atmospheric/GEM2.5/operational/",
+                "datasets": {
+                    "hour": {
+                        "surface fields": {"file pattern": "ops_{nemo_yyyymmdd}.nc"},
+                    },
+                },
+            },
+        }
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        expected_paths = [
+            Path("/results/forcing/atmospheric/GEM2.5/operational/ops_y2015m01d01.nc"),
+            Path("/results/forcing/atmospheric/GEM2.5/operational/ops_y2015m01d02.nc"),
+        ]
+        assert ds_paths == expected_paths
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        expected = os.fspath(Path(model_profile["results archive"]["path"]))
+        assert log_output.entries[0]["results_archive_path"] == expected
+        assert log_output.entries[0]["time_base"] == "hour"
+        assert log_output.entries[0]["vars_group"] == "surface fields"
+        assert log_output.entries[0]["nc_files_pattern"] == "ops_{nemo_yyyymmdd}.nc"
+        assert log_output.entries[0]["days_per_file"] == 1
+        assert log_output.entries[0]["start_date"] == "2015-01-01"
+        assert log_output.entries[0]["end_date"] == "2015-01-02"
+        assert log_output.entries[0]["n_datasets"] == 2
+        assert log_output.entries[0]["event"] == "collected dataset paths"
+
+    @staticmethod
+    def _hrdps_model_profiles(tmp_path):
+        (tmp_path / "gemlam").mkdir()
+        (tmp_path / "operational").mkdir()
+        operational_profile = {
+            "valid dates": {"start date": datetime.date(2014, 9, 12)},
+            "results archive": {
+                "path": os.fspath(tmp_path / "operational"),
+                "datasets": {
+                    "hour": {
+                        "surface fields": {"file pattern": "ops_{nemo_yyyymmdd}.nc"},
+                    },
+                },
+            },
+        }
+        operational_yaml = tmp_path / "operational.yaml"
+        operational_yaml.write_text(yaml.safe_dump(operational_profile))
+        gemlam_profile = {
+            "valid dates": {
+                "start date": datetime.date(2011, 9, 22),
+                "end date": datetime.date(2014, 11, 18),
+            },
+            "successor profile": os.fspath(operational_yaml),
+            "results archive": {
+                "path": os.fspath(tmp_path / "gemlam"),
+                "datasets": {
+                    "hour": {
+                        "surface fields": {"file pattern": "gemlam_{nemo_yyyymmdd}.nc"},
+                    },
+                },
+            },
+        }
+        return gemlam_profile
+
+    def test_stitched_successor_ds_paths(self, log_output, tmp_path):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2014, 11, 17),
+            "end date": datetime.date(2014, 11, 20),
+        }
+        model_profile = self._hrdps_model_profiles(tmp_path)
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        expected_paths = [
+            tmp_path / "gemlam" / "gemlam_y2014m11d17.nc",
+            tmp_path / "gemlam" / "gemlam_y2014m11d18.nc",
+            tmp_path / "operational" / "ops_y2014m11d19.nc",
+            tmp_path / "operational" / "ops_y2014m11d20.nc",
+        ]
+        assert ds_paths == expected_paths
+
+        assert log_output.entries[-1]["log_level"] == "info"
+        assert log_output.entries[-1]["successor_profile"] == os.fspath(
+            tmp_path / "operational.yaml"
+        )
+        assert log_output.entries[-1]["successor_start_date"] == "2014-11-19"
+        assert log_output.entries[-1]["n_datasets"] == 2
+        assert log_output.entries[-1]["n_successor_datasets"] == 2
+        assert (
+            log_output.entries[-1]["event"]
+            == "stitched successor model profile dataset paths"
+        )
+
+    def test_successor_only_ds_paths(self, log_output, tmp_path):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 2),
+        }
+        model_profile = self._hrdps_model_profiles(tmp_path)
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        expected_paths = [
+            tmp_path / "operational" / "ops_y2015m01d01.nc",
+            tmp_path / "operational" / "ops_y2015m01d02.nc",
+        ]
+        assert ds_paths == expected_paths
+        assert log_output.entries[-1]["successor_start_date"] == "2015-01-01"
+        assert log_output.entries[-1]["n_datasets"] == 0
+
+    def test_HRDPS_model_profiles_stitched(self, log_output, monkeypatch):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2011, 9, 21),
+            "end date": datetime.date(2014, 11, 19),
+        }
+        model_profile = yaml.safe_load(
+            (
+                Path(__file__).parent.parent.parent
+                / "model_profiles"
+                / "HRDPS-2.5km-GEMLAM-pre22sep11.yaml"
+            ).read_text()
+        )
+
+        monkeypatch.setattr(extract.Path, "exists", lambda path: True)
+
+        ds_paths = extract.calc_ds_paths(extract_config, model_profile)
+
+        gemlam = Path("/results/forcing/atmospheric/GEM2.5/gemlam/")
+        operational = Path("/results/forcing/atmospheric/GEM2.5/operational/")
+        assert (
+            len(ds_paths)
+            == (arrow.get("2014-11-19") - arrow.get("2011-09-21")).days + 1
+        )
+        assert ds_paths[0] == gemlam / "gemlam_y2011m09d21.nc"
+        assert ds_paths[1] == gemlam / "gemlam_y2011m09d22.nc"
+        assert ds_paths[-2] == gemlam / "gemlam_y2014m11d18.nc"
+        assert ds_paths[-1] == operational / "ops_y2014m11d19.nc"
+
+    def test_exit_when_start_before_valid_dates(self, log_output, tmp_path):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2011, 9, 21),
+            "end date": datetime.date(2011, 9, 22),
+        }
+        model_profile = self._hrdps_model_profiles(tmp_path)
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract.calc_ds_paths(extract_config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["start_date"] == "2011-09-21"
+        assert log_output.entries[0]["valid_start_date"] == "2011-09-22"
+        assert (
+            log_output.entries[0]["event"]
+            == "extraction start date is before model profile valid dates"
+        )
+
+    def test_exit_when_end_after_valid_dates_without_successor(
+        self, log_output, tmp_path
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2014, 11, 18),
+            "end date": datetime.date(2014, 11, 19),
+        }
+        model_profile = self._hrdps_model_profiles(tmp_path)
+        del model_profile["successor profile"]
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract.calc_ds_paths(extract_config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["end_date"] == "2014-11-19"
+        assert log_output.entries[0]["valid_end_date"] == "2014-11-18"
+        assert (
+            log_output.entries[0]["event"]
+            == "extraction end date is after model profile valid dates"
+        )
+
+
+class TestCalcDsChunks:
+    """Unit tests for calc_ds_chunk() function."""
+
+    def test_calc_ds_chunks(self, log_output):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 2),
+        }
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "chunk size": {
+                "time": 1,
+                "depth": 40,
+                "y": 898,
+                "x": 398,
+            },
+            "results archive": {
+                "datasets": {
+                    "day": {
+                        "biology": {"depth coord": "deptht"},
+                    },
+                },
+            },
+        }
+
+        chunk_size = extract.calc_ds_chunk_size(extract_config, model_profile)
+
+        expected = {
+            "time_counter": 1,
+            "deptht": 40,
+            "y": 898,
+            "x": 398,
+        }
+        assert chunk_size == expected
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["chunk_size"] == expected
+        assert log_output.entries[0]["event"] == "chunk size for dataset loading"
+
+    def test_calc_ds_chunks_no_depth(self, log_output):
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 2),
+        }
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "chunk size": {
+                "time": 24,
+                "y": 266,
+                "x": 256,
+            },
+        }
+
+        chunk_size = extract.calc_ds_chunk_size(extract_config, model_profile)
+
+        expected = {
+            "time_counter": 24,
+            "y": 266,
+            "x": 256,
+        }
+        assert chunk_size == expected
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["chunk_size"] == expected
+        assert log_output.entries[0]["event"] == "chunk size for dataset loading"
+
+    def test_model_profile_chunk_size_unchanged(self, log_output):
+        """Test to demonstrate bug whereby model profile chunk size dict was getting changed
+        in the course of calculating the dataset loading chunk size dict.
+        """
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 2),
+        }
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "chunk size": {
+                "time": 1,
+                "depth": 40,
+                "y": 898,
+                "x": 398,
+            },
+            "results archive": {
+                "datasets": {
+                    "day": {
+                        "biology": {"depth coord": "deptht"},
+                    },
+                },
+            },
+        }
+
+        extract.calc_ds_chunk_size(extract_config, model_profile)
+
+        expected = {
+            "time": 1,
+            "depth": 40,
+            "y": 898,
+            "x": 398,
+        }
+        assert model_profile["chunk size"] == expected
+
+
+class TestCreateDataarray:
+    """Unit tests for create_dataarray() function."""
+
+    def test_create_coord_array(self):
+        source_array = xarray.DataArray(
+            name="test source array",
+            data=numpy.arange(43),
+        )
+        attrs = {"foo": "bar"}
+
+        coord = extract.create_dataarray("test", source_array, attrs)
+
+        assert coord.name == "test"
+        assert numpy.array_equal(coord.data, source_array.data)
+        assert numpy.array_equal(coord.coords["test"], source_array.data)
+        assert coord.attrs == attrs
+
+    def test_create_var_array(self):
+        source_array = xarray.DataArray(
+            name="test source array",
+            data=numpy.arange(43),
+        )
+        attrs = {"bar": "foo"}
+        coords = {"time": numpy.arange(43, 0, -1)}
+
+        var = extract.create_dataarray("test", source_array, attrs, coords)
+
+        assert var.name == "test"
+        assert numpy.array_equal(var.data, source_array.data)
+        assert numpy.array_equal(var.coords["time"], coords["time"])
+        assert var.attrs == attrs
+
+
+class TestOpenDataset:
+    """Unit test for open_dataset() function."""
+
+    @pytest.fixture(name="source_dataset", scope="class")
+    def fixture_source_dataset(self):
+        return xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "deptht": numpy.arange(0, 4, 0.5),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "diatoms": xarray.DataArray(
+                    name="diatoms",
+                    data=numpy.ones((4, 8, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "deptht": numpy.arange(0, 4, 0.5),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "standard_name": "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water",
+                        "long_name": "Diatoms Concentration",
+                        "units": "mmol m-3",
+                    },
+                ),
+            },
+        )
+
+    def test_open_dataset(self, source_dataset, log_output, tmp_path):
+        results_archive = tmp_path / "results_archive"
+        results_archive.mkdir()
+        source_dataset.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
+        ds_paths = [results_archive / "test_dataset.nc"]
+        chunk_size = {
+            "time_counter": 4,
+            "deptht": 8,
+            "y": 9,
+            "x": 4,
+        }
+        extract_config = {
+            "extract variables": [
+                "diatoms",
+            ]
+        }
+        ds = extract.open_dataset(ds_paths, chunk_size, extract_config)
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "opened dataset"
+        assert log_output.entries[0]["ds"] == ds
+
+        xarray.testing.assert_equal(ds, source_dataset)
+
+    def test_open_dataset_parallel_read(self, source_dataset, log_output, tmp_path):
+        results_archive = tmp_path / "results_archive"
+        results_archive.mkdir()
+        source_dataset.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
+        ds_paths = [results_archive / "test_dataset.nc"]
+        chunk_size = {
+            "time_counter": 4,
+            "deptht": 8,
+            "y": 9,
+            "x": 4,
+        }
+        extract_config = {
+            "parallel read": True,
+            "extract variables": [
+                "diatoms",
+            ],
+        }
+        ds = extract.open_dataset(ds_paths, chunk_size, extract_config)
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "opened dataset"
+        assert log_output.entries[0]["ds"] == ds
+
+        xarray.testing.assert_equal(ds, source_dataset)
+
+    def test_exit_when_no_dataset_vars(self, source_dataset, log_output, tmp_path):
+        """re: issue #37
+
+        Confirm that processing ends with SystemExit(2) and appropriate error message in log
+        when that conditions that give rise to issue #37
+        (KeyError for variable not in variables group) occur.
+        """
+        results_archive = tmp_path / "results_archive"
+        results_archive.mkdir()
+        source_dataset.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
+        ds_paths = [results_archive / "test_dataset.nc"]
+        chunk_size = {
+            "time_counter": 4,
+            "deptht": 8,
+            "y": 9,
+            "x": 4,
+        }
+        extract_config = {
+            "extract variables": [
+                "nitrate",
+            ]
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract.open_dataset(ds_paths, chunk_size, extract_config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == "no variables in source dataset"
+        assert log_output.entries[0]["extract_vars"] == {"nitrate"}
+        expected = "typo in variable name, or incorrect variables group"
+        assert log_output.entries[0]["possible_reasons"] == expected
+
+    def test_keep_cell_thickness_var_for_reduce_depth(
+        self, source_dataset, log_output, tmp_path
+    ):
+        source_ds = source_dataset.assign(
+            e3t=source_dataset.diatoms.copy().assign_attrs(
+                long_name="T-cell thickness", units="m"
+            )
+        )
+        results_archive = tmp_path / "results_archive"
+        results_archive.mkdir()
+        source_ds.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
+        ds_paths = [results_archive / "test_dataset.nc"]
+        chunk_size = {
+            "time_counter": 4,
+            "deptht": 8,
+            "y": 9,
+            "x": 4,
+        }
+        extract_config = {
+            "extract variables": [
+                "diatoms",
+            ],
+            "reduce": {
+                "depth": {
+                    "aggregation": "mean",
+                },
+            },
+        }
+        ds = extract.open_dataset(ds_paths, chunk_size, extract_config)
+
+        assert set(ds.data_vars) == {"diatoms", "e3t"}
+
+
+class TestOpenStitchedDataset:
+    """Unit test for open_dataset() with the dataset paths of stitched successor model
+    profiles.
+    """
+
+    def test_successor_grid_coords_differ(self, tmp_path):
+        # GEMLAM y/x coordinates are grid indices,
+        # and operational y/x coordinates are metres
+        for profile_dir, ds_date, y, x in (
+            ("gemlam", "y2014m11d18", numpy.arange(3), numpy.arange(4)),
+            (
+                "operational",
+                "y2014m11d19",
+                numpy.arange(3) * 2500.0,
+                numpy.arange(4) * 2500.0,
+            ),
+        ):
+            (tmp_path / profile_dir).mkdir()
+            xarray.Dataset(
+                {
+                    "tair": (
+                        ("time_counter", "y", "x"),
+                        numpy.ones((24, 3, 4), dtype=numpy.single),
+                    )
+                },
+                coords={
+                    "time_counter": pandas.date_range(
+                        ds_date.replace("y", "").replace("m", "-").replace("d", "-"),
+                        periods=24,
+                        freq="h",
+                    ),
+                    "y": y,
+                    "x": x,
+                },
+            ).to_netcdf(
+                tmp_path / profile_dir / f"{profile_dir}_{ds_date}.nc", engine="netcdf4"
+            )
+        common_items = {
+            "time coord": {"name": "time_counter"},
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
+            "chunk size": {"time": 24, "y": 3, "x": 4},
+        }
+        operational_yaml = tmp_path / "operational.yaml"
+        operational_yaml.write_text(
+            yaml.safe_dump(
+                {
+                    **common_items,
+                    "y coord": {"name": "y", "units": "metres"},
+                    "x coord": {"name": "x", "units": "metres"},
+                    "valid dates": {"start date": datetime.date(2014, 9, 12)},
+                    "results archive": {
+                        "path": os.fspath(tmp_path / "operational"),
+                        "datasets": {
+                            "hour": {
+                                "surface fields": {
+                                    "file pattern": "operational_{nemo_yyyymmdd}.nc"
+                                },
+                            },
+                        },
+                    },
+                }
+            )
+        )
+        gemlam_profile = {
+            **common_items,
+            "valid dates": {"end date": datetime.date(2014, 11, 18)},
+            "successor profile": os.fspath(operational_yaml),
+            "results archive": {
+                "path": os.fspath(tmp_path / "gemlam"),
+                "datasets": {
+                    "hour": {
+                        "surface fields": {"file pattern": "gemlam_{nemo_yyyymmdd}.nc"},
+                    },
+                },
+            },
+        }
+        config = {
+            "dataset": {"time base": "hour", "variables group": "surface fields"},
+            "start date": datetime.date(2014, 11, 18),
+            "end date": datetime.date(2014, 11, 19),
+            "extract variables": ["tair"],
+        }
+        ds_paths = extract.calc_ds_paths(config, gemlam_profile)
+        chunk_size = extract.calc_ds_chunk_size(config, gemlam_profile)
+
+        with extract.open_dataset(ds_paths, chunk_size, config, gemlam_profile) as ds:
+            assert ds.tair.sizes == {"time_counter": 48, "y": 3, "x": 4}
+            numpy.testing.assert_array_equal(ds.y, numpy.arange(3))
+            numpy.testing.assert_array_equal(ds.x, numpy.arange(4))
+            assert not ds.tair.isnull().any()
+
+    def test_unstitched_grids_not_relabelled(self, tmp_path):
+        for day, y in ((18, numpy.arange(3)), (19, numpy.arange(1, 4))):
+            xarray.Dataset(
+                {
+                    "tair": (
+                        ("time_counter", "y", "x"),
+                        numpy.ones((1, 3, 4), dtype=numpy.single),
+                    )
+                },
+                coords={
+                    "time_counter": pandas.date_range(f"2014-11-{day}", periods=1),
+                    "y": y,
+                    "x": numpy.arange(4),
+                },
+            ).to_netcdf(tmp_path / f"gemlam_y2014m11d{day}.nc", engine="netcdf4")
+        model_profile = {
+            "time coord": {"name": "time_counter"},
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
+            "chunk size": {"time": 1, "y": 3, "x": 4},
+            "valid dates": {"end date": datetime.date(2014, 11, 30)},
+        }
+        config = {
+            "dataset": {"time base": "day", "variables group": "surface fields"},
+            "start date": datetime.date(2014, 11, 18),
+            "end date": datetime.date(2014, 11, 19),
+            "extract variables": ["tair"],
+        }
+        ds_paths = sorted(tmp_path.glob("gemlam_*.nc"))
+
+        # Files with mismatched grids are combined by their coordinates,
+        # not relabelled with the grid of the 1st file
+        with pytest.raises(ValueError):
+            extract.open_dataset(
+                ds_paths, model_profile["chunk size"], config, model_profile
+            )
+
+
+class TestOpenSynthesizedTimeDataset:
+    """Unit tests for open_dataset() with time coordinates synthesized from dataset
+    file dates.
+    """
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self, tmp_path):
+        return {
+            "time coord": {"name": "time_counter", "synthesize": True},
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
+            "chunk size": {"time": 24, "depth": 2, "y": 3, "x": 2},
+            "results archive": {
+                "path": tmp_path,
+                "datasets": {
+                    "hour": {
+                        "physics tracers": {
+                            "file pattern": "{ddmmmyy}/SalishSea_1h_{yyyymmdd}_grid_T.nc",
+                            "depth coord": "deptht",
+                        },
+                    },
+                    "day": {
+                        "physics tracers": {
+                            "file pattern": "SalishSea_1d_{yyyymmdd}_grid_T.nc",
+                            "depth coord": "deptht",
+                        },
+                    },
+                    "month": {
+                        "days per file": "month",
+                        "physics tracers": {
+                            "file pattern": "SalishSea_1m_{yyyymm01}_grid_T.nc",
+                            "depth coord": "deptht",
+                        },
+                    },
+                },
+            },
+        }
+
+    @staticmethod
+    def _write_ds_file(ds_path, time_counter):
+        ds_path.parent.mkdir(exist_ok=True)
+        xarray.Dataset(
+            {
+                "votemper": (
+                    ("time_counter", "deptht", "y", "x"),
+                    numpy.ones((len(time_counter), 2, 3, 2), dtype=numpy.single),
+                ),
+            },
+            coords={"time_counter": time_counter, "deptht": [0.5, 1.5]},
+        ).to_netcdf(ds_path, engine="netcdf4")
+
+    @staticmethod
+    def _config(time_base, start_date, end_date):
+        return {
+            "dataset": {"time base": time_base, "variables group": "physics tracers"},
+            "start date": start_date,
+            "end date": end_date,
+            "extract variables": ["votemper"],
+        }
+
+    def test_hour_time_base(self, model_profile, log_output, tmp_path):
+        config = self._config("hour", "2015-01-01", "2015-01-02")
+        ds_paths = extract.calc_ds_paths(config, model_profile)
+        for ds_path in ds_paths:
+            # Time values in the files are not read
+            self._write_ds_file(ds_path, numpy.zeros(24))
+        chunk_size = {"time_counter": 24, "deptht": 2, "y": 3, "x": 2}
+
+        ds = extract.open_dataset(ds_paths, chunk_size, config, model_profile)
+
+        expected = pandas.date_range("2015-01-01 00:30", "2015-01-02 23:30", freq="h")
+        pandas.testing.assert_index_equal(
+            ds.indexes["time_counter"], expected, check_names=False
+        )
+        numpy.testing.assert_array_equal(ds.deptht, [0.5, 1.5])
+        assert ds.votemper.sizes == {"time_counter": 48, "deptht": 2, "y": 3, "x": 2}
+        synthesized = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "synthesized time coordinate from dataset file dates"
+        ]
+        assert synthesized[0]["offset"] == "0 days 00:30:00"
+        assert synthesized[0]["static_coords"] == ["deptht"]
+
+    def test_same_as_decoded_time(self, model_profile, tmp_path):
+        config = self._config("day", "2015-01-01", "2015-01-03")
+        ds_paths = extract.calc_ds_paths(config, model_profile)
+        for ds_path in ds_paths:
+            ds_date = ds_path.name.split("_")[2]
+            self._write_ds_file(
+                ds_path, [pandas.Timestamp(ds_date) + pandas.Timedelta("12h")]
+            )
+        chunk_size = {"time_counter": 1, "deptht": 2, "y": 3, "x": 2}
+
+        synthesized_ds = extract.open_dataset(
+            ds_paths, chunk_size, config, model_profile
+        )
+        model_profile["time coord"]["synthesize"] = False
+        decoded_ds = extract.open_dataset(ds_paths, chunk_size, config, model_profile)
+
+        xarray.testing.assert_equal(synthesized_ds, decoded_ds)
+
+    def test_time_offset(self, model_profile, tmp_path):
+        model_profile["time coord"]["offsets"] = {"day": "00:00:00"}
+        config = self._config("day", "2015-01-01", "2015-01-02")
+        ds_paths = extract.calc_ds_paths(config, model_profile)
+        for ds_path in ds_paths:
+            self._write_ds_file(ds_path, numpy.zeros(1))
+        chunk_size = {"time_counter": 1, "deptht": 2, "y": 3, "x": 2}
+
+        ds = extract.open_dataset(ds_paths, chunk_size, config, model_profile)
+
+        numpy.testing.assert_array_equal(
+            ds.time_counter,
+            numpy.array(["2015-01-01", "2015-01-02"], dtype="datetime64[ns]"),
+        )
+
+    def test_time_records_mismatch(self, model_profile, tmp_path):
+        config = self._config("hour", "2015-01-01", "2015-01-01")
+        ds_paths = extract.calc_ds_paths(config, model_profile)
+        self._write_ds_file(ds_paths[0], numpy.zeros(23))
+        chunk_size = {"time_counter": 24, "deptht": 2, "y": 3, "x": 2}
+
+        with pytest.raises(ValueError, match="has 23 time records instead of the 24"):
+            extract.open_dataset(ds_paths, chunk_size, config, model_profile)
+
+
+class TestCalcSynthesizedDsDates:
+    """Unit tests for _calc_synthesized_ds_dates() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {
+            "time coord": {"name": "time_counter", "synthesize": True},
+            "results archive": {
+                "path": "/results/",
+                "datasets": {
+                    "day": {
+                        "biology": {"file pattern": "SalishSea_1d_{yyyymmdd}_ptrc_T.nc"}
+                    },
+                    "month": {
+                        "days per file": "month",
+                        "biology": {
+                            "file pattern": "SalishSea_1m_{yyyymm01}_ptrc_T.nc"
+                        },
+                    },
+                },
+            },
+        }
+
+    def test_calc_synthesized_ds_dates(self, model_profile):
+        config = {
+            "dataset": {"time base": "day", "variables group": "biology"},
+            "start date": "2015-01-01",
+            "end date": "2015-01-02",
+        }
+        ds_paths = [
+            Path("/results/SalishSea_1d_20150101_ptrc_T.nc"),
+            Path("/results/SalishSea_1d_20150102_ptrc_T.nc"),
+        ]
+
+        ds_dates = extract._calc_synthesized_ds_dates(ds_paths, config, model_profile)
+
+        assert ds_dates == {
+            "/results/SalishSea_1d_20150101_ptrc_T.nc": datetime.date(2015, 1, 1),
+            "/results/SalishSea_1d_20150102_ptrc_T.nc": datetime.date(2015, 1, 2),
+        }
+
+    def test_not_synthesized(self, model_profile):
+        model_profile["time coord"] = {"name": "time_counter"}
+        config = {"dataset": {"time base": "day", "variables group": "biology"}}
+        ds_paths = [Path("/results/SalishSea_1d_20150101_ptrc_T.nc")]
+
+        assert (
+            extract._calc_synthesized_ds_dates(ds_paths, config, model_profile) is None
+        )
+
+    def test_no_model_profile(self):
+        config = {"dataset": {"time base": "day", "variables group": "biology"}}
+        ds_paths = [Path("/results/SalishSea_1d_20150101_ptrc_T.nc")]
+
+        assert extract._calc_synthesized_ds_dates(ds_paths, config, None) is None
+
+    def test_month_time_base(self, model_profile, log_output):
+        config = {"dataset": {"time base": "month", "variables group": "biology"}}
+        ds_paths = [Path("/results/SalishSea_1m_20150101_ptrc_T.nc")]
+
+        ds_dates = extract._calc_synthesized_ds_dates(ds_paths, config, model_profile)
+
+        assert ds_dates is None
+        assert log_output.entries[0]["time_base"] == "month"
+
+    def test_successor_profile_paths(self, model_profile, log_output):
+        config = {
+            "dataset": {"time base": "day", "variables group": "biology"},
+            "start date": "2015-01-01",
+            "end date": "2015-01-02",
+        }
+        ds_paths = [
+            Path("/results/SalishSea_1d_20150101_ptrc_T.nc"),
+            Path("/successor_results/SalishSea_1d_20150102_ptrc_T.nc"),
+        ]
+
+        ds_dates = extract._calc_synthesized_ds_dates(ds_paths, config, model_profile)
+
+        assert ds_dates is None
+        assert log_output.entries[0]["ds_path"] == (
+            "/successor_results/SalishSea_1d_20150102_ptrc_T.nc"
+        )
+
+
+class TestSelectTimeRecords:
+    """Unit tests for _select_time_records() function."""
+
+    @pytest.fixture(name="source_ds")
+    def fixture_source_ds(self):
+        time_counter = pandas.date_range(
+            "2015-06-29 00:30", "2015-07-02 23:30", freq="h"
+        )
+        return xarray.Dataset(
+            {
+                "votemper": (
+                    ("time_counter", "y", "x"),
+                    numpy.arange(time_counter.size * 2, dtype=numpy.single).reshape(
+                        (time_counter.size, 1, 2)
+                    ),
+                    {"long_name": "Conservative Temperature", "units": "degree_C"},
+                ),
+            },
+            coords={"time_counter": time_counter},
+        )
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {"time coord": {"name": "time_counter"}}
+
+    def test_no_time_filters(self, source_ds, model_profile):
+        selected_ds = extract._select_time_records(source_ds, {}, model_profile)
+
+        assert selected_ds is source_ds
+
+    @pytest.mark.parametrize(
+        "selection, expected",
+        (
+            (
+                {"months": [7]},
+                pandas.date_range("2015-07-01 00:30", periods=48, freq="h"),
+            ),
+            (
+                {"hours": [12]},
+                pandas.date_range("2015-06-29 12:30", periods=4, freq="D"),
+            ),
+            (
+                {"days of week": ["Tuesday"], "hours": [0, 23]},
+                pandas.DatetimeIndex(["2015-06-30 00:30", "2015-06-30 23:30"]),
+            ),
+            (
+                {"dates": [datetime.date(2015, 7, 2)], "hours": [6]},
+                pandas.DatetimeIndex(["2015-07-02 06:30"]),
+            ),
+        ),
+    )
+    def test_select_time_records(
+        self, selection, expected, source_ds, model_profile, log_output
+    ):
+        config = {"selection": selection}
+
+        selected_ds = extract._select_time_records(source_ds, config, model_profile)
+
+        pandas.testing.assert_index_equal(
+            selected_ds.indexes["time_counter"], expected, check_names=False
+        )
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["n_time_records"] == expected.size
+        assert log_output.entries[0]["n_source_time_records"] == 96
+
+    def test_no_time_records_match(self, source_ds, model_profile, log_output):
+        config = {"selection": {"months": [7], "days of week": ["Mon"]}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._select_time_records(source_ds, config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert (
+            log_output.entries[0]["event"]
+            == "no time records match selection time filters"
+        )
+
+    def test_cli_extract_never_opens_pruned_files(self, source_ds, tmp_path):
+        for day, day_ds in source_ds.groupby("time_counter.day"):
+            day_ds.to_netcdf(tmp_path / f"SalishSea_1h_201507{day:02d}_grid_T.nc")
+        # Files for the dates outside of the time filters are not readable, so the
+        # extraction can only succeed if they are pruned before opening
+        for day in range(3, 8):
+            (tmp_path / f"SalishSea_1h_201507{day:02d}_grid_T.nc").write_text("")
+        (tmp_path / "test_profile.yaml").write_text(textwrap.dedent(f"""\
+                description: model profile for test
+
+                time coord:
+                  name: time_counter
+                y coord:
+                  name: y
+                x coord:
+                  name: x
+
+                chunk size:
+                  time: 24
+                  y: 1
+                  x: 2
+
+                extraction time origin: 2007-01-01
+
+                results archive:
+                  path: {tmp_path}
+                  datasets:
+                    hour:
+                      physics tracers:
+                        file pattern: "SalishSea_1h_{{yyyymmdd}}_grid_T.nc"
+                """))
+        config_yaml = tmp_path / "extract.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {tmp_path / "test_profile.yaml"}
+                  time base: hour
+                  variables group: physics tracers
+
+                dask cluster: unit_test_cluster.yaml
+
+                start date: 2015-07-01
+                end date: 2015-07-07
+
+                extract variables: [votemper]
+
+                selection:
+                  dates: [2015-07-01, 2015-07-02]
+                  hours: [12]
+
+                extracted dataset:
+                  name: votemper_noon
+                  description: test extraction
+                  dest dir: {tmp_path}
+                """))
+
+        extract.cli_extract(config_yaml, "", "")
+
+        with xarray.open_dataset(
+            tmp_path / "votemper_noon_20150701_20150707.nc"
+        ) as extracted_ds:
+            numpy.testing.assert_array_equal(extracted_ds.time.dt.day, [1, 2])
+            numpy.testing.assert_array_equal(
+                extracted_ds.votemper,
+                source_ds.votemper.sel(
+                    time_counter=["2015-07-01 12:30", "2015-07-02 12:30"]
+                ),
+            )
+
+
+class TestCalcOutputCoords:
+    """Unit tests for calc_output_coords() function."""
+
+    @pytest.fixture(name="model_profile", scope="class")
+    def fixture_model_profile(self):
+        return {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "y coord": {
+                "name": "y",
+            },
+            "x coord": {
+                "name": "x",
+            },
+            "chunk size": {
+                "time": 1,
+                "depth": 9,
+                "y": 9,
+                "x": 4,
+            },
+            "extraction time origin": "2015-01-01",
+            "results archive": {
+                "datasets": {
+                    "day": {
+                        "biology": {"depth coord": "deptht"},
+                    },
+                    "hour": {
+                        "biology": {"depth coord": "deptht"},
+                    },
+                }
+            },
+        }
+
+    @pytest.fixture(name="source_dataset", scope="class")
+    def fixture_source_dataset(self):
+        return xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "deptht": numpy.arange(0, 4, 0.5),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "diatoms": xarray.DataArray(
+                    name="diatoms",
+                    data=numpy.ones((4, 8, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "deptht": numpy.arange(0, 4, 0.5),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "standard_name": "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water",
+                        "long_name": "Diatoms Concentration",
+                        "units": "mmol m-3",
+                    },
+                ),
+            },
+        )
+
+    @pytest.mark.parametrize(
+        "use_model_coords, coord_name, time_base, example",
+        (
+            (
+                True,
+                "time_counter",
+                "day",
+                "8 February 2022 have a time value of 2022-02-08 12:00:00Z",
+            ),
+            (
+                False,
+                "time",
+                "day",
+                "8 February 2022 have a time value of 2022-02-08 12:00:00Z",
+            ),
+            (
+                True,
+                "time_counter",
+                "hour",
+                "the first hour of 8 February 2022 have a time value of 2022-02-08 00:30:00Z",
+            ),
+            (
+                False,
+                "time",
+                "hour",
+                "the first hour of 8 February 2022 have a time value of 2022-02-08 00:30:00Z",
+            ),
+        ),
+    )
+    def test_time_coord(
+        self,
+        use_model_coords,
+        coord_name,
+        time_base,
+        example,
+        source_dataset,
+        model_profile,
+        log_output,
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": time_base,
+                "variables group": "biology",
+            },
+            "extracted dataset": {
+                "use model coords": use_model_coords,
+            },
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords[coord_name].name == coord_name
+        assert numpy.array_equal(
+            output_coords[coord_name].data, source_dataset.time_counter.data
+        )
+        assert output_coords[coord_name].attrs["standard_name"] == "time"
+        assert output_coords[coord_name].attrs["long_name"] == "Time Axis"
+        expected = (
+            f"time values are UTC at the centre of the intervals over which the "
+            f"calculated model results are averaged; e.g. the field average values for "
+            f"{example}"
+        )
+        assert output_coords[coord_name].attrs["comment"] == expected
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extraction time coordinate"
+
+    @pytest.mark.parametrize(
+        "time_base, time_offset, example",
+        (
+            (
+                "day",
+                "12:00:00",
+                "8 February 2022 have a time value of 2022-02-08 12:00:00Z",
+            ),
+            (
+                "hour",
+                "00:30:00",
+                "the first hour of 8 February 2022 have a time value of 2022-02-08 00:30:00Z",
+            ),
+        ),
+    )
+    def test_time_coord_selection(
+        self, time_base, time_offset, example, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": time_base,
+                "variables group": "biology",
+            },
+            "selection": {
+                "time interval": 3,
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["time"].name == "time"
+        assert numpy.array_equal(
+            output_coords["time"].data,
+            source_dataset.time_counter.isel(time_counter=slice(0, None, 3)),
+        )
+        assert output_coords["time"].attrs["standard_name"] == "time"
+        assert output_coords["time"].attrs["long_name"] == "Time Axis"
+        assert output_coords["time"].attrs["time_origin"] == f"2015-01-01 {time_offset}"
+        expected = (
+            f"time values are UTC at the centre of the intervals over which the "
+            f"calculated model results are averaged; e.g. the field average values for "
+            f"{example}"
+        )
+        assert output_coords["time"].attrs["comment"] == expected
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extraction time coordinate"
+
+    @pytest.mark.parametrize(
+        "use_model_coords, time_coord_name, y_coord_name, x_coord_name",
+        (
+            (True, "time_counter", "y", "x"),
+            (False, "time", "gridY", "gridX"),
+        ),
+    )
+    def test_no_depth_coord(
+        self, use_model_coords, time_coord_name, y_coord_name, x_coord_name
+    ):
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "y coord": {
+                "name": "y",
+            },
+            "x coord": {
+                "name": "x",
+            },
+            "chunk size": {
+                "time": 4,
+                "y": 9,
+                "x": 4,
+            },
+            "extraction time origin": "2007-01-01",
+            "results archive": {
+                "datasets": {
+                    "hour": {
+                        "surface fields": {},
+                    },
+                }
+            },
+        }
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "atmpres": xarray.DataArray(
+                    name="atmpres",
+                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "standard_name": "PRMSL_meansealevel",
+                        "long_name": "Pressure Reduced to MSL",
+                        "units": "Pa",
+                    },
+                ),
+            },
+        )
+        extract_config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
+            },
+            "extracted dataset": {
+                "use model coords": use_model_coords,
+            },
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert "depth" not in output_coords
+
+        assert output_coords[time_coord_name].name == time_coord_name
+        assert output_coords[y_coord_name].name == y_coord_name
+        assert output_coords[x_coord_name].name == x_coord_name
+
+    def test_var_without_depth_coord(self, model_profile):
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "deptht": numpy.arange(0, 4, 0.5),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "sossheig": xarray.DataArray(
+                    name="sossheig",
+                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "standard_name": "sea_surface_height_above_geoid",
+                        "long_name": "Sea Surface Height",
+                        "units": "m",
+                    },
+                ),
+            },
+        )
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert "depth" not in output_coords
+
+    @pytest.mark.parametrize(
+        "use_model_coords, coord_name",
+        (
+            (True, "deptht"),
+            (False, "depth"),
+        ),
+    )
+    def test_depth_coord(
+        self, use_model_coords, coord_name, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "extracted dataset": {
+                "use model coords": use_model_coords,
+            },
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords[coord_name].name == coord_name
+        assert numpy.array_equal(
+            output_coords[coord_name].data, source_dataset.deptht.data
+        )
+        assert output_coords[coord_name].attrs["standard_name"] == "sea_floor_depth"
+        assert output_coords[coord_name].attrs["long_name"] == "Sea Floor Depth"
+        assert output_coords[coord_name].attrs["units"] == "metres"
+        assert output_coords[coord_name].attrs["positive"] == "down"
+
+        assert log_output.entries[1]["log_level"] == "debug"
+        assert log_output.entries[1]["event"] == "extraction depth coordinate"
+
+    def test_depth_coord_depth_selection_min(self, source_dataset, model_profile):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "depth": {
+                    "depth min": 5,
+                },
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["depth"].name == "depth"
+        assert numpy.array_equal(
+            output_coords["depth"].data,
+            # stop=None in slice() means the length of the array without having to know what that is
+            source_dataset.deptht.isel(deptht=slice(5, None)),
+        )
+
+    def test_depth_coord_depth_selection_max(self, source_dataset, model_profile):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "depth": {
+                    "depth max": 5,
+                },
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["depth"].name == "depth"
+        assert numpy.array_equal(
+            output_coords["depth"].data, source_dataset.deptht.isel(deptht=slice(0, 5))
+        )
+
+    def test_depth_coord_depth_selection_interval(self, source_dataset, model_profile):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "depth": {
+                    "depth interval": 2,
+                },
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        expected = os.fspath(Path(model_profile["results archive"]["path"]))
-        assert log_output.entries[0]["results_archive_path"] == expected
-        assert log_output.entries[0]["time_base"] == "hour"
-        assert log_output.entries[0]["vars_group"] == "surface fields"
-        assert log_output.entries[0]["nc_files_pattern"] == "ops_{nemo_yyyymmdd}.nc"
-        assert log_output.entries[0]["days_per_file"] == 1
-        assert log_output.entries[0]["start_date"] == "2015-01-01"
-        assert log_output.entries[0]["end_date"] == "2015-01-02"
-        assert log_output.entries[0]["n_datasets"] == 2
-        assert log_output.entries[0]["event"] == "collected dataset paths"
+        assert output_coords["depth"].name == "depth"
+        assert numpy.array_equal(
+            output_coords["depth"].data,
+            # stop=None in slice() means the length of the array without having to know what that is
+            source_dataset.deptht.isel(deptht=slice(0, None, 2)),
+        )
+
+    @pytest.mark.parametrize(
+        "use_model_coords, coord_name",
+        (
+            (True, "y"),
+            (False, "gridY"),
+        ),
+    )
+    def test_y_index_coord(
+        self, use_model_coords, coord_name, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "extracted dataset": {
+                "use model coords": use_model_coords,
+            },
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords[coord_name].name == coord_name
+        assert numpy.array_equal(output_coords[coord_name].data, source_dataset.y.data)
+        assert output_coords[coord_name].attrs["standard_name"] == "y"
+        assert output_coords[coord_name].attrs["long_name"] == "Grid Y"
+        assert output_coords[coord_name].attrs["units"] == "count"
+        assert (
+            output_coords[coord_name].attrs["comment"]
+            == f"{coord_name} values are grid indices in the model y-direction"
+        )
+
+        assert log_output.entries[2]["log_level"] == "debug"
+        assert log_output.entries[2]["event"] == "extraction y coordinate"
+
+    def test_y_index_coord_cast_to_int(self, log_output):
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "y": numpy.arange(9, dtype=float),
+                "x": numpy.arange(4, dtype=float),
+            },
+            data_vars={
+                "atmpres": xarray.DataArray(
+                    name="atmpres",
+                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "y": numpy.arange(9, dtype=float),
+                        "x": numpy.arange(4, dtype=float),
+                    },
+                    attrs={
+                        "short_name": "PRMSL_meansealevel",
+                        "long_name": "Pressure Reduced to MSL",
+                        "units": "Pa",
+                    },
+                ),
+            },
+        )
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "y coord": {
+                "name": "y",
+                "units": "metres",
+                "comment": "gridY values are distance in metres in the model y-direction from the south-west corner of the grid",
+            },
+            "x coord": {
+                "name": "x",
+                "units": "metres",
+                "comment": "gridX values are distance in metres in the model x-direction from the south-west corner of the grid",
+            },
+            "chunk size": {
+                "time": 4,
+                "y": 5,
+                "x": 4,
+            },
+            "extraction time origin": "2007-01-01",
+            "results archive": {
+                "datasets": {
+                    "hour": {
+                        "surface fields": {},
+                    }
+                }
+            },
+        }
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["gridY"].name == "gridY"
+        assert numpy.array_equal(output_coords["gridY"].data, source_dataset.y.data)
+        assert output_coords["gridY"].dtype == numpy.dtype(int)
+        assert output_coords["gridY"].attrs["standard_name"] == "y"
+        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
+        assert output_coords["gridY"].attrs["units"] == "metres"
+        assert (
+            output_coords["gridY"].attrs["comment"]
+            == "gridY values are distance in metres in the model y-direction from the south-west corner of the grid"
+        )
+
+        assert log_output.entries[1]["log_level"] == "debug"
+        assert log_output.entries[1]["event"] == "extraction y coordinate"
+
+    def test_y_index_coord_selection_y_min(
+        self, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "grid y": {
+                    "y min": 6,
+                },
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["gridY"].name == "gridY"
+        assert numpy.array_equal(
+            output_coords["gridY"].data, source_dataset.y.isel(y=slice(6, None))
+        )
+        assert output_coords["gridY"].attrs["standard_name"] == "y"
+        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
+        assert output_coords["gridY"].attrs["units"] == "count"
+        assert (
+            output_coords["gridY"].attrs["comment"]
+            == "gridY values are grid indices in the model y-direction"
+        )
+
+        assert log_output.entries[2]["log_level"] == "debug"
+        assert log_output.entries[2]["event"] == "extraction y coordinate"
+
+    def test_y_index_coord_selection_y_max(
+        self, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "grid y": {
+                    "y max": 3,
+                },
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["gridY"].name == "gridY"
+        assert numpy.array_equal(
+            output_coords["gridY"].data, source_dataset.y.isel(y=slice(0, 3))
+        )
+        assert output_coords["gridY"].attrs["standard_name"] == "y"
+        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
+        assert output_coords["gridY"].attrs["units"] == "count"
+        assert (
+            output_coords["gridY"].attrs["comment"]
+            == "gridY values are grid indices in the model y-direction"
+        )
+
+        assert log_output.entries[2]["log_level"] == "debug"
+        assert log_output.entries[2]["event"] == "extraction y coordinate"
+
+    def test_y_index_coord_selection_y_interval(
+        self, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "grid y": {
+                    "y interval": 2,
+                },
+            },
+            "extracted dataset": {},
+        }
+
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
+
+        assert output_coords["gridY"].name == "gridY"
+        assert numpy.array_equal(
+            output_coords["gridY"].data, source_dataset.y.isel(y=slice(0, None, 2))
+        )
+        assert output_coords["gridY"].attrs["standard_name"] == "y"
+        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
+        assert output_coords["gridY"].attrs["units"] == "count"
+        assert (
+            output_coords["gridY"].attrs["comment"]
+            == "gridY values are grid indices in the model y-direction"
+        )
+
+        assert log_output.entries[2]["log_level"] == "debug"
+        assert log_output.entries[2]["event"] == "extraction y coordinate"
+
+    @pytest.mark.parametrize(
+        "use_model_coords, coord_name",
+        (
+            (True, "x"),
+            (False, "gridX"),
+        ),
+    )
+    def test_x_index_coord(
+        self, use_model_coords, coord_name, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "extracted dataset": {
+                "use model coords": use_model_coords,
+            },
+        }
 
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
 
-class TestCalcDsChunks:
-    """Unit tests for calc_ds_chunk() function."""
+        assert output_coords[coord_name].name == coord_name
+        assert numpy.array_equal(output_coords[coord_name].data, source_dataset.x.data)
+        assert output_coords[coord_name].attrs["standard_name"] == "x"
+        assert output_coords[coord_name].attrs["long_name"] == "Grid X"
+        assert output_coords[coord_name].attrs["units"] == "count"
+        assert (
+            output_coords[coord_name].attrs["comment"]
+            == f"{coord_name} values are grid indices in the model x-direction"
+        )
 
-    def test_calc_ds_chunks(self, log_output):
+        assert log_output.entries[3]["log_level"] == "debug"
+        assert log_output.entries[3]["event"] == "extraction x coordinate"
+
+    def test_x_index_coord_cast_to_int(self, log_output):
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "y": numpy.arange(9, dtype=float),
+                "x": numpy.arange(4, dtype=float),
+            },
+            data_vars={
+                "atmpres": xarray.DataArray(
+                    name="atmpres",
+                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "y": numpy.arange(9, dtype=float),
+                        "x": numpy.arange(4, dtype=float),
+                    },
+                    attrs={
+                        "short_name": "PRMSL_meansealevel",
+                        "long_name": "Pressure Reduced to MSL",
+                        "units": "Pa",
+                    },
+                ),
+            },
+        )
         extract_config = {
             "dataset": {
                 "time base": "day",
                 "variables group": "biology",
             },
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 2),
+            "extracted dataset": {},
         }
         model_profile = {
             "time coord": {
                 "name": "time_counter",
             },
+            "y coord": {
+                "name": "y",
+                "units": "metres",
+                "comment": "gridY values are distance in metres in the model y-direction from the south-west corner of the grid",
+            },
+            "x coord": {
+                "name": "x",
+                "units": "metres",
+                "comment": "gridX values are distance in metres in the model x-direction from the south-west corner of the grid",
+            },
             "chunk size": {
-                "time": 1,
-                "depth": 40,
-                "y": 898,
-                "x": 398,
+                "time": 4,
+                "y": 5,
+                "x": 4,
             },
+            "extraction time origin": "2007-01-01",
             "results archive": {
                 "datasets": {
-                    "day": {
-                        "biology": {"depth coord": "deptht"},
-                    },
-                },
+                    "hour": {
+                        "surface fields": {},
+                    }
+                }
             },
         }
 
-        chunk_size = extract.calc_ds_chunk_size(extract_config, model_profile)
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
 
-        expected = {
-            "time_counter": 1,
-            "deptht": 40,
-            "y": 898,
-            "x": 398,
-        }
-        assert chunk_size == expected
+        assert output_coords["gridX"].name == "gridX"
+        assert numpy.array_equal(output_coords["gridX"].data, source_dataset.x.data)
+        assert output_coords["gridX"].dtype == numpy.dtype(int)
+        assert output_coords["gridX"].attrs["standard_name"] == "x"
+        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
+        assert output_coords["gridX"].attrs["units"] == "metres"
+        assert (
+            output_coords["gridX"].attrs["comment"]
+            == "gridX values are distance in metres in the model x-direction from the south-west corner of the grid"
+        )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["chunk_size"] == expected
-        assert log_output.entries[0]["event"] == "chunk size for dataset loading"
+        assert log_output.entries[2]["log_level"] == "debug"
+        assert log_output.entries[2]["event"] == "extraction x coordinate"
 
-    def test_calc_ds_chunks_no_depth(self, log_output):
+    def test_x_index_coord_selection_x_min(
+        self, source_dataset, model_profile, log_output
+    ):
         extract_config = {
             "dataset": {
-                "time base": "hour",
-                "variables group": "surface fields",
-            },
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 2),
-        }
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
+                "time base": "day",
+                "variables group": "biology",
             },
-            "chunk size": {
-                "time": 24,
-                "y": 266,
-                "x": 256,
+            "selection": {
+                "grid x": {
+                    "x min": 1,
+                },
             },
+            "extracted dataset": {},
         }
 
-        chunk_size = extract.calc_ds_chunk_size(extract_config, model_profile)
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
 
-        expected = {
-            "time_counter": 24,
-            "y": 266,
-            "x": 256,
-        }
-        assert chunk_size == expected
+        assert output_coords["gridX"].name == "gridX"
+        # stop=None in slice() means the length of the array without having to know what that is
+        assert numpy.array_equal(
+            output_coords["gridX"].data, source_dataset.x.isel(x=slice(1, None))
+        )
+        assert output_coords["gridX"].attrs["standard_name"] == "x"
+        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
+        assert output_coords["gridX"].attrs["units"] == "count"
+        assert (
+            output_coords["gridX"].attrs["comment"]
+            == "gridX values are grid indices in the model x-direction"
+        )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["chunk_size"] == expected
-        assert log_output.entries[0]["event"] == "chunk size for dataset loading"
+        assert log_output.entries[3]["log_level"] == "debug"
+        assert log_output.entries[3]["event"] == "extraction x coordinate"
 
-    def test_model_profile_chunk_size_unchanged(self, log_output):
-        """Test to demonstrate bug whereby model profile chunk size dict was getting changed
-        in the course of calculating the dataset loading chunk size dict.
-        """
+    def test_x_index_coord_selection_x_max(
+        self, source_dataset, model_profile, log_output
+    ):
         extract_config = {
             "dataset": {
                 "time base": "day",
                 "variables group": "biology",
             },
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 2),
-        }
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "chunk size": {
-                "time": 1,
-                "depth": 40,
-                "y": 898,
-                "x": 398,
-            },
-            "results archive": {
-                "datasets": {
-                    "day": {
-                        "biology": {"depth coord": "deptht"},
-                    },
+            "selection": {
+                "grid x": {
+                    "x max": 3,
                 },
             },
+            "extracted dataset": {},
         }
 
-        extract.calc_ds_chunk_size(extract_config, model_profile)
-
-        expected = {
-            "time": 1,
-            "depth": 40,
-            "y": 898,
-            "x": 398,
-        }
-        assert model_profile["chunk size"] == expected
-
-
-class TestCreateDataarray:
-    """Unit tests for create_dataarray() function."""
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
+        )
 
-    def test_create_coord_array(self):
-        source_array = xarray.DataArray(
-            name="test source array",
-            data=numpy.arange(43),
+        assert output_coords["gridX"].name == "gridX"
+        assert numpy.array_equal(
+            output_coords["gridX"].data, source_dataset.x.isel(x=slice(0, 3))
+        )
+        assert output_coords["gridX"].attrs["standard_name"] == "x"
+        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
+        assert output_coords["gridX"].attrs["units"] == "count"
+        assert (
+            output_coords["gridX"].attrs["comment"]
+            == "gridX values are grid indices in the model x-direction"
         )
-        attrs = {"foo": "bar"}
 
-        coord = extract.create_dataarray("test", source_array, attrs)
+        assert log_output.entries[3]["log_level"] == "debug"
+        assert log_output.entries[3]["event"] == "extraction x coordinate"
 
-        assert coord.name == "test"
-        assert numpy.array_equal(coord.data, source_array.data)
-        assert numpy.array_equal(coord.coords["test"], source_array.data)
-        assert coord.attrs == attrs
+    def test_x_index_coord_selection_x_interval(
+        self, source_dataset, model_profile, log_output
+    ):
+        extract_config = {
+            "dataset": {
+                "time base": "day",
+                "variables group": "biology",
+            },
+            "selection": {
+                "grid x": {
+                    "x interval": 2,
+                },
+            },
+            "extracted dataset": {},
+        }
 
-    def test_create_var_array(self):
-        source_array = xarray.DataArray(
-            name="test source array",
-            data=numpy.arange(43),
+        output_coords = extract.calc_output_coords(
+            source_dataset, extract_config, model_profile
         )
-        attrs = {"bar": "foo"}
-        coords = {"time": numpy.arange(43, 0, -1)}
-
-        var = extract.create_dataarray("test", source_array, attrs, coords)
 
-        assert var.name == "test"
-        assert numpy.array_equal(var.data, source_array.data)
-        assert numpy.array_equal(var.coords["time"], coords["time"])
-        assert var.attrs == attrs
+        assert output_coords["gridX"].name == "gridX"
+        # stop=None in slice() means the length of the array without having to know what that is
+        assert numpy.array_equal(
+            output_coords["gridX"].data, source_dataset.x.isel(x=slice(0, None, 2))
+        )
+        assert output_coords["gridX"].attrs["standard_name"] == "x"
+        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
+        assert output_coords["gridX"].attrs["units"] == "count"
+        assert (
+            output_coords["gridX"].attrs["comment"]
+            == "gridX values are grid indices in the model x-direction"
+        )
 
+        assert log_output.entries[3]["log_level"] == "debug"
+        assert log_output.entries[3]["event"] == "extraction x coordinate"
 
-class TestOpenDataset:
-    """Unit test for open_dataset() function."""
+
+class TestCalcExtractedVars:
+    """Unit tests for calc_extracted_vars() function."""
 
     @pytest.fixture(name="source_dataset", scope="class")
     def fixture_source_dataset(self):
@@ -972,92 +4579,6 @@ class TestOpenDataset:
             },
         )
 
-    def test_open_dataset(self, source_dataset, log_output, tmp_path):
-        results_archive = tmp_path / "results_archive"
-        results_archive.mkdir()
-        source_dataset.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
-        ds_paths = [results_archive / "test_dataset.nc"]
-        chunk_size = {
-            "time_counter": 4,
-            "deptht": 8,
-            "y": 9,
-            "x": 4,
-        }
-        extract_config = {
-            "extract variables": [
-                "diatoms",
-            ]
-        }
-        ds = extract.open_dataset(ds_paths, chunk_size, extract_config)
-
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "opened dataset"
-        assert log_output.entries[0]["ds"] == ds
-
-        xarray.testing.assert_equal(ds, source_dataset)
-
-    def test_open_dataset_parallel_read(self, source_dataset, log_output, tmp_path):
-        results_archive = tmp_path / "results_archive"
-        results_archive.mkdir()
-        source_dataset.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
-        ds_paths = [results_archive / "test_dataset.nc"]
-        chunk_size = {
-            "time_counter": 4,
-            "deptht": 8,
-            "y": 9,
-            "x": 4,
-        }
-        extract_config = {
-            "parallel read": True,
-            "extract variables": [
-                "diatoms",
-            ],
-        }
-        ds = extract.open_dataset(ds_paths, chunk_size, extract_config)
-
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "opened dataset"
-        assert log_output.entries[0]["ds"] == ds
-
-        xarray.testing.assert_equal(ds, source_dataset)
-
-    def test_exit_when_no_dataset_vars(self, source_dataset, log_output, tmp_path):
-        """re: issue #37
-
-        Confirm that processing ends with SystemExit(2) and appropriate error message in log
-        when that conditions that give rise to issue #37
-        (KeyError for variable not in variables group) occur.
-        """
-        results_archive = tmp_path / "results_archive"
-        results_archive.mkdir()
-        source_dataset.to_netcdf(results_archive / "test_dataset.nc", engine="netcdf4")
-        ds_paths = [results_archive / "test_dataset.nc"]
-        chunk_size = {
-            "time_counter": 4,
-            "deptht": 8,
-            "y": 9,
-            "x": 4,
-        }
-        extract_config = {
-            "extract variables": [
-                "nitrate",
-            ]
-        }
-
-        with pytest.raises(SystemExit) as exc_info:
-            extract.open_dataset(ds_paths, chunk_size, extract_config)
-
-        assert exc_info.value.code == 2
-        assert log_output.entries[0]["log_level"] == "error"
-        assert log_output.entries[0]["event"] == "no variables in source dataset"
-        assert log_output.entries[0]["extract_vars"] == {"nitrate"}
-        expected = "typo in variable name, or incorrect variables group"
-        assert log_output.entries[0]["possible_reasons"] == expected
-
-
-class TestCalcOutputCoords:
-    """Unit tests for calc_output_coords() function."""
-
     @pytest.fixture(name="model_profile", scope="class")
     def fixture_model_profile(self):
         return {
@@ -1071,182 +4592,182 @@ class TestCalcOutputCoords:
                 "name": "x",
             },
             "chunk size": {
-                "time": 1,
-                "depth": 9,
+                "time": 4,
+                "depth": 8,
                 "y": 9,
                 "x": 4,
             },
-            "extraction time origin": "2015-01-01",
             "results archive": {
                 "datasets": {
-                    "day": {
-                        "biology": {"depth coord": "deptht"},
-                    },
                     "hour": {
-                        "biology": {"depth coord": "deptht"},
-                    },
+                        "biology": {
+                            "depth coord": "deptht",
+                        }
+                    }
                 }
             },
         }
 
-    @pytest.fixture(name="source_dataset", scope="class")
-    def fixture_source_dataset(self):
-        return xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(4),
-                "deptht": numpy.arange(0, 4, 0.5),
-                "y": numpy.arange(9),
-                "x": numpy.arange(4),
-            },
-            data_vars={
-                "diatoms": xarray.DataArray(
-                    name="diatoms",
-                    data=numpy.ones((4, 8, 9, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(4),
-                        "deptht": numpy.arange(0, 4, 0.5),
-                        "y": numpy.arange(9),
-                        "x": numpy.arange(4),
-                    },
-                    attrs={
-                        "standard_name": "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water",
-                        "long_name": "Diatoms Concentration",
-                        "units": "mmol m-3",
-                    },
-                ),
-            },
-        )
-
-    @pytest.mark.parametrize(
-        "use_model_coords, coord_name, time_base, example",
-        (
-            (
-                True,
-                "time_counter",
-                "day",
-                "8 February 2022 have a time value of 2022-02-08 12:00:00Z",
-            ),
-            (
-                False,
-                "time",
-                "day",
-                "8 February 2022 have a time value of 2022-02-08 12:00:00Z",
-            ),
-            (
-                True,
-                "time_counter",
-                "hour",
-                "the first hour of 8 February 2022 have a time value of 2022-02-08 00:30:00Z",
-            ),
-            (
-                False,
-                "time",
-                "hour",
-                "the first hour of 8 February 2022 have a time value of 2022-02-08 00:30:00Z",
-            ),
-        ),
-    )
-    def test_time_coord(
-        self,
-        use_model_coords,
-        coord_name,
-        time_base,
-        example,
-        source_dataset,
-        model_profile,
-        log_output,
-    ):
-        extract_config = {
+    def test_extract_var(self, source_dataset, model_profile, log_output):
+        output_coords = {
+            "time": numpy.arange(4),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
             "dataset": {
-                "time base": time_base,
+                "time base": "hour",
                 "variables group": "biology",
             },
-            "extracted dataset": {
-                "use model coords": use_model_coords,
-            },
+            "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords[coord_name].name == coord_name
+        assert extracted_vars[0].name == "diatoms"
         assert numpy.array_equal(
-            output_coords[coord_name].data, source_dataset.time_counter.data
+            extracted_vars[0].data, numpy.ones((4, 8, 9, 4), dtype=numpy.single)
         )
-        assert output_coords[coord_name].attrs["standard_name"] == "time"
-        assert output_coords[coord_name].attrs["long_name"] == "Time Axis"
-        expected = (
-            f"time values are UTC at the centre of the intervals over which the "
-            f"calculated model results are averaged; e.g. the field average values for "
-            f"{example}"
+        assert (
+            extracted_vars[0].attrs["standard_name"]
+            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
         )
-        assert output_coords[coord_name].attrs["comment"] == expected
+        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
+        assert extracted_vars[0].attrs["units"] == "mmol m-3"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
         assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extraction time coordinate"
+        assert log_output.entries[0]["event"] == "extracted diatoms"
 
-    @pytest.mark.parametrize(
-        "time_base, time_offset, example",
-        (
-            (
-                "day",
-                "12:00:00",
-                "8 February 2022 have a time value of 2022-02-08 12:00:00Z",
-            ),
-            (
-                "hour",
-                "00:30:00",
-                "the first hour of 8 February 2022 have a time value of 2022-02-08 00:30:00Z",
-            ),
-        ),
-    )
-    def test_time_coord_selection(
-        self, time_base, time_offset, example, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": time_base,
-                "variables group": "biology",
+    def test_short_name_as_standard_name(self, log_output):
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(24),
+                "y": numpy.arange(5),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "atmpres": xarray.DataArray(
+                    name="atmpres",
+                    data=numpy.ones((24, 5, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(24),
+                        "y": numpy.arange(5),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "short_name": "PRMSL_meansealevel",
+                        "long_name": "Pressure Reduced to MSL",
+                        "units": "Pa",
+                    },
+                ),
             },
-            "selection": {
-                "time interval": 3,
+        )
+        output_coords = {
+            "time": numpy.arange(24),
+            "gridY": numpy.arange(5),
+            "gridX": numpy.arange(4),
+        }
+        config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "surface fields",
             },
             "extracted dataset": {},
         }
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "y coord": {
+                "name": "y",
+            },
+            "x coord": {
+                "name": "x",
+            },
+            "chunk size": {
+                "time": 24,
+                "y": 5,
+                "x": 4,
+            },
+            "results archive": {
+                "datasets": {
+                    "hour": {
+                        "surface fields": {},
+                    }
+                }
+            },
+        }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords["time"].name == "time"
+        assert extracted_vars[0].name == "atmpres"
         assert numpy.array_equal(
-            output_coords["time"].data,
-            source_dataset.time_counter.isel(time_counter=slice(0, None, 3)),
-        )
-        assert output_coords["time"].attrs["standard_name"] == "time"
-        assert output_coords["time"].attrs["long_name"] == "Time Axis"
-        assert output_coords["time"].attrs["time_origin"] == f"2015-01-01 {time_offset}"
-        expected = (
-            f"time values are UTC at the centre of the intervals over which the "
-            f"calculated model results are averaged; e.g. the field average values for "
-            f"{example}"
+            extracted_vars[0].data, numpy.ones((24, 5, 4), dtype=numpy.single)
         )
-        assert output_coords["time"].attrs["comment"] == expected
+        assert extracted_vars[0].attrs["standard_name"] == "PRMSL_meansealevel"
+        assert extracted_vars[0].attrs["long_name"] == "Pressure Reduced to MSL"
+        assert extracted_vars[0].attrs["units"] == "Pa"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
         assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extraction time coordinate"
+        assert log_output.entries[0]["event"] == "extracted atmpres"
 
-    @pytest.mark.parametrize(
-        "use_model_coords, time_coord_name, y_coord_name, x_coord_name",
-        (
-            (True, "time_counter", "y", "x"),
-            (False, "time", "gridY", "gridX"),
-        ),
-    )
-    def test_no_depth_coord(
-        self, use_model_coords, time_coord_name, y_coord_name, x_coord_name
-    ):
+    def test_variable_name_as_standard_name(self, log_output):
+        """Fall back to use variable name as standard_name if neither standard_name nor short_name
+        attributes are present in the source dataset.
+
+        This is in line with the implications of
+        https://cfconventions.org/Data/cf-conventions/cf-conventions-1.10/cf-conventions.html#long-name
+        """
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(24),
+                "deptht": numpy.arange(0, 4, 0.5),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "outfall": xarray.DataArray(
+                    name="outfall",
+                    data=numpy.ones((24, 8, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(24),
+                        "deptht": numpy.arange(0, 4, 0.5),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "long_name": "Iona Outfall Water Tracer",
+                        "units": "m3 m-3",
+                    },
+                ),
+            },
+        )
+        output_coords = {
+            "time": numpy.arange(24),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
+            "dataset": {
+                "time base": "hour",
+                "variables group": "physics tracers",
+            },
+            "extracted dataset": {},
+        }
         model_profile = {
             "time coord": {
                 "name": "time_counter",
@@ -1258,892 +4779,1260 @@ class TestCalcOutputCoords:
                 "name": "x",
             },
             "chunk size": {
-                "time": 4,
+                "time": 1,
+                "depth": 8,
                 "y": 9,
                 "x": 4,
             },
-            "extraction time origin": "2007-01-01",
             "results archive": {
                 "datasets": {
                     "hour": {
-                        "surface fields": {},
-                    },
+                        "physics tracers": {
+                            "depth coord": "deptht",
+                        }
+                    }
                 }
             },
         }
+
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
+        )
+
+        assert extracted_vars[0].name == "outfall"
+        assert numpy.array_equal(
+            extracted_vars[0].data, numpy.ones((24, 8, 9, 4), dtype=numpy.single)
+        )
+        assert extracted_vars[0].attrs["standard_name"] == "outfall"
+        assert extracted_vars[0].attrs["long_name"] == "Iona Outfall Water Tracer"
+        assert extracted_vars[0].attrs["units"] == "m3 m-3"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted outfall"
+
+    def test_extract_var_model_coords(self, log_output):
         source_dataset = xarray.Dataset(
             coords={
                 "time_counter": numpy.arange(4),
+                "depthu": numpy.arange(0, 4, 0.5),
                 "y": numpy.arange(9),
                 "x": numpy.arange(4),
             },
             data_vars={
-                "atmpres": xarray.DataArray(
-                    name="atmpres",
-                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                "vozocrtx": xarray.DataArray(
+                    name="vozocrtx",
+                    data=numpy.ones((4, 8, 9, 4), dtype=numpy.single),
                     coords={
                         "time_counter": numpy.arange(4),
+                        "depthu": numpy.arange(0, 4, 0.5),
                         "y": numpy.arange(9),
                         "x": numpy.arange(4),
                     },
                     attrs={
-                        "standard_name": "PRMSL_meansealevel",
-                        "long_name": "Pressure Reduced to MSL",
-                        "units": "Pa",
+                        "standard_name": "sea_water_x_velocity",
+                        "long_name": "Ocean Current Along x-Axis",
+                        "units": "m s-1",
                     },
                 ),
             },
         )
-        extract_config = {
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "y coord": {
+                "name": "y",
+            },
+            "x coord": {
+                "name": "x",
+            },
+            "chunk size": {
+                "time": 4,
+                "depth": 8,
+                "y": 9,
+                "x": 4,
+            },
+            "results archive": {
+                "datasets": {
+                    "hour": {
+                        "u velocity": {
+                            "depth coord": "depthu",
+                        }
+                    }
+                }
+            },
+        }
+        output_coords = {
+            "time_counter": numpy.arange(4),
+            "depthu": numpy.arange(0, 4, 0.5),
+            "y": numpy.arange(9),
+            "x": numpy.arange(4),
+        }
+        config = {
             "dataset": {
                 "time base": "hour",
-                "variables group": "surface fields",
+                "variables group": "u velocity",
             },
             "extracted dataset": {
-                "use model coords": use_model_coords,
+                "use model coords": True,
             },
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert "depth" not in output_coords
+        assert extracted_vars[0].name == "vozocrtx"
+        assert numpy.array_equal(
+            extracted_vars[0].data, numpy.ones((4, 8, 9, 4), dtype=numpy.single)
+        )
+        assert extracted_vars[0].attrs["standard_name"] == "sea_water_x_velocity"
+        assert extracted_vars[0].attrs["long_name"] == "Ocean Current Along x-Axis"
+        assert extracted_vars[0].attrs["units"] == "m s-1"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-        assert output_coords[time_coord_name].name == time_coord_name
-        assert output_coords[y_coord_name].name == y_coord_name
-        assert output_coords[x_coord_name].name == x_coord_name
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted vozocrtx"
 
-    def test_var_without_depth_coord(self, model_profile):
+    def test_extract_var_no_depth_coord(self, log_output):
         source_dataset = xarray.Dataset(
             coords={
-                "time_counter": numpy.arange(4),
-                "deptht": numpy.arange(0, 4, 0.5),
-                "y": numpy.arange(9),
+                "time_counter": numpy.arange(24),
+                "y": numpy.arange(5),
                 "x": numpy.arange(4),
             },
             data_vars={
-                "sossheig": xarray.DataArray(
-                    name="sossheig",
-                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                "atmpres": xarray.DataArray(
+                    name="atmpres",
+                    data=numpy.ones((24, 5, 4), dtype=numpy.single),
                     coords={
-                        "time_counter": numpy.arange(4),
-                        "y": numpy.arange(9),
+                        "time_counter": numpy.arange(24),
+                        "y": numpy.arange(5),
                         "x": numpy.arange(4),
                     },
                     attrs={
-                        "standard_name": "sea_surface_height_above_geoid",
-                        "long_name": "Sea Surface Height",
-                        "units": "m",
+                        "short_name": "PRMSL_meansealevel",
+                        "long_name": "Pressure Reduced to MSL",
+                        "units": "Pa",
                     },
                 ),
             },
         )
-        extract_config = {
+        output_coords = {
+            "time": numpy.arange(24),
+            "gridY": numpy.arange(5),
+            "gridX": numpy.arange(4),
+        }
+        config = {
             "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+                "time base": "hour",
+                "variables group": "surface fields",
             },
             "extracted dataset": {},
         }
+        model_profile = {
+            "time coord": {
+                "name": "time_counter",
+            },
+            "y coord": {
+                "name": "y",
+            },
+            "x coord": {
+                "name": "x",
+            },
+            "chunk size": {
+                "time": 24,
+                "y": 5,
+                "x": 4,
+            },
+            "results archive": {
+                "datasets": {
+                    "hour": {
+                        "surface fields": {},
+                    }
+                }
+            },
+        }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert "depth" not in output_coords
+        assert extracted_vars[0].name == "atmpres"
+        assert numpy.array_equal(
+            extracted_vars[0].data, numpy.ones((24, 5, 4), dtype=numpy.single)
+        )
+        assert extracted_vars[0].attrs["standard_name"] == "PRMSL_meansealevel"
+        assert extracted_vars[0].attrs["long_name"] == "Pressure Reduced to MSL"
+        assert extracted_vars[0].attrs["units"] == "Pa"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-    @pytest.mark.parametrize(
-        "use_model_coords, coord_name",
-        (
-            (True, "deptht"),
-            (False, "depth"),
-        ),
-    )
-    def test_depth_coord(
-        self, use_model_coords, coord_name, source_dataset, model_profile, log_output
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted atmpres"
+
+    def test_extract_var_time_selection(
+        self, source_dataset, model_profile, log_output
     ):
-        extract_config = {
+        output_coords = {
+            "time": numpy.arange(2),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
             "dataset": {
-                "time base": "day",
+                "time base": "hour",
                 "variables group": "biology",
             },
-            "extracted dataset": {
-                "use model coords": use_model_coords,
+            "selection": {
+                "time interval": 2,
             },
+            "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords[coord_name].name == coord_name
+        assert extracted_vars[0].name == "diatoms"
         assert numpy.array_equal(
-            output_coords[coord_name].data, source_dataset.deptht.data
+            extracted_vars[0].data, numpy.ones((2, 8, 9, 4), dtype=numpy.single)
         )
-        assert output_coords[coord_name].attrs["standard_name"] == "sea_floor_depth"
-        assert output_coords[coord_name].attrs["long_name"] == "Sea Floor Depth"
-        assert output_coords[coord_name].attrs["units"] == "metres"
-        assert output_coords[coord_name].attrs["positive"] == "down"
+        assert (
+            extracted_vars[0].attrs["standard_name"]
+            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
+        )
+        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
+        assert extracted_vars[0].attrs["units"] == "mmol m-3"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-        assert log_output.entries[1]["log_level"] == "debug"
-        assert log_output.entries[1]["event"] == "extraction depth coordinate"
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted diatoms"
 
-    def test_depth_coord_depth_selection_min(self, source_dataset, model_profile):
-        extract_config = {
+    def test_extract_var_depth_selection(
+        self, source_dataset, model_profile, log_output
+    ):
+        output_coords = {
+            "time": numpy.arange(4),
+            "depth": numpy.arange(0.5, 3, 1),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
             "dataset": {
-                "time base": "day",
+                "time base": "hour",
                 "variables group": "biology",
             },
             "selection": {
                 "depth": {
-                    "depth min": 5,
-                },
+                    "depth min": 1,
+                    "depth max": 6,
+                    "depth interval": 2,
+                }
             },
             "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords["depth"].name == "depth"
+        assert extracted_vars[0].name == "diatoms"
         assert numpy.array_equal(
-            output_coords["depth"].data,
-            # stop=None in slice() means the length of the array without having to know what that is
-            source_dataset.deptht.isel(deptht=slice(5, None)),
+            extracted_vars[0].data, numpy.ones((4, 3, 9, 4), dtype=numpy.single)
+        )
+        assert (
+            extracted_vars[0].attrs["standard_name"]
+            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
         )
+        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
+        assert extracted_vars[0].attrs["units"] == "mmol m-3"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-    def test_depth_coord_depth_selection_max(self, source_dataset, model_profile):
-        extract_config = {
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted diatoms"
+
+    def test_extract_var_y_selection(self, source_dataset, model_profile, log_output):
+        output_coords = {
+            "time": numpy.arange(4),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(2, 7),
+            "gridX": numpy.arange(4),
+        }
+        config = {
             "dataset": {
-                "time base": "day",
+                "time base": "hour",
                 "variables group": "biology",
             },
             "selection": {
-                "depth": {
-                    "depth max": 5,
-                },
+                "grid y": {
+                    "y min": 2,
+                    "y max": 7,
+                }
             },
             "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords["depth"].name == "depth"
+        assert extracted_vars[0].name == "diatoms"
         assert numpy.array_equal(
-            output_coords["depth"].data, source_dataset.deptht.isel(deptht=slice(0, 5))
+            extracted_vars[0].data, numpy.ones((4, 8, 5, 4), dtype=numpy.single)
+        )
+        assert (
+            extracted_vars[0].attrs["standard_name"]
+            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
         )
+        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
+        assert extracted_vars[0].attrs["units"] == "mmol m-3"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-    def test_depth_coord_depth_selection_interval(self, source_dataset, model_profile):
-        extract_config = {
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted diatoms"
+
+    def test_extract_var_x_selection(self, source_dataset, model_profile, log_output):
+        output_coords = {
+            "time": numpy.arange(4),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(2, 4),
+        }
+        config = {
             "dataset": {
-                "time base": "day",
+                "time base": "hour",
                 "variables group": "biology",
             },
             "selection": {
-                "depth": {
-                    "depth interval": 2,
-                },
+                "grid x": {
+                    "x min": 2,
+                }
             },
             "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords["depth"].name == "depth"
+        assert extracted_vars[0].name == "diatoms"
         assert numpy.array_equal(
-            output_coords["depth"].data,
-            # stop=None in slice() means the length of the array without having to know what that is
-            source_dataset.deptht.isel(deptht=slice(0, None, 2)),
+            extracted_vars[0].data, numpy.ones((4, 8, 9, 2), dtype=numpy.single)
+        )
+        assert (
+            extracted_vars[0].attrs["standard_name"]
+            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
         )
+        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
+        assert extracted_vars[0].attrs["units"] == "mmol m-3"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-    @pytest.mark.parametrize(
-        "use_model_coords, coord_name",
-        (
-            (True, "y"),
-            (False, "gridY"),
-        ),
-    )
-    def test_y_index_coord(
-        self, use_model_coords, coord_name, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted diatoms"
+
+    def test_extract_surface_var(self, model_profile, log_output):
+        source_dataset = xarray.Dataset(
+            coords={
+                "time_counter": numpy.arange(4),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
+            },
+            data_vars={
+                "sossheig": xarray.DataArray(
+                    name="sossheig",
+                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                    coords={
+                        "time_counter": numpy.arange(4),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
+                    },
+                    attrs={
+                        "standard_name": "sea_surface_height_above_geoid",
+                        "long_name": "Sea Surface Height",
+                        "units": "m",
+                    },
+                )
+            },
+        )
+
+        output_coords = {
+            "time": numpy.arange(4),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
             "dataset": {
-                "time base": "day",
+                "time base": "hour",
                 "variables group": "biology",
             },
-            "extracted dataset": {
-                "use model coords": use_model_coords,
-            },
+            "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords[coord_name].name == coord_name
-        assert numpy.array_equal(output_coords[coord_name].data, source_dataset.y.data)
-        assert output_coords[coord_name].attrs["standard_name"] == "y"
-        assert output_coords[coord_name].attrs["long_name"] == "Grid Y"
-        assert output_coords[coord_name].attrs["units"] == "count"
+        assert extracted_vars[0].name == "sossheig"
+        assert numpy.array_equal(
+            extracted_vars[0].data, numpy.ones((4, 9, 4), dtype=numpy.single)
+        )
         assert (
-            output_coords[coord_name].attrs["comment"]
-            == f"{coord_name} values are grid indices in the model y-direction"
+            extracted_vars[0].attrs["standard_name"] == "sea_surface_height_above_geoid"
         )
+        assert extracted_vars[0].attrs["long_name"] == "Sea Surface Height"
+        assert extracted_vars[0].attrs["units"] == "m"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-        assert log_output.entries[2]["log_level"] == "debug"
-        assert log_output.entries[2]["event"] == "extraction y coordinate"
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted sossheig"
 
-    def test_y_index_coord_cast_to_int(self, log_output):
+    def test_extract_surface_var_model_coords(self, model_profile, log_output):
         source_dataset = xarray.Dataset(
             coords={
                 "time_counter": numpy.arange(4),
-                "y": numpy.arange(9, dtype=float),
-                "x": numpy.arange(4, dtype=float),
+                "y": numpy.arange(9),
+                "x": numpy.arange(4),
             },
             data_vars={
-                "atmpres": xarray.DataArray(
-                    name="atmpres",
+                "sossheig": xarray.DataArray(
+                    name="sossheig",
                     data=numpy.ones((4, 9, 4), dtype=numpy.single),
                     coords={
                         "time_counter": numpy.arange(4),
-                        "y": numpy.arange(9, dtype=float),
-                        "x": numpy.arange(4, dtype=float),
+                        "y": numpy.arange(9),
+                        "x": numpy.arange(4),
                     },
                     attrs={
-                        "short_name": "PRMSL_meansealevel",
-                        "long_name": "Pressure Reduced to MSL",
-                        "units": "Pa",
+                        "standard_name": "sea_surface_height_above_geoid",
+                        "long_name": "Sea Surface Height",
+                        "units": "m",
                     },
-                ),
+                )
             },
         )
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-                "units": "metres",
-                "comment": "gridY values are distance in metres in the model y-direction from the south-west corner of the grid",
-            },
-            "x coord": {
-                "name": "x",
-                "units": "metres",
-                "comment": "gridX values are distance in metres in the model x-direction from the south-west corner of the grid",
-            },
-            "chunk size": {
-                "time": 4,
-                "y": 5,
-                "x": 4,
-            },
-            "extraction time origin": "2007-01-01",
-            "results archive": {
-                "datasets": {
-                    "hour": {
-                        "surface fields": {},
-                    }
-                }
-            },
+
+        output_coords = {
+            "time_counter": numpy.arange(4),
+            "y": numpy.arange(9),
+            "x": numpy.arange(4),
         }
-        extract_config = {
+        config = {
             "dataset": {
-                "time base": "day",
+                "time base": "hour",
                 "variables group": "biology",
             },
-            "extracted dataset": {},
+            "extracted dataset": {
+                "use model coords": True,
+            },
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_vars = extract.calc_extracted_vars(
+            source_dataset, output_coords, config, model_profile
         )
 
-        assert output_coords["gridY"].name == "gridY"
-        assert numpy.array_equal(output_coords["gridY"].data, source_dataset.y.data)
-        assert output_coords["gridY"].dtype == numpy.dtype(int)
-        assert output_coords["gridY"].attrs["standard_name"] == "y"
-        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
-        assert output_coords["gridY"].attrs["units"] == "metres"
+        assert extracted_vars[0].name == "sossheig"
+        assert numpy.array_equal(
+            extracted_vars[0].data, numpy.ones((4, 9, 4), dtype=numpy.single)
+        )
         assert (
-            output_coords["gridY"].attrs["comment"]
-            == "gridY values are distance in metres in the model y-direction from the south-west corner of the grid"
+            extracted_vars[0].attrs["standard_name"] == "sea_surface_height_above_geoid"
         )
+        assert extracted_vars[0].attrs["long_name"] == "Sea Surface Height"
+        assert extracted_vars[0].attrs["units"] == "m"
+        for coord in output_coords:
+            assert numpy.array_equal(
+                extracted_vars[0].coords[coord], output_coords[coord]
+            )
 
-        assert log_output.entries[1]["log_level"] == "debug"
-        assert log_output.entries[1]["event"] == "extraction y coordinate"
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted sossheig"
 
-    def test_y_index_coord_selection_y_min(
-        self, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+
+class TestCalcExtractedDataset:
+    """Unit tests for calc_extracted_dataset() function."""
+
+    def test_calc_extracted_dataset_no_date_overrides(self, log_output, monkeypatch):
+        def mock_now(tz):
+            return arrow.get("2022-10-28 19:12", tzinfo="Canada/Pacific")
+
+        monkeypatch.setattr(extract.arrow, "now", mock_now)
+
+        extracted_vars = []
+        output_coords = {
+            "time": numpy.arange(2),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 10),
+            "extracted dataset": {
+                "name": "test",
+                "description": "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast",
             },
-            "selection": {
-                "grid y": {
-                    "y min": 6,
-                },
+        }
+        config_yaml = Path("test_extract.yaml")
+        generated_by = f"`reshapr extract {config_yaml.absolute()}`"
+
+        extracted_ds = extract.calc_extracted_dataset(
+            extracted_vars, output_coords, config, generated_by
+        )
+
+        assert extracted_ds.name == "test_20150101_20150110"
+        assert extracted_ds.attrs["name"] == "test_20150101_20150110"
+        assert (
+            extracted_ds.attrs["description"]
+            == "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast"
+        )
+        assert (
+            extracted_ds.attrs["history"]
+            == f"2022-10-28 19:12 -07:00: Generated by {generated_by}"
+        )
+        assert extracted_ds.attrs["Conventions"] == "CF-1.6"
+
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted dataset metadata"
+
+    def test_calc_extracted_dataset_date_overrides(self, log_output, monkeypatch):
+        def mock_now(tz):
+            return arrow.get("2022-11-09 15:06", tzinfo="Canada/Pacific")
+
+        monkeypatch.setattr(extract.arrow, "now", mock_now)
+
+        extracted_vars = []
+        output_coords = {
+            "time": numpy.arange(2),
+            "depth": numpy.arange(0, 4, 0.5),
+            "gridY": numpy.arange(9),
+            "gridX": numpy.arange(4),
+        }
+        config = {
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 10),
+            "extracted dataset": {
+                "name": "test",
+                "description": "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast",
             },
-            "extracted dataset": {},
         }
+        config_yaml = Path("test_extract.yaml")
+        generated_by = f"`reshapr extract {config_yaml.absolute()}`"
+        override_start_date, override_end_date = "2022-11-09", "2022-11-09"
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_ds = extract.calc_extracted_dataset(
+            extracted_vars,
+            output_coords,
+            config,
+            generated_by,
+            override_start_date,
+            override_end_date,
         )
 
-        assert output_coords["gridY"].name == "gridY"
-        assert numpy.array_equal(
-            output_coords["gridY"].data, source_dataset.y.isel(y=slice(6, None))
+        assert extracted_ds.name == "test_20221109_20221109"
+        assert extracted_ds.attrs["name"] == "test_20221109_20221109"
+        assert (
+            extracted_ds.attrs["description"]
+            == "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast"
         )
-        assert output_coords["gridY"].attrs["standard_name"] == "y"
-        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
-        assert output_coords["gridY"].attrs["units"] == "count"
         assert (
-            output_coords["gridY"].attrs["comment"]
-            == "gridY values are grid indices in the model y-direction"
+            extracted_ds.attrs["history"]
+            == f"2022-11-09 15:06 -08:00: Generated by {generated_by}"
         )
+        assert extracted_ds.attrs["Conventions"] == "CF-1.6"
 
-        assert log_output.entries[2]["log_level"] == "debug"
-        assert log_output.entries[2]["event"] == "extraction y coordinate"
+        assert log_output.entries[0]["log_level"] == "debug"
+        assert log_output.entries[0]["event"] == "extracted dataset metadata"
 
-    def test_y_index_coord_selection_y_max(
-        self, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+    def test_calc_extracted_dataset_geo_selection(self, log_output, monkeypatch):
+        def mock_now(tz):
+            return arrow.get("2022-10-28 19:12", tzinfo="Canada/Pacific")
+
+        monkeypatch.setattr(extract.arrow, "now", mock_now)
+
+        config = {
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 10),
+            "extracted dataset": {
+                "name": "test",
+                "description": "Day-averaged diatoms biomass at a point",
             },
             "selection": {
-                "grid y": {
-                    "y max": 3,
-                },
+                "lon lat point": {"lon": -123.5, "lat": 49.1},
+                "grid y": {"y min": 400, "y max": 401},
+                "grid x": {"x min": 250, "x max": 251},
             },
-            "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        extracted_ds = extract.calc_extracted_dataset(
+            [], {"time": numpy.arange(2)}, config, "`reshapr extract test.yaml`"
         )
 
-        assert output_coords["gridY"].name == "gridY"
-        assert numpy.array_equal(
-            output_coords["gridY"].data, source_dataset.y.isel(y=slice(0, 3))
-        )
-        assert output_coords["gridY"].attrs["standard_name"] == "y"
-        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
-        assert output_coords["gridY"].attrs["units"] == "count"
-        assert (
-            output_coords["gridY"].attrs["comment"]
-            == "gridY values are grid indices in the model y-direction"
+        assert extracted_ds.attrs["geo_selection"] == (
+            "lon lat point: lon: -123.5, lat: 49.1; "
+            "resolved to grid y: 400:401, grid x: 250:251"
         )
 
-        assert log_output.entries[2]["log_level"] == "debug"
-        assert log_output.entries[2]["event"] == "extraction y coordinate"
 
-    def test_y_index_coord_selection_y_interval(
-        self, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+class TestCalcSourceVars:
+    """Unit tests for _calc_source_vars() function."""
+
+    def test_extract_vars(self):
+        config = {"extract variables": ["diatoms", "nitrate"]}
+
+        assert extract._calc_source_vars(config) == {"diatoms", "nitrate"}
+
+    def test_reduce_depth_cell_thickness_var(self):
+        config = {
+            "extract variables": ["votemper"],
+            "reduce": {"depth": {"cell thickness var": "e3t_cell"}},
+        }
+
+        assert extract._calc_source_vars(config) == {"votemper", "e3t_cell"}
+
+    def test_reduce_depth_mesh_mask(self):
+        config = {
+            "extract variables": ["votemper"],
+            "reduce": {"depth": {"mesh mask": "mesh_mask.nc"}},
+        }
+
+        assert extract._calc_source_vars(config) == {"votemper"}
+
+    def test_column_kernel_input_vars(self):
+        config = {
+            "extract variables": ["votemper"],
+            "column kernels": {
+                "mld": {"kernel": "mixed layer depth", "variable": "sigma_theta"},
             },
-            "selection": {
-                "grid y": {
-                    "y interval": 2,
-                },
+        }
+
+        assert extract._calc_source_vars(config) == {"votemper", "sigma_theta"}
+
+    def test_vector_field_u_var(self):
+        config = {
+            "extract variables": [],
+            "vector field": {
+                "u variable": "vozocrtx",
+                "v variables group": "v velocity",
+                "v variable": "vomecrty",
             },
-            "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
-        )
+        assert extract._calc_source_vars(config) == {"vozocrtx"}
 
-        assert output_coords["gridY"].name == "gridY"
-        assert numpy.array_equal(
-            output_coords["gridY"].data, source_dataset.y.isel(y=slice(0, None, 2))
-        )
-        assert output_coords["gridY"].attrs["standard_name"] == "y"
-        assert output_coords["gridY"].attrs["long_name"] == "Grid Y"
-        assert output_coords["gridY"].attrs["units"] == "count"
-        assert (
-            output_coords["gridY"].attrs["comment"]
-            == "gridY values are grid indices in the model y-direction"
-        )
 
-        assert log_output.entries[2]["log_level"] == "debug"
-        assert log_output.entries[2]["event"] == "extraction y coordinate"
+class TestCalcSourceVarsDerivedVars:
+    """Unit tests for _calc_source_vars() function with derived variables."""
 
-    @pytest.mark.parametrize(
-        "use_model_coords, coord_name",
-        (
-            (True, "x"),
-            (False, "gridX"),
-        ),
-    )
-    def test_x_index_coord(
-        self, use_model_coords, coord_name, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
-            },
-            "extracted dataset": {
-                "use model coords": use_model_coords,
+    def test_expression_input_vars(self):
+        config = {
+            "extract variables": ["nitrate"],
+            "derived variables": {
+                "total_nitrogen": {
+                    "expression": "nitrate + ammonium + diatoms",
+                    "units": "mmol m-3",
+                },
+                "total_nitrogen_pct": {
+                    "expression": "100 * nitrate / total_nitrogen",
+                    "units": "percent",
+                },
             },
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
-        )
+        assert extract._calc_source_vars(config) == {"nitrate", "ammonium", "diatoms"}
 
-        assert output_coords[coord_name].name == coord_name
-        assert numpy.array_equal(output_coords[coord_name].data, source_dataset.x.data)
-        assert output_coords[coord_name].attrs["standard_name"] == "x"
-        assert output_coords[coord_name].attrs["long_name"] == "Grid X"
-        assert output_coords[coord_name].attrs["units"] == "count"
-        assert (
-            output_coords[coord_name].attrs["comment"]
-            == f"{coord_name} values are grid indices in the model x-direction"
-        )
+    def test_isopycnals_density_var(self):
+        config = {
+            "extract variables": ["votemper"],
+            "selection": {
+                "isopycnals": {"density var": "sigma_theta", "values": [24, 25]},
+            },
+        }
 
-        assert log_output.entries[3]["log_level"] == "debug"
-        assert log_output.entries[3]["event"] == "extraction x coordinate"
+        assert extract._calc_source_vars(config) == {"votemper", "sigma_theta"}
 
-    def test_x_index_coord_cast_to_int(self, log_output):
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(4),
-                "y": numpy.arange(9, dtype=float),
-                "x": numpy.arange(4, dtype=float),
+    def test_invalid_expression(self, log_output):
+        config = {
+            "extract variables": [],
+            "derived variables": {
+                "bad": {"expression": "__import__('os')", "units": "1"},
             },
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_source_vars(config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == "invalid derived variable expression"
+        assert log_output.entries[0]["derived_var"] == "bad"
+
+
+class TestCalcDerivedVars:
+    """Unit tests for _calc_derived_vars() function."""
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1h"),
+            "gridY": numpy.arange(3),
+            "gridX": numpy.arange(2),
+        }
+        return xarray.Dataset(
+            coords=coords,
             data_vars={
-                "atmpres": xarray.DataArray(
-                    name="atmpres",
-                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(4),
-                        "y": numpy.arange(9, dtype=float),
-                        "x": numpy.arange(4, dtype=float),
-                    },
-                    attrs={
-                        "short_name": "PRMSL_meansealevel",
-                        "long_name": "Pressure Reduced to MSL",
-                        "units": "Pa",
-                    },
+                "u_wind": xarray.DataArray(
+                    dask.array.full((2, 3, 2), 3, dtype=numpy.single, chunks=1),
+                    coords=coords,
+                    attrs={"long_name": "U Wind", "units": "m/s"},
+                ),
+                "v_wind": xarray.DataArray(
+                    dask.array.full((2, 3, 2), -4, dtype=numpy.single, chunks=1),
+                    coords=coords,
+                    attrs={"long_name": "V Wind", "units": "m/s"},
                 ),
             },
+            attrs={"name": "test_20150401_20150401"},
         )
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+
+    def test_derived_var(self, extracted_ds, log_output):
+        config = {
+            "extract variables": ["u_wind", "v_wind"],
+            "derived variables": {
+                "wind_speed": {
+                    "expression": "sqrt(u_wind**2 + v_wind**2)",
+                    "standard name": "wind_speed",
+                    "long name": "Wind Speed",
+                    "units": "m/s",
+                },
             },
-            "extracted dataset": {},
         }
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-                "units": "metres",
-                "comment": "gridY values are distance in metres in the model y-direction from the south-west corner of the grid",
-            },
-            "x coord": {
-                "name": "x",
-                "units": "metres",
-                "comment": "gridX values are distance in metres in the model x-direction from the south-west corner of the grid",
+
+        derived_ds = extract._calc_derived_vars(extracted_ds, config)
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "calculating derived variable"
+        assert log_output.entries[0]["derived_var"] == "wind_speed"
+        assert isinstance(derived_ds.wind_speed.data, dask.array.Array)
+        numpy.testing.assert_allclose(derived_ds.wind_speed, 5)
+        assert derived_ds.wind_speed.dims == ("time", "gridY", "gridX")
+        assert derived_ds.wind_speed.attrs == {
+            "standard_name": "wind_speed",
+            "long_name": "Wind Speed",
+            "units": "m/s",
+            "comment": "calculated from expression: sqrt(u_wind**2 + v_wind**2)",
+        }
+        assert "u_wind" in derived_ds.data_vars
+        assert derived_ds.attrs["name"] == "test_20150401_20150401"
+
+    def test_input_only_vars_dropped(self, extracted_ds, log_output):
+        config = {
+            "extract variables": ["u_wind"],
+            "derived variables": {
+                "wind_speed": {"expression": "hypot(u_wind, v_wind)", "units": "m/s"},
             },
-            "chunk size": {
-                "time": 4,
-                "y": 5,
-                "x": 4,
+        }
+
+        derived_ds = extract._calc_derived_vars(extracted_ds, config)
+
+        assert set(derived_ds.data_vars) == {"u_wind", "wind_speed"}
+        assert derived_ds.wind_speed.attrs["standard_name"] == "wind_speed"
+        assert derived_ds.wind_speed.attrs["long_name"] == "wind_speed"
+
+    def test_column_kernel_input_vars_kept(self, extracted_ds, log_output):
+        config = {
+            "extract variables": [],
+            "derived variables": {
+                "wind_speed": {"expression": "hypot(u_wind, v_wind)", "units": "m/s"},
             },
-            "extraction time origin": "2007-01-01",
-            "results archive": {
-                "datasets": {
-                    "hour": {
-                        "surface fields": {},
-                    }
-                }
+            "column kernels": {
+                "u_max_depth": {"kernel": "depth of maximum", "variable": "u_wind"},
             },
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
-        )
-
-        assert output_coords["gridX"].name == "gridX"
-        assert numpy.array_equal(output_coords["gridX"].data, source_dataset.x.data)
-        assert output_coords["gridX"].dtype == numpy.dtype(int)
-        assert output_coords["gridX"].attrs["standard_name"] == "x"
-        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
-        assert output_coords["gridX"].attrs["units"] == "metres"
-        assert (
-            output_coords["gridX"].attrs["comment"]
-            == "gridX values are distance in metres in the model x-direction from the south-west corner of the grid"
-        )
+        derived_ds = extract._calc_derived_vars(extracted_ds, config)
 
-        assert log_output.entries[2]["log_level"] == "debug"
-        assert log_output.entries[2]["event"] == "extraction x coordinate"
+        assert set(derived_ds.data_vars) == {"u_wind", "wind_speed"}
 
-    def test_x_index_coord_selection_x_min(
-        self, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
-            },
-            "selection": {
-                "grid x": {
-                    "x min": 1,
+    def test_chained_derived_vars(self, extracted_ds, log_output):
+        config = {
+            "extract variables": [],
+            "derived variables": {
+                "wind_speed": {"expression": "hypot(u_wind, v_wind)", "units": "m/s"},
+                "wind_stress_proxy": {
+                    "expression": "1.2e-3 * wind_speed**2",
+                    "units": "m2 s-2",
                 },
             },
-            "extracted dataset": {},
         }
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
-        )
-
-        assert output_coords["gridX"].name == "gridX"
-        # stop=None in slice() means the length of the array without having to know what that is
-        assert numpy.array_equal(
-            output_coords["gridX"].data, source_dataset.x.isel(x=slice(1, None))
-        )
-        assert output_coords["gridX"].attrs["standard_name"] == "x"
-        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
-        assert output_coords["gridX"].attrs["units"] == "count"
-        assert (
-            output_coords["gridX"].attrs["comment"]
-            == "gridX values are grid indices in the model x-direction"
-        )
+        derived_ds = extract._calc_derived_vars(extracted_ds, config)
 
-        assert log_output.entries[3]["log_level"] == "debug"
-        assert log_output.entries[3]["event"] == "extraction x coordinate"
+        assert set(derived_ds.data_vars) == {"wind_speed", "wind_stress_proxy"}
+        numpy.testing.assert_allclose(derived_ds.wind_stress_proxy, 0.03, rtol=1e-6)
 
-    def test_x_index_coord_selection_x_max(
-        self, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
+    def test_no_units(self, extracted_ds, log_output):
+        config = {
+            "extract variables": [],
+            "derived variables": {
+                "wind_speed": {"expression": "hypot(u_wind, v_wind)"},
             },
-            "selection": {
-                "grid x": {
-                    "x max": 3,
-                },
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_derived_vars(extracted_ds, config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == "derived variable has no units"
+
+    @pytest.mark.parametrize(
+        "expression",
+        (
+            "hypot(u_wind, w_wind)",
+            "2 * pi",
+            "u_wind + sqrt",
+            "sqrt()",
+            "sqrt(u_wind, v_wind)",
+        ),
+    )
+    def test_invalid_expression(self, expression, extracted_ds, log_output):
+        config = {
+            "extract variables": [],
+            "derived variables": {
+                "wind_speed": {"expression": expression, "units": "m/s"},
             },
-            "extracted dataset": {},
         }
-
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_derived_vars(extracted_ds, config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == "invalid derived variable expression"
+
+
+class TestOpenVectorVDataset:
+    """Unit tests for _open_vector_v_dataset() function."""
+
+    def test_no_vector_field(self):
+        config = {"extract variables": ["votemper"]}
+
+        with extract._open_vector_v_dataset(config, {}) as v_ds:
+            assert v_ds is None
+
+    def test_opened_with_model_profile(self, monkeypatch):
+        config = {
+            "dataset": {"time base": "day", "variables group": "grid U"},
+            "start date": datetime.date(2015, 1, 1),
+            "end date": datetime.date(2015, 1, 1),
+            "extract variables": ["vozocrtx"],
+            "vector field": {"v variables group": "grid V", "v variable": "vomecrty"},
+        }
+        model_profile = {"time coord": {"name": "time_counter"}}
+        monkeypatch.setattr(
+            extract, "calc_ds_paths", lambda config, model_profile: ["v.nc"]
         )
-
-        assert output_coords["gridX"].name == "gridX"
-        assert numpy.array_equal(
-            output_coords["gridX"].data, source_dataset.x.isel(x=slice(0, 3))
+        monkeypatch.setattr(
+            extract, "calc_ds_chunk_size", lambda config, model_profile: {}
         )
-        assert output_coords["gridX"].attrs["standard_name"] == "x"
-        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
-        assert output_coords["gridX"].attrs["units"] == "count"
-        assert (
-            output_coords["gridX"].attrs["comment"]
-            == "gridX values are grid indices in the model x-direction"
+        open_dataset_args = []
+        monkeypatch.setattr(
+            extract, "open_dataset", lambda *args: open_dataset_args.append(args)
         )
 
-        assert log_output.entries[3]["log_level"] == "debug"
-        assert log_output.entries[3]["event"] == "extraction x coordinate"
+        extract._open_vector_v_dataset(config, model_profile)
 
-    def test_x_index_coord_selection_x_interval(
-        self, source_dataset, model_profile, log_output
-    ):
-        extract_config = {
-            "dataset": {
-                "time base": "day",
-                "variables group": "biology",
-            },
-            "selection": {
-                "grid x": {
-                    "x interval": 2,
-                },
-            },
-            "extracted dataset": {},
+        ds_paths, _, v_config, v_model_profile = open_dataset_args[0]
+        assert ds_paths == ["v.nc"]
+        assert v_config["dataset"]["variables group"] == "grid V"
+        assert v_config["extract variables"] == ["vomecrty"]
+        assert v_model_profile is model_profile
+
+    def test_time_filters(self, monkeypatch):
+        config = {
+            "dataset": {"time base": "day", "variables group": "grid U"},
+            "start date": datetime.date(2015, 1, 30),
+            "end date": datetime.date(2015, 2, 2),
+            "extract variables": ["vozocrtx"],
+            "selection": {"months": [2], "grid y": {"y min": 1}},
+            "vector field": {"v variables group": "grid V", "v variable": "vomecrty"},
         }
+        model_profile = {"time coord": {"name": "time_counter"}}
+        ds_paths_configs = []
+        monkeypatch.setattr(
+            extract,
+            "calc_ds_paths",
+            lambda config, model_profile: ds_paths_configs.append(config) or ["v.nc"],
+        )
+        monkeypatch.setattr(
+            extract, "calc_ds_chunk_size", lambda config, model_profile: {}
+        )
+        monkeypatch.setattr(
+            extract,
+            "open_dataset",
+            lambda *args: xarray.Dataset(
+                coords={
+                    "time_counter": pandas.date_range(
+                        "2015-01-30 12:00", periods=4, freq="1D"
+                    )
+                }
+            ),
+        )
 
-        output_coords = extract.calc_output_coords(
-            source_dataset, extract_config, model_profile
+        v_ds = extract._open_vector_v_dataset(config, model_profile)
+
+        assert ds_paths_configs[0]["selection"] == {"months": [2]}
+        numpy.testing.assert_array_equal(
+            v_ds.time_counter,
+            pandas.date_range("2015-02-01 12:00", periods=2, freq="1D"),
         )
 
-        assert output_coords["gridX"].name == "gridX"
-        # stop=None in slice() means the length of the array without having to know what that is
-        assert numpy.array_equal(
-            output_coords["gridX"].data, source_dataset.x.isel(x=slice(0, None, 2))
+
+class TestOpenCompareDataset:
+    """Unit tests for _open_compare_dataset() function."""
+
+    def test_no_compare(self):
+        with extract._open_compare_dataset({}, None) as compare_ds:
+            assert compare_ds is None
+
+    def test_opened_with_compare_model_profile(self, monkeypatch):
+        config = {"extract variables": ["votemper"]}
+        compare_model_profile = {"time coord": {"name": "time_counter"}}
+        monkeypatch.setattr(
+            extract, "calc_ds_paths", lambda config, model_profile: ["compare.nc"]
         )
-        assert output_coords["gridX"].attrs["standard_name"] == "x"
-        assert output_coords["gridX"].attrs["long_name"] == "Grid X"
-        assert output_coords["gridX"].attrs["units"] == "count"
-        assert (
-            output_coords["gridX"].attrs["comment"]
-            == "gridX values are grid indices in the model x-direction"
+        monkeypatch.setattr(
+            extract, "calc_ds_chunk_size", lambda config, model_profile: {}
+        )
+        open_dataset_args = []
+        monkeypatch.setattr(
+            extract, "open_dataset", lambda *args: open_dataset_args.append(args)
         )
 
-        assert log_output.entries[3]["log_level"] == "debug"
-        assert log_output.entries[3]["event"] == "extraction x coordinate"
+        extract._open_compare_dataset(config, compare_model_profile)
 
+        assert open_dataset_args == [
+            (["compare.nc"], {}, config, compare_model_profile)
+        ]
 
-class TestCalcExtractedVars:
-    """Unit tests for calc_extracted_vars() function."""
+    def test_time_filters(self, monkeypatch):
+        config = {
+            "extract variables": ["votemper"],
+            "selection": {"months": [2]},
+        }
+        compare_model_profile = {"time coord": {"name": "time_counter"}}
+        monkeypatch.setattr(
+            extract, "calc_ds_paths", lambda config, model_profile: ["compare.nc"]
+        )
+        monkeypatch.setattr(
+            extract, "calc_ds_chunk_size", lambda config, model_profile: {}
+        )
+        monkeypatch.setattr(
+            extract,
+            "open_dataset",
+            lambda *args: xarray.Dataset(
+                coords={
+                    "time_counter": pandas.date_range(
+                        "2015-01-30 12:00", periods=4, freq="1D"
+                    )
+                }
+            ),
+        )
 
-    @pytest.fixture(name="source_dataset", scope="class")
-    def fixture_source_dataset(self):
+        compare_ds = extract._open_compare_dataset(config, compare_model_profile)
+
+        numpy.testing.assert_array_equal(
+            compare_ds.time_counter,
+            pandas.date_range("2015-02-01 12:00", periods=2, freq="1D"),
+        )
+
+
+class TestCalcVectorFieldVars:
+    """Unit tests for _calc_vector_field_vars() function."""
+
+    @pytest.fixture(name="source_ds")
+    def fixture_source_ds(self):
+        # u and v are 1 on their grid points, except in the northeast corner
+        u = numpy.ones((2, 2, 3, 3), dtype=numpy.single)
+        u[:, :, 2, 2] = 3
         return xarray.Dataset(
             coords={
-                "time_counter": numpy.arange(4),
-                "deptht": numpy.arange(0, 4, 0.5),
-                "y": numpy.arange(9),
-                "x": numpy.arange(4),
+                "time_counter": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+                "depthu": numpy.array([0.5, 1.5]),
             },
             data_vars={
-                "diatoms": xarray.DataArray(
-                    name="diatoms",
-                    data=numpy.ones((4, 8, 9, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(4),
-                        "deptht": numpy.arange(0, 4, 0.5),
-                        "y": numpy.arange(9),
-                        "x": numpy.arange(4),
-                    },
-                    attrs={
-                        "standard_name": "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water",
-                        "long_name": "Diatoms Concentration",
-                        "units": "mmol m-3",
+                "vozocrtx": (
+                    ("time_counter", "depthu", "y", "x"),
+                    u,
+                    {
+                        "standard_name": "sea_water_x_velocity",
+                        "long_name": "Velocity in the i-direction",
+                        "units": "m/s",
                     },
                 ),
+                "nav_lon": (("y", "x"), numpy.zeros((3, 3))),
+            },
+        ).set_coords("nav_lon")
+
+    @pytest.fixture(name="v_source_ds")
+    def fixture_v_source_ds(self):
+        return xarray.Dataset(
+            coords={
+                "time_counter": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+                "depthv": numpy.array([0.5, 1.5]),
             },
+            data_vars={
+                "vomecrty": (
+                    ("time_counter", "depthv", "y", "x"),
+                    numpy.zeros((2, 2, 3, 3), dtype=numpy.single),
+                    {
+                        "standard_name": "sea_water_y_velocity",
+                        "long_name": "Velocity in the j-direction",
+                        "units": "m/s",
+                    },
+                ),
+                "nav_lon": (("y", "x"), numpy.ones((3, 3))),
+            },
+        ).set_coords("nav_lon")
+
+    @pytest.fixture(name="mesh_mask")
+    def fixture_mesh_mask(self, tmp_path):
+        # Grid x-direction is rotated 30 degrees counter-clockwise from east
+        # near the equator
+        angle = numpy.radians(30)
+        j, i = numpy.meshgrid(numpy.arange(3), numpy.arange(3), indexing="ij")
+        glamu = 0.01 * (i * numpy.cos(angle) - j * numpy.sin(angle))
+        gphiu = 0.01 * (i * numpy.sin(angle) + j * numpy.cos(angle))
+        mesh_mask = xarray.Dataset(
+            data_vars={
+                "glamu": (("t", "y", "x"), glamu[numpy.newaxis]),
+                "gphiu": (("t", "y", "x"), gphiu[numpy.newaxis]),
+            }
         )
+        mesh_mask.to_netcdf(tmp_path / "mesh_mask.nc")
+        return tmp_path / "mesh_mask.nc"
 
-    @pytest.fixture(name="model_profile", scope="class")
+    @pytest.fixture(name="model_profile")
     def fixture_model_profile(self):
         return {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-            },
-            "x coord": {
-                "name": "x",
-            },
-            "chunk size": {
-                "time": 4,
-                "depth": 8,
-                "y": 9,
-                "x": 4,
-            },
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
             "results archive": {
                 "datasets": {
-                    "hour": {
-                        "biology": {
-                            "depth coord": "deptht",
-                        }
-                    }
-                }
+                    "day": {
+                        "u velocity": {"depth coord": "depthu"},
+                        "v velocity": {"depth coord": "depthv"},
+                    },
+                },
             },
         }
 
-    def test_extract_var(self, source_dataset, model_profile, log_output):
-        output_coords = {
-            "time": numpy.arange(4),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
-        }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "biology",
+    @staticmethod
+    def _config(vector_field):
+        return {
+            "dataset": {"time base": "day", "variables group": "u velocity"},
+            "vector field": {
+                "u variable": "vozocrtx",
+                "v variables group": "v velocity",
+                "v variable": "vomecrty",
+                **vector_field,
             },
-            "extracted dataset": {},
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+    def test_unstagger(self, source_ds, v_source_ds, model_profile, log_output):
+        config = self._config({"rotate": False})
+
+        vector_ds = extract._calc_vector_field_vars(
+            source_ds, v_source_ds, config, model_profile
         )
 
-        assert extracted_vars[0].name == "diatoms"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 8, 9, 4), dtype=numpy.single)
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "calculating vector field variables"
+        assert log_output.entries[0]["rotate"] is False
+        assert vector_ds.vozocrtx.dims == ("time_counter", "depthu", "y", "x")
+        assert vector_ds.vomecrty.dims == ("time_counter", "depthu", "y", "x")
+        numpy.testing.assert_array_equal(
+            vector_ds.vozocrtx.isel(time_counter=0, depthu=0),
+            [[numpy.nan, 1, 1], [numpy.nan, 1, 1], [numpy.nan, 1, 2]],
+        )
+        assert numpy.isnan(vector_ds.vomecrty.isel(y=0)).all()
+        numpy.testing.assert_array_equal(vector_ds.vomecrty.isel(y=slice(1, None)), 0)
+        assert vector_ds.vozocrtx.attrs["units"] == "m/s"
+
+    def test_rotate(self, source_ds, v_source_ds, mesh_mask, model_profile, log_output):
+        config = self._config({"mesh mask": mesh_mask})
+
+        vector_ds = extract._calc_vector_field_vars(
+            source_ds, v_source_ds, config, model_profile
         )
+
+        assert "vozocrtx" not in vector_ds.data_vars
+        assert "vomecrty" not in vector_ds.data_vars
+        east = vector_ds.eastward_velocity.isel(
+            time_counter=0, depthu=0, y=slice(1, 2), x=slice(1, None)
+        )
+        north = vector_ds.northward_velocity.isel(
+            time_counter=0, depthu=0, y=slice(1, 2), x=slice(1, None)
+        )
+        numpy.testing.assert_allclose(east, numpy.cos(numpy.radians(30)), rtol=1e-4)
+        numpy.testing.assert_allclose(north, numpy.sin(numpy.radians(30)), rtol=1e-4)
         assert (
-            extracted_vars[0].attrs["standard_name"]
-            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
+            vector_ds.eastward_velocity.attrs["standard_name"]
+            == "eastward_sea_water_velocity"
         )
-        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
-        assert extracted_vars[0].attrs["units"] == "mmol m-3"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
+        assert (
+            vector_ds.northward_velocity.attrs["standard_name"]
+            == "northward_sea_water_velocity"
+        )
+        assert "speed" not in vector_ds.data_vars
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted diatoms"
+    def test_model_profile_mesh_mask(
+        self, source_ds, v_source_ds, mesh_mask, model_profile, log_output
+    ):
+        config = self._config({})
+        model_profile["mesh mask"] = mesh_mask
 
-    def test_short_name_as_standard_name(self, log_output):
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(24),
-                "y": numpy.arange(5),
-                "x": numpy.arange(4),
-            },
-            data_vars={
-                "atmpres": xarray.DataArray(
-                    name="atmpres",
-                    data=numpy.ones((24, 5, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(24),
-                        "y": numpy.arange(5),
-                        "x": numpy.arange(4),
-                    },
-                    attrs={
-                        "short_name": "PRMSL_meansealevel",
-                        "long_name": "Pressure Reduced to MSL",
-                        "units": "Pa",
-                    },
-                ),
-            },
+        vector_ds = extract._calc_vector_field_vars(
+            source_ds, v_source_ds, config, model_profile
         )
-        output_coords = {
-            "time": numpy.arange(24),
-            "gridY": numpy.arange(5),
-            "gridX": numpy.arange(4),
-        }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "surface fields",
-            },
-            "extracted dataset": {},
-        }
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-            },
-            "x coord": {
-                "name": "x",
-            },
-            "chunk size": {
-                "time": 24,
-                "y": 5,
-                "x": 4,
-            },
-            "results archive": {
-                "datasets": {
-                    "hour": {
-                        "surface fields": {},
-                    }
-                }
-            },
-        }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+        assert "eastward_velocity" in vector_ds.data_vars
+
+    def test_speed_and_direction(
+        self, source_ds, v_source_ds, mesh_mask, model_profile, log_output
+    ):
+        config = self._config({"mesh mask": mesh_mask, "speed and direction": True})
+
+        vector_ds = extract._calc_vector_field_vars(
+            source_ds, v_source_ds, config, model_profile
         )
 
-        assert extracted_vars[0].name == "atmpres"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((24, 5, 4), dtype=numpy.single)
+        interior = {"y": slice(1, 2), "x": slice(1, None)}
+        numpy.testing.assert_allclose(vector_ds.speed.isel(interior), 1, rtol=1e-4)
+        numpy.testing.assert_allclose(vector_ds.direction.isel(interior), 60, rtol=1e-3)
+        assert vector_ds.speed.attrs["standard_name"] == "sea_water_speed"
+        assert vector_ds.direction.attrs["units"] == "degree"
+
+    def test_speed_and_direction_without_rotation(
+        self, source_ds, v_source_ds, model_profile, log_output
+    ):
+        config = self._config({"rotate": False, "speed and direction": True})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_vector_field_vars(
+                source_ds, v_source_ds, config, model_profile
+            )
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert (
+            log_output.entries[0]["event"]
+            == "vector field speed and direction require rotation to east and north"
         )
-        assert extracted_vars[0].attrs["standard_name"] == "PRMSL_meansealevel"
-        assert extracted_vars[0].attrs["long_name"] == "Pressure Reduced to MSL"
-        assert extracted_vars[0].attrs["units"] == "Pa"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
+
+    def test_rotation_without_mesh_mask(
+        self, source_ds, v_source_ds, model_profile, log_output
+    ):
+        config = self._config({})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_vector_field_vars(
+                source_ds, v_source_ds, config, model_profile
             )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted atmpres"
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[0]["event"]
+            == "vector field rotation requires a mesh mask"
+        )
+
+
+class TestCalcGridAngles:
+    """Unit test for _calc_grid_angles() function."""
+
+    def test_grid_angles(self):
+        glamu = numpy.array([[-123.0, -122.99, -122.98]])
+        gphiu = numpy.array([[49.0, 49.0, 49.0]])
+
+        angles = extract._calc_grid_angles(glamu, gphiu, "y", "x")
+
+        assert angles.dims == ("y", "x")
+        assert numpy.isnan(angles[0, 0])
+        numpy.testing.assert_allclose(angles[0, 1:], 0, atol=1e-12)
+
 
-    def test_variable_name_as_standard_name(self, log_output):
-        """Fall back to use variable name as standard_name if neither standard_name nor short_name
-        attributes are present in the source dataset.
+class TestCalcColumnKernelVars:
+    """Unit tests for _calc_column_kernel_vars() function."""
 
-        This is in line with the implications of
-        https://cfconventions.org/Data/cf-conventions/cf-conventions-1.10/cf-conventions.html#long-name
-        """
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(24),
-                "deptht": numpy.arange(0, 4, 0.5),
-                "y": numpy.arange(9),
-                "x": numpy.arange(4),
-            },
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "depth": numpy.array([0.5, 5, 10, 15, 20, 25]),
+            "gridY": numpy.arange(3),
+            "gridX": numpy.arange(2),
+        }
+        sigma_theta = numpy.array([20.0, 20.0, 20.0, 20.01, 20.05, 21.0])
+        return xarray.Dataset(
+            coords=coords,
             data_vars={
-                "outfall": xarray.DataArray(
-                    name="outfall",
-                    data=numpy.ones((24, 8, 9, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(24),
-                        "deptht": numpy.arange(0, 4, 0.5),
-                        "y": numpy.arange(9),
-                        "x": numpy.arange(4),
+                "sigma_theta": xarray.DataArray(
+                    name="sigma_theta",
+                    data=numpy.broadcast_to(
+                        sigma_theta[numpy.newaxis, :, numpy.newaxis, numpy.newaxis],
+                        (2, 6, 3, 2),
+                    ),
+                    coords=coords,
+                    attrs={
+                        "standard_name": "sea_water_sigma_theta",
+                        "long_name": "Potential Density Anomaly",
+                        "units": "kg m-3",
                     },
+                ),
+                "votemper": xarray.DataArray(
+                    name="votemper",
+                    data=numpy.ones((2, 6, 3, 2)),
+                    coords=coords,
                     attrs={
-                        "long_name": "Iona Outfall Water Tracer",
-                        "units": "m3 m-3",
+                        "standard_name": "sea_water_conservative_temperature",
+                        "long_name": "Conservative Temperature",
+                        "units": "degree_C",
                     },
                 ),
             },
         )
-        output_coords = {
-            "time": numpy.arange(24),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
-        }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "physics tracers",
-            },
-            "extracted dataset": {},
-        }
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-            },
-            "x coord": {
-                "name": "x",
-            },
-            "chunk size": {
-                "time": 1,
-                "depth": 8,
-                "y": 9,
-                "x": 4,
-            },
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {
             "results archive": {
                 "datasets": {
-                    "hour": {
+                    "day": {
                         "physics tracers": {
                             "depth coord": "deptht",
                         }
@@ -2152,579 +6041,1414 @@ class TestCalcExtractedVars:
             },
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+    @staticmethod
+    def _config(column_kernels, extract_vars=("votemper",)):
+        return {
+            "dataset": {
+                "time base": "day",
+                "variables group": "physics tracers",
+            },
+            "extract variables": list(extract_vars),
+            "column kernels": column_kernels,
+            "extracted dataset": {},
+        }
+
+    def test_kernel_var(self, extracted_ds, model_profile, log_output):
+        config = self._config(
+            {"mld": {"kernel": "mixed layer depth", "variable": "sigma_theta"}}
         )
 
-        assert extracted_vars[0].name == "outfall"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((24, 8, 9, 4), dtype=numpy.single)
+        kernel_ds = extract._calc_column_kernel_vars(
+            extracted_ds, config, model_profile
         )
-        assert extracted_vars[0].attrs["standard_name"] == "outfall"
-        assert extracted_vars[0].attrs["long_name"] == "Iona Outfall Water Tracer"
-        assert extracted_vars[0].attrs["units"] == "m3 m-3"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted outfall"
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "calculating column kernel variable"
+        assert log_output.entries[0]["kernel"] == "mixed layer depth"
+        assert log_output.entries[0]["variable"] == "sigma_theta"
+        assert log_output.entries[0]["output_var"] == "mld"
+        assert kernel_ds.mld.dims == ("time", "gridY", "gridX")
+        numpy.testing.assert_allclose(kernel_ds.mld, 17.5)
+        assert kernel_ds.mld.attrs == {
+            "standard_name": "mld",
+            "long_name": "Mixed Layer Depth",
+            "units": "m",
+            "comment": "calculated by mixed layer depth column kernel from sigma_theta",
+        }
 
-    def test_extract_var_model_coords(self, log_output):
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(4),
-                "depthu": numpy.arange(0, 4, 0.5),
-                "y": numpy.arange(9),
-                "x": numpy.arange(4),
+    def test_input_only_var_dropped(self, extracted_ds, model_profile, log_output):
+        config = self._config(
+            {"mld": {"kernel": "mixed layer depth", "variable": "sigma_theta"}}
+        )
+
+        kernel_ds = extract._calc_column_kernel_vars(
+            extracted_ds, config, model_profile
+        )
+
+        assert set(kernel_ds.data_vars) == {"votemper", "mld"}
+
+    def test_extracted_input_var_kept(self, extracted_ds, model_profile, log_output):
+        config = self._config(
+            {"mld": {"kernel": "mixed layer depth", "variable": "sigma_theta"}},
+            extract_vars=("votemper", "sigma_theta"),
+        )
+
+        kernel_ds = extract._calc_column_kernel_vars(
+            extracted_ds, config, model_profile
+        )
+
+        assert set(kernel_ds.data_vars) == {"votemper", "sigma_theta", "mld"}
+
+    def test_kernel_parameters(self, extracted_ds, model_profile, log_output):
+        config = self._config(
+            {
+                "mld": {
+                    "kernel": "mixed layer depth",
+                    "variable": "sigma_theta",
+                    "parameters": {"threshold": 0.5, "reference depth": 0},
+                }
+            }
+        )
+
+        kernel_ds = extract._calc_column_kernel_vars(
+            extracted_ds, config, model_profile
+        )
+
+        assert log_output.entries[0]["params"] == {
+            "threshold": 0.5,
+            "reference_depth": 0,
+        }
+        numpy.testing.assert_allclose(kernel_ds.mld, 20 + 0.45 / 0.95 * 5)
+
+    def test_unregistered_kernel(self, extracted_ds, model_profile, log_output):
+        config = self._config(
+            {"mld": {"kernel": "no such kernel", "variable": "sigma_theta"}}
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_column_kernel_vars(extracted_ds, config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == "column kernel not found"
+        assert log_output.entries[0]["kernel"] == "no such kernel"
+
+    def test_no_depth_coord(self, extracted_ds, model_profile, log_output):
+        config = self._config(
+            {"mld": {"kernel": "mixed layer depth", "variable": "sigma_theta"}}
+        )
+        surface_ds = extracted_ds.isel(depth=0, drop=True)
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._calc_column_kernel_vars(surface_ds, config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        expected = "column kernel input variable has no depth coordinate"
+        assert log_output.entries[0]["event"] == expected
+
+
+class TestSelectTransect:
+    """Unit tests for _select_transect() function."""
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", os.fspath(tmp_path / "cache"))
+        lons, lats = numpy.meshgrid(
+            -124.0 + 0.1 * numpy.arange(3), 49.0 + 0.1 * numpy.arange(4)
+        )
+        xarray.Dataset(
+            {
+                "longitude": (("gridY", "gridX"), lons),
+                "latitude": (("gridY", "gridX"), lats),
+            }
+        ).to_netcdf(tmp_path / "geo_ref.nc")
+        return {
+            "geo ref dataset": {
+                "path": tmp_path / "geo_ref.nc",
+                "y coord": "gridY",
+                "x coord": "gridX",
+            },
+            "time coord": {"name": "time_counter"},
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
+        }
+
+    @pytest.fixture(name="config")
+    def fixture_config(self):
+        return {
+            "selection": {
+                "transect": {"waypoints": [[-124.0, 49.1], [-123.8, 49.1]]},
+                "grid y": {"y min": 1, "y max": 2},
+                "grid x": {"x min": 0, "x max": 3},
             },
+            "extracted dataset": {},
+        }
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "depth": numpy.array([0.5, 1.5]),
+            "gridY": numpy.arange(1, 2),
+            "gridX": numpy.arange(3),
+        }
+        votemper = dask.array.from_array(
+            numpy.arange(12, dtype=numpy.single).reshape((2, 2, 1, 3)),
+            chunks=(1, 2, 1, 3),
+        )
+        return xarray.Dataset(
+            coords=coords,
             data_vars={
-                "vozocrtx": xarray.DataArray(
-                    name="vozocrtx",
-                    data=numpy.ones((4, 8, 9, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(4),
-                        "depthu": numpy.arange(0, 4, 0.5),
-                        "y": numpy.arange(9),
-                        "x": numpy.arange(4),
-                    },
+                "votemper": xarray.DataArray(
+                    data=votemper,
+                    coords=coords,
                     attrs={
-                        "standard_name": "sea_water_x_velocity",
-                        "long_name": "Ocean Current Along x-Axis",
-                        "units": "m s-1",
+                        "long_name": "Conservative Temperature",
+                        "units": "degree_C",
                     },
-                ),
+                )
             },
+            attrs={"name": "test_20150401_20150402"},
         )
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-            },
-            "x coord": {
-                "name": "x",
-            },
-            "chunk size": {
-                "time": 4,
-                "depth": 8,
-                "y": 9,
-                "x": 4,
-            },
-            "results archive": {
-                "datasets": {
-                    "hour": {
-                        "u velocity": {
-                            "depth coord": "depthu",
-                        }
-                    }
-                }
+
+    def test_select_transect(self, extracted_ds, config, model_profile, log_output):
+        transect_ds = extract._select_transect(extracted_ds, config, model_profile)
+
+        assert transect_ds.votemper.dims == ("time", "depth", "distance")
+        numpy.testing.assert_array_equal(
+            transect_ds.votemper.isel(time=0, depth=0), [0, 1, 2]
+        )
+        numpy.testing.assert_array_equal(transect_ds.gridY, [1, 1, 1])
+        numpy.testing.assert_array_equal(transect_ds.gridX, [0, 1, 2])
+        numpy.testing.assert_allclose(transect_ds.distance, [0, 7280, 14561], rtol=1e-3)
+        assert transect_ds.distance.attrs == {
+            "long_name": "Distance Along Transect",
+            "units": "m",
+        }
+        assert transect_ds.votemper.attrs["units"] == "degree_C"
+        assert log_output.entries[-1]["event"] == "selecting transect"
+
+    def test_lazy(self, extracted_ds, config, model_profile, log_output):
+        transect_ds = extract._select_transect(extracted_ds, config, model_profile)
+
+        assert isinstance(transect_ds.votemper.data, dask.array.Array)
+
+    def test_model_coords(self, extracted_ds, config, model_profile, log_output):
+        config["extracted dataset"]["use model coords"] = True
+        extracted_ds = extracted_ds.rename(
+            {"time": "time_counter", "depth": "deptht", "gridY": "y", "gridX": "x"}
+        )
+        config["dataset"] = {"time base": "day", "variables group": "physics tracers"}
+        model_profile["results archive"] = {
+            "datasets": {"day": {"physics tracers": {"depth coord": "deptht"}}}
+        }
+
+        transect_ds = extract._select_transect(extracted_ds, config, model_profile)
+
+        assert transect_ds.votemper.dims == ("time_counter", "deptht", "distance")
+
+
+class TestLoadCompareModelProfile:
+    """Unit tests for _load_compare_model_profile() function."""
+
+    def test_no_compare(self):
+        assert extract._load_compare_model_profile({}) is None
+
+    def test_load_model_profile(self, tmp_path, log_output):
+        model_profile_yaml = tmp_path / "compare_profile.yaml"
+        model_profile_yaml.write_text(textwrap.dedent(f"""\
+                results archive:
+                  path: {tmp_path}
+                """))
+        config = {"compare": {"model profile": os.fspath(model_profile_yaml)}}
+
+        model_profile = extract._load_compare_model_profile(config)
+
+        assert model_profile["results archive"]["path"] == os.fspath(tmp_path)
+
+    @pytest.mark.parametrize("outputs", ([], ["difference", "skill"]))
+    def test_unknown_output(self, outputs, log_output):
+        config = {"compare": {"model profile": "foo.yaml", "output": outputs}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_compare_model_profile(config)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert log_output.entries[-1]["event"] == "unknown compare output"
+
+    @pytest.mark.parametrize("stage", ("resample", "climatology"))
+    def test_statistics_time_aggregation(self, stage, log_output):
+        config = {
+            "compare": {"model profile": "foo.yaml", "output": ["bias"]},
+            stage: {},
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_compare_model_profile(config)
+
+        assert exc_info.value.code == 2
+        expected = "resample and climatology of compare statistics are not supported"
+        assert log_output.entries[-1]["event"] == expected
+
+    def test_vector_field(self, log_output):
+        config = {"compare": {"model profile": "foo.yaml"}, "vector field": {}}
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_compare_model_profile(config)
+
+        assert exc_info.value.code == 2
+        expected = "compare extractions of vector fields are not supported"
+        assert log_output.entries[-1]["event"] == expected
+
+    def test_reduce_depth_no_mesh_mask(self, log_output):
+        config = {
+            "compare": {"model profile": "foo.yaml"},
+            "reduce": {"depth": {"aggregation": "mean"}},
+        }
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._load_compare_model_profile(config)
+
+        assert exc_info.value.code == 2
+        expected = (
+            "compare extractions with depth reduction require a reduce depth mesh mask"
+        )
+        assert log_output.entries[-1]["event"] == expected
+        assert log_output.entries[-1]["cell_thickness_var"] == "e3t"
+
+
+class TestCompare:
+    """Unit tests for _compare() function."""
+
+    @pytest.fixture(name="config")
+    def fixture_config(self):
+        return {
+            "dataset": {"model profile": "new.yaml"},
+            "compare": {"model profile": "old.yaml"},
+            "extracted dataset": {},
+        }
+
+    @staticmethod
+    def _extracted_ds(start, values):
+        coords = {
+            "time": pandas.date_range(start, periods=len(values), freq="1D"),
+            "gridY": numpy.arange(1, 3),
+        }
+        data = dask.array.from_array(
+            numpy.array(values, dtype=numpy.single)[:, numpy.newaxis]
+            * numpy.ones((1, 2), dtype=numpy.single),
+            chunks=(1, 2),
+        )
+        return xarray.Dataset(
+            coords=coords,
+            data_vars={
+                "votemper": xarray.DataArray(
+                    data=data,
+                    coords=coords,
+                    attrs={"long_name": "Conservative Temperature", "units": "degC"},
+                )
             },
+            attrs={"name": "test_20150401_20150403"},
+        )
+
+    def test_difference(self, config, log_output):
+        extracted_ds = self._extracted_ds("2015-04-01", [1, 2, 3])
+        compare_ds = self._extracted_ds("2015-04-02", [0, 0, 0])
+
+        compared_ds = extract._compare(extracted_ds, compare_ds, config, {})
+
+        assert list(compared_ds.data_vars) == ["votemper_difference"]
+        difference = compared_ds.votemper_difference
+        assert isinstance(difference.data, dask.array.Array)
+        numpy.testing.assert_array_equal(
+            difference.time, pandas.date_range("2015-04-02", periods=2, freq="1D")
+        )
+        numpy.testing.assert_array_equal(difference, [[2, 2], [3, 3]])
+        assert difference.attrs == {
+            "long_name": "Conservative Temperature Difference",
+            "units": "degC",
         }
-        output_coords = {
-            "time_counter": numpy.arange(4),
-            "depthu": numpy.arange(0, 4, 0.5),
-            "y": numpy.arange(9),
-            "x": numpy.arange(4),
+        assert compared_ds.attrs["name"] == "test_20150401_20150403"
+        assert compared_ds.attrs["comparison"] == "new.yaml minus old.yaml"
+        assert log_output.entries[-1]["event"] == "compared datasets"
+        assert log_output.entries[-1]["n_times"] == 2
+
+    def test_statistics(self, config, log_output):
+        config["compare"]["output"] = ["bias", "rmse"]
+        extracted_ds = self._extracted_ds("2015-04-01", [1, 2, 3])
+        compare_ds = self._extracted_ds("2015-04-01", [2, 2, 2])
+
+        compared_ds = extract._compare(extracted_ds, compare_ds, config, {})
+
+        assert list(compared_ds.data_vars) == ["votemper_bias", "votemper_rmse"]
+        assert compared_ds.votemper_bias.dims == ("gridY",)
+        numpy.testing.assert_allclose(compared_ds.votemper_bias, [0, 0])
+        numpy.testing.assert_allclose(compared_ds.votemper_rmse, [(2 / 3) ** 0.5] * 2)
+        assert (
+            compared_ds.votemper_bias.attrs["long_name"]
+            == "Conservative Temperature Bias"
+        )
+
+    def test_no_common_times(self, config, log_output):
+        extracted_ds = self._extracted_ds("2015-04-01", [1, 2])
+        compare_ds = self._extracted_ds("2015-05-01", [1, 2])
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._compare(extracted_ds, compare_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["event"] == "no common times in compared datasets"
+
+    def test_different_grids(self, config, log_output):
+        extracted_ds = self._extracted_ds("2015-04-01", [1, 2])
+        compare_ds = self._extracted_ds("2015-04-01", [1, 2]).isel(gridY=[0])
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._compare(extracted_ds, compare_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[-1]["event"] == "compared datasets have different grids"
+        )
+
+
+class TestInterpolateVertical:
+    """Unit tests for _interpolate_vertical() function."""
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "depth": xarray.DataArray(
+                numpy.array([1.0, 2.0, 4.0]),
+                dims="depth",
+                attrs={"long_name": "Sea Floor Depth", "units": "metres"},
+            ),
+            "gridY": numpy.arange(2),
+            "gridX": numpy.arange(2),
         }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "u velocity",
-            },
-            "extracted dataset": {
-                "use model coords": True,
+        votemper = numpy.broadcast_to(
+            numpy.array([10, 8, 4], dtype=numpy.single)[
+                numpy.newaxis, :, numpy.newaxis, numpy.newaxis
+            ],
+            (2, 3, 2, 2),
+        )
+        sigma_theta = numpy.broadcast_to(
+            numpy.array([22, 23, 25], dtype=numpy.single)[
+                numpy.newaxis, :, numpy.newaxis, numpy.newaxis
+            ],
+            (2, 3, 2, 2),
+        )
+        return xarray.Dataset(
+            coords=coords,
+            data_vars={
+                "votemper": xarray.DataArray(
+                    data=votemper,
+                    coords=coords,
+                    attrs={
+                        "standard_name": "sea_water_conservative_temperature",
+                        "long_name": "Conservative Temperature",
+                        "units": "degree_C",
+                    },
+                ),
+                "sigma_theta": xarray.DataArray(
+                    data=sigma_theta,
+                    coords=coords,
+                    attrs={
+                        "standard_name": "sea_water_sigma_theta",
+                        "long_name": "Potential Density Anomaly",
+                        "units": "kg m-3",
+                    },
+                ),
+                "sossheig": xarray.DataArray(
+                    data=numpy.zeros((2, 2, 2), dtype=numpy.single),
+                    coords={
+                        "time": coords["time"],
+                        "gridY": coords["gridY"],
+                        "gridX": coords["gridX"],
+                    },
+                    attrs={"long_name": "Sea Surface Height", "units": "m"},
+                ),
             },
+            attrs={"name": "test_20150401_20150402"},
+        )
+
+    @staticmethod
+    def _config(selection):
+        return {
+            "dataset": {"time base": "day", "variables group": "physics tracers"},
+            "selection": selection,
+            "extracted dataset": {},
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+    def test_depths(self, extracted_ds, log_output):
+        config = self._config({"depths": [1.5, 3]})
+
+        interpolated_ds = extract._interpolate_vertical(extracted_ds, config, {})
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "interpolating dataset to depths"
+        assert log_output.entries[0]["depths"] == [1.5, 3]
+        numpy.testing.assert_array_equal(interpolated_ds.depth, [1.5, 3])
+        assert interpolated_ds.depth.attrs["units"] == "metres"
+        assert interpolated_ds.votemper.dims == ("time", "depth", "gridY", "gridX")
+        numpy.testing.assert_allclose(
+            interpolated_ds.votemper.isel(time=0, gridY=0, gridX=0), [9, 6]
+        )
+        assert interpolated_ds.votemper.attrs["units"] == "degree_C"
+        assert interpolated_ds.sossheig.dims == ("time", "gridY", "gridX")
+        assert interpolated_ds.attrs["name"] == "test_20150401_20150402"
+
+    def test_isopycnals(self, extracted_ds, log_output):
+        config = self._config(
+            {"isopycnals": {"density var": "sigma_theta", "values": [22.5, 24]}}
+        )
+
+        interpolated_ds = extract._interpolate_vertical(extracted_ds, config, {})
+
+        assert log_output.entries[0]["event"] == "interpolating dataset to isopycnals"
+        assert log_output.entries[0]["density_var"] == "sigma_theta"
+        assert "sigma_theta" not in interpolated_ds.data_vars
+        assert "depth" not in interpolated_ds.coords
+        numpy.testing.assert_array_equal(interpolated_ds.isopycnal, [22.5, 24])
+        assert interpolated_ds.isopycnal.attrs["units"] == "kg m-3"
+        assert interpolated_ds.votemper.dims == ("time", "isopycnal", "gridY", "gridX")
+        numpy.testing.assert_allclose(
+            interpolated_ds.votemper.isel(time=0, gridY=0, gridX=0), [9, 6]
+        )
+        numpy.testing.assert_allclose(
+            interpolated_ds.isopycnal_depth.isel(time=0, gridY=0, gridX=0), [1.5, 3]
+        )
+        assert interpolated_ds.isopycnal_depth.attrs["long_name"] == "Isopycnal Depth"
+        assert interpolated_ds.sossheig.dims == ("time", "gridY", "gridX")
+
+    def test_depths_and_isopycnals(self, extracted_ds, log_output):
+        config = self._config(
+            {
+                "depths": [5],
+                "isopycnals": {"density var": "sigma_theta", "values": [24]},
+            }
         )
 
-        assert extracted_vars[0].name == "vozocrtx"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 8, 9, 4), dtype=numpy.single)
+        with pytest.raises(SystemExit) as exc_info:
+            extract._interpolate_vertical(extracted_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == (
+            "vertical interpolation to both depths and isopycnals is not supported"
         )
-        assert extracted_vars[0].attrs["standard_name"] == "sea_water_x_velocity"
-        assert extracted_vars[0].attrs["long_name"] == "Ocean Current Along x-Axis"
-        assert extracted_vars[0].attrs["units"] == "m s-1"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted vozocrtx"
+    def test_no_depth_coord(self, extracted_ds, log_output):
+        config = self._config({"depths": [5]})
 
-    def test_extract_var_no_depth_coord(self, log_output):
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(24),
-                "y": numpy.arange(5),
-                "x": numpy.arange(4),
-            },
+        with pytest.raises(SystemExit) as exc_info:
+            extract._interpolate_vertical(extracted_ds[["sossheig"]], config, {})
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[0]["event"]
+            == "vertical interpolation requires a depth coordinate"
+        )
+
+
+class TestReduceDepth:
+    """Unit tests for _reduce_depth() function."""
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "depth": numpy.array([0.5, 1.5, 3, 5]),
+            "gridY": numpy.arange(3),
+            "gridX": numpy.arange(2),
+        }
+        return xarray.Dataset(
+            coords=coords,
             data_vars={
-                "atmpres": xarray.DataArray(
-                    name="atmpres",
-                    data=numpy.ones((24, 5, 4), dtype=numpy.single),
+                "nitrate": xarray.DataArray(
+                    name="nitrate",
+                    data=numpy.broadcast_to(
+                        numpy.array([1, 2, 3, 4], dtype=numpy.single)[
+                            numpy.newaxis, :, numpy.newaxis, numpy.newaxis
+                        ],
+                        (2, 4, 3, 2),
+                    ),
+                    coords=coords,
+                    attrs={
+                        "standard_name": "mole_concentration_of_nitrate_in_sea_water",
+                        "long_name": "Nitrate Concentration",
+                        "units": "mmol m-3",
+                    },
+                ),
+                "e3t": xarray.DataArray(
+                    name="e3t",
+                    data=numpy.broadcast_to(
+                        numpy.array([1, 1, 2, 2], dtype=numpy.single)[
+                            numpy.newaxis, :, numpy.newaxis, numpy.newaxis
+                        ],
+                        (2, 4, 3, 2),
+                    ),
+                    coords=coords,
+                    attrs={
+                        "standard_name": "cell_thickness",
+                        "long_name": "T-cell thickness",
+                        "units": "m",
+                    },
+                ),
+                "sossheig": xarray.DataArray(
+                    name="sossheig",
+                    data=numpy.zeros((2, 3, 2), dtype=numpy.single),
                     coords={
-                        "time_counter": numpy.arange(24),
-                        "y": numpy.arange(5),
-                        "x": numpy.arange(4),
+                        "time": coords["time"],
+                        "gridY": coords["gridY"],
+                        "gridX": coords["gridX"],
                     },
                     attrs={
-                        "short_name": "PRMSL_meansealevel",
-                        "long_name": "Pressure Reduced to MSL",
-                        "units": "Pa",
+                        "standard_name": "sea_surface_height_above_geoid",
+                        "long_name": "Sea Surface Height",
+                        "units": "m",
                     },
                 ),
             },
+            attrs={"name": "test_20150401_20150402"},
         )
-        output_coords = {
-            "time": numpy.arange(24),
-            "gridY": numpy.arange(5),
-            "gridX": numpy.arange(4),
-        }
-        config = {
+
+    @staticmethod
+    def _config(reduce_depth):
+        return {
             "dataset": {
-                "time base": "hour",
-                "variables group": "surface fields",
+                "time base": "day",
+                "variables group": "physics tracers",
             },
+            "reduce": {"depth": reduce_depth},
             "extracted dataset": {},
         }
-        model_profile = {
-            "time coord": {
-                "name": "time_counter",
-            },
-            "y coord": {
-                "name": "y",
-            },
-            "x coord": {
-                "name": "x",
-            },
-            "chunk size": {
-                "time": 24,
-                "y": 5,
-                "x": 4,
-            },
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {
             "results archive": {
                 "datasets": {
-                    "hour": {
-                        "surface fields": {},
+                    "day": {
+                        "physics tracers": {
+                            "depth coord": "deptht",
+                        }
                     }
                 }
             },
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+    def test_depth_integral(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "sum"})
+
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "reducing dataset over depth"
+        assert log_output.entries[0]["aggregation"] == "sum"
+        assert log_output.entries[0]["depth_range"] is None
+        assert "depth" not in reduced_ds.dims
+        assert "e3t" not in reduced_ds.data_vars
+        assert reduced_ds.nitrate.dims == ("time", "gridY", "gridX")
+        numpy.testing.assert_allclose(reduced_ds.nitrate, 1 + 2 + 3 * 2 + 4 * 2)
+        assert (
+            reduced_ds.nitrate.attrs["long_name"]
+            == "Depth-integrated Nitrate Concentration"
+        )
+        assert reduced_ds.nitrate.attrs["units"] == "mmol m-3 m"
+        assert (
+            reduced_ds.nitrate.attrs["cell_methods"]
+            == "depth: sum (comment: weighted by grid cell thickness)"
         )
+        assert reduced_ds.attrs["name"] == "test_20150401_20150402"
 
-        assert extracted_vars[0].name == "atmpres"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((24, 5, 4), dtype=numpy.single)
+    def test_depth_average(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "mean"})
+
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        numpy.testing.assert_allclose(reduced_ds.nitrate, 17 / 6, rtol=1e-6)
+        assert (
+            reduced_ds.nitrate.attrs["long_name"]
+            == "Depth-averaged Nitrate Concentration"
         )
-        assert extracted_vars[0].attrs["standard_name"] == "PRMSL_meansealevel"
-        assert extracted_vars[0].attrs["long_name"] == "Pressure Reduced to MSL"
-        assert extracted_vars[0].attrs["units"] == "Pa"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
+        assert reduced_ds.nitrate.attrs["units"] == "mmol m-3"
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted atmpres"
+    def test_default_aggregation_is_mean(self, extracted_ds, model_profile, log_output):
+        config = self._config({})
 
-    def test_extract_var_time_selection(
-        self, source_dataset, model_profile, log_output
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        assert log_output.entries[0]["aggregation"] == "mean"
+        numpy.testing.assert_allclose(reduced_ds.nitrate, 17 / 6, rtol=1e-6)
+
+    @pytest.mark.parametrize("aggregation, expected", (("min", 1), ("max", 4)))
+    def test_depth_min_max(
+        self, aggregation, expected, extracted_ds, model_profile, log_output
     ):
-        output_coords = {
-            "time": numpy.arange(2),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
+        config = self._config({"aggregation": aggregation})
+
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        numpy.testing.assert_allclose(reduced_ds.nitrate, expected)
+        assert reduced_ds.nitrate.attrs["cell_methods"] == f"depth: {aggregation}"
+
+    def test_depth_range(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "sum", "depth range": [1, 4]})
+
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        assert log_output.entries[0]["depth_range"] == [1, 4]
+        numpy.testing.assert_allclose(reduced_ds.nitrate, 2 + 3 * 2)
+        assert reduced_ds.nitrate.attrs["cell_methods"] == (
+            "depth: sum (comment: weighted by grid cell thickness, over 1 to 4 metres)"
+        )
+
+    def test_surface_var_passes_through(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "mean"})
+
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        xarray.testing.assert_identical(reduced_ds.sossheig, extracted_ds.sossheig)
+
+    def test_mesh_mask_cell_thickness(
+        self, extracted_ds, model_profile, log_output, tmp_path
+    ):
+        e3t_0 = numpy.broadcast_to(
+            numpy.array([2, 2, 2, 2, 2])[
+                numpy.newaxis, :, numpy.newaxis, numpy.newaxis
+            ],
+            (1, 5, 4, 2),
+        )
+        tmask = numpy.ones((1, 5, 4, 2), dtype=numpy.int8)
+        # Land column at gridY=0, gridX=0
+        tmask[0, :, 0, 0] = 0
+        mesh_mask = xarray.Dataset(
+            data_vars={
+                "e3t_0": (("t", "z", "y", "x"), e3t_0),
+                "tmask": (("t", "z", "y", "x"), tmask),
+            }
+        )
+        mesh_mask.to_netcdf(tmp_path / "mesh_mask.nc")
+        config = self._config(
+            {"aggregation": "mean", "mesh mask": tmp_path / "mesh_mask.nc"}
+        )
+        config["selection"] = {
+            "depth": {"depth max": 4},
+            "grid y": {"y max": 3},
         }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "biology",
-            },
-            "selection": {
-                "time interval": 2,
-            },
-            "extracted dataset": {},
+
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        # mesh mask cell thicknesses are used, so e3t var in dataset is also reduced
+        assert "e3t" in reduced_ds.data_vars
+        assert numpy.isnan(reduced_ds.nitrate.isel(gridY=0, gridX=0)).all()
+        numpy.testing.assert_allclose(
+            reduced_ds.nitrate.isel(gridY=slice(1, None)), 2.5
+        )
+
+    def test_model_profile_mesh_mask_land_mask(
+        self, extracted_ds, model_profile, log_output, tmp_path
+    ):
+        tmask = numpy.ones((1, 5, 4, 2), dtype=numpy.int8)
+        # Land column at gridY=0, gridX=0, and sea floor above depth 5 at gridY=1
+        tmask[0, :, 0, 0] = 0
+        tmask[0, 3:, 1, :] = 0
+        xarray.Dataset({"tmask": (("t", "z", "y", "x"), tmask)}).to_netcdf(
+            tmp_path / "mesh_mask.nc"
+        )
+        model_profile["mesh mask"] = tmp_path / "mesh_mask.nc"
+        config = self._config({"aggregation": "mean"})
+        config["selection"] = {
+            "depth": {"depth max": 4},
+            "grid y": {"y max": 3},
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+        reduced_ds = extract._reduce_depth(extracted_ds, config, model_profile)
+
+        # Cell thicknesses are from the e3t var in the dataset
+        assert "e3t" not in reduced_ds.data_vars
+        assert numpy.isnan(reduced_ds.nitrate.isel(gridY=0, gridX=0)).all()
+        # (1 + 2 + 3 * 2) / (1 + 1 + 2)
+        numpy.testing.assert_allclose(reduced_ds.nitrate.isel(gridY=1), 2.25)
+        numpy.testing.assert_allclose(reduced_ds.nitrate.isel(gridY=2), 17 / 6)
+        assert "warning" not in {entry["log_level"] for entry in log_output.entries}
+
+    def test_no_land_mask(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "mean"})
+
+        extract._reduce_depth(extracted_ds, config, model_profile)
+
+        assert log_output.entries[1]["log_level"] == "warning"
+        assert log_output.entries[1]["event"] == (
+            "no mesh mask for depth reduction land mask; "
+            "land cells are only excluded where variables have missing values"
         )
 
-        assert extracted_vars[0].name == "diatoms"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((2, 8, 9, 4), dtype=numpy.single)
+    def test_no_cell_thickness(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "mean"})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._reduce_depth(extracted_ds.drop_vars("e3t"), config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[1]["log_level"] == "error"
+        assert (
+            log_output.entries[1]["event"]
+            == "cell thickness variable not in extracted dataset"
         )
+        assert log_output.entries[1]["cell_thickness_var"] == "e3t"
+
+    def test_unsupported_aggregation(self, extracted_ds, model_profile, log_output):
+        config = self._config({"aggregation": "median"})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._reduce_depth(extracted_ds, config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
         assert (
-            extracted_vars[0].attrs["standard_name"]
-            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
+            log_output.entries[0]["event"] == "unsupported depth reduction aggregation"
         )
-        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
-        assert extracted_vars[0].attrs["units"] == "mmol m-3"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
+        assert log_output.entries[0]["aggregation"] == "median"
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted diatoms"
 
-    def test_extract_var_depth_selection(
-        self, source_dataset, model_profile, log_output
-    ):
-        output_coords = {
-            "time": numpy.arange(4),
-            "depth": numpy.arange(0.5, 3, 1),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
+class TestReduceSpace:
+    """Unit tests for _reduce_space() function."""
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "depth": numpy.array([0.5, 1.5, 3]),
+            "gridY": numpy.arange(3),
+            "gridX": numpy.arange(2),
         }
-        config = {
+        # Values increase with gridY: 1, 2, 3
+        diatoms = numpy.broadcast_to(
+            numpy.array([1, 2, 3], dtype=numpy.single)[
+                numpy.newaxis, numpy.newaxis, :, numpy.newaxis
+            ],
+            (2, 3, 3, 2),
+        )
+        return xarray.Dataset(
+            coords=coords,
+            data_vars={
+                "diatoms": xarray.DataArray(
+                    name="diatoms",
+                    data=diatoms,
+                    coords=coords,
+                    attrs={
+                        "standard_name": "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water",
+                        "long_name": "Diatoms Concentration",
+                        "units": "mmol m-3",
+                    },
+                ),
+                "sossheig": xarray.DataArray(
+                    name="sossheig",
+                    data=diatoms[:, 0, :, :],
+                    coords={
+                        "time": coords["time"],
+                        "gridY": coords["gridY"],
+                        "gridX": coords["gridX"],
+                    },
+                    attrs={
+                        "standard_name": "sea_surface_height_above_geoid",
+                        "long_name": "Sea Surface Height",
+                        "units": "m",
+                    },
+                ),
+                "longitude": xarray.DataArray(
+                    name="longitude",
+                    data=numpy.zeros((3, 2)),
+                    coords={"gridY": coords["gridY"], "gridX": coords["gridX"]},
+                    attrs={"long_name": "Longitude", "units": "degrees_east"},
+                ),
+            },
+            attrs={"name": "test_20150401_20150402"},
+        )
+
+    @pytest.fixture(name="mesh_mask")
+    def fixture_mesh_mask(self, tmp_path):
+        # Cell areas increase with gridY: 1, 1, 2 m2
+        e1t = numpy.ones((1, 3, 2))
+        e2t = numpy.ones((1, 3, 2))
+        e2t[0, 2, :] = 2
+        e3t_0 = numpy.ones((1, 3, 3, 2))
+        e3t_0[0, 2, :, :] = 2
+        tmask = numpy.ones((1, 3, 3, 2), dtype=numpy.int8)
+        # gridY=0, gridX=0 column is land
+        tmask[0, :, 0, 0] = 0
+        # Deepest level of gridY=1 is below the sea floor
+        tmask[0, 2, 1, :] = 0
+        mesh_mask = xarray.Dataset(
+            data_vars={
+                "e1t": (("t", "y", "x"), e1t),
+                "e2t": (("t", "y", "x"), e2t),
+                "e3t_0": (("t", "z", "y", "x"), e3t_0),
+                "tmask": (("t", "z", "y", "x"), tmask),
+            }
+        )
+        mesh_mask.to_netcdf(tmp_path / "mesh_mask.nc")
+        return tmp_path / "mesh_mask.nc"
+
+    @staticmethod
+    def _config(reduce_space):
+        return {
             "dataset": {
-                "time base": "hour",
+                "time base": "day",
                 "variables group": "biology",
             },
-            "selection": {
-                "depth": {
-                    "depth min": 1,
-                    "depth max": 6,
-                    "depth interval": 2,
-                }
-            },
+            "reduce": {"space": reduce_space},
             "extracted dataset": {},
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
-        )
+    def test_area_mean(self, extracted_ds, mesh_mask, log_output):
+        config = self._config({"aggregation": "mean", "mesh mask": mesh_mask})
 
-        assert extracted_vars[0].name == "diatoms"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 3, 9, 4), dtype=numpy.single)
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "reducing dataset over space"
+        assert log_output.entries[0]["aggregation"] == "mean"
+        assert log_output.entries[0]["weights"] == "area"
+        assert log_output.entries[0]["region_mask"] is None
+        assert reduced_ds.diatoms.dims == ("time", "depth")
+        # surface: (1*1 + 2*2 + 3*2*2) / (1 + 2 + 2*2)
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(depth=0), 17 / 7, rtol=1e-6
+        )
+        # deepest level: (1*1 + 3*2*2) / (1 + 2*2)
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(depth=2), 13 / 5, rtol=1e-6
         )
         assert (
-            extracted_vars[0].attrs["standard_name"]
-            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
+            reduced_ds.diatoms.attrs["long_name"]
+            == "Area-averaged Diatoms Concentration"
         )
-        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
-        assert extracted_vars[0].attrs["units"] == "mmol m-3"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
+        assert (
+            reduced_ds.diatoms.attrs["cell_methods"]
+            == "area: mean (comment: area-weighted)"
+        )
+        assert reduced_ds.attrs["name"] == "test_20150401_20150402"
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted diatoms"
+    def test_surface_var_uses_surface_tmask(self, extracted_ds, mesh_mask, log_output):
+        config = self._config({"mesh mask": mesh_mask})
 
-    def test_extract_var_y_selection(self, source_dataset, model_profile, log_output):
-        output_coords = {
-            "time": numpy.arange(4),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(2, 7),
-            "gridX": numpy.arange(4),
-        }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "biology",
-            },
-            "selection": {
-                "grid y": {
-                    "y min": 2,
-                    "y max": 7,
-                }
-            },
-            "extracted dataset": {},
-        }
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+        assert reduced_ds.sossheig.dims == ("time",)
+        numpy.testing.assert_allclose(reduced_ds.sossheig, 17 / 7, rtol=1e-6)
+
+    def test_area_sum(self, extracted_ds, mesh_mask, log_output):
+        config = self._config({"aggregation": "sum", "mesh mask": mesh_mask})
+
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
+
+        numpy.testing.assert_allclose(reduced_ds.diatoms.isel(depth=0), 17)
+        assert reduced_ds.diatoms.attrs["units"] == "mmol m-3 m2"
+        assert (
+            reduced_ds.diatoms.attrs["long_name"]
+            == "Area-integrated Diatoms Concentration"
         )
 
-        assert extracted_vars[0].name == "diatoms"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 8, 5, 4), dtype=numpy.single)
+    def test_volume_mean(self, extracted_ds, mesh_mask, log_output):
+        config = self._config(
+            {"aggregation": "mean", "weights": "volume", "mesh mask": mesh_mask}
         )
+
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
+
+        assert reduced_ds.diatoms.dims == ("time",)
+        # 2 levels of thickness 1 with surface values, 1 level of thickness 2
+        expected = (17 * 2 + 13 * 2) / (7 * 2 + 5 * 2)
+        numpy.testing.assert_allclose(reduced_ds.diatoms, expected, rtol=1e-6)
         assert (
-            extracted_vars[0].attrs["standard_name"]
-            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
+            reduced_ds.diatoms.attrs["cell_methods"]
+            == "depth: area: mean (comment: volume-weighted)"
         )
-        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
-        assert extracted_vars[0].attrs["units"] == "mmol m-3"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
+        # Surface variables are area-weighted
+        assert reduced_ds.sossheig.dims == ("time",)
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted diatoms"
+    @pytest.mark.parametrize("aggregation, expected", (("min", 1), ("max", 3)))
+    def test_min_max(self, aggregation, expected, extracted_ds, mesh_mask, log_output):
+        config = self._config({"aggregation": aggregation, "mesh mask": mesh_mask})
 
-    def test_extract_var_x_selection(self, source_dataset, model_profile, log_output):
-        output_coords = {
-            "time": numpy.arange(4),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(2, 4),
-        }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "biology",
-            },
-            "selection": {
-                "grid x": {
-                    "x min": 2,
-                }
-            },
-            "extracted dataset": {},
-        }
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+        numpy.testing.assert_allclose(reduced_ds.diatoms.isel(depth=0), expected)
+        assert reduced_ds.diatoms.attrs["cell_methods"] == f"area: {aggregation}"
+
+    def test_region_mask(self, extracted_ds, mesh_mask, log_output, tmp_path):
+        region = numpy.zeros((3, 2), dtype=numpy.int8)
+        region[1:, 1] = 1
+        xarray.Dataset({"north_east": (("y", "x"), region)}).to_netcdf(
+            tmp_path / "regions.nc"
+        )
+        config = self._config(
+            {
+                "mesh mask": mesh_mask,
+                "region mask": {"path": tmp_path / "regions.nc", "var": "north_east"},
+            }
         )
 
-        assert extracted_vars[0].name == "diatoms"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 8, 9, 2), dtype=numpy.single)
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
+
+        assert log_output.entries[0]["region_mask"] == "north_east"
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(depth=0), (2 + 3 * 2) / 3, rtol=1e-6
+        )
+        assert reduced_ds.diatoms.attrs["cell_methods"] == (
+            "area: mean (comment: area-weighted over north_east region)"
+        )
+
+    def test_model_profile_mesh_mask(self, extracted_ds, mesh_mask, log_output):
+        config = self._config({"aggregation": "mean"})
+        model_profile = {"mesh mask": mesh_mask}
+
+        reduced_ds = extract._reduce_space(extracted_ds, config, model_profile)
+
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(depth=0), 17 / 7, rtol=1e-6
+        )
+
+    def test_config_mesh_mask_overrides_model_profile(
+        self, extracted_ds, mesh_mask, log_output
+    ):
+        config = self._config({"aggregation": "mean", "mesh mask": mesh_mask})
+        model_profile = {"mesh mask": "/no/such/mesh_mask.nc"}
+
+        reduced_ds = extract._reduce_space(extracted_ds, config, model_profile)
+
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(depth=0), 17 / 7, rtol=1e-6
         )
+
+    def test_lons_lats_dropped(self, extracted_ds, mesh_mask, log_output):
+        config = self._config({"mesh mask": mesh_mask})
+
+        reduced_ds = extract._reduce_space(extracted_ds, config, {})
+
+        assert "longitude" not in reduced_ds.data_vars
+
+    def test_no_mesh_mask(self, extracted_ds, log_output):
+        config = self._config({"aggregation": "mean"})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._reduce_space(extracted_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
         assert (
-            extracted_vars[0].attrs["standard_name"]
-            == "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water"
+            log_output.entries[0]["event"] == "spatial reduction requires a mesh mask"
         )
-        assert extracted_vars[0].attrs["long_name"] == "Diatoms Concentration"
-        assert extracted_vars[0].attrs["units"] == "mmol m-3"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted diatoms"
+    def test_unsupported_weights(self, extracted_ds, mesh_mask, log_output):
+        config = self._config({"weights": "depth", "mesh mask": mesh_mask})
 
-    def test_extract_surface_var(self, model_profile, log_output):
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(4),
-                "y": numpy.arange(9),
-                "x": numpy.arange(4),
-            },
+        with pytest.raises(SystemExit) as exc_info:
+            extract._reduce_space(extracted_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == "unsupported spatial reduction weights"
+        assert log_output.entries[0]["weights"] == "depth"
+
+
+class TestReduceRegions:
+    """Unit tests for _reduce_regions() function."""
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self):
+        coords = {
+            "time": pandas.date_range("2015-04-01", periods=2, freq="1D"),
+            "depth": numpy.array([0.5, 1.5, 3]),
+            "gridY": numpy.arange(3),
+            "gridX": numpy.arange(2),
+        }
+        # Values increase with gridY: 1, 2, 3
+        diatoms = numpy.broadcast_to(
+            numpy.array([1, 2, 3], dtype=numpy.single)[
+                numpy.newaxis, numpy.newaxis, :, numpy.newaxis
+            ],
+            (2, 3, 3, 2),
+        )
+        return xarray.Dataset(
+            coords=coords,
             data_vars={
+                "diatoms": xarray.DataArray(
+                    name="diatoms",
+                    data=diatoms,
+                    coords=coords,
+                    attrs={
+                        "standard_name": "mole_concentration_of_diatoms_expressed_as_nitrogen_in_sea_water",
+                        "long_name": "Diatoms Concentration",
+                        "units": "mmol m-3",
+                    },
+                ),
                 "sossheig": xarray.DataArray(
                     name="sossheig",
-                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
+                    data=diatoms[:, 0, :, :],
                     coords={
-                        "time_counter": numpy.arange(4),
-                        "y": numpy.arange(9),
-                        "x": numpy.arange(4),
+                        "time": coords["time"],
+                        "gridY": coords["gridY"],
+                        "gridX": coords["gridX"],
                     },
                     attrs={
                         "standard_name": "sea_surface_height_above_geoid",
                         "long_name": "Sea Surface Height",
                         "units": "m",
                     },
-                )
+                ),
+                "longitude": xarray.DataArray(
+                    name="longitude",
+                    data=numpy.zeros((3, 2)),
+                    coords={"gridY": coords["gridY"], "gridX": coords["gridX"]},
+                    attrs={"long_name": "Longitude", "units": "degrees_east"},
+                ),
             },
+            attrs={"name": "test_20150401_20150402"},
+        )
+
+    @pytest.fixture(name="mesh_mask")
+    def fixture_mesh_mask(self, tmp_path):
+        # Cell areas increase with gridY: 1, 1, 2 m2
+        e1t = numpy.ones((1, 3, 2))
+        e2t = numpy.ones((1, 3, 2))
+        e2t[0, 2, :] = 2
+        e3t_0 = numpy.ones((1, 3, 3, 2))
+        e3t_0[0, 2, :, :] = 2
+        tmask = numpy.ones((1, 3, 3, 2), dtype=numpy.int8)
+        # gridY=0, gridX=0 column is land
+        tmask[0, :, 0, 0] = 0
+        # Deepest level of gridY=1 is below the sea floor
+        tmask[0, 2, 1, :] = 0
+        mesh_mask = xarray.Dataset(
+            data_vars={
+                "e1t": (("t", "y", "x"), e1t),
+                "e2t": (("t", "y", "x"), e2t),
+                "e3t_0": (("t", "z", "y", "x"), e3t_0),
+                "tmask": (("t", "z", "y", "x"), tmask),
+            }
         )
+        mesh_mask.to_netcdf(tmp_path / "mesh_mask.nc")
+        return tmp_path / "mesh_mask.nc"
+
+    @pytest.fixture(name="labels")
+    def fixture_labels(self, tmp_path):
+        # gridY=0 row is region 1, gridY=1 and gridY=2 rows are region 2
+        labels = numpy.array([[1, 1], [2, 2], [2, 2]], dtype=numpy.int8)
+        xarray.Dataset(
+            {
+                "region_labels": (
+                    ("y", "x"),
+                    labels,
+                    {"flag_values": [1, 2], "flag_meanings": "south north"},
+                )
+            }
+        ).to_netcdf(tmp_path / "region_labels.nc")
+        return {"path": tmp_path / "region_labels.nc", "var": "region_labels"}
 
-        output_coords = {
-            "time": numpy.arange(4),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
-        }
-        config = {
+    @staticmethod
+    def _config(reduce_regions):
+        return {
             "dataset": {
-                "time base": "hour",
+                "time base": "day",
                 "variables group": "biology",
             },
+            "reduce": {"regions": reduce_regions},
             "extracted dataset": {},
         }
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+    def test_area_mean(self, extracted_ds, mesh_mask, labels, log_output):
+        config = self._config(
+            {"aggregation": "mean", "mesh mask": mesh_mask, "labels": labels}
         )
 
-        assert extracted_vars[0].name == "sossheig"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 9, 4), dtype=numpy.single)
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        assert log_output.entries[0]["log_level"] == "info"
+        assert log_output.entries[0]["event"] == "reducing dataset over regions"
+        assert log_output.entries[0]["aggregation"] == "mean"
+        assert log_output.entries[0]["weights"] == "area"
+        assert log_output.entries[0]["regions"] == ["south", "north"]
+        assert reduced_ds.diatoms.dims == ("time", "depth", "region")
+        assert list(reduced_ds.region.values) == ["south", "north"]
+        assert list(reduced_ds.region_label.values) == [1, 2]
+        # surface: region 1 has 1 wet cell; region 2: (2*1 + 2*1 + 3*2 + 3*2) / (1 + 1 + 2 + 2)
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(time=0, depth=0), [1, 16 / 6], rtol=1e-6
+        )
+        # deepest level: gridY=1 row of region 2 is below the sea floor
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(time=0, depth=2), [1, 3], rtol=1e-6
         )
         assert (
-            extracted_vars[0].attrs["standard_name"] == "sea_surface_height_above_geoid"
+            reduced_ds.diatoms.attrs["long_name"]
+            == "Area-averaged Diatoms Concentration"
+        )
+        assert (
+            reduced_ds.diatoms.attrs["cell_methods"]
+            == "area: mean where region (comment: area-weighted)"
+        )
+        assert reduced_ds.attrs["name"] == "test_20150401_20150402"
+
+    def test_matches_region_mask_space_reduction(
+        self, extracted_ds, mesh_mask, labels, log_output, tmp_path
+    ):
+        region = numpy.array([[0, 0], [1, 1], [1, 1]], dtype=numpy.int8)
+        xarray.Dataset({"north": (("y", "x"), region)}).to_netcdf(tmp_path / "north.nc")
+        space_config = {
+            "dataset": {"time base": "day", "variables group": "biology"},
+            "reduce": {
+                "space": {
+                    "mesh mask": mesh_mask,
+                    "region mask": {"path": tmp_path / "north.nc", "var": "north"},
+                }
+            },
+            "extracted dataset": {},
+        }
+        regions_config = self._config({"mesh mask": mesh_mask, "labels": labels})
+
+        space_ds = extract._reduce_space(extracted_ds, space_config, {})
+        regions_ds = extract._reduce_regions(extracted_ds, regions_config, {})
+
+        numpy.testing.assert_allclose(
+            regions_ds.diatoms.sel(region="north"), space_ds.diatoms, rtol=1e-6
+        )
+        numpy.testing.assert_allclose(
+            regions_ds.sossheig.sel(region="north"), space_ds.sossheig, rtol=1e-6
+        )
+
+    def test_fill_valued_labels(self, extracted_ds, mesh_mask, log_output, tmp_path):
+        # gridY=0 row is fill values, gridY=1 and gridY=2 rows are region 2
+        labels = numpy.array([[-1, -1], [2, 2], [2, 2]], dtype=numpy.int16)
+        xarray.Dataset({"region_labels": (("y", "x"), labels)}).to_netcdf(
+            tmp_path / "fill_labels.nc",
+            encoding={"region_labels": {"_FillValue": -1}},
+        )
+        config = self._config(
+            {
+                "mesh mask": mesh_mask,
+                "labels": {"path": tmp_path / "fill_labels.nc", "var": "region_labels"},
+            }
+        )
+
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        assert log_output.entries[0]["regions"] == ["region_2"]
+        assert list(reduced_ds.region_label.values) == [2]
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(time=0, depth=0), [16 / 6], rtol=1e-6
+        )
+
+    def test_area_sum(self, extracted_ds, mesh_mask, labels, log_output):
+        config = self._config(
+            {"aggregation": "sum", "mesh mask": mesh_mask, "labels": labels}
+        )
+
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        numpy.testing.assert_allclose(reduced_ds.diatoms.isel(time=0, depth=0), [1, 16])
+        assert reduced_ds.diatoms.attrs["units"] == "mmol m-3 m2"
+
+    def test_volume_mean(self, extracted_ds, mesh_mask, labels, log_output):
+        config = self._config(
+            {"weights": "volume", "mesh mask": mesh_mask, "labels": labels}
+        )
+
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        assert reduced_ds.diatoms.dims == ("time", "region")
+        # region 2: 2 levels of thickness 1 with surface values, 1 level of thickness 2
+        expected = (16 * 2 + 3 * 2 * 2 * 2) / (6 * 2 + 2 * 2 * 2)
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(time=0), [1, expected], rtol=1e-6
+        )
+        assert (
+            reduced_ds.diatoms.attrs["cell_methods"]
+            == "depth: area: mean where region (comment: volume-weighted)"
+        )
+
+    @pytest.mark.parametrize(
+        "aggregation, expected", (("min", [1, 2]), ("max", [1, 3]))
+    )
+    def test_min_max(
+        self, aggregation, expected, extracted_ds, mesh_mask, labels, log_output
+    ):
+        config = self._config(
+            {"aggregation": aggregation, "mesh mask": mesh_mask, "labels": labels}
+        )
+
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(time=0, depth=0), expected
+        )
+        assert (
+            reduced_ds.diatoms.attrs["cell_methods"]
+            == f"area: {aggregation} where region"
+        )
+
+    def test_names_from_config(self, extracted_ds, mesh_mask, labels, log_output):
+        config = self._config(
+            {
+                "mesh mask": mesh_mask,
+                "labels": labels,
+                "names": {2: "Haro Strait"},
+            }
+        )
+
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        assert list(reduced_ds.region.values) == ["Haro Strait"]
+        assert list(reduced_ds.region_label.values) == [2]
+        numpy.testing.assert_allclose(
+            reduced_ds.diatoms.isel(time=0, depth=0), [16 / 6], rtol=1e-6
+        )
+
+    def test_lons_lats_dropped(self, extracted_ds, mesh_mask, labels, log_output):
+        config = self._config({"mesh mask": mesh_mask, "labels": labels})
+
+        reduced_ds = extract._reduce_regions(extracted_ds, config, {})
+
+        assert "longitude" not in reduced_ds.data_vars
+
+    def test_no_mesh_mask(self, extracted_ds, labels, log_output):
+        config = self._config({"labels": labels})
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._reduce_regions(extracted_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert (
+            log_output.entries[0]["event"] == "regions reduction requires a mesh mask"
+        )
+
+    def test_unsupported_aggregation(self, extracted_ds, mesh_mask, labels, log_output):
+        config = self._config(
+            {"aggregation": "median", "mesh mask": mesh_mask, "labels": labels}
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            extract._reduce_regions(extracted_ds, config, {})
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[0]["event"]
+            == "unsupported regions reduction aggregation"
         )
-        assert extracted_vars[0].attrs["long_name"] == "Sea Surface Height"
-        assert extracted_vars[0].attrs["units"] == "m"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
+        assert log_output.entries[0]["aggregation"] == "median"
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted sossheig"
 
-    def test_extract_surface_var_model_coords(self, model_profile, log_output):
-        source_dataset = xarray.Dataset(
-            coords={
-                "time_counter": numpy.arange(4),
-                "y": numpy.arange(9),
-                "x": numpy.arange(4),
-            },
-            data_vars={
-                "sossheig": xarray.DataArray(
-                    name="sossheig",
-                    data=numpy.ones((4, 9, 4), dtype=numpy.single),
-                    coords={
-                        "time_counter": numpy.arange(4),
-                        "y": numpy.arange(9),
-                        "x": numpy.arange(4),
-                    },
-                    attrs={
-                        "standard_name": "sea_surface_height_above_geoid",
-                        "long_name": "Sea Surface Height",
-                        "units": "m",
-                    },
-                )
-            },
-        )
+class TestCalcRegionNames:
+    """Unit tests for _calc_region_names() function."""
 
-        output_coords = {
-            "time_counter": numpy.arange(4),
-            "y": numpy.arange(9),
-            "x": numpy.arange(4),
-        }
-        config = {
-            "dataset": {
-                "time base": "hour",
-                "variables group": "biology",
-            },
-            "extracted dataset": {
-                "use model coords": True,
-            },
-        }
+    def test_names_from_config(self):
+        labels = xarray.DataArray(
+            numpy.array([[1, 2], [3, 0]]), dims=("gridY", "gridX")
+        )
 
-        extracted_vars = extract.calc_extracted_vars(
-            source_dataset, output_coords, config, model_profile
+        region_labels, region_names = extract._calc_region_names(
+            labels, {"names": {3: "Strait of Georgia", 1: "Haro Strait"}}
         )
 
-        assert extracted_vars[0].name == "sossheig"
-        assert numpy.array_equal(
-            extracted_vars[0].data, numpy.ones((4, 9, 4), dtype=numpy.single)
+        assert region_labels == [3, 1]
+        assert region_names == ["Strait of Georgia", "Haro Strait"]
+
+    def test_names_from_flag_meanings(self):
+        labels = xarray.DataArray(
+            numpy.array([[1, 2], [2, 0]]),
+            dims=("gridY", "gridX"),
+            attrs={"flag_values": [1, 2], "flag_meanings": "SoG JdF"},
         )
-        assert (
-            extracted_vars[0].attrs["standard_name"] == "sea_surface_height_above_geoid"
+
+        region_labels, region_names = extract._calc_region_names(labels, {})
+
+        assert region_labels == [1, 2]
+        assert region_names == ["SoG", "JdF"]
+
+    def test_names_from_labels(self):
+        labels = xarray.DataArray(
+            numpy.array([[4, 2], [2, 0]]), dims=("gridY", "gridX")
         )
-        assert extracted_vars[0].attrs["long_name"] == "Sea Surface Height"
-        assert extracted_vars[0].attrs["units"] == "m"
-        for coord in output_coords:
-            assert numpy.array_equal(
-                extracted_vars[0].coords[coord], output_coords[coord]
-            )
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted sossheig"
+        region_labels, region_names = extract._calc_region_names(labels, {})
 
+        assert region_labels == [2, 4]
+        assert region_names == ["region_2", "region_4"]
 
-class TestCalcExtractedDataset:
-    """Unit tests for calc_extracted_dataset() function."""
 
-    def test_calc_extracted_dataset_no_date_overrides(self, log_output, monkeypatch):
-        def mock_now(tz):
-            return arrow.get("2022-10-28 19:12", tzinfo="Canada/Pacific")
+class TestCalcOutputCoordNames:
+    """Unit tests for _calc_output_coord_names() function."""
 
-        monkeypatch.setattr(extract.arrow, "now", mock_now)
+    def test_output_coord_names(self):
+        config = {"extracted dataset": {}}
 
-        extracted_vars = []
-        output_coords = {
-            "time": numpy.arange(2),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
+        coord_names = extract._calc_output_coord_names(config, {})
+
+        assert coord_names == {
+            "time": "time",
+            "depth": "depth",
+            "y": "gridY",
+            "x": "gridX",
         }
+
+    def test_model_coord_names(self):
         config = {
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 10),
-            "extracted dataset": {
-                "name": "test",
-                "description": "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast",
+            "dataset": {"time base": "day", "variables group": "u velocity"},
+            "extracted dataset": {"use model coords": True},
+        }
+        model_profile = {
+            "time coord": {"name": "time_counter"},
+            "y coord": {"name": "y"},
+            "x coord": {"name": "x"},
+            "results archive": {
+                "datasets": {"day": {"u velocity": {"depth coord": "depthu"}}}
             },
         }
-        config_yaml = Path("test_extract.yaml")
-        generated_by = f"`reshapr extract {config_yaml.absolute()}`"
 
-        extracted_ds = extract.calc_extracted_dataset(
-            extracted_vars, output_coords, config, generated_by
-        )
+        coord_names = extract._calc_output_coord_names(config, model_profile)
 
-        assert extracted_ds.name == "test_20150101_20150110"
-        assert extracted_ds.attrs["name"] == "test_20150101_20150110"
-        assert (
-            extracted_ds.attrs["description"]
-            == "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast"
-        )
-        assert (
-            extracted_ds.attrs["history"]
-            == f"2022-10-28 19:12 -07:00: Generated by {generated_by}"
-        )
-        assert extracted_ds.attrs["Conventions"] == "CF-1.6"
+        assert coord_names == {
+            "time": "time_counter",
+            "depth": "depthu",
+            "y": "y",
+            "x": "x",
+        }
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted dataset metadata"
 
-    def test_calc_extracted_dataset_date_overrides(self, log_output, monkeypatch):
-        def mock_now(tz):
-            return arrow.get("2022-11-09 15:06", tzinfo="Canada/Pacific")
+class TestCalcGridSelectors:
+    """Unit tests for _calc_grid_selectors() function."""
 
-        monkeypatch.setattr(extract.arrow, "now", mock_now)
+    def test_no_selection(self):
+        selectors = extract._calc_grid_selectors({})
 
-        extracted_vars = []
-        output_coords = {
-            "time": numpy.arange(2),
-            "depth": numpy.arange(0, 4, 0.5),
-            "gridY": numpy.arange(9),
-            "gridX": numpy.arange(4),
+        assert selectors == {
+            "depth": slice(0, None, 1),
+            "y": slice(0, None, 1),
+            "x": slice(0, None, 1),
         }
+
+    def test_selection(self):
         config = {
-            "start date": datetime.date(2015, 1, 1),
-            "end date": datetime.date(2015, 1, 10),
-            "extracted dataset": {
-                "name": "test",
-                "description": "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast",
-            },
+            "selection": {
+                "depth": {"depth min": 2, "depth max": 20, "depth interval": 2},
+                "grid y": {"y min": 600, "y max": 700, "y interval": 10},
+                "grid x": {"x min": 100, "x max": 300, "x interval": 5},
+            }
         }
-        config_yaml = Path("test_extract.yaml")
-        generated_by = f"`reshapr extract {config_yaml.absolute()}`"
-        override_start_date, override_end_date = "2022-11-09", "2022-11-09"
-
-        extracted_ds = extract.calc_extracted_dataset(
-            extracted_vars,
-            output_coords,
-            config,
-            generated_by,
-            override_start_date,
-            override_end_date,
-        )
 
-        assert extracted_ds.name == "test_20221109_20221109"
-        assert extracted_ds.attrs["name"] == "test_20221109_20221109"
-        assert (
-            extracted_ds.attrs["description"]
-            == "Day-averaged diatoms biomass extracted from SalishSeaCast v201812 hindcast"
-        )
-        assert (
-            extracted_ds.attrs["history"]
-            == f"2022-11-09 15:06 -08:00: Generated by {generated_by}"
-        )
-        assert extracted_ds.attrs["Conventions"] == "CF-1.6"
+        selectors = extract._calc_grid_selectors(config)
 
-        assert log_output.entries[0]["log_level"] == "debug"
-        assert log_output.entries[0]["event"] == "extracted dataset metadata"
+        assert selectors == {
+            "depth": slice(2, 20, 2),
+            "y": slice(600, 700, 10),
+            "x": slice(100, 300, 5),
+        }
 
 
 class TestResample:
@@ -3331,6 +8055,8 @@ class TestCalcCoordEncoding:
             ("depthv", False),
             ("depthw", True),
             ("depthw", False),
+            ("isopycnal", True),
+            ("isopycnal", False),
         ),
     )
     def test_depth_coord(self, coord_name, deflate):
@@ -3386,6 +8112,43 @@ class TestCalcCoordEncoding:
         }
         assert encoding == expected
 
+    @pytest.mark.parametrize("deflate", (True, False))
+    def test_distance_coord(self, deflate):
+        dataset = xarray.Dataset(coords={"distance": numpy.linspace(0, 1000, 5)})
+        config = {"extracted dataset": {"deflate": deflate}}
+        model_profile = {}
+
+        encoding = extract.calc_coord_encoding(
+            dataset, "distance", config, model_profile
+        )
+
+        assert encoding == {"dtype": numpy.single, "chunksizes": (5,), "zlib": deflate}
+
+    @pytest.mark.parametrize("coord_name", ("latitude", "longitude"))
+    def test_regridded_coord(self, coord_name):
+        dataset = xarray.Dataset(coords={coord_name: numpy.linspace(49, 50, 11)})
+        config = {"extracted dataset": {}}
+        model_profile = {}
+
+        encoding = extract.calc_coord_encoding(
+            dataset, coord_name, config, model_profile
+        )
+
+        assert encoding == {"dtype": numpy.float64, "chunksizes": (11,), "zlib": True}
+
+    def test_region_coord(self):
+        dataset = xarray.Dataset(
+            coords={
+                "region": ["Strait of Georgia", "Haro Strait"],
+            }
+        )
+        config = {"extracted dataset": {}}
+        model_profile = {}
+
+        encoding = extract.calc_coord_encoding(dataset, "region", config, model_profile)
+
+        assert encoding == {}
+
 
 class TestCalcTimeCoordAttrs:
     """Unit tests for calc_time_coord_attrs() function."""
@@ -3582,6 +8345,33 @@ class TestCalcVarEncoding:
         }
         assert encoding == expected
 
+    def test_regions_reduced_var(self):
+        output_coords = {
+            "time": numpy.arange(2),
+            "depth": numpy.arange(0, 4, 0.5),
+            "region": ["Strait of Georgia", "Haro Strait"],
+        }
+        config = {"extracted dataset": {}}
+        model_profile = {
+            "time coord": {
+                "name": "time",
+            },
+        }
+        var = xarray.DataArray(
+            name="diatoms",
+            data=numpy.empty((2, 8, 2), dtype=numpy.single),
+            coords=output_coords,
+        )
+
+        encoding = extract.calc_var_encoding(var, output_coords, config, model_profile)
+
+        expected = {
+            "dtype": numpy.single,
+            "chunksizes": (1, 8, 2),
+            "zlib": True,
+        }
+        assert encoding == expected
+
 
 class TestPrepNetcdfWrite:
     """Unit test for prep_netcdf_write() function."""
@@ -3829,6 +8619,17 @@ class TestPrepNetcdfWrite:
         assert log_output.entries[0]["event"] == "prepared netCDF4 write params"
         assert log_output.entries[0]["unlimited_dim"] == "time"
 
+    def test_no_unlimited_dim_compare_statistics(self, log_output, tmp_path):
+        extracted_ds = xarray.Dataset(attrs={"name": "test"})
+        config = {
+            "compare": {"model profile": "foo.yaml", "output": ["bias", "rmse"]},
+            "extracted dataset": {"dest dir": os.fspath(tmp_path), "name": "test"},
+        }
+
+        _, _, _, unlimited_dim = extract.prep_netcdf_write(extracted_ds, {}, config, {})
+
+        assert unlimited_dim is None
+
     def test_unlimited_dim_model_coord(self, log_output, tmp_path):
         extracted_ds = xarray.Dataset(
             attrs={"name": "test"},
@@ -3863,3 +8664,159 @@ class TestPrepNetcdfWrite:
         assert log_output.entries[0]["log_level"] == "debug"
         assert log_output.entries[0]["event"] == "prepared netCDF4 write params"
         assert log_output.entries[0]["unlimited_dim"] == "time_counter"
+
+
+class TestBoxes:
+    """Unit tests for _split_boxes(), _calc_output_writes(), and write_netcdfs() functions."""
+
+    @pytest.fixture(name="config")
+    def fixture_config(self, tmp_path):
+        return {
+            "dataset": {"time base": "day", "variables group": "physics tracers"},
+            "selection": {
+                "boxes": {
+                    "north": {
+                        "grid y": {"y min": 3, "y max": 5},
+                        "grid x": {"x min": 1, "x max": 3},
+                    },
+                    "south": {
+                        "grid y": {"y min": 1, "y max": 3},
+                        "grid x": {"x min": 1, "x max": 2},
+                    },
+                },
+                "grid y": {"y min": 1, "y max": 5},
+                "grid x": {"x min": 1, "x max": 3},
+            },
+            "extracted dataset": {
+                "name": "test",
+                "dest dir": os.fspath(tmp_path),
+            },
+        }
+
+    @pytest.fixture(name="model_profile")
+    def fixture_model_profile(self):
+        return {"extraction time origin": "2015-01-01"}
+
+    @pytest.fixture(name="chunk_reads")
+    def fixture_chunk_reads(self):
+        return []
+
+    @pytest.fixture(name="extracted_ds")
+    def fixture_extracted_ds(self, chunk_reads):
+        def read_chunk(block):
+            chunk_reads.append(block.shape)
+            return block
+
+        coords = {
+            "time": pandas.date_range("2015-01-01 12:00", periods=2, freq="1D"),
+            "gridY": numpy.arange(1, 5),
+            "gridX": numpy.arange(1, 3),
+        }
+        votemper = dask.array.from_array(
+            numpy.arange(16, dtype=numpy.single).reshape((2, 4, 2)), chunks=(1, 4, 2)
+        ).map_blocks(read_chunk, dtype=numpy.single)
+        return xarray.Dataset(
+            coords=coords,
+            data_vars={
+                "votemper": xarray.DataArray(
+                    data=votemper, coords=coords, attrs={"units": "degree_C"}
+                )
+            },
+            attrs={"name": "test_20150101_20150102"},
+        )
+
+    def test_split_boxes(self, extracted_ds, config, model_profile):
+        box_datasets = extract._split_boxes(extracted_ds, config, model_profile)
+
+        assert list(box_datasets) == ["north", "south"]
+        north = box_datasets["north"]
+        numpy.testing.assert_array_equal(north.gridY, [3, 4])
+        numpy.testing.assert_array_equal(north.gridX, [1, 2])
+        assert north.attrs["name"] == "test_north_20150101_20150102"
+        assert north.attrs["box"] == "north: grid y: 3:5, grid x: 1:3"
+        south = box_datasets["south"]
+        numpy.testing.assert_array_equal(south.gridY, [1, 2])
+        numpy.testing.assert_array_equal(south.gridX, [1])
+        numpy.testing.assert_array_equal(south.votemper.isel(time=0), [[0], [2]])
+        assert extracted_ds.attrs["name"] == "test_20150101_20150102"
+
+    def test_calc_output_writes_boxes(
+        self, extracted_ds, config, model_profile, chunk_reads, tmp_path, log_output
+    ):
+        output_coords = {"time": extracted_ds.time}
+
+        writes = extract._calc_output_writes(
+            extracted_ds, output_coords, config, model_profile
+        )
+        extract.write_netcdfs(writes.values())
+
+        nc_paths = {box_name: write[1] for box_name, write in writes.items()}
+
+        assert nc_paths == {
+            "north": tmp_path / "test_north_20150101_20150102.nc",
+            "south": tmp_path / "test_south_20150101_20150102.nc",
+        }
+        with xarray.open_dataset(nc_paths["north"]) as north:
+            numpy.testing.assert_array_equal(
+                north.votemper.isel(time=1), [[12, 13], [14, 15]]
+            )
+        with xarray.open_dataset(nc_paths["south"]) as south:
+            assert south.attrs["box"] == "south: grid y: 1:3, grid x: 1:2"
+        # Each source chunk is read once for both boxes;
+        # the empty chunk is from dask's inference of the array's metadata
+        assert [shape for shape in chunk_reads if 0 not in shape] == [(1, 4, 2)] * 2
+        wrote = [
+            entry["nc_path"]
+            for entry in log_output.entries
+            if entry["event"] == "wrote netCDF4 file"
+        ]
+        assert len(wrote) == 2
+
+    def test_write_netcdfs_in_batches(
+        self,
+        extracted_ds,
+        config,
+        model_profile,
+        chunk_reads,
+        tmp_path,
+        log_output,
+        monkeypatch,
+    ):
+        # Budget that fits only one box dataset at a time
+        monkeypatch.setattr(extract, "_calc_persist_memory_budget", lambda: 40)
+        output_coords = {"time": extracted_ds.time}
+
+        writes = extract._calc_output_writes(
+            extracted_ds, output_coords, config, model_profile
+        )
+        extract.write_netcdfs(writes.values())
+
+        with xarray.open_dataset(tmp_path / "test_north_20150101_20150102.nc") as north:
+            numpy.testing.assert_array_equal(
+                north.votemper.isel(time=1), [[12, 13], [14, 15]]
+            )
+        # Each source chunk is read once for each box
+        assert [shape for shape in chunk_reads if 0 not in shape] == [(1, 4, 2)] * 4
+        computing = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "computing extracted datasets"
+        ]
+        assert computing[0]["n_batches"] == 2
+
+    def test_calc_output_writes_boxes_resample(
+        self, extracted_ds, config, model_profile, chunk_reads, tmp_path, log_output
+    ):
+        config["resample"] = {"time interval": "2D", "aggregation": "mean"}
+        output_coords = {"time": extracted_ds.time}
+
+        writes = extract._calc_output_writes(
+            extracted_ds, output_coords, config, model_profile
+        )
+        extract.write_netcdfs(writes.values())
+
+        nc_paths = {box_name: write[1] for box_name, write in writes.items()}
+
+        with xarray.open_dataset(nc_paths["south"]) as south:
+            assert south.sizes["time"] == 1
+            numpy.testing.assert_array_equal(south.votemper.isel(time=0), [[4], [6]])
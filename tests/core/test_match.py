@@ -0,0 +1,294 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for core match module."""
+
+import textwrap
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from reshapr.core import match
+
+
+@pytest.fixture(name="model_profile")
+def fixture_model_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    lons, lats = numpy.meshgrid(
+        -124.0 + 0.1 * numpy.arange(3), 49.0 + 0.1 * numpy.arange(4)
+    )
+    xarray.Dataset(
+        {
+            "longitude": (("gridY", "gridX"), lons),
+            "latitude": (("gridY", "gridX"), lats),
+        }
+    ).to_netcdf(tmp_path / "geo_ref.nc")
+    archive = tmp_path / "results"
+    for day in (1, 2):
+        (archive / f"{day:02d}jan20").mkdir(parents=True)
+        times = pandas.date_range(f"2020-01-{day:02d} 00:30", periods=24, freq="1h")
+        # votemper = 1000 * day + 100 * hour + 10 * depth index + y index + x index / 10
+        votemper = (
+            1000 * day
+            + 100 * numpy.arange(24)[:, None, None, None]
+            + 10 * numpy.arange(3)[None, :, None, None]
+            + numpy.arange(4)[None, None, :, None]
+            + 0.1 * numpy.arange(3)[None, None, None, :]
+        )
+        xarray.Dataset(
+            {
+                "votemper": (("time_counter", "deptht", "y", "x"), votemper),
+                "sossheig": (
+                    ("time_counter", "y", "x"),
+                    votemper[:, 0, :, :],
+                ),
+            },
+            coords={"time_counter": times, "deptht": [0.5, 1.5, 2.5]},
+        ).to_netcdf(
+            archive / f"{day:02d}jan20" / f"SalishSea_1h_202001{day:02d}_grid_T.nc"
+        )
+    return {
+        "time coord": {"name": "time_counter"},
+        "y coord": {"name": "y"},
+        "x coord": {"name": "x"},
+        "chunk size": {"time": 12, "depth": 3, "y": 4, "x": 3},
+        "geo ref dataset": {
+            "path": tmp_path / "geo_ref.nc",
+            "y coord": "gridY",
+            "x coord": "gridX",
+        },
+        "results archive": {
+            "path": archive,
+            "datasets": {
+                "hour": {
+                    "physics tracers": {
+                        "file pattern": "{ddmmmyy}/SalishSea_1h_{yyyymmdd}_grid_T.nc",
+                        "depth coord": "deptht",
+                    }
+                }
+            },
+        },
+    }
+
+
+@pytest.fixture(name="config")
+def fixture_config():
+    return {
+        "dataset": {"time base": "hour", "variables group": "physics tracers"},
+        "observations": {"path": "obs.csv"},
+        "match variables": ["votemper"],
+    }
+
+
+@pytest.fixture(name="obs")
+def fixture_obs():
+    return pandas.DataFrame(
+        {
+            "time": ["2020-01-02 03:30", "2020-01-01 05:30", "2020-01-02 03:30"],
+            "lon": [-123.9, -123.8, -124.0],
+            "lat": [49.1, 49.3, 49.0],
+            "depth": [1.5, 0.5, 2.5],
+            "station": ["S1", "S2", "S3"],
+        }
+    )
+
+
+class TestLoadConfig:
+    """Unit test for load_config() function."""
+
+    def test_load_config(self, tmp_path, log_output):
+        config_yaml = tmp_path / "match.yaml"
+        config_yaml.write_text(textwrap.dedent("""\
+                match variables:
+                  - votemper
+                """))
+
+        config = match.load_config(config_yaml)
+
+        assert config["match variables"] == ["votemper"]
+        assert log_output.entries[0]["event"] == "loaded config"
+
+
+class TestReadObsTable:
+    """Unit tests for read_obs_table() function."""
+
+    def test_read_csv(self, obs, tmp_path, log_output):
+        obs.to_csv(tmp_path / "obs.csv", index=False)
+
+        read_obs = match.read_obs_table(tmp_path / "obs.csv")
+
+        pandas.testing.assert_frame_equal(read_obs, obs)
+        assert log_output.entries[0]["event"] == "read observations"
+        assert log_output.entries[0]["n_obs"] == 3
+
+    def test_no_obs_file(self, tmp_path, log_output):
+        with pytest.raises(SystemExit) as exc_info:
+            match.read_obs_table(tmp_path / "obs.csv")
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["log_level"] == "error"
+        assert log_output.entries[0]["event"] == "observations file not found"
+
+
+class TestWriteObsTable:
+    """Unit test for write_obs_table() function."""
+
+    def test_write_csv(self, obs, tmp_path, log_output):
+        match.write_obs_table(obs, tmp_path / "output" / "matches.csv")
+
+        pandas.testing.assert_frame_equal(
+            pandas.read_csv(tmp_path / "output" / "matches.csv"), obs
+        )
+        assert log_output.entries[0]["event"] == "wrote matched observations"
+
+
+class TestMatchObs:
+    """Unit tests for match_obs() function."""
+
+    def test_nearest(self, obs, config, model_profile, log_output):
+        matches = match.match_obs(obs, config, model_profile)
+
+        assert list(matches["station"]) == ["S1", "S2", "S3"]
+        assert list(matches["model_grid_y"]) == [1, 3, 0]
+        assert list(matches["model_grid_x"]) == [1, 2, 0]
+        numpy.testing.assert_allclose(
+            matches["model_votemper"], [2311.1, 1503.2, 2320.0]
+        )
+        assert log_output.entries[-1]["event"] == "matched model values to observations"
+        assert log_output.entries[-1]["n_files"] == 2
+
+    def test_linear_time_depth(self, obs, config, model_profile, log_output):
+        config["interpolation"] = {"time": "linear", "depth": "linear"}
+        obs["time"] = ["2020-01-02 04:00", "2020-01-01 05:30", "2020-01-02 03:30"]
+        obs["depth"] = [1.0, 0.5, 2.5]
+
+        matches = match.match_obs(obs, config, model_profile)
+
+        numpy.testing.assert_allclose(
+            matches["model_votemper"], [2356.1, 1503.2, 2320.0]
+        )
+
+    def test_surface_var(self, obs, config, model_profile, log_output):
+        config["match variables"] = ["sossheig"]
+
+        matches = match.match_obs(obs, config, model_profile)
+
+        numpy.testing.assert_allclose(
+            matches["model_sossheig"], [2301.1, 1503.2, 2300.0]
+        )
+
+    def test_no_depth_column(self, obs, config, model_profile, log_output):
+        matches = match.match_obs(obs.drop(columns="depth"), config, model_profile)
+
+        numpy.testing.assert_allclose(
+            matches["model_votemper"], [2301.1, 1503.2, 2300.0]
+        )
+
+    def test_tz_aware_times(self, obs, config, model_profile, log_output):
+        obs["time"] = [
+            "2020-01-01T19:30-08:00",
+            "2020-01-01T05:30Z",
+            "2020-01-02T03:30Z",
+        ]
+
+        matches = match.match_obs(obs, config, model_profile)
+
+        numpy.testing.assert_allclose(
+            matches["model_votemper"], [2311.1, 1503.2, 2320.0]
+        )
+
+    def test_unmatched_obs(self, obs, config, model_profile, log_output):
+        config["grid point"] = {"max distance": 2000}
+        obs["time"] = ["2020-01-03 03:30", "2020-01-01 05:30", "bad time"]
+        obs["lon"] = [-123.9, -123.5, -124.0]
+
+        matches = match.match_obs(obs, config, model_profile)
+
+        assert matches["model_grid_y"].isna().tolist() == [False, True, False]
+        assert numpy.isnan(matches["model_votemper"]).all()
+        assert log_output.entries[-2]["log_level"] == "warning"
+        assert (
+            log_output.entries[-2]["event"]
+            == "model dataset file not found; observations not matched"
+        )
+
+
+class TestCalcObsGridIndices:
+    """Unit tests for calc_obs_grid_indices() function."""
+
+    def test_unique_locations(self, obs, config, model_profile, log_output):
+        obs = pandas.concat((obs, obs), ignore_index=True)
+        columns = match._calc_obs_columns(config)
+
+        grid_indices = match.calc_obs_grid_indices(obs, columns, config, model_profile)
+
+        numpy.testing.assert_array_equal(grid_indices["y"], [1, 3, 0, 1, 3, 0])
+        numpy.testing.assert_array_equal(grid_indices["x"], [1, 2, 0, 1, 2, 0])
+        assert grid_indices["matched"].all()
+        assert log_output.entries[-1]["n_locations"] == 3
+
+    def test_unlocated_obs(self, obs, config, model_profile, log_output):
+        obs["lon"] = numpy.nan
+        columns = match._calc_obs_columns(config)
+
+        grid_indices = match.calc_obs_grid_indices(obs, columns, config, model_profile)
+
+        assert numpy.isnan(grid_indices["distance"]).all()
+        assert not grid_indices["matched"].any()
+        assert log_output.entries[-1]["n_locations"] == 0
+
+    def test_wet_point_no_mesh_mask(self, obs, config, model_profile, log_output):
+        config["grid point"] = {"wet point": True}
+        columns = match._calc_obs_columns(config)
+
+        with pytest.raises(SystemExit) as exc_info:
+            match.calc_obs_grid_indices(obs, columns, config, model_profile)
+
+        assert exc_info.value.code == 2
+        assert (
+            log_output.entries[0]["event"]
+            == "nearest wet point matching requires a mesh mask"
+        )
+
+
+class TestCalcInterpIndices:
+    """Unit tests for calc_interp_indices() function."""
+
+    def test_nearest(self, log_output):
+        indices, weights = match.calc_interp_indices(
+            numpy.array([0.5, 1.5, 2.5]), numpy.array([0, 1.4, 1.6, 9]), "nearest"
+        )
+
+        numpy.testing.assert_array_equal(indices, [[0, 1, 1, 2]])
+        numpy.testing.assert_array_equal(weights, [[1, 1, 1, 1]])
+
+    def test_linear(self, log_output):
+        indices, weights = match.calc_interp_indices(
+            numpy.array([0.5, 1.5, 2.5]), numpy.array([0, 1, 2.5, 9]), "linear"
+        )
+
+        numpy.testing.assert_array_equal(indices, [[0, 0, 2, 2], [1, 1, 2, 2]])
+        numpy.testing.assert_allclose(weights, [[1, 0.5, 1, 1], [0, 0.5, 0, 0]])
+
+    def test_unsupported_method(self, log_output):
+        with pytest.raises(SystemExit) as exc_info:
+            match.calc_interp_indices(numpy.arange(3), numpy.arange(3), "cubic")
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[0]["event"] == "unsupported interpolation method"
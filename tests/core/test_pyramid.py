@@ -0,0 +1,288 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for core pyramid module."""
+
+import os
+import textwrap
+from pathlib import Path
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from reshapr.core import extract, pyramid
+
+
+@pytest.fixture(name="archive")
+def fixture_archive(make_archive, tmp_path):
+    def data_vars(date):
+        # votemper = 100 * day + 10 * depth index + y index + x index / 10
+        votemper = (
+            100 * date.day
+            + 10 * numpy.arange(3)[None, :, None, None]
+            + numpy.arange(5)[None, None, :, None]
+            + 0.1 * numpy.arange(4)[None, None, None, :]
+        ).astype(numpy.single)
+        return {
+            "votemper": (
+                ("time_counter", "deptht", "y", "x"),
+                votemper,
+                {"long_name": "Conservative Temperature", "units": "degree_C"},
+            ),
+            "sossheig": (
+                ("time_counter", "y", "x"),
+                votemper[:, 0, :, :],
+                {"long_name": "Sea Surface Height", "units": "m"},
+            ),
+        }
+
+    make_archive(
+        pandas.date_range("2020-01-01", "2020-01-02", freq="1D"),
+        data_vars,
+        depths=[0.5, 1.5, 2.5],
+        chunk_size={"time": 1, "depth": 3, "y": 5, "x": 4},
+        profile_stanzas={
+            "overview pyramid": {"path": str(tmp_path / "pyramid"), "levels": [2, 4]}
+        },
+    )
+    tmask = numpy.ones((1, 3, 5, 4), dtype=numpy.int8)
+    tmask[:, :, 0, 0] = 0
+    tmask[:, 2, 4, :] = 0
+    xarray.Dataset({"tmask": (("t", "z", "y", "x"), tmask)}).to_netcdf(
+        tmp_path / "mesh_mask.nc"
+    )
+    return tmp_path
+
+
+def _write_config(tmp_path, extra=""):
+    config_yaml = tmp_path / "pyramid.yaml"
+    config_yaml.write_text(textwrap.dedent(f"""\
+            dataset:
+              model profile: {tmp_path / "test_profile.yaml"}
+              time base: day
+              variables group: physics tracers
+
+            dask cluster: unit_test_cluster.yaml
+
+            start date: 2020-01-01
+            end date: 2020-01-02
+
+            extract variables:
+              - votemper
+              - sossheig
+            """) + textwrap.dedent(extra))
+    return config_yaml
+
+
+class TestCliPyramid:
+    """Unit tests for cli_pyramid() function."""
+
+    def test_build_levels(self, archive, log_output):
+        pyramid.cli_pyramid(_write_config(archive), "", "")
+
+        overview_2 = archive / "pyramid" / "overview-2"
+        with xarray.open_dataset(
+            overview_2 / "02jan20" / "SalishSea_1d_20200102_grid_T.nc"
+        ) as overview_ds:
+            numpy.testing.assert_array_equal(overview_ds.y, [0, 2, 4])
+            numpy.testing.assert_array_equal(overview_ds.x, [0, 2])
+            assert overview_ds.votemper.shape == (1, 3, 3, 2)
+            # Block means of y index + x index / 10
+            numpy.testing.assert_allclose(
+                overview_ds.votemper.isel(time_counter=0, deptht=1),
+                210
+                + numpy.array([[0.5, 0.5], [2.5, 2.5], [4, 4]])
+                + numpy.array([0.05, 0.25]),
+                rtol=1e-6,
+            )
+            assert overview_ds.votemper.attrs["units"] == "degree_C"
+            assert overview_ds.attrs["overview_level"] == 2
+            assert overview_ds.sossheig.dims == ("time_counter", "y", "x")
+        overview_4 = archive / "pyramid" / "overview-4"
+        assert sorted(path.name for path in overview_4.glob("*/*.nc")) == [
+            "SalishSea_1d_20200101_grid_T.nc",
+            "SalishSea_1d_20200102_grid_T.nc",
+        ]
+        assert log_output.entries[-2]["n_ds_paths"] == 2
+        assert log_output.entries[-2]["n_overviews"] == 4
+        assert log_output.entries[-2]["event"] == "built overview pyramid files"
+
+    def test_up_to_date_overviews_not_rebuilt(self, archive, log_output):
+        config_yaml = _write_config(archive)
+        pyramid.cli_pyramid(config_yaml, "", "")
+        source = archive / "results" / "02jan20" / "SalishSea_1d_20200102_grid_T.nc"
+        overview = (
+            archive
+            / "pyramid"
+            / "overview-2"
+            / "02jan20"
+            / "SalishSea_1d_20200102_grid_T.nc"
+        )
+        updated_mtime = overview.stat().st_mtime + 60
+        os.utime(source, (updated_mtime, updated_mtime))
+
+        pyramid.cli_pyramid(config_yaml, "", "")
+
+        assert log_output.entries[-2]["n_overviews"] == 2
+
+    def test_land_masked(self, archive):
+        config_yaml = _write_config(
+            archive,
+            f"""\
+            mesh mask: {archive / "mesh_mask.nc"}
+
+            selection:
+              depth:
+                depth min: 1
+            """,
+        )
+
+        pyramid.cli_pyramid(config_yaml, "", "")
+
+        overview_2 = archive / "pyramid" / "overview-2"
+        with xarray.open_dataset(
+            overview_2 / "01jan20" / "SalishSea_1d_20200101_grid_T.nc"
+        ) as overview_ds:
+            numpy.testing.assert_array_equal(overview_ds.deptht, [1.5, 2.5])
+            votemper = overview_ds.votemper.isel(time_counter=0)
+            # Land point at y=0, x=0 is excluded from the south-west block mean
+            numpy.testing.assert_allclose(
+                votemper.isel(deptht=0, y=0, x=0), 110 + (0.1 + 1 + 1.1) / 3, rtol=1e-6
+            )
+            # North edge row is all land at the deepest level
+            assert numpy.isnan(votemper.isel(deptht=1, y=2)).all()
+            numpy.testing.assert_allclose(
+                overview_ds.sossheig.isel(time_counter=0, y=0, x=0),
+                100 + (0.1 + 1 + 1.1) / 3,
+                rtol=1e-6,
+            )
+
+    def test_no_overview_pyramid(self, archive, log_output):
+        model_profile_yaml = archive / "test_profile.yaml"
+        model_profile_yaml.write_text(
+            model_profile_yaml.read_text().replace("overview pyramid", "unused")
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            pyramid.cli_pyramid(_write_config(archive), "", "")
+
+        assert exc_info.value.code == 2
+        assert log_output.entries[-1]["log_level"] == "error"
+        assert (
+            log_output.entries[-1]["event"] == "model profile has no overview pyramid"
+        )
+
+
+class TestCalcOverviewPaths:
+    """Unit test for calc_overview_paths() function."""
+
+    def test_calc_overview_paths(self):
+        model_profile = {
+            "overview pyramid": {"path": "/results/pyramid/", "levels": [2, 8]},
+            "results archive": {"path": "/results/SalishSea/nowcast-green.202111/"},
+        }
+        ds_path = Path(
+            "/results/SalishSea/nowcast-green.202111/01jan20/SalishSea_1d_20200101_20200101_grid_T.nc"
+        )
+
+        overview_paths = pyramid.calc_overview_paths(ds_path, model_profile)
+
+        assert overview_paths == {
+            2: Path(
+                "/results/pyramid/overview-2/01jan20/SalishSea_1d_20200101_20200101_grid_T.nc"
+            ),
+            8: Path(
+                "/results/pyramid/overview-8/01jan20/SalishSea_1d_20200101_20200101_grid_T.nc"
+            ),
+        }
+
+
+class TestExtractOverview:
+    """Integration test of core.extract.cli_extract() function with an overview
+    resolution."""
+
+    def test_extract_overview(self, archive):
+        pyramid.cli_pyramid(_write_config(archive), "", "")
+        config_yaml = archive / "extract.yaml"
+        config_yaml.write_text(textwrap.dedent(f"""\
+                dataset:
+                  model profile: {archive / "test_profile.yaml"}
+                  time base: day
+                  variables group: physics tracers
+
+                dask cluster: unit_test_cluster.yaml
+
+                start date: 2020-01-01
+                end date: 2020-01-02
+
+                extract variables:
+                  - sossheig
+
+                resolution: overview-2
+
+                selection:
+                  grid y:
+                    y min: 2
+
+                extracted dataset:
+                  name: ssh_overview
+                  description: test extraction
+                  dest dir: {archive}
+                """))
+
+        extract.cli_extract(config_yaml, "", "")
+
+        with xarray.open_dataset(
+            archive / "ssh_overview_20200101_20200102.nc"
+        ) as extracted_ds:
+            numpy.testing.assert_array_equal(extracted_ds.gridY, [2, 4])
+            numpy.testing.assert_array_equal(extracted_ds.gridX, [0, 2])
+            numpy.testing.assert_allclose(
+                extracted_ds.sossheig.isel(time=1),
+                200 + numpy.array([[2.5, 2.5], [4, 4]]) + numpy.array([0.05, 0.25]),
+                rtol=1e-6,
+            )
+
+    def test_api_config_reuse(self, archive):
+        pyramid.cli_pyramid(_write_config(archive), "", "")
+        config = {
+            "dataset": {
+                "model profile": os.fspath(archive / "test_profile.yaml"),
+                "time base": "day",
+                "variables group": "physics tracers",
+            },
+            "dask cluster": "unit_test_cluster.yaml",
+            "start date": "2020-01-01",
+            "end date": "2020-01-02",
+            "extract variables": ["sossheig"],
+            "resolution": "overview-2",
+            "selection": {"grid y": {"y min": 2}},
+            "extracted dataset": {
+                "name": "ssh_overview",
+                "description": "test extraction",
+                "dest dir": os.fspath(archive),
+            },
+        }
+
+        for _ in range(2):
+            nc_path = extract.api_extract_netcdf(config, Path("extract.yaml"))
+
+            with xarray.open_dataset(nc_path) as extracted_ds:
+                numpy.testing.assert_array_equal(extracted_ds.gridY, [2, 4])
+        assert config["selection"] == {"grid y": {"y min": 2}}
@@ -51,6 +51,22 @@ class TestClusterConfigs:
         assert cluster_config["memory limit"] is not None
 
 
+class TestNibiCluster:
+    """Test of contents of nibi_cluster config YAML."""
+
+    def test_nibi_cluster(self):
+        with (CLUSTER_CONFIGS_DIR / "nibi_cluster.yaml").open("rt") as f:
+            cluster_config = yaml.safe_load(f)
+
+        assert cluster_config["name"] == "nibi dask cluster"
+        assert cluster_config["processes"] is True
+        assert cluster_config["number of workers"] == 16
+        assert cluster_config["threads per worker"] == 1
+        assert cluster_config["memory limit"] == "8000M"
+        assert cluster_config["io limits"]["max concurrent reads"] == 8
+        assert cluster_config["io limits"]["max read bandwidth"] == "500 MiB"
+
+
 class TestSalishCluster:
     """Test of contents of salish_cluster config YAML."""
 
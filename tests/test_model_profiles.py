@@ -277,6 +277,10 @@ class TestSalishSeaCast201905:
         assert model_profile["geo ref dataset"]["y coord"] == "gridY"
         assert model_profile["geo ref dataset"]["x coord"] == "gridX"
         assert model_profile["extraction time origin"] == arrow.get("2007-01-01").date()
+        assert (
+            model_profile["month-avg profile"]
+            == "SalishSeaCast-201905-month-avg-salish.yaml"
+        )
         assert (
             model_profile["results archive"]["path"]
             == "/results2/SalishSea/nowcast-green.201905/"
@@ -495,6 +499,10 @@ class TestSalishSeaCast202111:
         assert model_profile["geo ref dataset"]["y coord"] == "gridY"
         assert model_profile["geo ref dataset"]["x coord"] == "gridX"
         assert model_profile["extraction time origin"] == arrow.get("2007-01-01").date()
+        assert (
+            model_profile["month-avg profile"]
+            == "SalishSeaCast-202111-month-avg-salish.yaml"
+        )
         assert (
             model_profile["results archive"]["path"]
             == "/results2/SalishSea/nowcast-green.202111/"
@@ -823,6 +831,10 @@ class TestHRDPS2_5kmOperational:
         assert model_profile["geo ref dataset"]["y coord"] == "gridY"
         assert model_profile["geo ref dataset"]["x coord"] == "gridX"
         assert model_profile["extraction time origin"] == arrow.get("2007-01-01").date()
+        assert model_profile["valid dates"] == {
+            "start date": arrow.get("2014-09-12").date()
+        }
+        assert "successor profile" not in model_profile
         assert (
             model_profile["results archive"]["path"]
             == "/results/forcing/atmospheric/GEM2.5/operational/"
@@ -869,6 +881,14 @@ class TestHRDPS2_5kmGEMLAM_pre22sep11:
         assert model_profile["geo ref dataset"]["x coord"] == "x"
         assert model_profile["geo ref dataset"]["latitude var"] == "nav_lat"
         assert model_profile["extraction time origin"] == arrow.get("2007-01-01").date()
+        assert model_profile["valid dates"] == {
+            "start date": arrow.get("2007-01-03").date(),
+            "end date": arrow.get("2011-09-21").date(),
+        }
+        assert (
+            model_profile["successor profile"]
+            == "HRDPS-2.5km-GEMLAM-22sep11onward.yaml"
+        )
         assert (
             dataset_hour["surface fields"]["file pattern"]
             == "gemlam_{nemo_yyyymmdd}.nc"
@@ -910,6 +930,11 @@ class TestHRDPS2_5kmGEMLAM_22sep11onward:
         assert model_profile["geo ref dataset"]["x coord"] == "x"
         assert model_profile["geo ref dataset"]["latitude var"] == "nav_lat"
         assert model_profile["extraction time origin"] == arrow.get("2007-01-01").date()
+        assert model_profile["valid dates"] == {
+            "start date": arrow.get("2011-09-22").date(),
+            "end date": arrow.get("2014-11-18").date(),
+        }
+        assert model_profile["successor profile"] == "HRDPS-2.5km-operational.yaml"
         assert (
             dataset_hour["surface fields"]["file pattern"]
             == "gemlam_{nemo_yyyymmdd}.nc"
@@ -0,0 +1,162 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for the day and month aggregate cache."""
+
+import os
+from pathlib import Path
+
+import arrow
+import numpy
+import pandas
+import pytest
+import xarray
+
+from reshapr.utils import aggregate_cache
+
+
+class TestCalcLevels:
+    """Unit tests for calc_levels() function."""
+
+    @pytest.mark.parametrize(
+        "time_base, expected",
+        (
+            ("hour", ("month", "day")),
+            ("day", ("month",)),
+            ("month", ()),
+        ),
+    )
+    def test_calc_levels(self, time_base, expected):
+        assert aggregate_cache.calc_levels(time_base) == expected
+
+
+class TestCalcEntryPath:
+    """Unit tests for calc_entry_path() function."""
+
+    @pytest.mark.parametrize(
+        "level, expected",
+        (
+            ("day", "day/votemper/votemper_20200107.nc"),
+            ("month", "month/votemper/votemper_202001.nc"),
+        ),
+    )
+    def test_calc_entry_path(self, level, expected):
+        entry_path = aggregate_cache.calc_entry_path(
+            "/results/aggregates/",
+            "hour",
+            "physics tracers",
+            "mean",
+            level,
+            "votemper",
+            arrow.get("2020-01-07"),
+        )
+
+        assert entry_path == Path(
+            "/results/aggregates/hour/physics_tracers/mean", expected
+        )
+
+
+class TestIsValid:
+    """Unit tests for is_valid() function."""
+
+    def test_missing_entry(self, tmp_path):
+        assert not aggregate_cache.is_valid(tmp_path / "entry.nc", [])
+
+    def test_up_to_date_entry(self, tmp_path):
+        source = tmp_path / "source.nc"
+        source.write_bytes(b"")
+        entry = tmp_path / "entry.nc"
+        entry.write_bytes(b"")
+        os.utime(source, (entry.stat().st_mtime - 60,) * 2)
+
+        assert aggregate_cache.is_valid(entry, [source, tmp_path / "deleted.nc"])
+
+    def test_out_of_date_entry(self, tmp_path):
+        source = tmp_path / "source.nc"
+        source.write_bytes(b"")
+        entry = tmp_path / "entry.nc"
+        entry.write_bytes(b"")
+        os.utime(source, (entry.stat().st_mtime + 60,) * 2)
+
+        assert not aggregate_cache.is_valid(entry, [source])
+
+
+class TestCalcEntries:
+    """Unit tests for calc_entries() function."""
+
+    @pytest.fixture(name="source_ds")
+    def fixture_source_ds(self):
+        times = pandas.date_range("2020-01-30 00:30", "2020-02-01 23:30", freq="1h")
+        ds = xarray.Dataset(
+            {
+                "votemper": (
+                    ("time_counter", "y"),
+                    numpy.arange(times.size * 2, dtype=float).reshape(-1, 2),
+                    {"units": "degree_C"},
+                )
+            },
+            coords={
+                "time_counter": times,
+                "time_centered": ("time_counter", times),
+            },
+        )
+        ds.time_counter.encoding = {
+            "units": "seconds since 1900-01-01",
+            "calendar": "gregorian",
+            "dtype": "int64",
+        }
+        return ds
+
+    def test_day_entries(self, source_ds):
+        entries = aggregate_cache.calc_entries(source_ds, "day", "mean", "time_counter")
+
+        assert list(entries) == list(
+            pandas.date_range("2020-01-30", "2020-02-01", freq="1D")
+        )
+        entry_ds = entries[pandas.Timestamp("2020-01-31")]
+        numpy.testing.assert_array_equal(
+            entry_ds.time_counter, [numpy.datetime64("2020-01-31T12:00")]
+        )
+        numpy.testing.assert_array_equal(
+            entry_ds.votemper,
+            source_ds.votemper[24:48].mean("time_counter").values[None],
+        )
+        assert "time_centered" not in entry_ds.coords
+        assert entry_ds.votemper.attrs == {"units": "degree_C"}
+        assert entry_ds.attrs == {"aggregate_level": "day", "aggregation": "mean"}
+        assert entry_ds.time_counter.encoding == {
+            "units": "seconds since 1900-01-01",
+            "calendar": "gregorian",
+            "dtype": "float64",
+        }
+
+    def test_month_entries(self, source_ds):
+        entries = aggregate_cache.calc_entries(
+            source_ds, "month", "max", "time_counter"
+        )
+
+        assert list(entries) == [
+            pandas.Timestamp("2020-01-01"),
+            pandas.Timestamp("2020-02-01"),
+        ]
+        entry_ds = entries[pandas.Timestamp("2020-02-01")]
+        numpy.testing.assert_array_equal(
+            entry_ds.time_counter, [numpy.datetime64("2020-02-15T12:00")]
+        )
+        numpy.testing.assert_array_equal(
+            entry_ds.votemper, source_ds.votemper[-1:].values
+        )
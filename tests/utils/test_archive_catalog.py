@@ -0,0 +1,297 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for the results archive catalog."""
+
+import contextlib
+import os
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from reshapr.utils import archive_catalog
+
+
+@pytest.fixture(name="ds_path")
+def fixture_ds_path(tmp_path):
+    ds_path = tmp_path / "SalishSea_1d_20200101_grid_T.nc"
+    xarray.Dataset(
+        {
+            "votemper": (
+                ("time_counter", "deptht", "y", "x"),
+                numpy.ones((1, 2, 3, 2), dtype=numpy.single),
+                {"long_name": "Conservative Temperature", "units": "degree_C"},
+            ),
+            "nav_lon": (("y", "x"), numpy.zeros((3, 2))),
+        },
+        coords={
+            "time_counter": pandas.date_range("2020-01-01 12:00", periods=1),
+            "deptht": [0.5, 1.5],
+        },
+    ).set_coords("nav_lon").to_netcdf(
+        ds_path,
+        encoding={"votemper": {"chunksizes": (1, 2, 3, 2)}},
+        engine="netcdf4",
+    )
+    return ds_path
+
+
+def _store(catalog_path, records, time_base="day", vars_group="physics tracers"):
+    with contextlib.closing(archive_catalog.connect(catalog_path)) as connection:
+        archive_catalog.store_records(connection, records, time_base, vars_group)
+
+
+class TestScanFile:
+    """Unit tests for scan_file() function."""
+
+    def test_ok(self, ds_path):
+        record = archive_catalog.scan_file(ds_path)
+
+        assert record["path"] == os.fspath(ds_path)
+        assert record["size"] == ds_path.stat().st_size
+        assert record["mtime"] == ds_path.stat().st_mtime
+        assert record["status"] == "ok"
+        assert record["error"] is None
+        variables = {var["name"]: var for var in record["variables"]}
+        assert variables["votemper"] == {
+            "name": "votemper",
+            "is_coord": False,
+            "dims": ["time_counter", "deptht", "y", "x"],
+            "shape": [1, 2, 3, 2],
+            "chunks": [1, 2, 3, 2],
+            "dtype": "float32",
+            "long_name": "Conservative Temperature",
+            "units": "degree_C",
+        }
+        assert variables["nav_lon"]["is_coord"]
+        assert variables["time_counter"]["is_coord"]
+
+    def test_missing(self, tmp_path):
+        record = archive_catalog.scan_file(tmp_path / "missing.nc")
+
+        assert record["status"] == "missing"
+        assert record["size"] is None
+        assert record["variables"] == []
+
+    def test_unreadable(self, tmp_path):
+        ds_path = tmp_path / "truncated.nc"
+        ds_path.write_bytes(b"\x89HDF\r\n")
+
+        record = archive_catalog.scan_file(ds_path)
+
+        assert record["status"] == "unreadable"
+        assert record["size"] == 6
+        assert record["error"]
+        assert record["variables"] == []
+
+
+class TestStoreRecords:
+    """Unit tests for store_records() and load_variables() functions."""
+
+    def test_load_variables(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "catalogs" / "test.sqlite"
+        record = archive_catalog.scan_file(ds_path)
+        _store(catalog_path, [{**record, "date": "2020-01-01"}])
+
+        variables = archive_catalog.load_variables(catalog_path, ds_path)
+
+        assert variables == record["variables"]
+
+    def test_replace_record(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        record = archive_catalog.scan_file(ds_path)
+        _store(catalog_path, [{**record, "date": "2020-01-01"}])
+        _store(catalog_path, [{**record, "date": "2020-01-01", "variables": []}])
+
+        variables = archive_catalog.load_variables(catalog_path, ds_path)
+
+        assert variables == []
+
+    def test_stale_record(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        record = archive_catalog.scan_file(ds_path)
+        _store(catalog_path, [{**record, "date": "2020-01-01", "mtime": 0}])
+
+        assert archive_catalog.load_variables(catalog_path, ds_path) is None
+
+    def test_no_catalog(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+
+        assert archive_catalog.load_variables(catalog_path, ds_path) is None
+        assert not catalog_path.exists()
+
+
+class TestCalcStalePaths:
+    """Unit tests for calc_stale_paths() function."""
+
+    def test_calc_stale_paths(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        missing_path = tmp_path / "missing.nc"
+        new_path = tmp_path / "new.nc"
+        new_path.write_bytes(b"")
+        catalogued_missing_path = tmp_path / "catalogued_missing.nc"
+        _store(
+            catalog_path,
+            [
+                {**archive_catalog.scan_file(ds_path), "date": "2020-01-01"},
+                {
+                    **archive_catalog.scan_file(catalogued_missing_path),
+                    "date": "2020-01-02",
+                },
+            ],
+        )
+
+        with contextlib.closing(archive_catalog.connect(catalog_path)) as connection:
+            stale_paths = archive_catalog.calc_stale_paths(
+                connection, [ds_path, missing_path, new_path, catalogued_missing_path]
+            )
+
+        assert stale_paths == [missing_path, new_path]
+
+    def test_updated_file(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        _store(
+            catalog_path, [{**archive_catalog.scan_file(ds_path), "date": "2020-01-01"}]
+        )
+        os.utime(ds_path, (0, ds_path.stat().st_mtime + 10))
+
+        with contextlib.closing(archive_catalog.connect(catalog_path)) as connection:
+            stale_paths = archive_catalog.calc_stale_paths(connection, [ds_path])
+
+        assert stale_paths == [ds_path]
+
+
+class TestLoadCurrentGaps:
+    """Unit tests for load_current_gaps() function."""
+
+    def test_current_gaps(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        unreadable_path = tmp_path / "b.nc"
+        unreadable_path.write_bytes(b"\x89HDF\r\n")
+        _store(
+            catalog_path,
+            [
+                {**archive_catalog.scan_file(ds_path), "date": "2020-01-01"},
+                {
+                    **archive_catalog.scan_file(tmp_path / "a.nc"),
+                    "date": "2020-01-02",
+                },
+                {**archive_catalog.scan_file(unreadable_path), "date": "2020-01-03"},
+            ],
+        )
+        ds_paths = [ds_path, tmp_path / "a.nc", unreadable_path, tmp_path / "c.nc"]
+
+        gaps = archive_catalog.load_current_gaps(
+            catalog_path, "day", "physics tracers", ds_paths
+        )
+
+        assert gaps == {
+            tmp_path / "a.nc": ("2020-01-02", "missing"),
+            unreadable_path: ("2020-01-03", "unreadable"),
+        }
+
+    @pytest.mark.parametrize("gap_name", ("a.nc", "b.nc"))
+    def test_changed_gap_files(self, gap_name, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        (tmp_path / "b.nc").write_bytes(b"\x89HDF\r\n")
+        _store(
+            catalog_path,
+            [
+                {
+                    **archive_catalog.scan_file(tmp_path / "a.nc"),
+                    "date": "2020-01-02",
+                },
+                {
+                    **archive_catalog.scan_file(tmp_path / "b.nc"),
+                    "date": "2020-01-03",
+                },
+            ],
+        )
+        # Written or repaired after the catalog was updated
+        (tmp_path / gap_name).write_bytes(ds_path.read_bytes())
+
+        gaps = archive_catalog.load_current_gaps(
+            catalog_path, "day", "physics tracers", [tmp_path / gap_name]
+        )
+
+        assert gaps == {}
+
+    def test_no_catalog(self, tmp_path):
+        gaps = archive_catalog.load_current_gaps(
+            tmp_path / "test.sqlite", "day", "physics tracers", [tmp_path / "a.nc"]
+        )
+
+        assert gaps == {}
+
+
+class TestCalcCoverage:
+    """Unit tests for load_statuses() and calc_coverage() functions."""
+
+    def test_calc_coverage(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        record = archive_catalog.scan_file(ds_path)
+        _store(
+            catalog_path,
+            [
+                {**record, "date": "2020-01-01"},
+                {
+                    **archive_catalog.scan_file(tmp_path / "a.nc"),
+                    "date": "2020-01-02",
+                },
+                {
+                    **archive_catalog.scan_file(tmp_path / "b.nc"),
+                    "date": "2020-01-03",
+                },
+            ],
+        )
+        _store(
+            catalog_path,
+            [{**archive_catalog.scan_file(tmp_path / "c.nc"), "date": "2020-01-04"}],
+            vars_group="biology",
+        )
+
+        coverage = archive_catalog.calc_coverage(catalog_path, "day", "physics tracers")
+
+        assert coverage == {
+            "n_files": 3,
+            "start_date": "2020-01-01",
+            "end_date": "2020-01-03",
+            "n_ok": 1,
+            "n_missing": 2,
+            "n_unreadable": 0,
+            "gap_dates": ["2020-01-02", "2020-01-03"],
+            "latest_path": ds_path,
+        }
+
+    def test_no_catalog(self, tmp_path):
+        coverage = archive_catalog.calc_coverage(
+            tmp_path / "test.sqlite", "day", "physics tracers"
+        )
+
+        assert coverage is None
+
+    def test_no_dataset_files(self, ds_path, tmp_path):
+        catalog_path = tmp_path / "test.sqlite"
+        _store(
+            catalog_path, [{**archive_catalog.scan_file(ds_path), "date": "2020-01-01"}]
+        )
+
+        coverage = archive_catalog.calc_coverage(catalog_path, "hour", "biology")
+
+        assert coverage is None
@@ -0,0 +1,190 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for column kernel functions and registry."""
+
+from importlib import metadata
+
+import dask.array
+import numpy
+import pytest
+import xarray
+
+from reshapr.utils import column_kernels
+
+
+class TestColumnKernel:
+    """Unit tests for column_kernel() decorator and get_column_kernel() function."""
+
+    @pytest.mark.parametrize(
+        "name, kernel",
+        (
+            ("mixed layer depth", column_kernels.mixed_layer_depth),
+            ("threshold depth", column_kernels.threshold_depth),
+            ("nitracline depth", column_kernels.nitracline_depth),
+            ("depth of maximum", column_kernels.depth_of_maximum),
+        ),
+    )
+    def test_built_in_kernels(self, name, kernel):
+        assert column_kernels.get_column_kernel(name) is kernel
+        assert kernel.kernel_name == name
+
+    def test_kernel_attrs(self):
+        kernel = column_kernels.get_column_kernel("mixed layer depth")
+
+        assert kernel.long_name == "Mixed Layer Depth"
+        assert kernel.units == "m"
+
+    def test_entry_point_kernel(self, monkeypatch):
+        def euphotic_depth(values, depths):
+            return depths[0]
+
+        class MockEntryPoint:
+            name = "euphotic depth"
+
+            def load(self):
+                return euphotic_depth
+
+        def mock_entry_points(group):
+            assert group == "reshapr.column_kernels"
+            return [MockEntryPoint()]
+
+        monkeypatch.setattr(metadata, "entry_points", mock_entry_points)
+        monkeypatch.setattr(
+            column_kernels, "_registry", column_kernels._registry.copy()
+        )
+
+        kernel = column_kernels.get_column_kernel("euphotic depth")
+
+        assert kernel is euphotic_depth
+        assert kernel.kernel_name == "euphotic depth"
+
+    def test_unregistered_kernel(self, monkeypatch):
+        monkeypatch.setattr(metadata, "entry_points", lambda group: [])
+
+        with pytest.raises(KeyError):
+            column_kernels.get_column_kernel("no such kernel")
+
+
+class TestApplyColumnKernel:
+    """Unit tests for apply_column_kernel() function."""
+
+    def test_apply_column_kernel_dask(self):
+        depths = numpy.array([0.5, 1.5, 2.5, 3.5])
+        values = numpy.broadcast_to(
+            numpy.array([1, 3, 2, 0])[numpy.newaxis, :, numpy.newaxis], (2, 4, 3)
+        )
+        var = xarray.DataArray(
+            dask.array.from_array(values, chunks=(1, 2, 3)),
+            coords={"time": numpy.arange(2), "depth": depths, "gridX": numpy.arange(3)},
+            dims=("time", "depth", "gridX"),
+        )
+
+        result = column_kernels.apply_column_kernel(
+            column_kernels.depth_of_maximum, var, "depth"
+        )
+
+        assert result.dims == ("time", "gridX")
+        assert result.chunks is not None
+        numpy.testing.assert_array_equal(result.compute(), numpy.full((2, 3), 1.5))
+
+    def test_apply_column_kernel_params(self):
+        depths = numpy.array([0.5, 1.5, 2.5, 3.5])
+        var = xarray.DataArray(
+            numpy.array([[0, 1, 2, 3]]),
+            coords={"gridX": [0], "depth": depths},
+            dims=("gridX", "depth"),
+        )
+
+        result = column_kernels.apply_column_kernel(
+            column_kernels.threshold_depth, var, "depth", threshold=1.5
+        )
+
+        numpy.testing.assert_allclose(result, [2.0])
+
+
+class TestMixedLayerDepth:
+    """Unit tests for mixed_layer_depth() kernel."""
+
+    def test_mixed_layer_depth(self):
+        depths = numpy.array([0.5, 5, 10, 15, 20, 25])
+        sigma_theta = numpy.array([[20.0, 20.0, 20.0, 20.01, 20.05, 21.0]])
+
+        mld = column_kernels.mixed_layer_depth(sigma_theta, depths)
+
+        # 20.03 is reached 1/2 way between 15 m and 20 m
+        numpy.testing.assert_allclose(mld, [17.5])
+
+    def test_reference_depth_and_threshold(self):
+        depths = numpy.array([0.5, 5, 10, 15, 20, 25])
+        sigma_theta = numpy.array([[19.0, 20.0, 20.0, 20.01, 20.05, 21.0]])
+
+        mld = column_kernels.mixed_layer_depth(
+            sigma_theta, depths, threshold=0.5, reference_depth=0
+        )
+
+        numpy.testing.assert_allclose(mld, [2.75])
+
+    def test_mixed_to_bottom(self):
+        depths = numpy.array([0.5, 5, 10, 15, 20, 25])
+        sigma_theta = numpy.array([[20.0, 20.0, 20.0, 20.0, 20.01, numpy.nan]])
+
+        mld = column_kernels.mixed_layer_depth(sigma_theta, depths)
+
+        numpy.testing.assert_allclose(mld, [20])
+
+    def test_land_column(self):
+        depths = numpy.array([0.5, 5, 10, 15])
+        sigma_theta = numpy.full((1, 4), numpy.nan)
+
+        mld = column_kernels.mixed_layer_depth(sigma_theta, depths)
+
+        assert numpy.isnan(mld).all()
+
+
+class TestThresholdDepth:
+    """Unit tests for threshold_depth() and nitracline_depth() kernels."""
+
+    def test_threshold_depth(self):
+        depths = numpy.array([0.5, 1.5, 2.5, 3.5])
+        values = numpy.array([[0, 0.5, 1.5, 3], [2, 3, 4, 5], [0, 0, 0, 0]])
+
+        result = column_kernels.threshold_depth(values, depths)
+
+        numpy.testing.assert_allclose(result, [2.0, 0.5, numpy.nan])
+
+    def test_nitracline_depth(self):
+        depths = numpy.array([0.5, 1.5, 2.5, 3.5])
+        nitrate = numpy.array([[0, 0.5, 1.5, 30]])
+
+        result = column_kernels.nitracline_depth(nitrate, depths, threshold=10)
+
+        numpy.testing.assert_allclose(result, [2.5 + 8.5 / 28.5])
+
+
+class TestDepthOfMaximum:
+    """Unit test for depth_of_maximum() kernel."""
+
+    def test_depth_of_maximum(self):
+        depths = numpy.array([0.5, 1.5, 2.5, 3.5])
+        values = numpy.array(
+            [[0, 5, 1, numpy.nan], [numpy.nan] * 4, [1, 0, 0, 0]], dtype=float
+        )
+
+        result = column_kernels.depth_of_maximum(values, depths)
+
+        numpy.testing.assert_allclose(result, [1.5, numpy.nan, 0.5])
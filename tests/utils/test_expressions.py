@@ -0,0 +1,119 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for safe arithmetic expressions for derived variables."""
+
+import dask.array
+import numpy
+import pytest
+import xarray
+
+from reshapr.utils import expressions
+
+
+class TestCompileExpression:
+    """Unit tests for compile_expression() function."""
+
+    @pytest.mark.parametrize(
+        "expression, expected",
+        (
+            ("sqrt(u_wind**2 + v_wind**2)", {"u_wind", "v_wind"}),
+            ("nitrate + ammonium + diatoms", {"nitrate", "ammonium", "diatoms"}),
+            ("where(votemper > 10, votemper, 0)", {"votemper"}),
+            ("-sossheig * 2 * pi", {"sossheig"}),
+        ),
+    )
+    def test_var_names(self, expression, expected):
+        _, var_names = expressions.compile_expression(expression)
+
+        assert var_names == expected
+
+    def test_compiled_once(self):
+        expression = "diatoms + flagellates"
+
+        code, _ = expressions.compile_expression(expression)
+
+        assert expressions.compile_expression(expression)[0] is code
+
+    @pytest.mark.parametrize(
+        "expression",
+        (
+            "__import__('os').system('ls')",
+            "diatoms.values",
+            "diatoms[0]",
+            "lambda: diatoms",
+            "[diatoms]",
+            "'diatoms'",
+            "eval('1')",
+            "numpy.sqrt(diatoms)",
+            "sqrt(diatoms, out=diatoms)",
+            "diatoms if nitrate else 0",
+        ),
+    )
+    def test_unsafe_expressions(self, expression):
+        with pytest.raises(ValueError):
+            expressions.compile_expression(expression)
+
+    @pytest.mark.parametrize(
+        "expression, expected",
+        (
+            ("u + sqrt", "expression function sqrt is not called"),
+            ("sqrt()", "expression function sqrt takes 1 argument"),
+            ("sqrt(u, v)", "expression function sqrt takes 1 argument"),
+            ("arctan2(u)", "expression function arctan2 takes 2 argument"),
+            ("where(u > 0, u)", "expression function where takes 3 argument"),
+        ),
+    )
+    def test_function_misuse(self, expression, expected):
+        with pytest.raises(ValueError, match=expected):
+            expressions.compile_expression(expression)
+
+    def test_syntax_error(self):
+        with pytest.raises(ValueError, match="invalid expression syntax"):
+            expressions.compile_expression("diatoms +")
+
+
+class TestEvaluateExpression:
+    """Unit tests for evaluate_expression() function."""
+
+    def test_numpy(self):
+        result = expressions.evaluate_expression(
+            "hypot(u, v)", {"u": numpy.array([3.0]), "v": numpy.array([4.0])}
+        )
+
+        numpy.testing.assert_array_equal(result, [5])
+
+    def test_lazy_dataarrays(self):
+        u = xarray.DataArray(dask.array.full((2, 3), 3.0, chunks=1), dims=("y", "x"))
+        v = xarray.DataArray(dask.array.full((2, 3), 4.0, chunks=1), dims=("y", "x"))
+
+        result = expressions.evaluate_expression("sqrt(u**2 + v**2)", {"u": u, "v": v})
+
+        assert isinstance(result, xarray.DataArray)
+        assert isinstance(result.data, dask.array.Array)
+        numpy.testing.assert_array_equal(result.compute(), 5)
+
+    def test_where(self):
+        var = xarray.DataArray(numpy.array([-1.0, 2.0]), dims="x")
+
+        result = expressions.evaluate_expression("where(var > 0, var, 0)", {"var": var})
+
+        numpy.testing.assert_array_equal(result, [0, 2])
+
+    def test_missing_var(self):
+        with pytest.raises(KeyError):
+            expressions.evaluate_expression("diatoms + nitrate", {"diatoms": 1})
@@ -0,0 +1,296 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for geographic index of model grids."""
+
+import numpy
+import pytest
+import xarray
+
+from reshapr.utils import geo_index
+
+
+@pytest.fixture(name="geo_ref_dataset")
+def fixture_geo_ref_dataset(tmp_path):
+    # 4x3 grid with 0.1 degree spacing; longitudes in 0-360 range
+    lons, lats = numpy.meshgrid(
+        236.0 + 0.1 * numpy.arange(3), 49.0 + 0.1 * numpy.arange(4)
+    )
+    xarray.Dataset(
+        {
+            "nav_lon": (("gridY", "gridX"), lons),
+            "nav_lat": (("gridY", "gridX"), lats),
+        }
+    ).to_netcdf(tmp_path / "geo_ref.nc")
+    return {
+        "path": tmp_path / "geo_ref.nc",
+        "y coord": "gridY",
+        "x coord": "gridX",
+        "longitude var": "nav_lon",
+        "latitude var": "nav_lat",
+    }
+
+
+class TestDefaultCacheDir:
+    """Unit test for default_cache_dir() function."""
+
+    def test_xdg_cache_home(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        assert geo_index.default_cache_dir() == tmp_path / "reshapr" / "geo_index"
+
+
+class TestLoadGeoIndex:
+    """Unit tests for load_geo_index() function."""
+
+    def test_load_geo_index(self, geo_ref_dataset, tmp_path, log_output):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path / "cache")
+
+        assert index["lons"].shape == (4, 3)
+        numpy.testing.assert_allclose(index["lons"][0], [-124, -123.9, -123.8])
+        numpy.testing.assert_allclose(index["lats"][:, 0], [49, 49.1, 49.2, 49.3])
+        assert index["xyz"].shape == (4, 3, 3)
+        assert len(list((tmp_path / "cache").glob("*.npz"))) == 1
+        assert log_output.entries[0]["event"] == "cached geographic index"
+
+    def test_load_from_disk_cache(self, geo_ref_dataset, tmp_path, log_output):
+        geo_index.load_geo_index(geo_ref_dataset, tmp_path / "cache")
+        geo_index._load_geo_index.cache_clear()
+        (tmp_path / "geo_ref.nc").unlink()
+
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path / "cache")
+
+        assert index["lons"].shape == (4, 3)
+        assert log_output.entries[-1]["event"] == "loaded geographic index from cache"
+
+
+class TestFindBoxIndices:
+    """Unit tests for find_box_indices() function."""
+
+    def test_box(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        indices = geo_index.find_box_indices(index, -123.95, -123.75, 49.05, 49.25)
+
+        assert indices == {"y min": 1, "y max": 3, "x min": 1, "x max": 3}
+
+    def test_0_360_lons(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        indices = geo_index.find_box_indices(index, 236.05, 236.25, 49.05, 49.25)
+
+        assert indices == {"y min": 1, "y max": 3, "x min": 1, "x max": 3}
+
+    def test_empty_box(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        with pytest.raises(ValueError):
+            geo_index.find_box_indices(index, -120, -119, 49, 50)
+
+
+class TestFindNearestIndex:
+    """Unit tests for find_nearest_index() function."""
+
+    def test_nearest(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        y_index, x_index, distance = geo_index.find_nearest_index(index, -123.91, 49.19)
+
+        assert (y_index, x_index) == (2, 1)
+        assert 1000 < distance < 1500
+
+    def test_nearest_wet(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+        wet_mask = numpy.ones((4, 3), dtype=bool)
+        wet_mask[2, 1] = False
+
+        y_index, x_index, _ = geo_index.find_nearest_index(
+            index, -123.9, 49.16, wet_mask
+        )
+
+        assert (y_index, x_index) == (1, 1)
+
+    def test_wet_mask_shape_mismatch(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        with pytest.raises(ValueError):
+            geo_index.find_nearest_index(
+                index, -123.91, 49.19, numpy.ones((3, 3), dtype=bool)
+            )
+
+
+class TestFindNearestIndices:
+    """Unit tests for find_nearest_indices() function."""
+
+    @pytest.fixture(name="rotated_geo_ref_dataset")
+    def fixture_rotated_geo_ref_dataset(self, tmp_path):
+        # 300x200 grid rotated by 30 degrees so that the coarse grid stride is > 1
+        j, i = numpy.mgrid[0:300, 0:200]
+        rotation = numpy.radians(30)
+        lons = -126 + 0.005 * (i * numpy.cos(rotation) - j * numpy.sin(rotation))
+        lats = 47 + 0.004 * (i * numpy.sin(rotation) + j * numpy.cos(rotation))
+        xarray.Dataset(
+            {"nav_lon": (("y", "x"), lons), "nav_lat": (("y", "x"), lats)}
+        ).to_netcdf(tmp_path / "rotated_geo_ref.nc")
+        return {
+            "path": tmp_path / "rotated_geo_ref.nc",
+            "y coord": "y",
+            "x coord": "x",
+            "longitude var": "nav_lon",
+            "latitude var": "nav_lat",
+        }
+
+    @pytest.mark.parametrize("dry_x", (0, 150))
+    def test_matches_whole_grid_search(self, dry_x, rotated_geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(rotated_geo_ref_dataset, tmp_path)
+        rng = numpy.random.default_rng(42)
+        lons = rng.uniform(-127.2, -124.9, 200)
+        lats = rng.uniform(46.7, 48.7, 200)
+        # Points over the dry part of the grid are beyond their refinement windows
+        # from the nearest water grid points
+        wet_mask = rng.random((300, 200)) > 0.3
+        wet_mask[:, :dry_x] = False
+
+        y_indices, x_indices, distances = geo_index.find_nearest_indices(
+            index, lons, lats, wet_mask
+        )
+
+        points_xyz = numpy.stack(
+            (
+                numpy.cos(numpy.radians(lats)) * numpy.cos(numpy.radians(lons)),
+                numpy.cos(numpy.radians(lats)) * numpy.sin(numpy.radians(lons)),
+                numpy.sin(numpy.radians(lats)),
+            ),
+            axis=-1,
+        )
+        chords = numpy.linalg.norm(
+            index["xyz"][numpy.newaxis] - points_xyz[:, numpy.newaxis, numpy.newaxis],
+            axis=-1,
+        )
+        chords = numpy.where(wet_mask, chords, numpy.inf).reshape(len(lons), -1)
+        expected_y, expected_x = numpy.unravel_index(chords.argmin(axis=1), (300, 200))
+        numpy.testing.assert_array_equal(y_indices, expected_y)
+        numpy.testing.assert_array_equal(x_indices, expected_x)
+        numpy.testing.assert_allclose(
+            distances,
+            2 * geo_index.EARTH_RADIUS * numpy.arcsin(chords.min(axis=1) / 2),
+        )
+
+    def test_no_wet_points(self, rotated_geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(rotated_geo_ref_dataset, tmp_path)
+
+        with pytest.raises(ValueError):
+            geo_index.find_nearest_indices(
+                index, [-125.5], [47.5], numpy.zeros((300, 200), dtype=bool)
+            )
+
+
+class TestFindTransectIndices:
+    """Unit tests for find_transect_indices() function."""
+
+    def test_along_grid_row(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        transect = geo_index.find_transect_indices(
+            index, [(-124.0, 49.1), (-123.8, 49.1)]
+        )
+
+        numpy.testing.assert_array_equal(transect["y"], [1, 1, 1])
+        numpy.testing.assert_array_equal(transect["x"], [0, 1, 2])
+        numpy.testing.assert_allclose(transect["distance"], [0, 7280, 14561], rtol=1e-3)
+
+    def test_multiple_segments(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        transect = geo_index.find_transect_indices(
+            index, [(-124.0, 49.0), (-124.0, 49.2), (-123.8, 49.2)], spacing=500
+        )
+
+        numpy.testing.assert_array_equal(transect["y"], [0, 1, 2, 2, 2])
+        numpy.testing.assert_array_equal(transect["x"], [0, 0, 0, 1, 2])
+        assert (numpy.diff(transect["distance"]) > 0).all()
+
+    def test_one_waypoint(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        with pytest.raises(ValueError):
+            geo_index.find_transect_indices(index, [(-124.0, 49.1)])
+
+
+class TestFindFractionalIndices:
+    """Unit tests for find_fractional_indices() function."""
+
+    def test_inside_grid(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        fy, fx = geo_index.find_fractional_indices(
+            index,
+            numpy.array([-124.0, -123.85, -123.8]),
+            numpy.array([49.0, 49.25, 49.3]),
+        )
+
+        numpy.testing.assert_allclose(fy, [0, 2.5, 3], atol=1e-6)
+        numpy.testing.assert_allclose(fx, [0, 1.5, 2], atol=1e-6)
+
+    def test_outside_grid(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        fy, fx = geo_index.find_fractional_indices(
+            index, numpy.array([-124.5, -123.9]), numpy.array([49.1, 49.1])
+        )
+
+        assert numpy.isnan(fy[0]) and numpy.isnan(fx[0])
+        numpy.testing.assert_allclose([fy[1], fx[1]], [1, 1], atol=1e-6)
+
+    def test_start(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        fy, fx = geo_index.find_fractional_indices(
+            index,
+            numpy.array([-123.85]),
+            numpy.array([49.05]),
+            start=(numpy.array([3.0]), numpy.array([0.0])),
+        )
+
+        numpy.testing.assert_allclose([fy[0], fx[0]], [0.5, 1.5], atol=1e-6)
+
+
+class TestLoadTransect:
+    """Unit tests for load_transect() function."""
+
+    def test_load_transect(self, geo_ref_dataset, tmp_path, log_output):
+        transect = geo_index.load_transect(
+            geo_ref_dataset, [[-124.0, 49.1], [-123.8, 49.1]], cache_dir=tmp_path
+        )
+
+        numpy.testing.assert_array_equal(transect["x"], [0, 1, 2])
+        assert len(list(tmp_path.glob("*-transect-*.npz"))) == 1
+        assert log_output.entries[-1]["event"] == "cached transect grid points"
+
+    def test_load_from_disk_cache(self, geo_ref_dataset, tmp_path, log_output):
+        waypoints = [[-124.0, 49.1], [-123.8, 49.1]]
+        geo_index.load_transect(geo_ref_dataset, waypoints, cache_dir=tmp_path)
+        geo_index._load_transect.cache_clear()
+
+        transect = geo_index.load_transect(
+            geo_ref_dataset, waypoints, cache_dir=tmp_path
+        )
+
+        numpy.testing.assert_array_equal(transect["x"], [0, 1, 2])
+        assert (
+            log_output.entries[-1]["event"] == "loaded transect grid points from cache"
+        )
@@ -0,0 +1,216 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for the dask cluster I/O limits."""
+
+import pickle
+import textwrap
+import threading
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from reshapr.core import extract
+from reshapr.utils import io_limits
+
+
+@pytest.fixture(name="io_stats", autouse=True)
+def fixture_io_stats():
+    io_limits.pop_io_stats()
+    yield
+    io_limits.pop_io_stats()
+
+
+class TestIOLimiter:
+    """Unit tests for IOLimiter class."""
+
+    @pytest.fixture(name="sleeps")
+    def fixture_sleeps(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(io_limits.time, "sleep", sleeps.append)
+        return sleeps
+
+    def test_read_holds_lease(self, sleeps):
+        semaphore = threading.BoundedSemaphore(1)
+        io_limiter = io_limits.IOLimiter(semaphore, max_reads=1, bandwidth=None)
+        leased = []
+
+        class _Array:
+            def __getitem__(self, key):
+                leased.append(not semaphore.acquire(blocking=False))
+                return numpy.ones(key, dtype=numpy.single)
+
+        data = io_limiter.read(_Array(), (10, 100))
+
+        assert data.shape == (10, 100)
+        assert leased == [True]
+        assert semaphore.acquire(blocking=False)
+        assert sleeps == []
+        io_stats = io_limits.pop_io_stats()
+        assert io_stats["n_reads"] == 1
+        assert io_stats["read_bytes"] == 4_000
+        assert io_stats["throttle_time"] == 0
+
+    def test_read_throttled_to_bandwidth_share(self, sleeps):
+        semaphore = threading.BoundedSemaphore(2)
+        io_limiter = io_limits.IOLimiter(semaphore, max_reads=2, bandwidth=3_000_000)
+
+        io_limiter.read(numpy.ones(3_000_000, dtype=numpy.int8), slice(None))
+
+        # The read's share of the bandwidth is 1_500_000 bytes/s,
+        # so 3_000_000 bytes take 2 seconds
+        assert len(sleeps) == 1
+        assert sleeps[0] == pytest.approx(2, abs=0.1)
+        assert io_limits.pop_io_stats()["throttle_time"] == sleeps[0]
+        assert semaphore.acquire(blocking=False)
+        assert semaphore.acquire(blocking=False)
+
+    def test_lease_released_on_read_error(self, sleeps):
+        semaphore = threading.BoundedSemaphore(1)
+        io_limiter = io_limits.IOLimiter(semaphore, max_reads=1, bandwidth=1)
+
+        with pytest.raises(IndexError):
+            io_limiter.read(numpy.ones(2), 3)
+
+        assert semaphore.acquire(blocking=False)
+        assert sleeps == []
+        assert io_limits.pop_io_stats()["n_reads"] == 0
+
+    def test_concurrent_reads_counted(self, sleeps):
+        semaphore = threading.BoundedSemaphore(8)
+        io_limiter = io_limits.IOLimiter(semaphore, max_reads=8, bandwidth=None)
+        array = numpy.ones(10, dtype=numpy.int8)
+
+        def _read_chunks():
+            for _ in range(1_000):
+                io_limiter.read(array, slice(None))
+
+        threads = [threading.Thread(target=_read_chunks) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        io_stats = io_limits.pop_io_stats()
+        assert io_stats["n_reads"] == 8_000
+        assert io_stats["read_bytes"] == 80_000
+
+    def test_pickle(self):
+        io_limiter = io_limits.IOLimiter(None, max_reads=4, bandwidth=1_000_000)
+
+        unpickled_limiter = pickle.loads(pickle.dumps(io_limiter))
+
+        assert unpickled_limiter.max_reads == 4
+        assert unpickled_limiter.bandwidth == 1_000_000
+
+
+class TestIOLimitedNetCDF4BackendEntrypoint:
+    """Unit tests for IOLimitedNetCDF4BackendEntrypoint class."""
+
+    def test_chunk_reads_limited(self, tmp_path):
+        xarray.Dataset(
+            {"votemper": (("time_counter", "y", "x"), numpy.ones((4, 3, 2)))},
+            coords={
+                "time_counter": pandas.date_range(
+                    "2015-01-01 00:30", periods=4, freq="h"
+                )
+            },
+        ).to_netcdf(tmp_path / "test_dataset.nc", engine="netcdf4")
+        io_limiter = io_limits.IOLimiter(
+            threading.BoundedSemaphore(1), max_reads=1, bandwidth=None
+        )
+
+        with xarray.open_dataset(
+            tmp_path / "test_dataset.nc",
+            engine=io_limits.IOLimitedNetCDF4BackendEntrypoint,
+            backend_kwargs={"io_limiter": io_limiter},
+            chunks={"time_counter": 2},
+        ) as ds:
+            # Opening the file and reading its dimension coordinate are not limited
+            assert io_limits.pop_io_stats()["n_reads"] == 0
+            assert float(ds.votemper.sum()) == 24
+
+        io_stats = io_limits.pop_io_stats()
+        # 1 read per chunk
+        assert io_stats["n_reads"] == 2
+        assert io_stats["read_bytes"] == 4 * 3 * 2 * 8
+
+
+class TestGetOpenKwargs:
+    """Unit tests for get_open_kwargs() function."""
+
+    def test_no_client(self):
+        assert io_limits.get_open_kwargs() == {}
+
+    def test_no_io_limits(self):
+        client = extract.get_dask_client("unit_test_cluster.yaml")
+        try:
+            assert io_limits.get_open_kwargs() == {}
+        finally:
+            client.close()
+
+
+class TestLogIOStats:
+    """Unit tests for log_io_stats() function."""
+
+    def test_log_io_stats(self, log_output, tmp_path):
+        xarray.Dataset(
+            {"votemper": (("time_counter", "y", "x"), numpy.ones((24, 3, 2)))},
+            coords={
+                "time_counter": pandas.date_range(
+                    "2015-01-01 00:30", periods=24, freq="h"
+                )
+            },
+        ).to_netcdf(tmp_path / "test_dataset.nc", engine="netcdf4")
+        dask_config_yaml = tmp_path / "test_cluster.yaml"
+        dask_config_yaml.write_text(textwrap.dedent("""\
+                name: test dask cluster
+                processes: True
+                number of workers: 1
+                threads per worker: 1
+                io limits:
+                  max concurrent reads: 1
+                """))
+        client = extract.get_dask_client(dask_config_yaml)
+        try:
+            with extract.open_dataset(
+                [tmp_path / "test_dataset.nc"],
+                {"time_counter": 24, "y": 3, "x": 2},
+                {"extract variables": ["votemper"]},
+            ) as ds:
+                assert float(ds.votemper.sum()) == 144
+            io_limits.log_io_stats(client)
+        finally:
+            client.close()
+
+        io_stats = log_output.entries[-1]
+        assert io_stats["event"] == "I/O statistics"
+        # 1 read of the single chunk of votemper
+        assert io_stats["n_reads"] == 1
+        assert io_stats["read_bytes"] == "1.12 kiB"
+        assert io_stats["throttle_time"] == 0
+
+    def test_no_io_limits(self, log_output):
+        client = extract.get_dask_client("unit_test_cluster.yaml")
+        try:
+            io_limits.log_io_stats(client)
+        finally:
+            client.close()
+
+        assert log_output.entries[-1]["event"] != "I/O statistics"
@@ -0,0 +1,151 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for mesh geometry fields service."""
+
+import dask.array
+import dask.distributed
+import numpy
+import pytest
+import xarray
+
+from reshapr.utils import mesh_geometry
+
+
+@pytest.fixture(name="mesh_mask")
+def fixture_mesh_mask(tmp_path):
+    e1t = numpy.arange(12, dtype=numpy.float64).reshape((1, 4, 3))
+    tmask = numpy.ones((1, 2, 4, 3), dtype=numpy.int8)
+    tmask[0, 1, 0, :] = 0
+    mesh_mask = xarray.Dataset(
+        data_vars={
+            "e1t": (("t", "y", "x"), e1t),
+            "tmask": (("t", "z", "y", "x"), tmask),
+            "nav_lon": (("y", "x"), e1t[0] - 123),
+        }
+    )
+    mesh_mask.to_netcdf(tmp_path / "mesh_mask.nc")
+    return tmp_path / "mesh_mask.nc"
+
+
+@pytest.fixture(name="selectors")
+def fixture_selectors():
+    return {"depth": slice(0, None, 1), "y": slice(1, 3, 1), "x": slice(0, None, 2)}
+
+
+@pytest.fixture(autouse=True)
+def fixture_clear_cache():
+    mesh_geometry.clear_cache()
+    yield
+    mesh_geometry.clear_cache()
+
+
+class TestLoadMeshFields:
+    """Unit tests for load_mesh_fields() function."""
+
+    def test_subset_fields(self, mesh_mask, selectors, log_output):
+        mesh_fields = mesh_geometry.load_mesh_fields(
+            mesh_mask, ("e1t", "tmask", "nav_lon"), selectors
+        )
+
+        dims, e1t = mesh_fields["e1t"]
+        assert dims == ("y", "x")
+        numpy.testing.assert_array_equal(e1t, [[3, 5], [6, 8]])
+        dims, tmask = mesh_fields["tmask"]
+        assert dims == ("z", "y", "x")
+        assert tmask.shape == (2, 2, 2)
+        dims, nav_lon = mesh_fields["nav_lon"]
+        assert dims == ("y", "x")
+        numpy.testing.assert_array_equal(nav_lon, [[-120, -118], [-117, -115]])
+
+    def test_surface(self, mesh_mask, selectors, log_output):
+        mesh_fields = mesh_geometry.load_mesh_fields(
+            mesh_mask, ("tmask",), selectors, surface=True
+        )
+
+        dims, tmask = mesh_fields["tmask"]
+        assert dims == ("y", "x")
+        assert tmask.shape == (2, 2)
+
+    def test_fields_read_once(self, mesh_mask, selectors, log_output):
+        mesh_geometry.load_mesh_fields(mesh_mask, ("e1t", "tmask"), selectors)
+        mesh_geometry.load_mesh_fields(mesh_mask, ("tmask", "e1t"), selectors)
+
+        reads = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "reading mesh mask fields"
+        ]
+        assert len(reads) == 1
+        assert reads[0]["var_names"] == ["e1t", "tmask"]
+
+    def test_only_missing_fields_read(self, mesh_mask, selectors, log_output):
+        mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+        mesh_geometry.load_mesh_fields(mesh_mask, ("e1t", "tmask"), selectors)
+
+        reads = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "reading mesh mask fields"
+        ]
+        assert [read["var_names"] for read in reads] == [["e1t"], ["tmask"]]
+
+    def test_different_selection_read(self, mesh_mask, selectors, log_output):
+        mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+        selectors["y"] = slice(0, None, 1)
+        mesh_fields = mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+
+        reads = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "reading mesh mask fields"
+        ]
+        assert len(reads) == 2
+        assert mesh_fields["e1t"][1].shape == (4, 2)
+
+    def test_no_client_numpy_arrays(self, mesh_mask, selectors, log_output):
+        mesh_fields = mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+
+        assert isinstance(mesh_fields["e1t"][1], numpy.ndarray)
+
+    def test_client_scatters_fields(self, mesh_mask, selectors, log_output):
+        with dask.distributed.Client(
+            n_workers=2, threads_per_worker=1, processes=False, dashboard_address=None
+        ) as client:
+            mesh_fields = mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+
+            e1t = mesh_fields["e1t"][1]
+            assert isinstance(e1t, dask.array.Array)
+            numpy.testing.assert_array_equal(e1t.compute(), [[3, 5], [6, 8]])
+            who_has = client.who_has()
+            assert any(len(workers) == 2 for workers in who_has.values())
+
+
+class TestClearCache:
+    """Unit test for clear_cache() function."""
+
+    def test_clear_cache(self, mesh_mask, selectors, log_output):
+        mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+        mesh_geometry.clear_cache()
+        mesh_geometry.load_mesh_fields(mesh_mask, ("e1t",), selectors)
+
+        reads = [
+            entry
+            for entry in log_output.entries
+            if entry["event"] == "reading mesh mask fields"
+        ]
+        assert len(reads) == 2
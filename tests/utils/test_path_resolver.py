@@ -0,0 +1,289 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for the results archive path resolver."""
+
+import datetime
+from pathlib import Path
+
+import arrow
+import pytest
+
+from reshapr.utils import date_formatters, path_resolver
+
+
+class TestCompilePattern:
+    """Unit tests for compile_pattern() function."""
+
+    @pytest.mark.parametrize(
+        "file_pattern",
+        (
+            "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc",
+            "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc",
+            "ops_{nemo_yyyymmdd}.nc",
+            "{yyyy}/HRDPS_{nemo_yyyymm}.nc",
+            "no_placeholders.nc",
+        ),
+    )
+    @pytest.mark.parametrize(
+        "day", ("2022-02-07", "2024-02-15", "2023-12-31", "2007-01-01")
+    )
+    def test_same_as_date_formatters(self, file_pattern, day):
+        arrow_date = arrow.get(day)
+        expected = file_pattern.format(
+            ddmmmyy=date_formatters.ddmmmyy(arrow_date),
+            yyyymmdd=date_formatters.yyyymmdd(arrow_date),
+            yyyymm01=date_formatters.yyyymm01(arrow_date),
+            yyyymm_end=date_formatters.yyyymm_end(arrow_date),
+            yyyy=date_formatters.yyyy(arrow_date),
+            nemo_yyyymm=date_formatters.nemo_yyyymm(arrow_date),
+            nemo_yyyymmdd=date_formatters.nemo_yyyymmdd(arrow_date),
+        )
+
+        format_pattern = path_resolver.compile_pattern(file_pattern)
+
+        assert format_pattern(arrow_date.date()) == expected
+        assert format_pattern(arrow_date) == expected
+
+    def test_compiled_once(self):
+        file_pattern = "ops_{nemo_yyyymmdd}.nc"
+
+        assert path_resolver.compile_pattern(
+            file_pattern
+        ) is path_resolver.compile_pattern(file_pattern)
+
+    @pytest.mark.parametrize(
+        "file_pattern", ("SalishSea_{yyyymmddhh}.nc", "SalishSea_{yyyymmdd:>10}.nc")
+    )
+    def test_unsupported_placeholder(self, file_pattern):
+        with pytest.raises(ValueError, match="unsupported file pattern placeholder"):
+            path_resolver.compile_pattern(file_pattern)
+
+
+class TestCalcGlobPattern:
+    """Unit tests for calc_glob_pattern() function."""
+
+    def test_calc_glob_pattern(self):
+        glob_pattern = path_resolver.calc_glob_pattern(
+            "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc"
+        )
+
+        assert glob_pattern == "*/SalishSea_1d_*_*_ptrc_T.nc"
+
+
+class TestCalcPeriodDate:
+    """Unit tests for calc_period_date() function."""
+
+    @pytest.mark.parametrize(
+        "frame, expected",
+        (
+            ("day", datetime.date(2023, 11, 29)),
+            ("month", datetime.date(2023, 11, 1)),
+        ),
+    )
+    def test_calc_period_date(self, frame, expected):
+        period_date = path_resolver.calc_period_date(arrow.get("2023-11-29"), frame)
+
+        assert period_date == expected
+
+
+class TestDiscoverPaths:
+    """Unit tests for discover_paths() function."""
+
+    @pytest.fixture(name="dates")
+    def fixture_dates(self):
+        return [arrow.get("2015-01-01").shift(days=+day).date() for day in range(0, 5)]
+
+    def test_day_dirs(self, dates, tmp_path):
+        for day in ("01jan15", "02jan15", "05jan15"):
+            (tmp_path / day).mkdir()
+        (tmp_path / "01jan15" / "SalishSea_1d_20150101_20150101_ptrc_T.nc").touch()
+        (tmp_path / "02jan15" / "SalishSea_1d_20150102_20150102_ptrc_T.nc").touch()
+        (tmp_path / "02jan15" / "SalishSea_1d_20150102_20150102_grid_T.nc").touch()
+        (tmp_path / "05jan15" / "SalishSea_1d_20150105_20150105_ptrc_T.nc").touch()
+        # Directories outside of the dates are not scanned
+        (tmp_path / "06jan15").mkdir()
+        (tmp_path / "06jan15" / "SalishSea_1d_20150106_20150106_ptrc_T.nc").touch()
+
+        found_paths = path_resolver.discover_paths(
+            tmp_path,
+            "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc",
+            dates,
+            "day",
+        )
+
+        assert found_paths == {
+            datetime.date(2015, 1, 1): tmp_path
+            / "01jan15"
+            / "SalishSea_1d_20150101_20150101_ptrc_T.nc",
+            datetime.date(2015, 1, 2): tmp_path
+            / "02jan15"
+            / "SalishSea_1d_20150102_20150102_ptrc_T.nc",
+            datetime.date(2015, 1, 5): tmp_path
+            / "05jan15"
+            / "SalishSea_1d_20150105_20150105_ptrc_T.nc",
+        }
+
+    def test_wildcards(self, dates, tmp_path):
+        (tmp_path / "run_a").mkdir()
+        (tmp_path / "run_b").mkdir()
+        (tmp_path / "run_a" / "ops_y2015m01d01_v2.nc").touch()
+        (tmp_path / "run_b" / "ops_y2015m01d03_v10.nc").touch()
+        (tmp_path / "run_b" / "ops_y2015m01d03_v10.nc.tmp").touch()
+
+        found_paths = path_resolver.discover_paths(
+            tmp_path, "run_*/ops_{nemo_yyyymmdd}_v*.nc", dates, "day"
+        )
+
+        assert found_paths == {
+            datetime.date(2015, 1, 1): tmp_path / "run_a" / "ops_y2015m01d01_v2.nc",
+            datetime.date(2015, 1, 3): tmp_path / "run_b" / "ops_y2015m01d03_v10.nc",
+        }
+
+    def test_repeated_placeholders_must_match(self, dates, tmp_path):
+        (tmp_path / "SalishSea_1d_20150101_20150102_ptrc_T.nc").touch()
+
+        found_paths = path_resolver.discover_paths(
+            tmp_path, "SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc", dates, "day"
+        )
+
+        assert found_paths == {}
+
+    def test_month_files(self, tmp_path):
+        (tmp_path / "SalishSeaCast_1m_biol_T_20231101_20231130.nc").touch()
+        (tmp_path / "SalishSeaCast_1m_biol_T_20240101_20240131.nc").touch()
+        dates = [
+            arrow.get("2023-11-15"),
+            arrow.get("2023-12-15"),
+            arrow.get("2024-01-15"),
+        ]
+
+        found_paths = path_resolver.discover_paths(
+            tmp_path,
+            "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc",
+            dates,
+            "month",
+        )
+
+        assert found_paths == {
+            datetime.date(2023, 11, 1): tmp_path
+            / "SalishSeaCast_1m_biol_T_20231101_20231130.nc",
+            datetime.date(2024, 1, 1): tmp_path
+            / "SalishSeaCast_1m_biol_T_20240101_20240131.nc",
+        }
+
+    def test_invalid_dates_ignored(self, dates, tmp_path):
+        (tmp_path / "ops_y2015m02d31.nc").touch()
+        (tmp_path / "ops_y2015m01d02.nc").touch()
+
+        found_paths = path_resolver.discover_paths(
+            tmp_path, "ops_{nemo_yyyymmdd}.nc", dates, "day"
+        )
+
+        assert found_paths == {
+            datetime.date(2015, 1, 2): tmp_path / "ops_y2015m01d02.nc"
+        }
+
+    def test_missing_archive(self, dates, tmp_path):
+        found_paths = path_resolver.discover_paths(
+            tmp_path / "missing", "ops_{nemo_yyyymmdd}.nc", dates, "day"
+        )
+
+        assert found_paths == {}
+
+
+class TestParsePathDate:
+    """Unit tests for parse_path_date() function."""
+
+    @pytest.mark.parametrize(
+        "file_pattern, path, expected",
+        (
+            (
+                "{ddmmmyy}/SalishSea_1d_{yyyymmdd}_{yyyymmdd}_ptrc_T.nc",
+                "/results/07feb22/SalishSea_1d_20220207_20220207_ptrc_T.nc",
+                datetime.date(2022, 2, 7),
+            ),
+            (
+                "SalishSeaCast_1m_biol_T_{yyyymm01}_{yyyymm_end}.nc",
+                "/results/SalishSeaCast_1m_biol_T_20231101_20231130.nc",
+                datetime.date(2023, 11, 1),
+            ),
+            (
+                "{yyyy}/HRDPS_{nemo_yyyymm}.nc",
+                "/results/2022/HRDPS_y2022m02.nc",
+                datetime.date(2022, 2, 1),
+            ),
+        ),
+    )
+    def test_parse_path_date(self, file_pattern, path, expected):
+        path_date = path_resolver.parse_path_date(
+            Path("/results"), file_pattern, Path(path)
+        )
+
+        assert path_date == expected
+
+    @pytest.mark.parametrize(
+        "path",
+        (
+            "/other_results/SalishSea_1d_20220207_ptrc_T.nc",
+            "/results/SalishSea_1d_20220207_grid_T.nc",
+            "/results/SalishSea_1d_20220231_ptrc_T.nc",
+        ),
+    )
+    def test_no_date(self, path):
+        path_date = path_resolver.parse_path_date(
+            Path("/results"), "SalishSea_1d_{yyyymmdd}_ptrc_T.nc", Path(path)
+        )
+
+        assert path_date is None
+
+
+class TestCalcGaps:
+    """Unit tests for calc_gaps() function."""
+
+    def test_day_gaps(self):
+        missing_dates = [
+            datetime.date(2015, 1, 3),
+            datetime.date(2015, 1, 4),
+            datetime.date(2015, 1, 5),
+            datetime.date(2015, 1, 9),
+            datetime.date(2015, 1, 31),
+            datetime.date(2015, 2, 1),
+        ]
+
+        gaps = path_resolver.calc_gaps(missing_dates, "day")
+
+        assert gaps == [
+            "2015-01-03 to 2015-01-05",
+            "2015-01-09",
+            "2015-01-31 to 2015-02-01",
+        ]
+
+    def test_month_gaps(self):
+        missing_dates = [
+            datetime.date(2022, 11, 1),
+            datetime.date(2022, 12, 1),
+            datetime.date(2023, 1, 1),
+            datetime.date(2023, 3, 1),
+        ]
+
+        gaps = path_resolver.calc_gaps(missing_dates, "month")
+
+        assert gaps == ["2022-11 to 2023-01", "2023-03"]
+
+    def test_no_gaps(self):
+        assert path_resolver.calc_gaps([], "day") == []
@@ -0,0 +1,260 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for regridding to regular longitude/latitude grids."""
+
+import dask.array
+import numpy
+import pytest
+import xarray
+
+from reshapr.utils import geo_index, regrid
+
+
+@pytest.fixture(name="geo_ref_dataset")
+def fixture_geo_ref_dataset(tmp_path):
+    # 6x5 grid with 0.1 degree spacing that is rotated a little
+    y, x = numpy.mgrid[0:6, 0:5].astype(float)
+    lons = -124.0 + 0.1 * x + 0.02 * y
+    lats = 49.0 + 0.1 * y - 0.01 * x
+    xarray.Dataset(
+        {
+            "nav_lon": (("gridY", "gridX"), lons),
+            "nav_lat": (("gridY", "gridX"), lats),
+        }
+    ).to_netcdf(tmp_path / "geo_ref.nc")
+    return {
+        "path": tmp_path / "geo_ref.nc",
+        "y coord": "gridY",
+        "x coord": "gridX",
+        "longitude var": "nav_lon",
+        "latitude var": "nav_lat",
+    }
+
+
+@pytest.fixture(autouse=True)
+def fixture_clear_cache():
+    regrid.clear_cache()
+    yield
+    regrid.clear_cache()
+
+
+class TestCalcRegularAxis:
+    """Unit tests for calc_regular_axis() function."""
+
+    @pytest.mark.parametrize(
+        "axis_max, expected",
+        ((49.3, [49.0, 49.1, 49.2, 49.3]), (49.35, [49.0, 49.1, 49.2, 49.3])),
+    )
+    def test_calc_regular_axis(self, axis_max, expected):
+        axis = regrid.calc_regular_axis(49.0, axis_max, 0.1)
+
+        numpy.testing.assert_array_equal(axis, expected)
+
+    @pytest.mark.parametrize(
+        "axis_min, axis_max, step", ((49.0, 49.3, 0), (49.3, 49.0, 0.1))
+    )
+    def test_invalid_axis(self, axis_min, axis_max, step):
+        with pytest.raises(ValueError):
+            regrid.calc_regular_axis(axis_min, axis_max, step)
+
+
+class TestCalcBilinearWeights:
+    """Unit tests for calc_bilinear_weights() function."""
+
+    def test_linear_field_reproduced(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+        lons = numpy.array([-123.9, -123.8, -123.7])
+        lats = numpy.array([49.1, 49.2, 49.3])
+
+        indices, weights = regrid.calc_bilinear_weights(index, lons, lats)
+
+        assert indices.shape == weights.shape == (9, 4)
+        numpy.testing.assert_allclose(weights.sum(axis=1), 1)
+        regridded = (index["lons"].ravel()[indices] * weights).sum(axis=1)
+        numpy.testing.assert_allclose(
+            regridded.reshape(3, 3), numpy.meshgrid(lons, lats)[0]
+        )
+
+    def test_outside_grid_zero_weights(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        _, weights = regrid.calc_bilinear_weights(
+            index, numpy.array([-125.0]), numpy.array([49.1])
+        )
+
+        numpy.testing.assert_array_equal(weights, [[0, 0, 0, 0]])
+
+    def test_land_corners_zero_weights(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+        wet_mask = numpy.ones((6, 5), dtype=bool)
+        wet_mask[1, 1] = False
+
+        indices, weights = regrid.calc_bilinear_weights(
+            index, numpy.array([-123.8]), numpy.array([49.1]), wet_mask
+        )
+
+        assert weights[0][indices[0] == 1 * 5 + 1].sum() == 0
+        numpy.testing.assert_allclose(weights.sum(), 1)
+
+
+class TestCalcConservativeWeights:
+    """Unit test for calc_conservative_weights() function."""
+
+    def test_cell_average(self, geo_ref_dataset, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+
+        indices, weights = regrid.calc_conservative_weights(
+            index, numpy.array([-123.85, -123.65]), numpy.array([49.2, 49.4])
+        )
+
+        # 0.2 degree cells are sampled by 7x7 sub-points at no more than half of the
+        # grid spacing
+        assert indices.shape == weights.shape == (4, 49)
+        numpy.testing.assert_allclose(weights.sum(axis=1), 1)
+        regridded_lons = (index["lons"].ravel()[indices] * weights).sum(axis=1)
+        regridded_lats = (index["lats"].ravel()[indices] * weights).sum(axis=1)
+        numpy.testing.assert_allclose(
+            regridded_lons, [-123.85, -123.65, -123.85, -123.65], atol=0.02
+        )
+        numpy.testing.assert_allclose(
+            regridded_lats, [49.2, 49.2, 49.4, 49.4], atol=0.02
+        )
+
+
+class TestLoadRegridWeights:
+    """Unit tests for load_regrid_weights() function."""
+
+    def test_box_weights(self, geo_ref_dataset, tmp_path, log_output):
+        weights = regrid.load_regrid_weights(
+            geo_ref_dataset,
+            numpy.array([-123.8, -123.7]),
+            numpy.array([49.2]),
+            "bilinear",
+            cache_dir=tmp_path,
+        )
+
+        assert (weights["y min"], weights["y max"]) == (2, 4)
+        assert (weights["x min"], weights["x max"]) == (1, 4)
+        assert weights["indices"].max() < 2 * 3
+        assert len(list(tmp_path.glob("regrid-*.npz"))) == 1
+        assert log_output.entries[-1]["event"] == "cached regrid weights"
+
+    def test_load_from_disk_cache(self, geo_ref_dataset, tmp_path, log_output):
+        args = (numpy.array([-123.8, -123.7]), numpy.array([49.2]), "bilinear")
+        cached = regrid.load_regrid_weights(geo_ref_dataset, *args, cache_dir=tmp_path)
+        regrid.clear_cache()
+
+        weights = regrid.load_regrid_weights(geo_ref_dataset, *args, cache_dir=tmp_path)
+
+        assert weights["y min"] == cached["y min"]
+        numpy.testing.assert_array_equal(weights["indices"], cached["indices"])
+        numpy.testing.assert_array_equal(weights["weights"], cached["weights"])
+        assert log_output.entries[-1]["event"] == "loaded regrid weights from cache"
+
+    def test_unknown_method(self, geo_ref_dataset, tmp_path):
+        with pytest.raises(ValueError):
+            regrid.load_regrid_weights(
+                geo_ref_dataset,
+                numpy.array([-123.8]),
+                numpy.array([49.2]),
+                "nearest",
+                cache_dir=tmp_path,
+            )
+
+    def test_outside_grid(self, geo_ref_dataset, tmp_path):
+        with pytest.raises(ValueError):
+            regrid.load_regrid_weights(
+                geo_ref_dataset,
+                numpy.array([-126.0]),
+                numpy.array([49.2]),
+                "bilinear",
+                cache_dir=tmp_path,
+            )
+
+
+class TestRegrid:
+    """Unit tests for regrid() and apply_weights() functions."""
+
+    @pytest.fixture(name="weights")
+    def fixture_weights(self, geo_ref_dataset, tmp_path):
+        return regrid.load_regrid_weights(
+            geo_ref_dataset,
+            numpy.array([-123.8, -123.7]),
+            numpy.array([49.2]),
+            "bilinear",
+            cache_dir=tmp_path,
+        )
+
+    def test_regrid_dask(self, geo_ref_dataset, weights, tmp_path):
+        index = geo_index.load_geo_index(geo_ref_dataset, tmp_path)
+        box_lons = index["lons"][2:4, 1:4]
+        values = dask.array.from_array(
+            numpy.stack((box_lons, 2 * box_lons)), chunks=(1, 1, 3)
+        )
+        var = xarray.DataArray(
+            values, dims=("time", "gridY", "gridX"), attrs={"units": "degrees_east"}
+        )
+
+        regridded = regrid.regrid(
+            var,
+            "gridY",
+            "gridX",
+            weights,
+            numpy.array([-123.8, -123.7]),
+            numpy.array([49.2]),
+        )
+
+        assert regridded.dims == ("time", "latitude", "longitude")
+        assert isinstance(regridded.data, dask.array.Array)
+        assert regridded.attrs["units"] == "degrees_east"
+        assert regridded.longitude.attrs["units"] == "degrees_east"
+        numpy.testing.assert_allclose(
+            regridded.values, [[[-123.8, -123.7]], [[-247.6, -247.4]]]
+        )
+
+    def test_missing_values_excluded(self, weights):
+        values = numpy.full((2, 3), 10.0)
+        values[1, 1] = numpy.nan
+
+        regridded = regrid.apply_weights(
+            values, weights["indices"], weights["weights"], (1, 2)
+        )
+
+        numpy.testing.assert_allclose(regridded, [[10, 10]])
+
+    def test_all_missing(self, weights):
+        values = numpy.full((2, 3), numpy.nan)
+
+        regridded = regrid.apply_weights(
+            values, weights["indices"], weights["weights"], (1, 2)
+        )
+
+        assert numpy.isnan(regridded).all()
+
+    def test_grid_shape_mismatch(self, weights):
+        var = xarray.DataArray(numpy.zeros((3, 3)), dims=("gridY", "gridX"))
+
+        with pytest.raises(ValueError):
+            regrid.regrid(
+                var,
+                "gridY",
+                "gridX",
+                weights,
+                numpy.array([-123.8, -123.7]),
+                numpy.array([49.2]),
+            )
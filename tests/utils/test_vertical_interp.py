@@ -0,0 +1,116 @@
+# Copyright 2022 – present, UBC EOAS MOAD Group and The University of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Tests for vertical interpolation functions."""
+
+import dask.array
+import numpy
+import xarray
+
+from reshapr.utils import vertical_interp
+
+
+class TestInterpolateColumns:
+    """Unit tests for interpolate_columns() function."""
+
+    def test_1d_coords(self):
+        values = numpy.array([[10.0, 20.0, 30.0, numpy.nan]])
+        depths = numpy.array([1.0, 2.0, 4.0, 8.0])
+
+        interpolated = vertical_interp.interpolate_columns(
+            values, depths, numpy.array([1, 1.5, 3, 4, 6])
+        )
+
+        numpy.testing.assert_allclose(interpolated, [[10, 15, 25, 30, numpy.nan]])
+
+    def test_above_top_level(self):
+        values = numpy.array([10.0, 20.0])
+        depths = numpy.array([0.5, 1.5])
+
+        interpolated = vertical_interp.interpolate_columns(
+            values, depths, numpy.array([0, 0.5])
+        )
+
+        numpy.testing.assert_allclose(interpolated, [numpy.nan, 10])
+
+    def test_below_deepest_level(self):
+        values = numpy.array([10.0, 20.0])
+        depths = numpy.array([0.5, 1.5])
+
+        interpolated = vertical_interp.interpolate_columns(
+            values, depths, numpy.array([2])
+        )
+
+        assert numpy.isnan(interpolated).all()
+
+    def test_column_coords(self):
+        values = numpy.array([[0.5, 1.5, 2.5], [0.5, 1.5, 2.5]])
+        densities = numpy.array([[22.0, 24.0, 25.0], [24.0, 24.5, numpy.nan]])
+
+        interpolated = vertical_interp.interpolate_columns(
+            values, densities, numpy.array([23, 24.5])
+        )
+
+        numpy.testing.assert_allclose(interpolated, [[1, 2], [numpy.nan, 1.5]])
+
+
+class TestInterpolateToDepths:
+    """Unit test for interpolate_to_depths() function."""
+
+    def test_interpolate_to_depths(self):
+        var = xarray.DataArray(
+            dask.array.from_array(
+                numpy.broadcast_to(
+                    numpy.array([10.0, 20.0, 30.0])[numpy.newaxis, :, numpy.newaxis],
+                    (2, 3, 4),
+                ),
+                chunks=(1, 1, 2),
+            ),
+            coords={"depth": ("depth", [1.0, 2.0, 4.0], {"units": "metres"})},
+            dims=("time", "depth", "gridX"),
+            attrs={"long_name": "Temperature"},
+        )
+
+        interpolated = vertical_interp.interpolate_to_depths(var, "depth", [1.5, 3])
+
+        assert interpolated.dims == ("time", "depth", "gridX")
+        assert isinstance(interpolated.data, dask.array.Array)
+        numpy.testing.assert_array_equal(interpolated.depth, [1.5, 3])
+        assert interpolated.depth.attrs == {"units": "metres"}
+        numpy.testing.assert_allclose(interpolated.isel(time=0, gridX=0), [15, 25])
+        assert interpolated.attrs == {"long_name": "Temperature"}
+
+
+class TestInterpolateToIsopycnals:
+    """Unit test for interpolate_to_isopycnals() function."""
+
+    def test_interpolate_to_isopycnals(self):
+        coords = {"depth": [1.0, 2.0, 4.0]}
+        var = xarray.DataArray(
+            numpy.array([[10.0, 20.0, 30.0]]), coords=coords, dims=("time", "depth")
+        )
+        density = xarray.DataArray(
+            numpy.array([[23.0, 24.0, 26.0]]), coords=coords, dims=("time", "depth")
+        )
+
+        interpolated = vertical_interp.interpolate_to_isopycnals(
+            var, density, "depth", [23.5, 25], "isopycnal"
+        )
+
+        assert interpolated.dims == ("time", "isopycnal")
+        numpy.testing.assert_array_equal(interpolated.isopycnal, [23.5, 25])
+        numpy.testing.assert_allclose(interpolated, [[15, 25]])